@@ -4,7 +4,7 @@ Flask application factory.
 Responsibilities:
 - Load environment configuration
 - Initialize database
-- Configure middleware (CORS, logging)
+- Configure middleware (CORS, logging, request timing, profiling)
 - Register blueprints
 - Expose WSGI-compatible app
 """
@@ -21,8 +21,11 @@ from flask import Flask
 from sqlalchemy.exc import SQLAlchemyError
 
 from backend.utils.response_time_logger import setup_response_time_logging
+from backend.utils.request_timing import setup_request_timing
+from backend.utils.query_stats import setup_query_stats
+from backend.utils.request_profiler import setup_request_profiling
 from backend.utils.config import configure_cors
-from backend.utils.database import init_db, create_tables
+from backend.utils.database import init_db, create_tables, setup_request_sessions
 from backend.utils.rate_limit import limiter
 
 from backend.routes.auth_routes import bp as auth_bp
@@ -34,6 +37,8 @@ from backend.routes.recommendations_routes import bp as rec_bp
 from backend.routes.cache_routes import bp as cache_bp
 from backend.routes.reviews_routes import bp as reviews_bp
 from backend.routes.products_admin_routes import bp as products_admin_bp
+from backend.routes.metrics_routes import bp as metrics_bp
+from backend.routes.profiling_routes import bp as profiling_bp
 
 
 # ---------- LOGGING ----------
@@ -125,6 +130,18 @@ def _configure_app(app: Flask):
         log_file="api_response_times.log",
     )
 
+    # Server-Timing headers + latency histograms (served at /metrics)
+    setup_request_timing(app)
+
+    # SQL query counts / N+1 warnings per request (X-DB-* headers in debug)
+    setup_query_stats(app)
+
+    # One DB session / pooled connection per request, shared by services
+    setup_request_sessions(app)
+
+    # Sampled stack profiles (PROFILE_SAMPLE_RATE / admin X-Profile-Request)
+    setup_request_profiling(app)
+
     # CORS
     configure_cors(app)
 
@@ -150,6 +167,8 @@ def _register_routes(app: Flask):
     app.register_blueprint(cache_bp)  # NEW: Cache management endpoints
     app.register_blueprint(reviews_bp)
     app.register_blueprint(products_admin_bp)
+    app.register_blueprint(metrics_bp)
+    app.register_blueprint(profiling_bp)
 
 
 def _warmup_ml_state():
@@ -158,13 +177,19 @@ def _warmup_ml_state():
     thread at startup, instead of on the first incoming request. Previously
     the first search after a fresh boot paid this cost inline (10-18s in
     testing) with only a bare spinner shown to the user.
+
+    When the batch jobs have written the memory-mapped artifacts (model
+    trees, profile store) this only maps files and takes milliseconds.
     """
     def _run():
         try:
-            from ml.model import get_model
+            from ml.model import get_state, start_model_watcher
             from backend.services.user_profile_service import get_profiles
             logger.info("Warming up ranking model and user profile cache")
-            get_model()
+            # Maps the exported trees (LightGBM pickle only if there are none)
+            get_state()
+            # Pick up models published by later retrains without a restart
+            start_model_watcher()
             get_profiles()
             logger.info("Warmup complete")
         except Exception:
@@ -0,0 +1,177 @@
+"""
+ASGI entry point: async search and recommendations, Flask for the rest.
+
+Responsibilities:
+- Serve GET /api/search and GET /api/recommendations on asyncio
+  (backend/controllers/async_controller.py): bearer-token auth, rate limit
+  and cache/DB lookups are non-blocking and fanned out concurrently
+- Mount the existing Flask app (backend/app.py) for every other route
+- Emit the same Server-Timing header and latency histograms as Flask
+  (/metrics, served by the mounted app, covers both)
+- Own the async DB engine / Redis client lifecycle (startup, shutdown)
+
+Run with:
+    uvicorn --factory backend.asgi:create_asgi_app --workers 4
+
+The WSGI entry point (backend.app:app under gunicorn) is unchanged.
+"""
+
+import os
+import time
+import logging
+from contextlib import asynccontextmanager
+
+from a2wsgi import WSGIMiddleware
+from starlette.applications import Starlette
+from starlette.middleware.cors import CORSMiddleware
+from starlette.requests import Request
+from starlette.responses import Response
+from starlette.routing import Mount, Route, request_response
+
+from backend.controllers.async_controller import async_recommendations_controller, async_search_controller
+from backend.services.async_redis import close_async_redis, get_async_redis
+from backend.utils.async_database import dispose_async_db, fetch_user, init_async_db
+from backend.utils.auth_token import decode_token, is_token_stale
+from backend.utils.config import DEFAULT_CORS_ORIGINS
+from backend.utils.request_timing import (
+    REQUEST_LATENCY,
+    SERVER_TIMING_ENABLED,
+    STAGE_LATENCY,
+    server_timing_header,
+)
+
+
+logger = logging.getLogger("asgi")
+
+
+# ---------- CONFIG ----------
+
+# Same limit as the Flask route (@limiter.limit("60 per minute"))
+SEARCH_RATE_LIMIT_PER_MINUTE = 60
+# Threads running Flask requests (WSGI) under the ASGI server
+ASGI_WSGI_WORKERS = int(os.getenv("ASGI_WSGI_WORKERS", "10"))
+
+
+# ---------- AUTH / RATE LIMIT ----------
+
+def _bearer_token(request: Request):
+    header = request.headers.get("Authorization", "")
+    if header.startswith("Bearer "):
+        return header[len("Bearer "):].strip()
+    return None
+
+
+async def authenticate(request: Request):
+    """Async auth_middleware._resolve_user_id: the user row, or None."""
+    user_id, issued_at = decode_token(_bearer_token(request))
+    if not user_id:
+        return None
+    try:
+        user = await fetch_user(user_id)
+    except Exception:
+        logger.exception("User lookup failed during authentication")
+        return None
+    if not user or is_token_stale(user, issued_at):
+        return None
+    return user
+
+
+async def rate_limited(request: Request, scope: str, per_minute: int) -> bool:
+    """Fixed one-minute window per client address; fails open if Redis is down."""
+    client = request.client.host if request.client else "unknown"
+    key = f"asgi_ratelimit:{scope}:{client}:{int(time.time() // 60)}"
+    try:
+        async with get_async_redis().pipeline(transaction=False) as pipe:
+            pipe.incr(key)
+            pipe.expire(key, 60)
+            count, _ = await pipe.execute()
+    except Exception:
+        return False
+    return count > per_minute
+
+
+# ---------- RESPONSES ----------
+
+def _respond(json_provider, request, endpoint, body, status, timings, start):
+    response = Response(json_provider.dumps(body), status_code=status, media_type="application/json")
+
+    elapsed = time.perf_counter() - start
+    REQUEST_LATENCY.observe(elapsed, request.method, endpoint, str(status))
+    for stage, ms in timings.items():
+        STAGE_LATENCY.observe(ms / 1000.0, stage)
+    if SERVER_TIMING_ENABLED:
+        timings = {**timings, "app": elapsed * 1000}
+        response.headers["Server-Timing"] = server_timing_header(timings)
+    return response
+
+
+# ---------- APP FACTORY ----------
+
+def create_asgi_app(wsgi_app=None) -> Starlette:
+    """
+    Build the ASGI app around `wsgi_app` (default: backend.app:app).
+    """
+    if wsgi_app is None:
+        from backend.app import app as wsgi_app
+
+    json_provider = wsgi_app.json
+
+    async def search(request: Request):
+        start = time.perf_counter()
+        if await rate_limited(request, "search", SEARCH_RATE_LIMIT_PER_MINUTE):
+            body, status, timings = {"error": "rate limit exceeded"}, 429, {}
+        else:
+            # Anonymous search stays anonymous; a bad token is not an error
+            user = await authenticate(request)
+            body, status, timings = await async_search_controller(
+                request.query_params.get("q"),
+                user,
+                request.query_params.get("cursor"),
+                request.query_params.get("limit"),
+            )
+        return _respond(json_provider, request, "/api/search", body, status, timings, start)
+
+    async def recommendations(request: Request):
+        start = time.perf_counter()
+        user = await authenticate(request)
+        if user is None:
+            body, status, timings = {"error": "authentication required"}, 401, {}
+        else:
+            body, status, timings = await async_recommendations_controller(user)
+        return _respond(json_provider, request, "/api/recommendations", body, status, timings, start)
+
+    @asynccontextmanager
+    async def lifespan(app):
+        init_async_db()
+        try:
+            yield
+        finally:
+            await dispose_async_db()
+            await close_async_redis()
+
+    origins_env = os.getenv("ALLOWED_ORIGINS")
+    origins = [o.strip() for o in origins_env.split(",") if o.strip()] if origins_env else DEFAULT_CORS_ORIGINS
+
+    def _with_cors(endpoint):
+        async def get_only(request: Request):
+            if request.method not in ("GET", "HEAD"):
+                return Response(status_code=405, headers={"Allow": "GET"})
+            return await endpoint(request)
+
+        # Flask-Cors covers mounted routes; these bypass Flask
+        return CORSMiddleware(
+            request_response(get_only),
+            allow_origins=origins,
+            allow_credentials=True,
+            allow_methods=["GET"],
+            allow_headers=["Content-Type", "Authorization"],
+        )
+
+    return Starlette(
+        routes=[
+            Route("/api/search", _with_cors(search)),
+            Route("/api/recommendations", _with_cors(recommendations)),
+            Mount("/", app=WSGIMiddleware(wsgi_app, workers=ASGI_WSGI_WORKERS)),
+        ],
+        lifespan=lifespan,
+    )
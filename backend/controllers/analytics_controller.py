@@ -5,7 +5,7 @@ from flask import jsonify
 from sqlalchemy import func
 
 from backend.services.db_event_service import get_events_df
-from backend.utils.database import get_db_session
+from backend.utils.database import get_read_session
 from backend.services.redis_client import redis_get_json, redis_setex_json
 from backend.models import User
 
@@ -65,7 +65,7 @@ def _compute_analytics():
 
 
 def get_cluster_counts():
-    with get_db_session() as session:
+    with get_read_session() as session:
         rows = (
             session.query(
                 func.coalesce(User.cluster, -1),
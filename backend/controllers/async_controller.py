@@ -0,0 +1,182 @@
+"""
+Async search and recommendation controllers for the ASGI serving mode
+(backend/asgi.py).
+
+The sync controllers fetch their inputs one after another: user, cached
+ranking, base candidates, recent boost, profiles, then the product queries
+on a cache miss. Here the independent lookups are issued concurrently on
+the event loop (one Redis MGET, async SQL, profiles in a worker thread) and
+only the CPU-bound ranking runs in a thread, reusing the sync ranking code
+via SearchLookups / rank_similar, so results and cache entries are
+identical to the Flask path.
+
+Controllers take the authenticated user row (already loaded by the ASGI
+auth layer) and return (body, status, timings).
+"""
+
+import time
+import asyncio
+
+from backend.controllers.recommendations_controller import (
+    CACHE_DURATION_SECONDS,
+    EVENT_TYPES,
+    dedupe_recent,
+    parse_recs_limit,
+    rank_similar,
+    recommendations_cache_key,
+    serialize_product_dates,
+)
+from backend.controllers.search_controller import (
+    DEFAULT_GROUP,
+    build_search_response,
+    error_response,
+    parse_pagination,
+)
+from backend.services.async_redis import aredis_get_json, aredis_mget_json, aredis_setex_json
+from backend.services.user_profile_service import get_profiles
+from backend.utils.async_database import fetch_event_product_ids, fetch_products_by_ids, fetch_products_df
+from backend.utils.intent import detect_intent
+from backend.utils.search import (
+    RECENT_BOOST_CACHE_SECONDS,
+    RECENT_BOOST_EVENTS,
+    SearchLookups,
+    base_cache_key,
+    parse_recent_boost,
+    ranking_cache_key,
+    recent_boost_from_products,
+    recent_boost_key,
+    search_products,
+)
+
+
+def _ms_since(start):
+    return (time.perf_counter() - start) * 1000
+
+
+async def _recent_boost(user_id):
+    """Recent boost on a cache miss: async event read, then cache it."""
+    try:
+        boosts = recent_boost_from_products(
+            await fetch_event_product_ids(user_id, RECENT_BOOST_EVENTS, limit=10)
+        )
+    except Exception:
+        boosts = {}
+    await aredis_setex_json(
+        recent_boost_key(user_id), {str(k): v for k, v in boosts.items()}, RECENT_BOOST_CACHE_SECONDS
+    )
+    return boosts
+
+
+async def _none():
+    return None
+
+
+# ---------- SEARCH ----------
+
+async def async_search_controller(query, user, cursor_raw=None, limit_raw=None):
+    timings = {}
+    t0 = time.perf_counter()
+
+    if not query:
+        return (*error_response("query required"), timings)
+
+    cursor, page_size, pagination_error = parse_pagination(cursor_raw, limit_raw)
+    if pagination_error:
+        return (*error_response(pagination_error), timings)
+
+    user_id = user.user_id if user is not None else None
+    cluster = user.cluster if user is not None else None
+    group = (user.group if user is not None else None) or DEFAULT_GROUP
+
+    intent = detect_intent(query)
+    search_query = intent["clean_query"]
+    category = intent["suggested_category"]
+
+    # -------- independent lookups: one MGET + profiles --------
+    t_lookup = time.perf_counter()
+    keys = [ranking_cache_key(search_query, user_id, cluster, group), base_cache_key(search_query, category)]
+    if user_id:
+        keys.append(recent_boost_key(user_id))
+    values, profiles = await asyncio.gather(
+        aredis_mget_json(keys, counted=keys[:1]),
+        asyncio.to_thread(get_profiles),
+    )
+    lookups = SearchLookups(
+        ranking=values[0],
+        base_candidates=values[1],
+        profiles=profiles,
+        recent_boost=parse_recent_boost(values[2]) if user_id else {},
+    )
+    timings["lookups"] = _ms_since(t_lookup)
+
+    # -------- cache misses: SQL + recent boost concurrently --------
+    need_candidates = not isinstance(lookups.ranking, list) and not lookups.base_candidates
+    need_boost = lookups.recent_boost is None
+    if need_candidates or need_boost:
+        t_db = time.perf_counter()
+        text_df, category_df, recent_boost = await asyncio.gather(
+            fetch_products_df(search_query=search_query) if need_candidates else _none(),
+            fetch_products_df(category_filter=category) if need_candidates and category else _none(),
+            _recent_boost(user_id) if need_boost else _none(),
+        )
+        if need_candidates:
+            lookups.text_products = text_df
+            if category:
+                lookups.category_products = category_df
+        if need_boost:
+            lookups.recent_boost = recent_boost
+        timings["db"] = _ms_since(t_db)
+
+    # -------- ranking (CPU-bound) --------
+    t_search = time.perf_counter()
+    products = await asyncio.to_thread(
+        search_products,
+        search_query,
+        user_id,
+        cluster=cluster,
+        ab_group=group,
+        limit=None,
+        category=category,
+        lookups=lookups,
+    )
+    timings["search_products"] = _ms_since(t_search)
+
+    body, status = build_search_response(products, intent, cursor, page_size, timings, t0)
+    return body, status, timings
+
+
+# ---------- RECOMMENDATIONS ----------
+
+async def async_recommendations_controller(user, limit=None):
+    timings = {}
+    t0 = time.perf_counter()
+    limit = parse_recs_limit(limit)
+    user_id = user.user_id
+
+    # Cache first: a hit needs nothing else, so don't speculatively query
+    cache_key = recommendations_cache_key(user_id)
+    cached = await aredis_get_json(cache_key)
+    if cached:
+        timings["total"] = _ms_since(t0)
+        return cached, 200, timings
+
+    t_lookup = time.perf_counter()
+    event_ids, profiles = await asyncio.gather(
+        fetch_event_product_ids(user_id, EVENT_TYPES, limit=20),
+        asyncio.to_thread(get_profiles),
+    )
+    timings["lookups"] = _ms_since(t_lookup)
+
+    recent_ids = dedupe_recent(event_ids)
+    t_rank = time.perf_counter()
+    recent_products, similar = await asyncio.gather(
+        fetch_products_by_ids(recent_ids),
+        asyncio.to_thread(rank_similar, user_id, user.cluster, profiles, recent_ids, limit),
+    )
+    serialize_product_dates(recent_products)
+    timings["rank"] = _ms_since(t_rank)
+
+    result = {"recent": recent_products, "similar": similar}
+    await aredis_setex_json(cache_key, result, CACHE_DURATION_SECONDS)
+    timings["total"] = _ms_since(t0)
+    return result, 200, timings
@@ -1,7 +1,6 @@
 import hashlib
 import logging
 import os
-import threading
 import uuid
 import bcrypt
 from flask import jsonify
@@ -30,6 +29,7 @@ from backend.services.email_service import (
     update_user_password,
 )
 from backend.utils.auth_token import create_token
+from backend.utils import background
 
 
 EXPERIMENT_GROUPS = ("A", "B")
@@ -49,13 +49,13 @@ def generate_user_id():
 
 
 def _send_email_async(fn, *args):
-    """Fire-and-forget email send in a background thread."""
+    """Fire-and-forget email send on the shared background executor."""
     def _run():
         try:
             fn(*args)
         except Exception:
             logger.exception("Async email send failed")
-    threading.Thread(target=_run, daemon=True).start()
+    background.submit(_run)
 
 
 def assign_experiment_group(user_id: str) -> str:
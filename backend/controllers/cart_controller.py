@@ -1,6 +1,7 @@
 import logging
-import threading
 import time
+from datetime import datetime
+from werkzeug.http import http_date
 from backend.utils.sanitize import sanitize_user_id
 
 logger = logging.getLogger("cart_controller")
@@ -11,16 +12,15 @@ from backend.services.db_user_manager import (
 )
 from backend.services.db_cart_manager import (
     add_to_cart,
-    get_cart,
+    get_cart_items,
+    get_cached_cart,
+    cache_cart,
     remove_from_cart,
     clear_cart
 )
-from backend.services.db_event_service import create_search_event
-from backend.services.db_product_service import (
-    update_product_popularity,
-    get_products_by_ids,
-)
+from backend.services.db_event_service import search_event_row
 from backend.services.retrain_trigger import record_event
+from backend.utils import background
 
 
 DEFAULT_GROUP = "A"
@@ -50,21 +50,16 @@ def get_valid_user(raw_user_id):
 # ---------- Controllers ----------
 
 def _log_cart_analytics(user_id, product_id, query, group):
-    """Background task for non-critical analytics logging."""
-    try:
-        create_search_event(
-            user_id=user_id,
-            query=query,
-            product_id=product_id,
-            event_type="add_to_cart",
-            group=group,
-        )
-    except Exception:
-        logger.warning("Failed to log cart event for user=%s product=%s", user_id, product_id, exc_info=True)
-    try:
-        update_product_popularity(product_id, 3)
-    except Exception:
-        logger.warning("Failed to update product popularity for product=%s", product_id, exc_info=True)
+    """Queue non-critical analytics (event row + popularity) for the
+    background executor's next batch."""
+    background.log_event(search_event_row(
+        user_id=user_id,
+        query=query,
+        product_id=product_id,
+        event_type="add_to_cart",
+        group=group,
+    ))
+    background.add_popularity(product_id, 3)
     record_event()
 
 
@@ -112,13 +107,9 @@ def update_cart_controller(data):
     except Exception as e:
         return error_response(f"Failed to update cart: {str(e)}", 500)
 
-    # Run analytics in background thread for adds
+    # Analytics for adds are written in the background
     if quantity > 0:
-        threading.Thread(
-            target=_log_cart_analytics,
-            args=(user_id, product_id, query, group),
-            daemon=True
-        ).start()
+        _log_cart_analytics(user_id, product_id, query, group)
 
     elapsed = (time.perf_counter() - t0) * 1000
     logger.info("update_cart user=%s product=%s qty=%s %.1fms", user_id, product_id, quantity, elapsed)
@@ -132,12 +123,15 @@ def get_cart_controller(raw_user_id):
 
     user_id = user.user_id
 
+    # Invalidated by every cart write (services/cart), so safe to serve as-is
+    cached, generation = get_cached_cart(user_id)
+    if cached is not None:
+        return cached, 200
+
     try:
-        cart_data = get_cart(user_id) or {}
+        items = get_cart_items(user_id)
     except Exception:
-        cart_data = {}
-
-    if not cart_data:
+        logger.warning("Failed to load cart for user=%s", user_id, exc_info=True)
         return {
             "items": [],
             "total": 0,
@@ -145,34 +139,25 @@ def get_cart_controller(raw_user_id):
             "count": 0,
         }, 200
 
-    product_ids = list(cart_data.keys())
-    products = get_products_by_ids(product_ids)
-    products_by_id = {
-        str(p["product_id"]): p for p in products
-    }
-
-    items = []
-    for pid, quantity in cart_data.items():
-        product = products_by_id.get(str(pid))
-        if not product:
-            continue
-
-        item = product.copy()
-        item["quantity"] = quantity
-        items.append(item)
-
+    # Same HTTP-date strings Flask's JSON encoder gave the datetimes, so a
+    # cached cart matches a freshly loaded one
+    for item in items:
+        if isinstance(item.get("created_at"), datetime):
+            item["created_at"] = http_date(item["created_at"])
     total = sum(
-        item.get("price", 0) * item.get("quantity", 1)
+        (item.get("price") or 0) * item["quantity"]
         for item in items
     )
-    total_items = sum(item.get("quantity", 1) for item in items)
+    total_items = sum(item["quantity"] for item in items)
 
-    return {
+    result = {
         "items": items,
         "total": total,
         "total_items": total_items,
         "count": total_items,
-    }, 200
+    }
+    cache_cart(user_id, result, generation)
+    return result, 200
 
 
 def clear_cart_controller(data):
@@ -189,19 +174,12 @@ def clear_cart_controller(data):
         return error_response("Failed to clear cart", 500)
 
     group = getattr(user, "group", None) or DEFAULT_GROUP
-
-    def _log_clear():
-        try:
-            create_search_event(
-                user_id=user.user_id,
-                query="",
-                product_id=None,
-                event_type="cart_cleared",
-                group=group,
-            )
-        except Exception:
-            logger.warning("Failed to log cart_cleared event for user=%s", user.user_id, exc_info=True)
-
-    threading.Thread(target=_log_clear, daemon=True).start()
+    background.log_event(search_event_row(
+        user_id=user.user_id,
+        query="",
+        product_id=None,
+        event_type="cart_cleared",
+        group=group,
+    ))
 
     return {"status": "cart cleared"}, 200
@@ -3,10 +3,11 @@ import time
 
 from backend.utils.sanitize import sanitize_user_id
 from backend.services.db_user_manager import get_user_by_id
-from backend.services.db_event_service import create_search_event
-from backend.services.db_product_service import update_product_popularity, get_product_by_id
+from backend.services.db_event_service import search_event_row
+from backend.services.db_product_service import get_product_by_id
 from backend.services.retrain_trigger import record_event
 from backend.services.cache_invalidation import invalidate_on_user_event
+from backend.utils import background
 
 logger = logging.getLogger("event_logger")
 
@@ -88,36 +89,35 @@ def log_event_controller(data):
         logger.warning(f"Invalid user_id received: {raw_user_id}")
         return error_response("invalid user_id")
 
-    # Best-effort analytics logging
-    try:
-        create_search_event(
-            user_id=user_id,
-            query=query,
-            product_id=product_id,
-            event_type=event_type,
-            group=group,
-        )
-        logger.info("Event created successfully.")
-    except Exception as e:
-        logger.error(f"Event logging failed: {e}")
-
-    # Popularity update
+    # Cache invalidation on user events — after the event row is written,
+    # so a recompute can't cache results that miss it
+    invalidate = None
+    if user_id and event_type in CACHE_INVALIDATION_EVENTS:
+        def invalidate():
+            try:
+                user = get_user_by_id(user_id)
+                cluster_id = getattr(user, "cluster", None) if user else None
+                invalidate_on_user_event(user_id, event_type, cluster_id)
+            except Exception as e:
+                logger.error(f"Cache invalidation failed (non-blocking): {e}")
+
+    # Best-effort analytics logging: batched multi-row insert in the background
+    background.log_event(search_event_row(
+        user_id=user_id,
+        query=query,
+        product_id=product_id,
+        event_type=event_type,
+        group=group,
+    ), after=invalidate)
+
+    # Popularity update (summed per product within a batch)
     if event_type in POPULARITY_EVENTS and product_id:
-        update_product_popularity(product_id, 1)
+        background.add_popularity(product_id, 1)
 
     # Retrain trigger
     if event_type in RETRAIN_EVENTS:
         record_event()
 
-    # NEW: Cache invalidation on user events
-    if user_id and event_type in CACHE_INVALIDATION_EVENTS:
-        try:
-            user = get_user_by_id(user_id)
-            cluster_id = getattr(user, "cluster", None) if user else None
-            invalidate_on_user_event(user_id, event_type, cluster_id)
-        except Exception as e:
-            logger.error(f"Cache invalidation failed (non-blocking): {e}")
-
     elapsed = (time.perf_counter() - t0) * 1000
     logger.info("log_event type=%s product=%s user=%s %.1fms", event_type, product_id, user_id, elapsed)
     return {"status": "logged"}, 200
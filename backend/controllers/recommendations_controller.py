@@ -1,16 +1,20 @@
 import json
+import numpy as np
 from sqlalchemy import desc
 
 from backend.services.db_event_service import get_events_df
 from backend.services.user_profile_service import get_profiles
-from backend.services.db_product_service import get_products_by_ids
+from backend.services.db_product_service import get_products_by_ids, serialize_product
+from backend.services.rec_candidates_service import get_segment_candidates
+from backend.services.similarity_service import get_similar_product_ids
 from backend.models import Product
 from backend.services.db_user_manager import get_user_by_id
-from backend.services.redis_client import redis_get_json, redis_setex_json
+from backend.services.redis_client import redis_get_json, redis_msetex_entries, redis_setex_json
 from backend.utils.database import get_db_session
 
 from ml.features import build_features
-from ml.model import predict_score
+from ml.model import predict_scores
+from ml.profile_store import ProfileStore
 
 
 # ---------- CONFIG ----------
@@ -23,6 +27,11 @@ MAX_RECS_LIMIT = 50
 _CANDIDATE_MAX = 500
 
 EVENT_TYPES = ("click", "add_to_cart")
+# Score multiplier for products the user interacted with recently, so
+# "similar" isn't just a replay of "recent".
+RECENT_DEMOTION = 0.5
+# Co-interaction neighbours of recent items considered for "similar".
+NEIGHBOR_LIMIT = 20
 
 
 # ---------- HELPERS ----------
@@ -55,9 +64,16 @@ def get_recent_product_ids(user_id, limit=5):
         return []
 
 
-def get_cluster_category_boost(cluster, profiles):
+def get_cluster_category_boost(cluster, profiles, writes=None):
+    """
+    Category weights across a cluster's profiles. With `writes`, the cache
+    entry is added to it ({key: (value, ttl)}) instead of written here.
+    """
     if cluster is None:
         return {}
+    if isinstance(profiles, ProfileStore):
+        # Precomputed by the batch job — no scan over every profile
+        return profiles.cluster_boost(cluster)
 
     boost_key = f"cluster_boost:{cluster}"
     cached = redis_get_json(boost_key, count_stats=False)
@@ -76,46 +92,54 @@ def get_cluster_category_boost(cluster, profiles):
 
     total = sum(cat_counts.values())
     boost = {k: v / total for k, v in cat_counts.items()}
-    redis_setex_json(boost_key, boost, 3600)
+    if writes is not None:
+        writes[boost_key] = (boost, 3600)
+    else:
+        redis_setex_json(boost_key, boost, 3600)
     return boost
 
 
-# ---------- CONTROLLER ----------
-
-def recommendations_controller(user_id, limit=None):
-    if not user_id:
-        return {"error": "user_id required"}, 400
-
-    try:
-        limit = int(limit) if limit is not None else DEFAULT_RECS_LIMIT
-        limit = max(1, min(limit, MAX_RECS_LIMIT))
-    except (TypeError, ValueError):
-        limit = DEFAULT_RECS_LIMIT
-
-    cache_key = f"recommendations:{user_id}"
-    cached = redis_get_json(cache_key)
-    if cached:
-        return cached, 200
-
-    # ---- user context ----
-    user = get_user_by_id(user_id)
-    cluster = getattr(user, "cluster", None) if user else None
+def _to_result(product):
+    created_at = product["created_at"]
+    return {
+        "product_id": product["product_id"],
+        "title": product["title"],
+        "description": product["description"],
+        "category": product["category"],
+        "price": product["price"],
+        "rating": product["rating"],
+        "review_count": product["review_count"],
+        "popularity": product["popularity"],
+        "created_at": created_at.isoformat() if hasattr(created_at, "isoformat") else created_at,
+    }
 
-    profiles = get_profiles()
-    profile = profiles.get(user_id, {})
 
-    # ---- recent products ----
-    recent_ids = get_recent_product_ids(user_id)
-    recent_products = get_products_by_ids(recent_ids) if recent_ids else []
-    serialize_product_dates(recent_products)
+def score_precomputed_candidates(product_ids, scores, recent_set):
+    """
+    Hydrate a precomputed segment list and apply recent-item demotion.
+    Returns [(product_dict, score)], unsorted. Products deleted since the
+    list was built are skipped.
+    """
+    products_by_id = {
+        p["product_id"]: p
+        for p in get_products_by_ids([int(pid) for pid in product_ids])
+    }
+    scored = []
+    for pid, score in zip(product_ids, scores):
+        product = products_by_id.get(int(pid))
+        if product is None:
+            continue
+        score = float(score)
+        if product["product_id"] in recent_set:
+            score *= RECENT_DEMOTION
+        scored.append((product, score))
+    return scored
 
-    # ---- cluster boost ----
-    cluster_boost = get_cluster_category_boost(cluster, profiles)
 
-    # ---- candidate generation ----
+def score_candidates_on_the_fly(profile, cluster_boost, recent_set):
+    """Score the top-popularity pool for a single user with the ranking model."""
     avg_price = profile.get("avg_price")
     cat_pref_map = profile.get("category_pref", {})
-    recent_set = set(recent_ids)
     scored = []
 
     with get_db_session() as session:
@@ -129,6 +153,7 @@ def recommendations_controller(user_id, limit=None):
             .all()
         )
 
+        rows = []
         for p in candidates:
             cat_pref = cat_pref_map.get(p.category, 0)
             cluster_pref = cluster_boost.get(p.category, 0)
@@ -139,23 +164,40 @@ def recommendations_controller(user_id, limit=None):
                 denom = max(abs(avg_price), 1.0)
                 price_affinity = max(0.0, 1.0 - abs(p.price - avg_price) / denom)
 
-            features = build_features(
+            rows.append(build_features(
                 popularity=p.popularity,
                 rating=p.rating,
                 created_at=p.created_at,
                 category_score=category_score,
                 price_affinity=price_affinity,
-            )
+            ))
+
+        # One model call for the whole pool
+        scores = predict_scores(np.stack(rows)) if rows else []
 
-            base_score = predict_score(features)
+        for p, base_score in zip(candidates, scores):
+            base_score = float(base_score)
             if p.id in recent_set:
-                base_score *= 0.5
+                base_score *= RECENT_DEMOTION
 
-            scored.append((p, base_score))
+            scored.append((serialize_product(p), base_score))
 
-    # ---- rank + diversify ----
+    return scored
+
+
+def score_neighbors(neighbor_scores):
+    """Hydrate {product_id: similarity} into [(product_dict, similarity)], best first."""
+    if not neighbor_scores:
+        return []
+    products = get_products_by_ids(list(neighbor_scores))
+    scored = [(p, neighbor_scores[p["product_id"]]) for p in products if p["product_id"] in neighbor_scores]
     scored.sort(key=lambda x: x[1], reverse=True)
+    return scored
+
 
+def diversify(scored, cat_pref_map, limit):
+    """Pick up to `limit` products from score-sorted (product, score) pairs
+    under per-category quotas."""
     results = []
     per_category: dict[str, int] = {}
 
@@ -163,9 +205,10 @@ def recommendations_controller(user_id, limit=None):
         if len(results) >= limit:
             break
 
+        category = product["category"]
         # Per-category quota scales with user's stated preference:
         # strong preference (>30%) → up to 5 slots; moderate → 3; cold-start → 2.
-        pref_weight = cat_pref_map.get(product.category, 0)
+        pref_weight = cat_pref_map.get(category, 0)
         if pref_weight > 0.3:
             quota = min(5, FINAL_LIMIT // 2)
         elif pref_weight > 0.1:
@@ -173,26 +216,103 @@ def recommendations_controller(user_id, limit=None):
         else:
             quota = 2
 
-        if per_category.get(product.category, 0) >= quota:
+        if per_category.get(category, 0) >= quota:
             continue
 
-        results.append({
-            "product_id": product.id,
-            "title": product.title,
-            "description": product.description,
-            "category": product.category,
-            "price": product.price,
-            "rating": product.rating,
-            "review_count": product.review_count,
-            "popularity": product.popularity,
-            "created_at": product.created_at.isoformat(),
-        })
-        per_category[product.category] = per_category.get(product.category, 0) + 1
+        results.append(product)
+        per_category[category] = per_category.get(category, 0) + 1
+
+    return results
+
+
+def parse_recs_limit(limit):
+    try:
+        limit = int(limit) if limit is not None else DEFAULT_RECS_LIMIT
+        return max(1, min(limit, MAX_RECS_LIMIT))
+    except (TypeError, ValueError):
+        return DEFAULT_RECS_LIMIT
+
+
+def recommendations_cache_key(user_id):
+    return f"recommendations:{user_id}"
+
+
+def dedupe_recent(product_ids, limit=5):
+    """Newest-first event product ids -> distinct ids, newest first."""
+    return list(dict.fromkeys(int(pid) for pid in product_ids))[:limit]
+
+
+def rank_similar(user_id, cluster, profiles, recent_ids, limit, writes=None):
+    """Rank and diversify the "similar" list for a user (the CPU-bound part
+    of recommendations, shared with the async path). `writes` collects
+    cache entries as in get_cluster_category_boost."""
+    profile = profiles.get(user_id, {})
+
+    # ---- candidate generation ----
+    cat_pref_map = profile.get("category_pref", {})
+    recent_set = set(recent_ids)
+
+    # Precomputed per-cluster list (nightly / post-retrain batch) when present;
+    # otherwise score the popularity pool for this user on the fly.
+    precomputed = get_segment_candidates(cluster)
+    if precomputed is not None:
+        scored = score_precomputed_candidates(*precomputed, recent_set)
+    else:
+        cluster_boost = get_cluster_category_boost(cluster, profiles, writes)
+        scored = score_candidates_on_the_fly(profile, cluster_boost, recent_set)
+
+    # ---- rank + diversify ----
+    scored.sort(key=lambda x: x[1], reverse=True)
+
+    # Items co-clicked / co-carted with (or, for products without interaction
+    # history, textually similar to) the user's recent products lead the
+    # list; model-ranked candidates fill the remaining slots.
+    neighbors = score_neighbors(get_similar_product_ids(recent_ids, limit=NEIGHBOR_LIMIT))
+    if neighbors:
+        neighbor_ids = {p["product_id"] for p, _ in neighbors}
+        scored = neighbors + [(p, sc) for p, sc in scored if p["product_id"] not in neighbor_ids]
+
+    return [
+        _to_result(product)
+        for product in diversify(scored, cat_pref_map, limit)
+    ]
+
+
+# ---------- CONTROLLER ----------
+
+def recommendations_controller(user_id, limit=None, force_refresh=False):
+    """
+    force_refresh=True skips the cached result and recomputes/overwrites it
+    (used by the cache-warming job after a retrain).
+    """
+    if not user_id:
+        return {"error": "user_id required"}, 400
+
+    limit = parse_recs_limit(limit)
+
+    cache_key = recommendations_cache_key(user_id)
+    cached = None if force_refresh else redis_get_json(cache_key)
+    if cached:
+        return cached, 200
+
+    # ---- user context ----
+    user = get_user_by_id(user_id)
+    cluster = getattr(user, "cluster", None) if user else None
+
+    profiles = get_profiles()
+
+    # ---- recent products ----
+    recent_ids = get_recent_product_ids(user_id)
+    recent_products = get_products_by_ids(recent_ids) if recent_ids else []
+    serialize_product_dates(recent_products)
 
+    writes = {}
     result = {
         "recent": recent_products,
-        "similar": results,
+        "similar": rank_similar(user_id, cluster, profiles, recent_ids, limit, writes),
     }
 
-    redis_setex_json(cache_key, result, CACHE_DURATION_SECONDS)
+    # Result and cluster boost (if recomputed) in one round trip
+    writes[cache_key] = (result, CACHE_DURATION_SECONDS)
+    redis_msetex_entries(writes)
     return result, 200
@@ -4,6 +4,7 @@ from backend.utils.search import search_products
 from backend.services.db_user_manager import get_user_by_id
 from backend.utils.sanitize import sanitize_user_id
 from backend.utils.intent import detect_intent
+from backend.utils.request_timing import record_timings
 
 
 DEFAULT_GROUP = "A"
@@ -123,6 +124,11 @@ def search_controller(query, raw_user_id, cursor_raw=None, limit_raw=None):
     )
     timings["search_products"] = (time.perf_counter() - t_search) * 1000
 
+    return build_search_response(products, intent, cursor, page_size, timings, t0)
+
+
+def build_search_response(products, intent, cursor, page_size, timings, t0):
+    """Price filter, sort and paginate ranked results (shared with the async path)."""
     # -------- price filtering --------
     t_price = time.perf_counter()
     products = apply_price_filter(
@@ -150,6 +156,8 @@ def search_controller(query, raw_user_id, cursor_raw=None, limit_raw=None):
         detected_intents.append("price_filter")
 
     timings["total"] = (time.perf_counter() - t0) * 1000
+    # Server-Timing header + per-stage histograms (/metrics)
+    record_timings(timings)
 
     total_results = len(products)
     paginated_products = products[cursor : cursor + page_size]
@@ -4,11 +4,13 @@ Cache management routes.
 Provides admin endpoints for:
 - Viewing cache statistics
 - Manual cache invalidation
-- Cache maintenance operations
+- Cache maintenance operations (incl. triggering a cache warm-up)
 
 All endpoints require a valid session token whose user_id is in ADMIN_USER_IDS.
 """
 
+import logging
+
 from flask import Blueprint, jsonify, g
 
 from backend.services.cache_invalidation import (
@@ -22,14 +24,36 @@ from backend.utils.admin_auth import require_admin
 
 bp = Blueprint("cache", __name__, url_prefix="/api/admin/cache")
 
+logger = logging.getLogger("cache_routes")
+
+
+def _enqueue_warm_up():
+    """Best-effort: queue a cache warm-up so the next wave of traffic isn't
+    served entirely cold. Returns the job id, or None if RQ is unavailable."""
+    try:
+        # Imported lazily — rq_jobs pulls in the training pipeline, which the
+        # web process otherwise never needs.
+        from backend.services.rq_jobs import enqueue_warm_caches
+        return enqueue_warm_caches().id
+    except Exception:
+        logger.warning("Failed to enqueue cache warm-up", exc_info=True)
+        return None
+
+
+def _rounded(stats):
+    stats["hit_rate"] = round(stats["hit_rate"], 4)
+    for ns in stats.get("namespaces", {}).values():
+        ns["hit_rate"] = round(ns["hit_rate"], 4)
+        ns["avg_latency_ms"] = round(ns["avg_latency_ms"], 3)
+    return stats
+
 
 @bp.route("/dashboard", methods=["GET"])
 @require_admin
 def cache_dashboard():
     """Get admin dashboard data (user info + cache stats)."""
     user = g.admin_user
-    stats = get_cache_stats()
-    stats["hit_rate"] = round(stats["hit_rate"], 4)
+    stats = _rounded(get_cache_stats())
 
     return jsonify({
         "admin": {
@@ -44,9 +68,9 @@ def cache_dashboard():
 @bp.route("/stats", methods=["GET"])
 @require_admin
 def cache_stats():
-    """Get cache statistics."""
-    stats = get_cache_stats()
-    stats["hit_rate"] = round(stats["hit_rate"], 4)
+    """Get cache statistics: overall plus per-namespace hit rate and
+    average lookup latency."""
+    stats = _rounded(get_cache_stats())
     return jsonify(stats), 200
 
 
@@ -71,7 +95,11 @@ def invalidate_user(user_id):
 def invalidate_search():
     """Invalidate all search caches."""
     deleted = invalidate_all_search_caches()
-    return jsonify({"status": f"invalidated {deleted} search keys"}), 200
+    warm_job_id = _enqueue_warm_up()
+    return jsonify({
+        "status": f"invalidated {deleted} search keys",
+        "warm_job_id": warm_job_id,
+    }), 200
 
 
 @bp.route("/invalidate/all-recommendations", methods=["POST"])
@@ -89,4 +117,18 @@ def invalidate_all():
     search_deleted = invalidate_all_search_caches()
     recs_deleted = invalidate_all_recommendation_caches()
     total = search_deleted + recs_deleted
-    return jsonify({"status": f"invalidated {total} total keys"}), 200
+    warm_job_id = _enqueue_warm_up()
+    return jsonify({
+        "status": f"invalidated {total} total keys",
+        "warm_job_id": warm_job_id,
+    }), 200
+
+
+@bp.route("/warm", methods=["POST"])
+@require_admin
+def warm():
+    """Enqueue a cache warm-up for top queries and most active users."""
+    warm_job_id = _enqueue_warm_up()
+    if warm_job_id is None:
+        return jsonify({"error": "failed to enqueue warm-up"}), 503
+    return jsonify({"status": "warm-up enqueued", "warm_job_id": warm_job_id}), 202
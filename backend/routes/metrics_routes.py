@@ -0,0 +1,52 @@
+"""
+Prometheus metrics endpoint.
+
+Serves the in-process latency histograms (backend/utils/request_timing.py),
+DB pool gauges/counters (backend/utils/db_pool.py), background executor
+queue/task metrics (backend/utils/background.py) and read-replica health
+in the text exposition format. If METRICS_TOKEN is set, scrapers must send
+it as a bearer token; otherwise the endpoint is open (restrict it at the
+proxy).
+"""
+
+import os
+import hmac
+
+from flask import Blueprint, Response, request
+
+from backend.utils import background, database
+from backend.utils.db_pool import render_pool_metrics
+from backend.utils.rate_limit import limiter
+from backend.utils.request_timing import render_metrics
+
+bp = Blueprint("metrics", __name__)
+
+
+def _replica_lines():
+    status = database.replica_status()
+    if not status["configured"]:
+        return
+    yield "# TYPE db_replica_usable gauge"
+    yield f"db_replica_usable {int(status['usable'])}"
+    if status["lag_seconds"] is not None:
+        yield "# TYPE db_replica_lag_seconds gauge"
+        yield f"db_replica_lag_seconds {status['lag_seconds']:.3f}"
+    yield "# TYPE db_replica_fallbacks_total counter"
+    yield f"db_replica_fallbacks_total {status['fallbacks']}"
+
+
+@bp.route("/metrics", methods=["GET"])
+@limiter.exempt
+def metrics():
+    token = os.getenv("METRICS_TOKEN")
+    if token:
+        supplied = request.headers.get("Authorization", "").removeprefix("Bearer ").strip()
+        if not hmac.compare_digest(supplied.encode(), token.encode()):
+            return Response("unauthorized\n", status=401, mimetype="text/plain")
+    lines = [
+        *render_pool_metrics(database._engine),
+        *background.get_executor().render_metrics(),
+        *_replica_lines(),
+    ]
+    body = render_metrics() + "".join(f"{line}\n" for line in lines)
+    return Response(body, mimetype="text/plain; version=0.0.4")
@@ -0,0 +1,78 @@
+"""
+Request profiling routes.
+
+Admin endpoints over the sampled request profiles
+(backend/utils/request_profiler.py):
+- Per-route summary for a time window
+- Collapsed-stack download for flamegraph.pl / speedscope
+
+Windows are given as ?minutes=N (default 60) back from now, or explicit
+?since=/&until= ISO-8601 timestamps; ?route= narrows to one URL rule.
+All endpoints require a valid session token whose user_id is in ADMIN_USER_IDS.
+"""
+
+from datetime import datetime, timedelta, timezone
+
+from flask import Blueprint, Response, jsonify, request
+
+from backend.utils.admin_auth import require_admin
+from backend.utils.request_profiler import collapsed_stacks, summarize_profiles
+
+bp = Blueprint("profiling", __name__, url_prefix="/api/admin/profiles")
+
+DEFAULT_WINDOW_MINUTES = 60
+
+
+def _parse_window():
+    """(since, until, error) from the query string."""
+    now = datetime.now(timezone.utc)
+    try:
+        until = _parse_ts(request.args.get("until")) or now
+        since = _parse_ts(request.args.get("since"))
+        if since is None:
+            minutes = int(request.args.get("minutes", DEFAULT_WINDOW_MINUTES))
+            if minutes <= 0:
+                return None, None, "minutes must be > 0"
+            since = until - timedelta(minutes=minutes)
+    except ValueError:
+        return None, None, "invalid time window"
+    if since >= until:
+        return None, None, "since must be before until"
+    return since, until, None
+
+
+def _parse_ts(raw):
+    if not raw:
+        return None
+    ts = datetime.fromisoformat(raw)
+    return ts if ts.tzinfo else ts.replace(tzinfo=timezone.utc)
+
+
+@bp.route("", methods=["GET"])
+@require_admin
+def profile_summary():
+    """Profiled request counts and durations per route."""
+    since, until, error = _parse_window()
+    if error:
+        return jsonify({"error": error}), 400
+    return jsonify({
+        "since": since.isoformat(),
+        "until": until.isoformat(),
+        "routes": summarize_profiles(since, until, request.args.get("route")),
+    }), 200
+
+
+@bp.route("/flamegraph", methods=["GET"])
+@require_admin
+def flamegraph():
+    """Collapsed stacks ("frame;frame count" lines) aggregated over the window."""
+    since, until, error = _parse_window()
+    if error:
+        return jsonify({"error": error}), 400
+    body = collapsed_stacks(since, until, request.args.get("route"))
+    filename = f"profiles-{since:%Y%m%dT%H%M}-{until:%Y%m%dT%H%M}.collapsed"
+    return Response(
+        body,
+        mimetype="text/plain",
+        headers={"Content-Disposition": f"attachment; filename={filename}"},
+    )
@@ -0,0 +1,97 @@
+"""
+Shared loader for offline ML artifacts (candidate lists, neighbour indexes).
+
+Responsibilities:
+- Load an artifact file lazily on first use
+- Reload it when a batch job replaces the file (mtime check, rate-limited)
+- Keep serving the previous copy if a reload fails
+- Thread-safe; lookups after the first load never block on I/O
+"""
+
+import os
+import time
+import threading
+import logging
+from typing import Callable
+
+
+logger = logging.getLogger("artifact_cache")
+
+DEFAULT_RELOAD_CHECK_SECONDS = 30
+
+
+class ArtifactCache:
+    """
+    In-process copy of one on-disk artifact.
+
+    `path` may be a string or a zero-arg callable (resolved on every check,
+    so tests and config can redirect it). `loader(path)` returns the parsed
+    artifact; `empty` is what get() returns while no file exists.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        path,
+        loader: Callable[[str], object],
+        *,
+        empty=None,
+        reload_check_seconds: float = DEFAULT_RELOAD_CHECK_SECONDS,
+    ):
+        self.name = name
+        self._path = path
+        self._loader = loader
+        self._empty = empty
+        self.reload_check_seconds = reload_check_seconds
+
+        self.value = None
+        self.mtime = None
+        self.last_check = 0.0
+        self.loaded = False
+        self.lock = threading.Lock()
+
+    @property
+    def path(self) -> str:
+        return self._path() if callable(self._path) else self._path
+
+    def _fresh(self, now: float) -> bool:
+        return self.loaded and now - self.last_check < self.reload_check_seconds
+
+    def get(self):
+        now = time.monotonic()
+        if self._fresh(now):
+            return self.value
+
+        with self.lock:
+            if self._fresh(now):
+                return self.value
+            self.last_check = now
+            path = self.path
+
+            try:
+                mtime = os.path.getmtime(path)
+            except OSError:
+                self.value, self.mtime, self.loaded = self._empty, None, True
+                return self.value
+
+            if self.loaded and mtime == self.mtime:
+                return self.value
+
+            try:
+                self.value = self._loader(path)
+                self.mtime = mtime
+                logger.info("Loaded %s artifact from %s", self.name, path)
+            except Exception:
+                logger.exception("Failed to load %s artifact; keeping previous copy", self.name)
+                if not self.loaded:
+                    self.value = self._empty
+            self.loaded = True
+            return self.value
+
+    def reset(self) -> None:
+        """Drop the in-memory copy; the next get() reloads from disk."""
+        with self.lock:
+            self.value = None
+            self.mtime = None
+            self.last_check = 0.0
+            self.loaded = False
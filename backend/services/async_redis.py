@@ -0,0 +1,99 @@
+"""
+Non-blocking Redis access for the ASGI serving mode (backend/asgi.py).
+
+Mirrors redis_client.py (same URL, JSON encoding, TTL jitter and buffered
+global and per-namespace hit/miss stats) on top of redis.asyncio, plus MGET so
+independent cache lookups cost one round trip. Errors read as misses.
+
+The client is created lazily on the running event loop and closed by the
+ASGI lifespan (close_async_redis).
+"""
+import os
+import json
+import time
+import random
+import asyncio
+
+import redis.asyncio as aioredis
+
+from backend.services.redis_client import (
+    REDIS_URL,
+    _TTL_JITTER_SECONDS,
+    flush_counters,
+    record_lookups,
+)
+
+_aredis: aioredis.StrictRedis | None = None
+
+
+def get_async_redis() -> aioredis.StrictRedis:
+    global _aredis
+    if _aredis is None:
+        _aredis = aioredis.StrictRedis.from_url(
+            REDIS_URL,
+            decode_responses=True,
+            max_connections=int(os.getenv("REDIS_MAX_CONNECTIONS", "20")),
+            socket_connect_timeout=1,
+            socket_timeout=1,
+            health_check_interval=30,
+            retry_on_timeout=True,
+        )
+    return _aredis
+
+
+async def close_async_redis() -> None:
+    global _aredis
+    client, _aredis = _aredis, None
+    if client is not None:
+        try:
+            await client.aclose()
+        except Exception:
+            pass
+
+
+def _decode(value):
+    if value is None:
+        return None
+    try:
+        return json.loads(value)
+    except Exception:
+        # Corrupt cached value — treat as miss so caller re-fetches
+        return None
+
+
+async def aredis_get_json(key, *, count_stats=True):
+    """Async redis_get_json: JSON-decoded value or None."""
+    return (await aredis_mget_json([key], counted=[key] if count_stats else ()))[0]
+
+
+async def aredis_mget_json(keys, *, counted=()):
+    """
+    JSON-decode several keys in one MGET; misses/errors are None.
+
+    Only keys listed in `counted` record hit/miss (the same split as
+    count_stats in redis_get_json: dashboard-level caches vs sub-caches).
+    """
+    keys = list(keys)
+    if not keys:
+        return []
+    start = time.perf_counter()
+    try:
+        raw = await get_async_redis().mget(keys)
+    except Exception:
+        raw = [None] * len(keys)
+    elapsed = time.perf_counter() - start
+
+    values = [_decode(value) for value in raw]
+    # Shared in-process buffer with the sync client; flushed off the loop
+    if counted and record_lookups(keys, values, set(counted), elapsed):
+        await asyncio.to_thread(flush_counters)
+    return values
+
+
+async def aredis_setex_json(key, value, ttl):
+    try:
+        effective_ttl = max(1, int(ttl) + random.randint(0, _TTL_JITTER_SECONDS))
+        await get_async_redis().setex(key, effective_ttl, json.dumps(value))
+        return True
+    except Exception:
+        return False
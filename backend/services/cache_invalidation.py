@@ -6,29 +6,56 @@ Responsibilities:
 - Track cache usage and hit rates
 - Support event-triggered invalidation
 - Graceful handling of Redis failures
+
+Deletes are batched (one DEL per event / per SCAN page) and the
+invalidation counter goes through redis_client's buffered counters.
 """
 
 import logging
 from typing import List, Optional
-from backend.services.redis_client import _redis
+from backend.services.redis_client import (
+    HITS_KEY,
+    INVALIDATIONS_KEY,
+    MISSES_KEY,
+    NAMESPACE_HITS_KEY,
+    NAMESPACE_KEYS,
+    NAMESPACE_LATENCY_KEY,
+    NAMESPACE_MISSES_KEY,
+    _redis,
+    discard_counters,
+    flush_counters,
+    incr_counter,
+)
 from backend.services.cache_keys import query_hash
 
 logger = logging.getLogger("cache_invalidation")
 
 # Redis-backed counter keys
-_HITS_KEY = "cache:hits"
-_MISSES_KEY = "cache:misses"
-_INVALIDATIONS_KEY = "cache:invalidations"
+_HITS_KEY = HITS_KEY
+_MISSES_KEY = MISSES_KEY
+_INVALIDATIONS_KEY = INVALIDATIONS_KEY
+
+_DELETE_BATCH = 500
+
+
+def _delete_keys(keys: List[str]) -> int:
+    try:
+        return int(_redis.delete(*keys) or 0)
+    except Exception:
+        return 0
 
 
 def _delete_by_pattern(pattern: str) -> int:
     deleted_total = 0
     try:
-        for key in _redis.scan_iter(match=pattern, count=500):
-            try:
-                deleted_total += int(_redis.delete(key) or 0)
-            except Exception:
-                continue
+        batch = []
+        for key in _redis.scan_iter(match=pattern, count=_DELETE_BATCH):
+            batch.append(key)
+            if len(batch) >= _DELETE_BATCH:
+                deleted_total += _delete_keys(batch)
+                batch = []
+        if batch:
+            deleted_total += _delete_keys(batch)
         return deleted_total
     except Exception as e:
         logger.error(f"Failed pattern delete for {pattern}: {e}")
@@ -65,11 +92,9 @@ def invalidate_product_search_cache(query: str) -> bool:
         deleted = 0
         deleted += _delete_by_pattern(f"search_products:{key_hash}:*")
         deleted += _delete_by_pattern(f"search_ranked:{key_hash}:*")
+        deleted += _delete_by_pattern(f"search_tier:{key_hash}:*")
         if deleted:
-            try:
-                _redis.incr(_INVALIDATIONS_KEY)  # count operations, not keys
-            except Exception:
-                pass
+            incr_counter(_INVALIDATIONS_KEY)  # count operations, not keys
         return deleted > 0
     except Exception as e:
         logger.error(f"Failed to invalidate search cache for query '{query}': {e}")
@@ -87,11 +112,9 @@ def invalidate_all_search_caches() -> int:
         deleted = 0
         deleted += _delete_by_pattern("search_products:*")
         deleted += _delete_by_pattern("search_ranked:*")
+        deleted += _delete_by_pattern("search_tier:*")
         if deleted:
-            try:
-                _redis.incr(_INVALIDATIONS_KEY)  # count operations, not keys
-            except Exception:
-                pass
+            incr_counter(_INVALIDATIONS_KEY)  # count operations, not keys
         logger.info(f"Invalidated {deleted} search cache keys")
         return deleted
     except Exception as e:
@@ -110,10 +133,7 @@ def invalidate_all_recommendation_caches() -> int:
         pattern = "recommendations:*"
         deleted = _delete_by_pattern(pattern)
         if deleted:
-            try:
-                _redis.incr(_INVALIDATIONS_KEY)  # count operations, not keys
-            except Exception:
-                pass
+            incr_counter(_INVALIDATIONS_KEY)  # count operations, not keys
         logger.info(f"Invalidated {deleted} recommendation cache keys")
         return deleted
     except Exception as e:
@@ -121,6 +141,18 @@ def invalidate_all_recommendation_caches() -> int:
         return 0
 
 
+def invalidate_all_cart_caches() -> int:
+    """
+    Invalidate ALL cached cart views (they embed product price/title).
+
+    Returns: Number of keys deleted
+    """
+    deleted = _delete_by_pattern("cart:*")
+    if deleted:
+        incr_counter(_INVALIDATIONS_KEY)  # count operations, not keys
+    return deleted
+
+
 def invalidate_on_product_update(product_id: int) -> bool:
     """
     Invalidate caches when a product is updated.
@@ -128,6 +160,7 @@ def invalidate_on_product_update(product_id: int) -> bool:
     Clears:
     - All search caches (product could be in many results)
     - All recommendation caches (product could be recommended)
+    - All cart views (product could be in a cart)
     """
     results = []
     
@@ -135,6 +168,7 @@ def invalidate_on_product_update(product_id: int) -> bool:
     # In production, could implement query-product index to target specific queries
     results.append(invalidate_all_search_caches() > 0)
     results.append(invalidate_all_recommendation_caches() > 0)
+    results.append(invalidate_all_cart_caches() > 0)
     
     logger.info(f"Invalidated caches for product {product_id} update")
     return any(results)
@@ -149,26 +183,21 @@ def invalidate_on_user_event(user_id: str, event_type: str, cluster_id: Optional
     - purchase: User preferences definitely changed
     - click: User interest signal (could update cluster)
     """
-    results = []
-    
-    if event_type in ["add_to_cart", "purchase", "click"]:
-        # Always invalidate user's recommendations
-        results.append(invalidate_user_recommendations(user_id))
-
-        # Invalidate recent-boost cache so new event is reflected immediately
-        try:
-            deleted = _redis.delete(f"recent_boost:{user_id}")
-            results.append(bool(deleted))
-        except Exception:
-            pass
-
-        # Invalidate cluster boost if user is in a cluster
-        if cluster_id is not None:
-            results.append(invalidate_cluster_boost(cluster_id))
+    if event_type not in ["add_to_cart", "purchase", "click"]:
+        return False
 
-        logger.info(f"Invalidated caches for user {user_id} event: {event_type}")
+    # User's recommendations, recent-boost cache (so the new event is
+    # reflected immediately) and cluster boost if the user is in a cluster
+    # — one DEL round trip
+    keys = [f"recommendations:{user_id}", f"recent_boost:{user_id}"]
+    if cluster_id is not None:
+        keys.append(f"cluster_boost:{cluster_id}")
+    deleted = _delete_keys(keys)
+    if deleted:
+        incr_counter(_INVALIDATIONS_KEY)
 
-    return any(results)
+    logger.info(f"Invalidated caches for user {user_id} event: {event_type}")
+    return deleted > 0
 
 
 # ---------- INTERNAL HELPERS ----------
@@ -178,10 +207,7 @@ def _delete_cache_key(key: str) -> bool:
     try:
         deleted = _redis.delete(key)
         if deleted:
-            try:
-                _redis.incr(_INVALIDATIONS_KEY)
-            except Exception:
-                pass
+            incr_counter(_INVALIDATIONS_KEY)
             logger.debug(f"Invalidated cache key: {key}")
         return deleted > 0
     except Exception as e:
@@ -191,15 +217,41 @@ def _delete_cache_key(key: str) -> bool:
 
 # ---------- STATISTICS ----------
 
+def _namespace_stats(ns_hits: dict, ns_misses: dict, ns_latency: dict) -> dict:
+    """{namespace: hits, misses, hit_rate, avg_latency_ms} from the raw hashes."""
+    stats = {}
+    for namespace in sorted(set(ns_hits) | set(ns_misses)):
+        hits = int(ns_hits.get(namespace) or 0)
+        misses = int(ns_misses.get(namespace) or 0)
+        total = hits + misses
+        latency_us = int(ns_latency.get(namespace) or 0)
+        stats[namespace] = {
+            "hits": hits,
+            "misses": misses,
+            "hit_rate": (hits / total) if total > 0 else 0.0,
+            "avg_latency_ms": (latency_us / total / 1000.0) if total > 0 else 0.0,
+        }
+    return stats
+
+
 def get_cache_stats():
-    """Get cache invalidation statistics."""
+    """Get cache statistics, overall and per cache namespace."""
+    # Push this process's buffered counts first (other workers' trail by
+    # up to CACHE_STATS_FLUSH_SECONDS)
+    flush_counters()
     try:
-        hits = int(_redis.get(_HITS_KEY) or 0)
-        misses = int(_redis.get(_MISSES_KEY) or 0)
-        invalidations = int(_redis.get(_INVALIDATIONS_KEY) or 0)
+        pipe = _redis.pipeline(transaction=False)
+        pipe.mget([_HITS_KEY, _MISSES_KEY, _INVALIDATIONS_KEY])
+        pipe.hgetall(NAMESPACE_HITS_KEY)
+        pipe.hgetall(NAMESPACE_MISSES_KEY)
+        pipe.hgetall(NAMESPACE_LATENCY_KEY)
+        counters, ns_hits, ns_misses, ns_latency = pipe.execute()
+        hits, misses, invalidations = (int(value or 0) for value in counters)
+        namespaces = _namespace_stats(ns_hits or {}, ns_misses or {}, ns_latency or {})
     except Exception:
         # Fallback to zeros on Redis failure
         hits = misses = invalidations = 0
+        namespaces = {}
 
     total = hits + misses
     hit_rate = (hits / total) if total > 0 else 0.0
@@ -208,10 +260,11 @@ def get_cache_stats():
         "misses": misses,
         "invalidations": invalidations,
         "hit_rate": hit_rate,
+        "namespaces": namespaces,
     }
 
 
-# Note: cache counters are incremented directly in Redis by `redis_client`.
+# Note: cache counters are buffered and flushed to Redis by `redis_client`.
 
 
 def get_cache_hit_rate() -> float:
@@ -222,9 +275,9 @@ def get_cache_hit_rate() -> float:
 
 def reset_cache_stats():
     """Reset statistics counters."""
+    discard_counters(_HITS_KEY, _MISSES_KEY, _INVALIDATIONS_KEY, *NAMESPACE_KEYS)
     try:
-        _redis.set(_HITS_KEY, 0)
-        _redis.set(_MISSES_KEY, 0)
-        _redis.set(_INVALIDATIONS_KEY, 0)
+        _redis.mset({_HITS_KEY: 0, _MISSES_KEY: 0, _INVALIDATIONS_KEY: 0})
+        _redis.delete(*NAMESPACE_KEYS)
     except Exception:
         pass
@@ -0,0 +1,157 @@
+"""
+Cache warming service.
+
+Responsibilities:
+- Build a warm-up plan from recorded traffic (top queries, most active users)
+- Precompute base + ranked search caches per A/B group and cluster
+- Precompute recommendations for the most active users
+- Pace work so a warm-up never floods the DB
+- Report progress through a caller-supplied callback
+
+Run via the RQ job in backend/services/rq_jobs.py after a retrain, a deploy
+or a bulk invalidation, so the first wave of real traffic hits warm caches.
+"""
+
+import os
+import time
+import logging
+from typing import Callable, List, Optional, Tuple
+
+from backend.services.db_event_service import get_top_queries, get_most_active_users
+from backend.services.db_user_manager import get_cluster_ids
+from backend.utils.intent import detect_intent
+from backend.utils.search import search_products
+
+
+logger = logging.getLogger("cache_warming")
+
+
+# ---------- CONFIG ----------
+
+WARM_TOP_QUERIES = int(os.getenv("CACHE_WARM_TOP_QUERIES", "50"))
+WARM_TOP_USERS = int(os.getenv("CACHE_WARM_TOP_USERS", "100"))
+# Look-back window for "top" traffic; 0 means all history.
+WARM_LOOKBACK_HOURS = int(os.getenv("CACHE_WARM_LOOKBACK_HOURS", str(7 * 24)))
+# Upper bound on cache computations per second (each one is >= 1 DB round trip).
+WARM_MAX_OPS_PER_SECOND = float(os.getenv("CACHE_WARM_MAX_OPS_PER_SECOND", "10"))
+
+AB_GROUPS = ("A", "B")
+
+TASK_SEARCH = "search"
+TASK_RECOMMENDATIONS = "recommendations"
+
+
+# ---------- PLAN ----------
+
+def build_warm_plan(
+    top_queries: int = WARM_TOP_QUERIES,
+    top_users: int = WARM_TOP_USERS,
+    lookback_hours: int = WARM_LOOKBACK_HOURS,
+) -> List[Tuple]:
+    """
+    Return an ordered list of warm-up tasks:
+        ("search", query, ab_group, cluster)
+        ("recommendations", user_id)
+
+    Queries come first (they're shared by every user), most popular first,
+    so a rate-limited or interrupted run still covers the hottest keys.
+    """
+    since = lookback_hours or None
+    queries = [q for q, _ in get_top_queries(limit=top_queries, since_hours=since)]
+    clusters: List[Optional[int]] = [None] + get_cluster_ids()
+
+    plan: List[Tuple] = []
+    for query in queries:
+        for group in AB_GROUPS:
+            for cluster in clusters:
+                plan.append((TASK_SEARCH, query, group, cluster))
+
+    users = [u for u, _ in get_most_active_users(
+        limit=top_users,
+        since_hours=since,
+        event_types=["click", "add_to_cart"],
+    )]
+    plan.extend((TASK_RECOMMENDATIONS, user_id) for user_id in users)
+    return plan
+
+
+# ---------- EXECUTION ----------
+
+def _warm_search(query: str, ab_group: str, cluster) -> int:
+    # Mirror search_controller: the cache keys are derived from the cleaned
+    # query and the intent-detected category, not the raw string.
+    intent = detect_intent(query)
+    results = search_products(
+        intent["clean_query"],
+        None,
+        cluster=cluster,
+        ab_group=ab_group,
+        category=intent["suggested_category"],
+        force_refresh=True,
+    )
+    return len(results)
+
+
+def _warm_recommendations(user_id: str) -> int:
+    # Imported lazily: the controller pulls in Flask-side modules that the
+    # RQ worker only needs when this task actually runs.
+    from backend.controllers.recommendations_controller import recommendations_controller
+    result, status = recommendations_controller(user_id, force_refresh=True)
+    return len(result.get("similar", [])) if status == 200 else 0
+
+
+def run_warm_plan(
+    plan: List[Tuple],
+    *,
+    max_ops_per_second: float = WARM_MAX_OPS_PER_SECOND,
+    progress: Optional[Callable[[dict], None]] = None,
+    sleep: Callable[[float], None] = time.sleep,
+) -> dict:
+    """
+    Execute a warm-up plan, pacing to at most max_ops_per_second.
+
+    Failures are counted and logged, never raised — a partially warmed cache
+    is still better than a cold one. `progress` (if given) is called after
+    every task with the running summary.
+    """
+    min_interval = 1.0 / max_ops_per_second if max_ops_per_second > 0 else 0.0
+    summary = {"total": len(plan), "done": 0, "failed": 0, "search": 0, "recommendations": 0}
+    t0 = time.perf_counter()
+
+    for task in plan:
+        started = time.perf_counter()
+        kind = task[0]
+        try:
+            if kind == TASK_SEARCH:
+                _warm_search(*task[1:])
+            elif kind == TASK_RECOMMENDATIONS:
+                _warm_recommendations(*task[1:])
+            else:
+                raise ValueError(f"unknown warm task {kind!r}")
+            summary[kind] += 1
+        except Exception:
+            summary["failed"] += 1
+            logger.warning("Cache warm task failed: %r", task, exc_info=True)
+
+        summary["done"] += 1
+        if progress is not None:
+            progress(dict(summary))
+
+        elapsed = time.perf_counter() - started
+        if elapsed < min_interval:
+            sleep(min_interval - elapsed)
+
+    summary["elapsed_seconds"] = round(time.perf_counter() - t0, 2)
+    logger.info(
+        "Cache warm-up finished: %d/%d tasks (%d failed) in %.1fs",
+        summary["done"] - summary["failed"], summary["total"],
+        summary["failed"], summary["elapsed_seconds"],
+    )
+    return summary
+
+
+def warm_caches(progress: Optional[Callable[[dict], None]] = None, **plan_kwargs) -> dict:
+    """Build the default warm-up plan and run it."""
+    plan = build_warm_plan(**plan_kwargs)
+    logger.info("Cache warm-up planned: %d tasks", len(plan))
+    return run_warm_plan(plan, progress=progress)
@@ -1,6 +1,7 @@
 from sqlalchemy.dialects.postgresql import insert as pg_insert
 from sqlalchemy.dialects.sqlite import insert as sqlite_insert
 from backend.utils.database import get_db_session
+from backend.services.cart.cache import invalidate_cart
 from backend.models import CartItem, utcnow
 
 def add_to_cart(user_id, product_id, quantity=1):
@@ -24,6 +25,7 @@ def add_to_cart(user_id, product_id, quantity=1):
         )
         session.execute(stmt)
         session.commit()
+        invalidate_cart(user_id)
         return True
     except Exception as e:
         session.rollback()
@@ -0,0 +1,63 @@
+"""
+Per-user cart view cache.
+
+The cart is fetched on every page; its response (items joined with their
+products, totals) is cached in Redis under cart:{user_id} and dropped by
+each cart write (add / remove / clear) after it commits. CART_CACHE_SECONDS
+bounds staleness from product edits.
+
+A read racing a write could otherwise cache the cart it loaded before the
+write committed, after the write's delete. Each write therefore also bumps
+a per-user generation (cartgen:{user_id}); readers note the generation
+before loading, stamp it on the entry they cache, and serve an entry only
+while its stamp is still the current generation.
+"""
+import os
+
+from backend.services.redis_client import _redis, redis_mget_json, redis_setex_json
+
+CART_CACHE_SECONDS = int(os.getenv("CART_CACHE_SECONDS", "120"))
+# Idle generation counters expire; far longer than any racing read
+CART_GENERATION_SECONDS = 24 * 3600
+
+
+def cart_cache_key(user_id):
+    return f"cart:{user_id}"
+
+
+def cart_generation_key(user_id):
+    # Outside cart:* so invalidate_all_cart_caches() leaves counters alone
+    return f"cartgen:{user_id}"
+
+
+def get_cached_cart(user_id):
+    """
+    (cart, generation): the cached cart, or None on a miss or an entry from
+    an older generation, and the generation to pass to cache_cart().
+    """
+    key = cart_cache_key(user_id)
+    entry, generation = redis_mget_json([key, cart_generation_key(user_id)], counted=(key,))
+    generation = generation if isinstance(generation, int) else 0
+    if isinstance(entry, dict) and entry.get("generation") == generation:
+        return entry.get("cart"), generation
+    return None, generation
+
+
+def cache_cart(user_id, cart, generation):
+    return redis_setex_json(
+        cart_cache_key(user_id),
+        {"generation": generation, "cart": cart},
+        CART_CACHE_SECONDS,
+    )
+
+
+def invalidate_cart(user_id):
+    try:
+        pipe = _redis.pipeline(transaction=False)
+        pipe.incr(cart_generation_key(user_id))
+        pipe.expire(cart_generation_key(user_id), CART_GENERATION_SECONDS)
+        pipe.delete(cart_cache_key(user_id))
+        pipe.execute()
+    except Exception:
+        # Expires on its own within CART_CACHE_SECONDS
+        pass
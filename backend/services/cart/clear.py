@@ -1,4 +1,5 @@
 from backend.utils.database import get_db_session
+from backend.services.cart.cache import invalidate_cart
 from backend.models import CartItem
 
 def clear_cart(user_id):
@@ -6,6 +7,7 @@ def clear_cart(user_id):
     try:
         session.query(CartItem).filter_by(user_id=user_id).delete()
         session.commit()
+        invalidate_cart(user_id)
         return True
     except Exception as e:
         session.rollback()
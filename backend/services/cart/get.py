@@ -1,10 +1,43 @@
+from sqlalchemy import select
 from backend.utils.database import get_db_session
-from backend.models import CartItem
+from backend.models import CartItem, Product
+
+MAX_CART_ITEMS = 100
+
+# serialize_product() fields, selected as plain columns (no ORM objects)
+_PRODUCT_COLUMNS = (
+    Product.id.label("product_id"),
+    Product.title,
+    Product.description,
+    Product.category,
+    Product.price,
+    Product.rating,
+    Product.review_count,
+    Product.popularity,
+    Product.created_at,
+)
 
 def get_cart(user_id):
     session = get_db_session()
     try:
-        items = session.query(CartItem).filter_by(user_id=user_id).limit(100).all()
+        items = session.query(CartItem).filter_by(user_id=user_id).limit(MAX_CART_ITEMS).all()
         return {str(item.product_id): item.quantity for item in items}
     finally:
         session.close()
+
+def get_cart_items(user_id):
+    """Cart rows joined with their products in one query: product dicts
+    (serialize_product fields) plus "quantity", in the order added. Items
+    whose product no longer exists are skipped."""
+    stmt = (
+        select(*_PRODUCT_COLUMNS, CartItem.quantity)
+        .join_from(CartItem, Product, Product.id == CartItem.product_id)
+        .where(CartItem.user_id == user_id)
+        .order_by(CartItem.id)
+        .limit(MAX_CART_ITEMS)
+    )
+    session = get_db_session()
+    try:
+        return [dict(row) for row in session.execute(stmt).mappings()]
+    finally:
+        session.close()
@@ -1,4 +1,5 @@
 from backend.utils.database import get_db_session
+from backend.services.cart.cache import invalidate_cart
 from backend.models import CartItem
 
 def remove_from_cart(user_id, product_id, quantity=1):
@@ -23,6 +24,7 @@ def remove_from_cart(user_id, product_id, quantity=1):
             else:
                 session.delete(item)
             session.commit()
+            invalidate_cart(user_id)
             return True
         return False
     except Exception as e:
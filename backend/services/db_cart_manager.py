@@ -1,4 +1,5 @@
 from backend.services.cart.add import add_to_cart
 from backend.services.cart.remove import remove_from_cart
 from backend.services.cart.clear import clear_cart
-from backend.services.cart.get import get_cart
+from backend.services.cart.get import get_cart, get_cart_items
+from backend.services.cart.cache import get_cached_cart, cache_cart, invalidate_cart
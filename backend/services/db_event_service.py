@@ -1,10 +1,11 @@
 import logging
 from datetime import datetime, timezone, timedelta
 
-from backend.services.event.creation import create_search_event
+from backend.services.event.creation import create_search_event, create_search_events_bulk, search_event_row
 from backend.services.event.query import _build_event_query
 from backend.services.event.convert import _events_to_dataframe
-from backend.utils.database import get_db_session
+from backend.services.event.top import get_top_queries, get_most_active_users
+from backend.utils.database import get_db_session, get_read_session
 from backend.models import SearchEvent
 
 logger = logging.getLogger("event_logger")
@@ -14,8 +15,17 @@ def get_events_df(
     limit=1000,
     user_id=None,
     event_types=None,
+    use_replica=None,
 ):
-    with get_db_session() as session:
+    """
+    Events as a DataFrame. Bulk / analytics scans read from the replica
+    (get_read_session); a single user's events default to the primary so
+    serving paths (recent boosts, recommendations) see the event just
+    logged. use_replica=True/False overrides that choice.
+    """
+    if use_replica is None:
+        use_replica = user_id is None
+    with (get_read_session() if use_replica else get_db_session()) as session:
         query = _build_event_query(
             session,
             user_id=user_id,
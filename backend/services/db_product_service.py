@@ -1,6 +1,6 @@
 from backend.services.product.shared import serialize_product, DEFAULT_LIMIT
 from backend.services.product.read import get_all_products, get_products_by_ids, get_product_by_id, get_products_paginated
 from backend.services.product.dataframe import get_products_df
-from backend.services.product.update import update_product_popularity, update_product
+from backend.services.product.update import update_product_popularity, update_products_popularity, update_product
 from backend.services.product.create import create_product
 from backend.services.product.delete import delete_product
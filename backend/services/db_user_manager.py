@@ -2,3 +2,4 @@ from backend.services.user.get_by_id import get_user_by_id
 from backend.services.user.get_by_username import get_user_by_username
 from backend.services.user.create import create_user
 from backend.services.user.update_cluster import update_user_cluster
+from backend.services.user.list_clusters import get_cluster_ids
@@ -1,7 +1,39 @@
+import io
+import os
 from datetime import datetime, timezone
+from sqlalchemy import insert
 from .shared import session_scope, normalize_user_id, logger
 from backend.models import SearchEvent
 
+# Rows per INSERT statement / executemany round
+EVENT_INSERT_CHUNK = int(os.getenv("EVENT_INSERT_CHUNK", "1000"))
+# PostgreSQL: batches at least this large are streamed with COPY instead
+EVENT_COPY_THRESHOLD = int(os.getenv("EVENT_COPY_THRESHOLD", "5000"))
+
+_EVENT_COLUMNS = ("user_id", "query", "product_id", "event_type", "group", "position", "timestamp")
+
+def search_event_row(
+    user_id,
+    query,
+    product_id,
+    event_type,
+    group="A",
+    position=None,
+    timestamp=None,
+):
+    """Column values for one SearchEvent, normalized as create_search_event
+    stores them. timestamp defaults to now (pass the time it happened when
+    the row is written later, e.g. in a batch)."""
+    return {
+        "user_id": normalize_user_id(user_id) or "",
+        "query": query,
+        "product_id": int(product_id) if product_id else None,
+        "event_type": event_type,
+        "group": group,
+        "position": position,
+        "timestamp": timestamp or datetime.now(timezone.utc),
+    }
+
 def create_search_event(
     user_id,
     query,
@@ -10,16 +42,69 @@ def create_search_event(
     group="A",
     position=None,
 ):
-    normalized_user_id = normalize_user_id(user_id) or ""
     with session_scope() as session:
-        event = SearchEvent(
-            user_id=normalized_user_id,
-            query=query,
-            product_id=int(product_id) if product_id else None,
-            event_type=event_type,
-            group=group,
-            position=position,
-            timestamp=datetime.now(timezone.utc),
-        )
+        event = SearchEvent(**search_event_row(
+            user_id, query, product_id, event_type, group=group, position=position,
+        ))
         session.add(event)
         return event
+
+def _complete_row(row):
+    """All insert columns for a row dict (search_event_row output, or a
+    partial dict from import tooling: missing columns are NULL, timestamp
+    defaults to now)."""
+    values = {column: row.get(column) for column in _EVENT_COLUMNS}
+    if values["timestamp"] is None:
+        values["timestamp"] = datetime.now(timezone.utc)
+    return values
+
+def _csv_field(value):
+    # COPY ... CSV: unquoted empty = NULL, anything quoted is a literal
+    if value is None:
+        return ""
+    if isinstance(value, datetime):
+        value = value.isoformat()
+    return '"' + str(value).replace('"', '""') + '"'
+
+def events_copy_payload(rows):
+    """CSV body for COPY search_events (_EVENT_COLUMNS) FROM STDIN."""
+    buffer = io.StringIO()
+    for row in rows:
+        buffer.write(",".join(_csv_field(row[column]) for column in _EVENT_COLUMNS))
+        buffer.write("\n")
+    buffer.seek(0)
+    return buffer
+
+def _copy_events(session, rows):
+    columns = ", ".join(f'"{column}"' for column in _EVENT_COLUMNS)
+    cursor = session.connection().connection.cursor()
+    try:
+        cursor.copy_expert(
+            f"COPY {SearchEvent.__tablename__} ({columns}) FROM STDIN WITH (FORMAT csv)",
+            events_copy_payload(rows),
+        )
+    finally:
+        cursor.close()
+
+def create_search_events_bulk(rows, chunk_size=None):
+    """
+    Insert many events in one transaction instead of a session + commit
+    each: multi-row Core INSERTs of chunk_size rows (EVENT_INSERT_CHUNK),
+    or a single COPY on PostgreSQL for batches of EVENT_COPY_THRESHOLD+.
+
+    rows are search_event_row dicts (or partial dicts, see _complete_row).
+    Returns the number inserted; raises on failure with nothing written.
+    """
+    rows = [_complete_row(row) for row in rows]
+    if not rows:
+        return 0
+    chunk_size = chunk_size or EVENT_INSERT_CHUNK
+    with session_scope() as session:
+        if session.bind.dialect.name == "postgresql" and len(rows) >= EVENT_COPY_THRESHOLD:
+            _copy_events(session, rows)
+        else:
+            table = SearchEvent.__table__
+            for start in range(0, len(rows), chunk_size):
+                session.execute(insert(table), rows[start:start + chunk_size])
+    logger.debug("Inserted %d search events", len(rows))
+    return len(rows)
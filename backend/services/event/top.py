@@ -0,0 +1,50 @@
+from datetime import datetime, timezone, timedelta
+from sqlalchemy import desc, func
+from backend.utils.database import get_read_session
+from backend.models import SearchEvent
+
+
+def _since(query, since_hours):
+    if since_hours:
+        cutoff = datetime.now(timezone.utc) - timedelta(hours=since_hours)
+        query = query.filter(SearchEvent.timestamp >= cutoff)
+    return query
+
+
+def get_top_queries(limit=50, since_hours=None):
+    """Most frequent non-empty search queries, most frequent first.
+
+    Aggregated in SQL so batch jobs (cache warming) don't have to pull the
+    whole event history into a DataFrame just to count it.
+    """
+    with get_read_session() as session:
+        count = func.count(SearchEvent.id)
+        query = (
+            session.query(SearchEvent.query, count)
+            .filter(SearchEvent.query.isnot(None), SearchEvent.query != "")
+        )
+        rows = (
+            _since(query, since_hours)
+            .group_by(SearchEvent.query)
+            .order_by(desc(count))
+            .limit(limit)
+            .all()
+        )
+        return [(q, int(n)) for q, n in rows]
+
+
+def get_most_active_users(limit=100, since_hours=None, event_types=None):
+    """User ids with the most events, most active first. Anonymous ("") excluded."""
+    with get_read_session() as session:
+        count = func.count(SearchEvent.id)
+        query = session.query(SearchEvent.user_id, count).filter(SearchEvent.user_id != "")
+        if event_types:
+            query = query.filter(SearchEvent.event_type.in_(event_types))
+        rows = (
+            _since(query, since_hours)
+            .group_by(SearchEvent.user_id)
+            .order_by(desc(count))
+            .limit(limit)
+            .all()
+        )
+        return [(user_id, int(n)) for user_id, n in rows]
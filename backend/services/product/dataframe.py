@@ -1,46 +1,54 @@
 import pandas as pd
-from sqlalchemy import desc, func
-from .shared import get_db_session, Product, serialize_product, DEFAULT_LIMIT
+from sqlalchemy import desc, func, select
+from backend.utils.database import get_read_session
+from .shared import Product, serialize_product, DEFAULT_LIMIT
 
 
-def _is_postgres(session) -> bool:
-    return session.bind.dialect.name == "postgresql"
-
-
-def get_products_df(search_query=None, category_filter=None, limit=DEFAULT_LIMIT):
+def products_statement(search_query=None, category_filter=None, limit=DEFAULT_LIMIT, dialect="sqlite"):
     """
-    Returns products as a pandas DataFrame.
+    SELECT behind get_products_df, shared with the async search path.
 
     search_query: free-text search (Postgres full-text / SQLite LIKE)
     category_filter: exact category match (case-insensitive), applied in addition
                      to or independently of search_query
     """
-    with get_db_session() as session:
-        query = session.query(Product)
-        if search_query:
-            if _is_postgres(session):
-                ts_query = func.plainto_tsquery("english", search_query)
-                rank = func.ts_rank_cd(Product.search_vector, ts_query)
-                query = (
-                    query
-                    .filter(Product.search_vector.op("@@")(ts_query))
-                    .order_by(desc(rank), desc(Product.popularity))
-                )
-            else:
-                # SQLite/local fallback
-                pattern = f"%{search_query}%"
-                query = query.filter(
-                    (Product.title.ilike(pattern)) |
-                    (Product.description.ilike(pattern)) |
-                    (Product.category.ilike(pattern))
-                )
-        if category_filter:
-            query = query.filter(Product.category.ilike(category_filter))
-        if not search_query:
-            # Without text ranking, fall back to popularity order
-            query = query.order_by(desc(Product.popularity))
-        products = query.limit(limit).all()
-        df = pd.DataFrame([serialize_product(p) for p in products])
-        if "created_at" in df.columns:
-            df["created_at"] = pd.to_datetime(df["created_at"])
-        return df
+    stmt = select(Product)
+    if search_query:
+        if dialect == "postgresql":
+            ts_query = func.plainto_tsquery("english", search_query)
+            rank = func.ts_rank_cd(Product.search_vector, ts_query)
+            stmt = (
+                stmt
+                .where(Product.search_vector.op("@@")(ts_query))
+                .order_by(desc(rank), desc(Product.popularity))
+            )
+        else:
+            # SQLite/local fallback
+            pattern = f"%{search_query}%"
+            stmt = stmt.where(
+                (Product.title.ilike(pattern)) |
+                (Product.description.ilike(pattern)) |
+                (Product.category.ilike(pattern))
+            )
+    if category_filter:
+        stmt = stmt.where(Product.category.ilike(category_filter))
+    if not search_query:
+        # Without text ranking, fall back to popularity order
+        stmt = stmt.order_by(desc(Product.popularity))
+    return stmt.limit(limit)
+
+
+def products_frame(products) -> pd.DataFrame:
+    df = pd.DataFrame([serialize_product(p) for p in products])
+    if "created_at" in df.columns:
+        df["created_at"] = pd.to_datetime(df["created_at"])
+    return df
+
+
+def get_products_df(search_query=None, category_filter=None, limit=DEFAULT_LIMIT):
+    """
+    Returns products as a pandas DataFrame (see products_statement).
+    """
+    with get_read_session() as session:
+        stmt = products_statement(search_query, category_filter, limit, session.bind.dialect.name)
+        return products_frame(session.scalars(stmt).all())
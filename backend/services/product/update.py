@@ -1,4 +1,4 @@
-from sqlalchemy import update, text
+from sqlalchemy import bindparam, update, text
 from .shared import get_db_session, Product, serialize_product
 
 def update_product_popularity(product_id, increment):
@@ -9,8 +9,29 @@ def update_product_popularity(product_id, increment):
             .where(Product.id == int(product_id))
             .values(popularity=Product.popularity + increment)
         )
+        session.commit()
         return result.rowcount > 0
 
+def update_products_popularity(deltas):
+    """Apply aggregated {product_id: increment} popularity deltas in one
+    executemany and transaction. Returns the number of deltas applied."""
+    params = [
+        {"b_id": int(product_id), "b_delta": delta}
+        for product_id, delta in deltas.items() if delta
+    ]
+    if not params:
+        return 0
+    products = Product.__table__
+    with get_db_session() as session:
+        session.execute(
+            update(products)
+            .where(products.c.id == bindparam("b_id"))
+            .values(popularity=products.c.popularity + bindparam("b_delta")),
+            params,
+        )
+        session.commit()
+    return len(params)
+
 def update_product(product_id, **fields):
     """Partial update of editable product fields (title/description/category/price).
 
@@ -0,0 +1,51 @@
+"""
+Recommendation candidate service.
+
+Responsibilities:
+- Load the precomputed per-cluster candidate artifact (ml/recommendation_candidates.py)
+- Reload it when the batch job writes a new one (see artifact_cache.py)
+- Provide thread-safe, read-only access for the recommendations controller
+"""
+
+from typing import Optional, Tuple
+
+import numpy as np
+
+from backend.services.artifact_cache import ArtifactCache
+from ml.recommendation_candidates import (
+    CANDIDATES_PATH,
+    COLD_START_SEGMENT,
+    load_candidate_lists,
+    segment_for_cluster,
+)
+
+
+# ---------- STATE ----------
+
+_cache = ArtifactCache(
+    "recommendation candidates",
+    lambda: CANDIDATES_PATH,
+    load_candidate_lists,
+    empty={},
+)
+
+
+# ---------- PUBLIC API ----------
+
+def get_segment_candidates(cluster) -> Optional[Tuple[np.ndarray, np.ndarray]]:
+    """
+    (product_ids, scores) for the user's cluster, best first.
+
+    Falls back to the cold-start segment when the cluster has no list (e.g.
+    a cluster created after the last materialization). Returns None when no
+    artifact has been built yet, so callers can use the on-the-fly path.
+    """
+    lists = _cache.get() or {}
+    if not lists:
+        return None
+    return lists.get(segment_for_cluster(cluster)) or lists.get(COLD_START_SEGMENT)
+
+
+def reset_candidates_cache() -> None:
+    """Drop the in-memory copy; the next lookup reloads from disk."""
+    _cache.reset()
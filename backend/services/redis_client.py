@@ -1,6 +1,28 @@
+"""
+Shared Redis client and JSON cache helpers.
+
+Responsibilities:
+- One pooled client per process (_redis)
+- JSON get / set with TTL jitter, single-key and batched (MGET, pipelined
+  SETEX) so a request needs as few round trips as possible
+- Cache hit/miss/invalidation counters, buffered in-process and flushed to
+  Redis in one pipeline every CACHE_STATS_FLUSH_SECONDS instead of an INCR
+  per lookup
+- Per-namespace (key prefix: search_ranked, recommendations, analytics, ...)
+  hit/miss counts and lookup latency, kept in the NAMESPACE_*_KEY hashes
+
+Counters are flushed by the next cache operation after the interval
+elapses, by get_cache_stats() (this process's share) and at exit, so the
+dashboard can trail live traffic by up to the flush interval per worker.
+"""
 import os
 import json
+import time
+import atexit
 import random
+import threading
+from collections import Counter
+
 import redis
 
 REDIS_URL = os.getenv("REDIS_URL", "redis://localhost:6379/0")
@@ -15,6 +37,126 @@ _redis = redis.StrictRedis.from_url(
 )
 _TTL_JITTER_SECONDS = 30
 
+HITS_KEY = "cache:hits"
+MISSES_KEY = "cache:misses"
+INVALIDATIONS_KEY = "cache:invalidations"
+# Hashes of namespace -> count / total lookup microseconds
+NAMESPACE_HITS_KEY = "cache:ns:hits"
+NAMESPACE_MISSES_KEY = "cache:ns:misses"
+NAMESPACE_LATENCY_KEY = "cache:ns:lookup_us"
+NAMESPACE_KEYS = (NAMESPACE_HITS_KEY, NAMESPACE_MISSES_KEY, NAMESPACE_LATENCY_KEY)
+CACHE_STATS_FLUSH_SECONDS = float(os.getenv("CACHE_STATS_FLUSH_SECONDS", "5"))
+
+
+# ---------- BUFFERED COUNTERS ----------
+
+# Plain counter key -> INCRBY; (hash key, field) -> HINCRBY
+_pending: Counter = Counter()
+_pending_lock = threading.Lock()
+_last_flush = time.monotonic()
+
+
+def buffer_counter(key, amount: int = 1) -> bool:
+    """Add to a Redis counter locally; True when a flush is due."""
+    if amount:
+        with _pending_lock:
+            _pending[key] += amount
+    return time.monotonic() - _last_flush >= CACHE_STATS_FLUSH_SECONDS
+
+
+def incr_counter(key: str, amount: int = 1) -> None:
+    """Buffered INCRBY (flushed with the other counters)."""
+    if buffer_counter(key, amount):
+        flush_counters()
+
+
+def flush_counters() -> None:
+    """Send buffered counter increments to Redis in one pipeline."""
+    global _last_flush
+    with _pending_lock:
+        pending = {k: n for k, n in _pending.items() if n}
+        _pending.clear()
+        _last_flush = time.monotonic()
+    if not pending:
+        return
+    try:
+        pipe = _redis.pipeline(transaction=False)
+        for key, amount in pending.items():
+            if isinstance(key, tuple):
+                pipe.hincrby(key[0], key[1], amount)
+            else:
+                pipe.incrby(key, amount)
+        pipe.execute()
+    except Exception:
+        # Keep them for the next flush rather than losing the counts
+        with _pending_lock:
+            _pending.update(pending)
+
+
+def discard_counters(*keys) -> None:
+    """Drop unflushed increments (all, or just `keys`, hashes included) —
+    used when resetting."""
+    with _pending_lock:
+        if keys:
+            for key in list(_pending):
+                if (key[0] if isinstance(key, tuple) else key) in keys:
+                    del _pending[key]
+        else:
+            _pending.clear()
+
+
+def cache_namespace(key: str) -> str:
+    """Stats namespace of a cache key: its prefix before the first ':'."""
+    return str(key).split(":", 1)[0]
+
+
+def record_lookups(keys, values, counted, elapsed: float) -> bool:
+    """
+    Buffer hit/miss counts (global and per namespace) for the `counted`
+    keys of one MGET, each charged the round trip's latency. True when a
+    flush is due.
+    """
+    hits = misses = 0
+    latency_us = int(elapsed * 1_000_000)
+    per_namespace = Counter()
+    for key, value in zip(keys, values):
+        if key not in counted:
+            continue
+        namespace = cache_namespace(key)
+        if value is None:
+            misses += 1
+            per_namespace[(NAMESPACE_MISSES_KEY, namespace)] += 1
+        else:
+            hits += 1
+            per_namespace[(NAMESPACE_HITS_KEY, namespace)] += 1
+        per_namespace[(NAMESPACE_LATENCY_KEY, namespace)] += latency_us
+    if not (hits or misses):
+        return False
+    with _pending_lock:
+        _pending[HITS_KEY] += hits
+        _pending[MISSES_KEY] += misses
+        _pending.update(per_namespace)
+    return time.monotonic() - _last_flush >= CACHE_STATS_FLUSH_SECONDS
+
+
+atexit.register(flush_counters)
+
+
+# ---------- JSON CACHE ----------
+
+def _decode(value):
+    if value is None:
+        return None
+    try:
+        return json.loads(value)
+    except Exception:
+        # Corrupt cached value — treat as miss so caller re-fetches
+        return None
+
+
+def _jittered(ttl) -> int:
+    return max(1, int(ttl) + random.randint(0, _TTL_JITTER_SECONDS))
+
 
 def redis_get_json(key, *, count_stats=True):
     """
@@ -23,39 +165,64 @@ def redis_get_json(key, *, count_stats=True):
     count_stats=True  → record hit/miss in cache:hits / cache:misses.
     count_stats=False → internal/sub-caches that shouldn't skew dashboard stats.
     """
-    def _incr(counter):
-        if not count_stats:
-            return
-        try:
-            _redis.incr(counter)
-        except Exception:
-            pass
+    return redis_mget_json([key], counted=(key,) if count_stats else ())[0]
+
+
+def redis_mget_json(keys, *, counted=()):
+    """
+    Fetch and JSON-decode several keys in one MGET; misses, corrupt values
+    and Redis errors come back as None.
 
+    Only keys in `counted` record hit/miss (see count_stats above).
+    """
+    keys = list(keys)
+    if not keys:
+        return []
+    start = time.perf_counter()
     try:
-        value = _redis.get(key)
+        raw = _redis.mget(keys)
     except Exception:
         # Redis error: caller gets None, same outcome as a miss
-        _incr("cache:misses")
-        return None
+        raw = [None] * len(keys)
+    elapsed = time.perf_counter() - start
+
+    values = [_decode(value) for value in raw]
+    if counted and record_lookups(keys, values, counted, elapsed):
+        flush_counters()
+    return values
 
-    if value is None:
-        _incr("cache:misses")
-        return None
 
+def redis_setex_json(key, value, ttl):
     try:
-        parsed = json.loads(value)
-        _incr("cache:hits")
-        return parsed
+        _redis.setex(key, _jittered(ttl), json.dumps(value))
+        return True
     except Exception:
-        # Corrupt cached value — treat as miss so caller re-fetches
-        _incr("cache:misses")
-        return None
+        return False
 
 
-def redis_setex_json(key, value, ttl):
+def redis_msetex_json(mapping, ttl):
+    """
+    SETEX several keys in one pipelined round trip.
+
+    ttl is one TTL for every key or a {key: ttl} dict. Each key gets its
+    own jitter, as with redis_setex_json.
+    """
+    if not mapping:
+        return True
     try:
-        effective_ttl = max(1, int(ttl) + random.randint(0, _TTL_JITTER_SECONDS))
-        _redis.setex(key, effective_ttl, json.dumps(value))
+        pipe = _redis.pipeline(transaction=False)
+        for key, value in mapping.items():
+            key_ttl = ttl[key] if isinstance(ttl, dict) else ttl
+            pipe.setex(key, _jittered(key_ttl), json.dumps(value))
+        pipe.execute()
         return True
     except Exception:
         return False
+
+
+def redis_msetex_entries(entries):
+    """redis_msetex_json for collected {key: (value, ttl)} cache entries."""
+    return redis_msetex_json(
+        {key: value for key, (value, _) in entries.items()},
+        {key: ttl for key, (_, ttl) in entries.items()},
+    )
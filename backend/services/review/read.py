@@ -1,4 +1,4 @@
-from backend.utils.database import get_db_session
+from backend.utils.database import get_read_session
 from backend.models import Review, User
 
 DEFAULT_LIMIT = 50
@@ -6,7 +6,7 @@ DEFAULT_LIMIT = 50
 
 def get_reviews_for_product(product_id, limit=DEFAULT_LIMIT, cursor=0):
     """Most recent reviews first, with the reviewer's username attached."""
-    session = get_db_session()
+    session = get_read_session()
     try:
         rows = (
             session.query(Review, User.username)
@@ -5,18 +5,28 @@ Responsibilities:
 - Enqueue retrain jobs
 - Prevent concurrent retraining via distributed lock
 - Run model retrain followed by cluster assignment
+- Materialize per-cluster recommendation candidates (post-retrain + nightly)
+- Build the item-to-item co-interaction neighbour index
+- Build the memory-mapped user-profile store (post-retrain + periodic)
+- Warm search/recommendation caches after retrain, deploy or invalidation
 - Provide retries, timeouts, and observability
 """
 
 import os
 import logging
 import redis
-from rq import Queue, Retry
+from rq import Queue, Retry, get_current_job
 from datetime import timedelta
 
 from ml.train_ranker import main as train_ranker_main
 from ml.assign_user_clusters import assign_clusters_to_users
+from ml.recommendation_candidates import materialize_candidates
+from ml.item_similarity import build_item_neighbors
+from ml.content_similarity import build_content_neighbors
+from ml.semantic_index import build_semantic_search_index
+from ml.profile_store import build_profile_store
 from backend.services.db_event_service import purge_old_events
+from backend.services.cache_warming import warm_caches
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -32,6 +42,12 @@ RESULT_TTL_SECONDS = 24 * 60 * 60      # Keep job result for 24h
 RETRAIN_LOCK_KEY = "lock:retrain_and_cluster"
 RETRAIN_LOCK_TTL = 60 * 60              # Lock auto-expires after 1h
 
+WARM_QUEUE_NAME = "default"
+WARM_JOB_TIMEOUT_SECONDS = 30 * 60
+WARM_LOCK_KEY = "lock:warm_caches"
+WARM_LOCK_TTL = 30 * 60
+WARM_PROGRESS_EVERY = 10                # Persist job.meta every N tasks
+
 
 # ---------- SETUP ----------
 
@@ -51,6 +67,12 @@ queue = Queue(
     default_timeout=JOB_TIMEOUT_SECONDS,
 )
 
+warm_queue = Queue(
+    name=WARM_QUEUE_NAME,
+    connection=redis_conn,
+    default_timeout=WARM_JOB_TIMEOUT_SECONDS,
+)
+
 
 # ---------- WORKER JOB ----------
 
@@ -82,6 +104,28 @@ def retrain_and_cluster():
         assign_clusters_to_users()
         logger.info("[RQ] User clustering completed")
 
+        logger.info("[RQ] Building user profile store")
+        build_profile_store()
+        logger.info("[RQ] User profile store built")
+
+        # Depends on the new model and cluster assignments, so it runs here
+        # rather than as a separate job that could race the retrain.
+        logger.info("[RQ] Materializing recommendation candidates")
+        materialize_candidates()
+        logger.info("[RQ] Recommendation candidates materialized")
+
+        logger.info("[RQ] Building item co-interaction neighbour index")
+        build_item_neighbors()
+        logger.info("[RQ] Item neighbour index built")
+
+        logger.info("[RQ] Building content neighbour index")
+        build_content_neighbors()
+        logger.info("[RQ] Content neighbour index built")
+
+        logger.info("[RQ] Building semantic search index")
+        build_semantic_search_index()
+        logger.info("[RQ] Semantic search index built")
+
         logger.info("[RQ] Purging search events older than 90 days")
         purge_old_events(retention_days=90)
 
@@ -95,6 +139,126 @@ def retrain_and_cluster():
         except Exception:
             pass
 
+    # New model + clusters change every ranked result; re-warm the hot keys
+    # in a separate job so this one isn't held open (or retried) for it.
+    try:
+        enqueue_warm_caches()
+    except Exception:
+        logger.exception("Failed to enqueue cache warm-up after retrain")
+
+
+def materialize_candidates_job():
+    """
+    RQ job: rebuild per-cluster recommendation candidates and the item
+    neighbour indexes (co-interaction + content) and the semantic search
+    index without retraining.
+    Intended for a nightly schedule (e.g. cron running `--materialize`) so
+    lists pick up popularity/catalog drift between retrains.
+    """
+    lock = redis_conn.lock(
+        RETRAIN_LOCK_KEY,
+        timeout=RETRAIN_LOCK_TTL,
+        blocking=False,
+    )
+
+    # Shares the retrain lock: a retrain materializes candidates itself.
+    if not lock.acquire(blocking=False):
+        logger.warning("Retrain job running; skipping standalone candidate materialization.")
+        return None
+
+    try:
+        logger.info("[RQ] Materializing recommendation candidates")
+        segments = materialize_candidates()
+        logger.info("[RQ] Materialized candidates for %d segments", segments)
+
+        logger.info("[RQ] Building item co-interaction neighbour index")
+        items = build_item_neighbors()
+        logger.info("[RQ] Item neighbour index built for %d items", items)
+
+        logger.info("[RQ] Building content neighbour index")
+        items = build_content_neighbors()
+        logger.info("[RQ] Content neighbour index built for %d items", items)
+
+        logger.info("[RQ] Building semantic search index")
+        items = build_semantic_search_index()
+        logger.info("[RQ] Semantic search index built for %d items", items)
+
+        logger.info("[RQ] Building user profile store")
+        users = build_profile_store()
+        logger.info("[RQ] User profile store built for %d users", users)
+        return segments
+
+    except Exception:
+        logger.exception("Candidate materialization job failed")
+        raise
+
+    finally:
+        try:
+            lock.release()
+        except Exception:
+            pass
+
+
+def build_profile_store_job():
+    """
+    RQ job: rebuild the memory-mapped user-profile store from the event
+    history. Cheap compared to a retrain; intended to run every few minutes
+    (e.g. cron running `--profiles`) so web workers pick up fresh
+    preferences without each rebuilding profiles themselves.
+    """
+    logger.info("[RQ] Building user profile store")
+    users = build_profile_store()
+    logger.info("[RQ] User profile store built for %d users", users)
+    return users
+
+
+def warm_caches_job():
+    """
+    RQ job:
+    - Precomputes search caches for top queries per A/B group and cluster
+    - Precomputes recommendations for the most active users
+    Progress is published in job.meta["warm_progress"].
+    Uses a Redis lock so overlapping triggers don't double the DB load.
+    """
+    lock = redis_conn.lock(
+        WARM_LOCK_KEY,
+        timeout=WARM_LOCK_TTL,
+        blocking=False,
+    )
+
+    if not lock.acquire(blocking=False):
+        logger.warning("Cache warm-up already running. Skipping duplicate execution.")
+        return None
+
+    job = get_current_job()
+
+    def _report(summary):
+        if job is None:
+            return
+        if summary["done"] % WARM_PROGRESS_EVERY and summary["done"] != summary["total"]:
+            return
+        try:
+            job.meta["warm_progress"] = summary
+            job.save_meta()
+        except Exception:
+            pass
+
+    try:
+        logger.info("[RQ] Starting cache warm-up")
+        summary = warm_caches(progress=_report)
+        logger.info("[RQ] Cache warm-up completed: %s", summary)
+        return summary
+
+    except Exception:
+        logger.exception("Cache warm-up job failed")
+        raise
+
+    finally:
+        try:
+            lock.release()
+        except Exception:
+            pass
+
 
 # ---------- ENQUEUE API ----------
 
@@ -114,6 +278,37 @@ def enqueue_retrain_and_cluster():
     )
 
 
+def enqueue_materialize_candidates():
+    """Enqueue a standalone recommendation-candidate materialization."""
+    return queue.enqueue(
+        materialize_candidates_job,
+        retry=Retry(max=2, interval=[300, 900]),
+        job_timeout=JOB_TIMEOUT_SECONDS,
+        result_ttl=RESULT_TTL_SECONDS,
+    )
+
+
+def enqueue_build_profile_store():
+    """Enqueue a user-profile store rebuild."""
+    return queue.enqueue(
+        build_profile_store_job,
+        job_timeout=JOB_TIMEOUT_SECONDS,
+        result_ttl=RESULT_TTL_SECONDS,
+    )
+
+
+def enqueue_warm_caches():
+    """
+    Enqueue a cache warm-up job.
+    Call after a retrain, a deploy, or a bulk cache invalidation.
+    """
+    return warm_queue.enqueue(
+        warm_caches_job,
+        job_timeout=WARM_JOB_TIMEOUT_SECONDS,
+        result_ttl=RESULT_TTL_SECONDS,
+    )
+
+
 # ---------- CLI ----------
 
 def main():
@@ -125,6 +320,24 @@ def main():
         job = enqueue_retrain_and_cluster()
         print(f"Enqueued retrain + cluster job {job.id} on queue '{QUEUE_NAME}' with status '{job.get_status()}'")
         return
+
+    if len(sys.argv) > 1 and sys.argv[1] == "--materialize":
+        # Nightly hook: rebuild recommendation candidates (requires worker to be running)
+        job = enqueue_materialize_candidates()
+        print(f"Enqueued candidate materialization job {job.id} on queue '{QUEUE_NAME}' with status '{job.get_status()}'")
+        return
+
+    if len(sys.argv) > 1 and sys.argv[1] == "--profiles":
+        # Periodic hook: rebuild the user-profile store (requires worker to be running)
+        job = enqueue_build_profile_store()
+        print(f"Enqueued profile store job {job.id} on queue '{QUEUE_NAME}' with status '{job.get_status()}'")
+        return
+
+    if len(sys.argv) > 1 and sys.argv[1] == "--warm":
+        # Post-deploy hook: enqueue a cache warm-up (requires worker to be running)
+        job = enqueue_warm_caches()
+        print(f"Enqueued cache warm-up job {job.id} on queue '{WARM_QUEUE_NAME}' with status '{job.get_status()}'")
+        return
     
     # Run training directly (no RQ)
     print("Running retrain + cluster directly (no RQ)...")
@@ -0,0 +1,47 @@
+"""
+Semantic search service.
+
+Responsibilities:
+- Load the LSA + IVF semantic index (ml/semantic_index.py)
+- Reload it when the batch job writes a new one (see artifact_cache.py)
+- Return approximate nearest-neighbour product ids for a query
+"""
+
+import logging
+from typing import List
+
+from backend.services.artifact_cache import ArtifactCache
+from ml.semantic_index import SEMANTIC_INDEX_PATH, load_semantic_index, search_index
+
+
+logger = logging.getLogger("semantic_search")
+
+
+# ---------- STATE ----------
+
+_cache = ArtifactCache(
+    "semantic index",
+    lambda: SEMANTIC_INDEX_PATH,
+    load_semantic_index,
+)
+
+
+# ---------- PUBLIC API ----------
+
+def semantic_product_ids(query: str, top_k: int = 50, min_score: float = 0.0) -> List[int]:
+    """
+    Product ids nearest to `query`, best first. Empty when no index has
+    been built or the query has no known terms — callers then use lexical
+    results alone.
+    """
+    try:
+        hits = search_index(_cache.get(), query, top_k=top_k, min_score=min_score)
+    except Exception:
+        logger.exception("Semantic search failed")
+        return []
+    return [pid for pid, _ in hits]
+
+
+def reset_semantic_cache() -> None:
+    """Drop the in-memory copy; the next lookup reloads from disk."""
+    _cache.reset()
@@ -0,0 +1,88 @@
+"""
+Item similarity service.
+
+Responsibilities:
+- Load the co-interaction neighbour index (ml/item_similarity.py) and the
+  content (TF-IDF) neighbour index (ml/content_similarity.py)
+- Reload them when the batch job writes new ones (see artifact_cache.py)
+- Expand a user's recent products into similar products without a catalog scan,
+  falling back to content neighbours for items with no interaction history
+"""
+
+from typing import Dict, List
+
+from backend.services.artifact_cache import ArtifactCache
+from ml.item_similarity import (
+    NEIGHBORS_PATH,
+    expand_neighbors,
+    load_neighbor_index,
+    seeds_with_neighbors,
+)
+from ml.content_similarity import CONTENT_NEIGHBORS_PATH, load_content_index
+
+
+# ---------- CONFIG ----------
+
+# Weight of the i-th most recent seed: the newest interaction counts most.
+RECENCY_DECAY = 0.8
+
+# Content similarity is a weaker signal than observed co-interaction, so its
+# scores are scaled down before the two are merged.
+CONTENT_WEIGHT = 0.5
+
+
+# ---------- STATE ----------
+
+_cache = ArtifactCache(
+    "item neighbours",
+    lambda: NEIGHBORS_PATH,
+    load_neighbor_index,
+)
+
+_content_cache = ArtifactCache(
+    "content neighbours",
+    lambda: CONTENT_NEIGHBORS_PATH,
+    load_content_index,
+)
+
+
+# ---------- PUBLIC API ----------
+
+def get_similar_product_ids(recent_ids: List[int], limit: int = 20) -> Dict[int, float]:
+    """
+    {product_id: similarity} for neighbours of `recent_ids` (most recent
+    first), excluding the recent items themselves.
+
+    Seeds with co-interaction neighbours use those; seeds without any (new
+    or rarely-seen products) use their content neighbours instead. Empty
+    when no index has been built yet or none of the seeds have neighbours.
+    """
+    if not recent_ids:
+        return {}
+
+    weights = [RECENCY_DECAY ** i for i in range(len(recent_ids))]
+    index = _cache.get()
+    merged = expand_neighbors(index, recent_ids, limit=limit, weights=weights)
+
+    covered = seeds_with_neighbors(index, recent_ids)
+    cold = [(pid, w) for pid, w in zip(recent_ids, weights) if int(pid) not in covered]
+    if cold:
+        content = expand_neighbors(
+            _content_cache.get(),
+            [pid for pid, _ in cold],
+            limit=limit,
+            weights=[CONTENT_WEIGHT * w for _, w in cold],
+        )
+        recent_set = {int(pid) for pid in recent_ids}
+        for pid, score in content.items():
+            if pid not in recent_set:
+                merged[pid] = merged.get(pid, 0.0) + score
+
+    best = sorted(merged.items(), key=lambda kv: kv[1], reverse=True)[:limit]
+    return dict(best)
+
+
+def reset_similarity_cache() -> None:
+    """Drop the in-memory copies; the next lookup reloads from disk."""
+    _cache.reset()
+    _content_cache.reset()
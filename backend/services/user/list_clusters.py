@@ -0,0 +1,16 @@
+from backend.utils.database import get_db_session
+from backend.models import User
+
+def get_cluster_ids():
+    """Distinct cluster ids currently assigned to at least one user, ascending."""
+    session = get_db_session()
+    try:
+        rows = (
+            session.query(User.cluster)
+            .filter(User.cluster.isnot(None))
+            .distinct()
+            .all()
+        )
+        return sorted(int(cluster) for (cluster,) in rows)
+    finally:
+        session.close()
@@ -6,18 +6,30 @@ Responsibilities:
 - Refresh profiles on a fixed interval (async to prevent blocking)
 - Allow forced refresh
 - Provide thread-safe access
+- Serve the memory-mapped profile store (ml/profile_store.py) when the batch
+  jobs have built one, instead of rebuilding profiles in every worker; a
+  store older than PROFILE_STORE_MAX_AGE_SECONDS falls back to the
+  in-process refresh so profiles never freeze when the job stops running
 """
 
+import os
+import time
 from datetime import datetime, timezone
 import threading
 import logging
 
+from backend.services.artifact_cache import ArtifactCache
+from ml.profile_store import PROFILE_STORE_PATH, load_profile_store
 from ml.user_profile import build_user_profiles
 
 
 # ---------- CONFIG ----------
 
 PROFILE_REFRESH_SECONDS = 300  # 5 minutes
+USE_PROFILE_STORE = os.getenv("USE_PROFILE_STORE", "1").lower() in ("1", "true", "yes")
+# Beyond this age the store (its job may have stopped) gives way to the
+# in-process refresh
+PROFILE_STORE_MAX_AGE_SECONDS = int(os.getenv("PROFILE_STORE_MAX_AGE_SECONDS", str(PROFILE_REFRESH_SECONDS)))
 
 
 # ---------- STATE ----------
@@ -32,6 +44,12 @@ class ProfileCache:
 
 _state = ProfileCache()
 
+_store_cache = ArtifactCache(
+    "profile store",
+    lambda: PROFILE_STORE_PATH,
+    load_profile_store,
+)
+
 logger = logging.getLogger("profile_service")
 
 
@@ -45,30 +63,43 @@ def _is_stale(now: datetime) -> bool:
     ).total_seconds() > PROFILE_REFRESH_SECONDS
 
 
+def _store_is_stale() -> bool:
+    mtime = _store_cache.mtime
+    return mtime is None or time.time() - mtime > PROFILE_STORE_MAX_AGE_SECONDS
+
+
 # ---------- PUBLIC API ----------
 
 def get_profiles():
     """
     Get cached user profiles.
 
-    Profiles are refreshed automatically if stale (async, non-blocking).
-    Returns stale cache immediately while background refresh happens.
+    With a fresh profile store on disk, returns its shared read-only
+    mapping (reloaded when the batch job rewrites it). Otherwise profiles
+    are built in-process and refreshed automatically if stale (async,
+    non-blocking), returning the stale cache — or the outdated store —
+    immediately while the refresh happens.
     Thread-safe.
     """
+    store = _store_cache.get() if USE_PROFILE_STORE else None
+    if store is not None and not _store_is_stale():
+        return store
+
     now = datetime.now(timezone.utc)
 
     # Fast path: cache is fresh
     if _state.profiles is not None and not _is_stale(now):
         return _state.profiles
 
-    # Return stale cache while background refresh happens
-    if _state.profiles is not None:
+    # Return stale data while background refresh happens
+    stale = _state.profiles if _state.profiles is not None else store
+    if stale is not None:
         # Trigger async refresh in background (don't block)
         with _state.lock:
             if not _state.refresh_in_progress:
                 _state.refresh_in_progress = True
                 _trigger_async_refresh()
-        return _state.profiles  # Return stale, not empty ✓
+        return stale  # Return stale, not empty ✓
     
     # First load: must block to get initial data
     with _state.lock:
@@ -86,6 +117,7 @@ def refresh_profiles():
     Blocks until refresh completes.
     Thread-safe.
     """
+    _store_cache.reset()
     with _state.lock:
         logger.info("Force refreshing user profiles cache")
         _state.profiles = build_user_profiles()
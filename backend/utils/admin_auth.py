@@ -48,3 +48,18 @@ def require_admin(f):
         g.admin_user = user
         return f(*args, **kwargs)
     return decorated
+
+
+def request_admin_user():
+    """The admin user behind the request's bearer token, or None.
+
+    Same checks as require_admin, for code that only needs to know (e.g.
+    honouring an admin-only debug header) rather than reject the request.
+    """
+    user_id, issued_at = decode_token(_extract_token())
+    if not user_id or user_id not in ADMIN_USER_IDS:
+        return None
+    user = get_user_by_id(user_id)
+    if not user or is_token_stale(user, issued_at):
+        return None
+    return user
@@ -0,0 +1,186 @@
+"""
+Async database access for the ASGI serving mode (backend/asgi.py).
+
+Responsibilities:
+- Build AsyncEngines for DATABASE_URL (and DATABASE_REPLICA_URL) with the
+  matching async driver: postgresql -> asyncpg, sqlite -> aiosqlite
+- Provide the non-blocking reads the async search / recommendation paths
+  fan out concurrently (user, recent interactions, product frames)
+
+Pool sizing and replica lag policy are shared with the sync engine
+(backend/utils/db_pool.py, backend/utils/database.py). Reads here never
+write, so the SQLite writer queue is not involved.
+"""
+
+import asyncio
+import logging
+from contextlib import asynccontextmanager
+
+from sqlalchemy import desc, select
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncEngine, async_sessionmaker, create_async_engine
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+
+from backend.models import Product, SearchEvent, User
+from backend.services.event.shared import normalize_user_id
+from backend.services.product.dataframe import products_frame, products_statement
+from backend.services.product.shared import DEFAULT_LIMIT, serialize_product
+from backend.utils import database
+from backend.utils.config import get_database_url, get_replica_database_url
+from backend.utils.db_pool import pool_settings
+from backend.utils.sqlite_profile import apply_sqlite_profile
+
+
+logger = logging.getLogger("async_database")
+
+_ASYNC_DRIVERS = {
+    "postgresql": "postgresql+asyncpg",
+    "postgres": "postgresql+asyncpg",
+    "sqlite": "sqlite+aiosqlite",
+}
+
+
+# ---------- GLOBAL STATE ----------
+
+_async_engine: AsyncEngine | None = None
+_AsyncSessionLocal: async_sessionmaker | None = None
+_async_replica_engine: AsyncEngine | None = None
+_AsyncReplicaSessionLocal: async_sessionmaker | None = None
+
+
+# ---------- INITIALIZATION ----------
+
+def async_database_url(database_url: str) -> str:
+    """Swap the sync driver of `database_url` for its async counterpart."""
+    url = make_url(database_url)
+    backend = url.get_backend_name()
+    if backend not in _ASYNC_DRIVERS:
+        raise ValueError(f"No async driver configured for {backend!r} URLs")
+    url = url.set(drivername=_ASYNC_DRIVERS[backend])
+    if backend != "sqlite" and "sslmode" in url.query:
+        # asyncpg spells libpq's sslmode as ssl
+        url = url.difference_update_query(["sslmode"]).update_query_dict({"ssl": url.query["sslmode"]})
+    return url.render_as_string(hide_password=False)
+
+
+def _create_async_engine(database_url: str) -> AsyncEngine:
+    connect_args = {}
+    if database_url.startswith("sqlite"):
+        connect_args = {"timeout": 30}
+
+    engine = create_async_engine(
+        async_database_url(database_url),
+        # Explicit so aiosqlite pools too (its default is NullPool)
+        poolclass=AsyncAdaptedQueuePool,
+        pool_pre_ping=True,
+        echo=False,
+        connect_args=connect_args,
+        **pool_settings(database_url),
+    )
+    # Same pragmas as the sync engine (WAL, mmap, cache size)
+    apply_sqlite_profile(engine.sync_engine)
+    return engine
+
+
+def init_async_db():
+    """Initialize async engines and session factories (idempotent)."""
+    global _async_engine, _AsyncSessionLocal, _async_replica_engine, _AsyncReplicaSessionLocal
+
+    if _async_engine is not None:
+        return _async_engine, _AsyncSessionLocal
+
+    logger.info("Initializing async database engine")
+    _async_engine = _create_async_engine(get_database_url())
+    _AsyncSessionLocal = async_sessionmaker(_async_engine, expire_on_commit=False)
+
+    replica_url = get_replica_database_url()
+    if replica_url:
+        _async_replica_engine = _create_async_engine(replica_url)
+        _AsyncReplicaSessionLocal = async_sessionmaker(_async_replica_engine, expire_on_commit=False)
+    return _async_engine, _AsyncSessionLocal
+
+
+async def dispose_async_db():
+    global _async_engine, _AsyncSessionLocal, _async_replica_engine, _AsyncReplicaSessionLocal
+
+    for engine in (_async_engine, _async_replica_engine):
+        if engine is not None:
+            await engine.dispose()
+    _async_engine = _AsyncSessionLocal = None
+    _async_replica_engine = _AsyncReplicaSessionLocal = None
+
+
+# ---------- SESSIONS ----------
+
+@asynccontextmanager
+async def async_session():
+    """Primary-database AsyncSession."""
+    if _AsyncSessionLocal is None:
+        init_async_db()
+    async with _AsyncSessionLocal() as session:
+        yield session
+
+
+@asynccontextmanager
+async def async_read_session():
+    """
+    AsyncSession for lag-tolerant reads: the replica when configured and
+    within REPLICA_MAX_LAG_SECONDS (same cached check as get_read_session),
+    otherwise the primary.
+    """
+    if _AsyncSessionLocal is None:
+        init_async_db()
+    factory = _AsyncSessionLocal
+    if _AsyncReplicaSessionLocal is not None:
+        # Cached for REPLICA_LAG_CHECK_SECONDS; a re-check may hit the network
+        if await asyncio.to_thread(database._replica_usable):
+            factory = _AsyncReplicaSessionLocal
+        else:
+            database._replica_state.fallbacks += 1
+    async with factory() as session:
+        yield session
+
+
+# ---------- READS ----------
+
+async def fetch_user(user_id: str) -> User | None:
+    async with async_session() as session:
+        return (await session.scalars(select(User).filter_by(user_id=user_id))).first()
+
+
+async def fetch_event_product_ids(user_id, event_types, limit=20) -> list[int]:
+    """
+    Product ids of the user's last `limit` events of `event_types`, newest
+    first (the columns of get_events_df that the serving paths use). Read
+    from the primary, like get_events_df(user_id=...), so a just-logged
+    event is seen.
+    """
+    user_id = normalize_user_id(user_id)
+    if user_id is None:
+        return []
+    stmt = (
+        select(SearchEvent.product_id)
+        .where(SearchEvent.user_id == user_id, SearchEvent.event_type.in_(list(event_types)))
+        .order_by(desc(SearchEvent.timestamp))
+        .limit(limit)
+    )
+    async with async_session() as session:
+        rows = (await session.scalars(stmt)).all()
+    return [int(pid) for pid in rows if pid is not None]
+
+
+async def fetch_products_df(search_query=None, category_filter=None, limit=DEFAULT_LIMIT):
+    """Async get_products_df."""
+    async with async_read_session() as session:
+        stmt = products_statement(search_query, category_filter, limit, session.bind.dialect.name)
+        return products_frame((await session.scalars(stmt)).all())
+
+
+async def fetch_products_by_ids(product_ids) -> list[dict]:
+    """Async get_products_by_ids."""
+    if not product_ids:
+        return []
+    ids = [int(pid) for pid in product_ids]
+    async with async_session() as session:
+        products = (await session.scalars(select(Product).where(Product.id.in_(ids)))).all()
+        return [serialize_product(p) for p in products]
@@ -0,0 +1,295 @@
+"""
+Bounded background executor for fire-and-forget work off the request path.
+
+Responsibilities:
+- One process-wide queue (BACKGROUND_QUEUE_SIZE) drained by a fixed set of
+  BACKGROUND_WORKERS threads, so bursts never start threads of their own
+- Backpressure: when the queue is full a submitter waits up to
+  BACKGROUND_SUBMIT_TIMEOUT_SECONDS, then runs its work on its own thread
+  rather than dropping it
+- Batching: analytics events and popularity deltas picked up together are
+  written as one multi-row insert and one aggregated update per batch
+  (up to BACKGROUND_BATCH_SIZE items) instead of a transaction each; a
+  failed write is retried in halves down to single rows, so only the rows
+  that fail on their own are dropped. An event's `after` callback runs once
+  its batch has been written
+- Graceful drain at exit, bounded by BACKGROUND_DRAIN_SECONDS
+- Queue depth, task counters and batch write latency for /metrics
+
+Work runs outside the Flask app context (its own DB sessions), and a
+failing task or batch is logged, never raised to the submitter.
+"""
+
+import os
+import time
+import queue
+import atexit
+import logging
+import threading
+from collections import Counter
+from typing import Iterable
+
+from sqlalchemy.exc import OperationalError
+
+from backend.utils.request_timing import LatencyHistogram, register_histogram
+
+logger = logging.getLogger("background")
+
+
+# ---------- CONFIG ----------
+
+BACKGROUND_WORKERS = int(os.getenv("BACKGROUND_WORKERS", "2"))
+BACKGROUND_QUEUE_SIZE = int(os.getenv("BACKGROUND_QUEUE_SIZE", "1000"))
+BACKGROUND_BATCH_SIZE = int(os.getenv("BACKGROUND_BATCH_SIZE", "200"))
+BACKGROUND_SUBMIT_TIMEOUT_SECONDS = float(os.getenv("BACKGROUND_SUBMIT_TIMEOUT_SECONDS", "0.05"))
+BACKGROUND_DRAIN_SECONDS = float(os.getenv("BACKGROUND_DRAIN_SECONDS", "10"))
+
+
+# ---------- METRICS ----------
+
+BATCH_LATENCY = register_histogram(LatencyHistogram(
+    "background_batch_duration_seconds",
+    "Time to run one background batch (tasks, event insert, popularity update).",
+    (),
+))
+
+_COUNTER_HELP = {
+    "submitted": "Work items queued for the background executor.",
+    "completed": "Background work items that finished.",
+    "failed": "Background work items that raised, even when retried alone (logged and dropped).",
+    "inline": "Work items run on the submitting thread because the queue was full or closed.",
+    "batches": "Batches run by background workers.",
+}
+
+# Queue item kinds
+_TASK, _EVENT, _POPULARITY, _STOP = "task", "event", "popularity", "stop"
+
+
+class BackgroundExecutor:
+    """Bounded queue + worker threads; see the module docstring."""
+
+    def __init__(self, workers: int = BACKGROUND_WORKERS, queue_size: int = BACKGROUND_QUEUE_SIZE,
+                 batch_size: int = BACKGROUND_BATCH_SIZE,
+                 submit_timeout: float = BACKGROUND_SUBMIT_TIMEOUT_SECONDS):
+        self.workers = max(1, workers)
+        self.batch_size = max(1, batch_size)
+        self.submit_timeout = submit_timeout
+        self._queue: queue.Queue = queue.Queue(maxsize=queue_size)
+        self._threads: list = []
+        self._lock = threading.Lock()
+        self._closed = False
+        self._counters = Counter({name: 0 for name in _COUNTER_HELP})
+
+    # ---- submitting ----
+
+    def submit(self, fn, *args, **kwargs) -> bool:
+        """Run fn(*args, **kwargs) in the background. False if it ran inline."""
+        return self._put((_TASK, (fn, args, kwargs)))
+
+    def log_event(self, row: dict, after=None) -> bool:
+        """
+        Queue a search_events row (see search_event_row) for a batched
+        insert. `after` (no arguments) runs once the batch's insert has been
+        attempted — e.g. cache invalidation that must not race the write.
+        """
+        return self._put((_EVENT, (row, after)))
+
+    def add_popularity(self, product_id, delta) -> bool:
+        """Queue a popularity increment; deltas in one batch are summed per product."""
+        return self._put((_POPULARITY, (int(product_id), delta)))
+
+    def _put(self, item) -> bool:
+        if not self._closed:
+            self._ensure_started()
+            try:
+                self._queue.put(item, timeout=self.submit_timeout)
+                self._count("submitted")
+                return True
+            except queue.Full:
+                pass
+        # Backpressure: the caller does the work itself rather than lose it
+        self._count("inline")
+        self._run_batch([item])
+        return False
+
+    # ---- workers ----
+
+    def _ensure_started(self) -> None:
+        if self._threads:
+            return
+        with self._lock:
+            if self._threads or self._closed:
+                return
+            for i in range(self.workers):
+                thread = threading.Thread(target=self._work, daemon=True, name=f"background-{i}")
+                thread.start()
+                self._threads.append(thread)
+
+    def _work(self) -> None:
+        while True:
+            batch = [self._queue.get()]
+            while len(batch) < self.batch_size and batch[-1][0] != _STOP:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            try:
+                self._run_batch(batch)
+            except Exception:
+                # Never let a bad batch take the worker down
+                logger.exception("Background batch failed")
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+            if batch[-1][0] == _STOP:
+                return
+
+    def _run_batch(self, batch) -> None:
+        start = time.perf_counter()
+        events, deltas, after = [], Counter(), []
+        for kind, payload in batch:
+            if kind == _TASK:
+                fn, args, kwargs = payload
+                try:
+                    fn(*args, **kwargs)
+                    self._count("completed")
+                except Exception:
+                    self._count("failed")
+                    logger.exception("Background task %s failed", getattr(fn, "__name__", fn))
+            elif kind == _EVENT:
+                row, callback = payload
+                events.append(row)
+                if callback is not None:
+                    after.append(callback)
+            elif kind == _POPULARITY:
+                product_id, delta = payload
+                deltas[product_id] += delta
+
+        if events:
+            failed = self._write("event insert", _insert_events, events)
+            self._count("completed", len(events) - len(failed))
+            self._count("failed", len(failed))
+        if deltas:
+            items = Counter(payload[0] for kind, payload in batch if kind == _POPULARITY)
+            failed = self._write("popularity update", _apply_deltas, list(deltas.items()))
+            failed_items = sum(items[product_id] for product_id, _ in failed)
+            self._count("completed", sum(items.values()) - failed_items)
+            self._count("failed", failed_items)
+        for callback in after:
+            try:
+                callback()
+            except Exception:
+                logger.exception("Background after-write callback failed")
+        self._count("batches")
+        BATCH_LATENCY.observe(time.perf_counter() - start)
+
+    def _write(self, label: str, write, rows: list) -> list:
+        """
+        write(rows); if that fails, retry each half in turn so one bad row
+        (a constraint violation, a stray value) costs only itself rather than
+        the batch. Returns the rows that still failed on their own, which are
+        logged and dropped. Connection-level errors fail the rows at once:
+        retrying halves against a database that is down only adds load.
+        """
+        try:
+            write(rows)
+            return []
+        except OperationalError:
+            logger.exception("Background %s failed for %d items", label, len(rows))
+            return list(rows)
+        except Exception:
+            if len(rows) == 1:
+                logger.exception("Background %s failed; dropping %r", label, rows[0])
+                return list(rows)
+        mid = len(rows) // 2
+        return self._write(label, write, rows[:mid]) + self._write(label, write, rows[mid:])
+
+    def _count(self, name: str, amount: int = 1) -> None:
+        with self._lock:
+            self._counters[name] += amount
+
+    # ---- lifecycle ----
+
+    def drain(self, timeout: float = None) -> bool:
+        """Wait until everything queued so far has run. True if it did in time."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while self._queue.unfinished_tasks:
+            if deadline is not None and time.monotonic() >= deadline:
+                return False
+            time.sleep(0.01)
+        return True
+
+    def shutdown(self, timeout: float = BACKGROUND_DRAIN_SECONDS) -> bool:
+        """Stop accepting work (later submits run inline), finish what is
+        queued and stop the workers. True if they finished within timeout."""
+        with self._lock:
+            self._closed = True
+            threads = list(self._threads)
+        deadline = time.monotonic() + timeout
+        for _ in threads:
+            try:
+                self._queue.put((_STOP, None), timeout=max(0.0, deadline - time.monotonic()))
+            except queue.Full:
+                break
+        for thread in threads:
+            thread.join(max(0.0, deadline - time.monotonic()))
+        finished = not any(thread.is_alive() for thread in threads)
+        if not finished:
+            logger.warning("Background executor shut down with %d items unprocessed", self._queue.qsize())
+        return finished
+
+    # ---- metrics ----
+
+    def stats(self) -> dict:
+        with self._lock:
+            counters = dict(self._counters)
+        return {"queue_depth": self._queue.qsize(), "workers": len(self._threads), **counters}
+
+    def render_metrics(self) -> Iterable[str]:
+        stats = self.stats()
+        yield "# TYPE background_queue_depth gauge"
+        yield f"background_queue_depth {stats['queue_depth']}"
+        for name, help_text in _COUNTER_HELP.items():
+            metric = f"background_{name}_total"
+            yield f"# HELP {metric} {help_text}"
+            yield f"# TYPE {metric} counter"
+            yield f"{metric} {stats[name]}"
+
+
+# Imported lazily: the services import the DB layer, which this module
+# should not pull in for callers that only submit plain tasks.
+
+def _insert_events(rows) -> None:
+    from backend.services.db_event_service import create_search_events_bulk
+    create_search_events_bulk(rows)
+
+
+def _apply_popularity(deltas) -> None:
+    from backend.services.db_product_service import update_products_popularity
+    update_products_popularity(deltas)
+
+
+def _apply_deltas(items) -> None:
+    _apply_popularity(dict(items))
+
+
+# ---------- PROCESS-WIDE EXECUTOR ----------
+
+_executor = BackgroundExecutor()
+atexit.register(_executor.shutdown)
+
+
+def get_executor() -> BackgroundExecutor:
+    return _executor
+
+
+def submit(fn, *args, **kwargs) -> bool:
+    return _executor.submit(fn, *args, **kwargs)
+
+
+def log_event(row: dict, after=None) -> bool:
+    return _executor.log_event(row, after)
+
+
+def add_popularity(product_id, delta) -> bool:
+    return _executor.add_popularity(product_id, delta)
@@ -4,6 +4,7 @@ Application configuration utilities.
 Responsibilities:
 - Configure CORS safely
 - Resolve database URL with sane defaults
+- Resolve the optional read-replica URL
 - Normalize database URLs for SQLAlchemy compatibility
 """
 
@@ -84,6 +85,16 @@ def get_database_url():
     return database_url
 
 
+def get_replica_database_url():
+    """
+    Optional read-only replica (DATABASE_REPLICA_URL); None when unset.
+    """
+    replica_url = os.getenv("DATABASE_REPLICA_URL")
+    if not replica_url:
+        return None
+    return _normalize_database_url(replica_url)
+
+
 def _normalize_database_url(database_url: str) -> str:
     """
     Normalize database URLs for SQLAlchemy.
@@ -5,45 +5,57 @@ Responsibilities:
 - Initialize SQLAlchemy engine
 - Configure connection pooling safely
 - Provide session factory for request-scoped DB access
+- Share one session (and pooled connection) per Flask app context, and
+  release its connection early for callers that hand work to other threads
+- Route designated read-only queries to a read replica, falling back to
+  the primary when the replica lags or is unreachable
+- Attach per-request query instrumentation and pool metrics to the engine
 """
 
+import os
+import time
 import logging
-from sqlalchemy import create_engine, text
-from sqlalchemy.orm import sessionmaker
+import threading
+from datetime import datetime, timezone
+from flask import current_app, has_app_context
+from sqlalchemy import create_engine, event, func, select, text
+from sqlalchemy.orm import Session, scoped_session, sessionmaker
 from sqlalchemy.engine import Engine
+from sqlalchemy.sql.elements import TextClause
 
-from backend.models import Base
-from backend.utils.config import get_database_url
+from backend.models import Base, SearchEvent
+from backend.utils.config import get_database_url, get_replica_database_url
+from backend.utils.db_pool import TimedQueuePool, instrument_pool, pool_settings
+from backend.utils.query_stats import instrument_engine
+from backend.utils.sqlite_profile import apply_sqlite_profile
 
 
 logger = logging.getLogger("database")
 
 
+# ---------- CONFIG ----------
+
+# Replica reads fall back to the primary beyond this much replication lag
+REPLICA_MAX_LAG_SECONDS = float(os.getenv("REPLICA_MAX_LAG_SECONDS", "30"))
+# How long a lag measurement is trusted before re-checking
+REPLICA_LAG_CHECK_SECONDS = float(os.getenv("REPLICA_LAG_CHECK_SECONDS", "10"))
+
+
 # ---------- GLOBAL STATE ----------
 
 _engine: Engine | None = None
 _SessionLocal: sessionmaker | None = None
+# One session per app context (thread-local; removed at teardown)
+_request_sessions: scoped_session | None = None
+# Optional read-only replica (DATABASE_REPLICA_URL)
+_replica_engine: Engine | None = None
+_ReplicaSessionLocal: sessionmaker | None = None
 
 
 # ---------- INITIALIZATION ----------
 
-def init_db():
-    """
-    Initialize SQLAlchemy engine and session factory.
-
-    Safe to call multiple times (idempotent).
-    """
-    global _engine, _SessionLocal
-
-    if _engine is not None and _SessionLocal is not None:
-        return _engine, _SessionLocal
-
-    database_url = get_database_url()
-    logger.info("Initializing database engine")
-
+def _create_engine(database_url: str) -> Engine:
     connect_args = {}
-    pool_size = 5
-    max_overflow = 10
 
     # SQLite-specific configuration
     if database_url.startswith("sqlite"):
@@ -51,25 +63,72 @@ def init_db():
             "check_same_thread": False,
             "timeout": 30,
         }
-        pool_size = 1
-        max_overflow = 0
         logger.info("Using SQLite configuration")
 
-    _engine = create_engine(
+    pool = pool_settings(database_url)
+    logger.info("DB pool: size=%(pool_size)s overflow=%(max_overflow)s timeout=%(pool_timeout)ss", pool)
+
+    engine = create_engine(
         database_url,
+        poolclass=TimedQueuePool,
         pool_pre_ping=True,
-        pool_size=pool_size,
-        max_overflow=max_overflow,
-        pool_recycle=3600,
         echo=False,
         connect_args=connect_args,
+        **pool,
     )
+    # Per-request query counts / N+1 detection (backend/utils/query_stats.py)
+    instrument_engine(engine)
+    instrument_pool(engine)
+    # WAL + pragmas + single-writer queue (SQLITE_PERFORMANCE_PROFILE)
+    apply_sqlite_profile(engine)
+    return engine
+
+
+def init_db():
+    """
+    Initialize SQLAlchemy engine and session factory (plus the read replica's,
+    if DATABASE_REPLICA_URL is set).
+
+    Safe to call multiple times (idempotent).
+    """
+    global _engine, _SessionLocal, _request_sessions, _replica_engine, _ReplicaSessionLocal
+
+    if _engine is not None and _SessionLocal is not None:
+        return _engine, _SessionLocal
+
+    database_url = get_database_url()
+    logger.info("Initializing database engine")
+
+    _engine = _create_engine(database_url)
 
     _SessionLocal = sessionmaker(
         autocommit=False,
         autoflush=False,
         bind=_engine,
     )
+    # Objects loaded by one service stay readable after another commits
+    request_factory = sessionmaker(
+        autocommit=False,
+        autoflush=False,
+        expire_on_commit=False,
+        bind=_engine,
+    )
+    _track_writes(request_factory)
+    _request_sessions = scoped_session(request_factory)
+
+    replica_url = get_replica_database_url()
+    if replica_url:
+        logger.info("Initializing read-replica engine")
+        _replica_engine = _create_engine(replica_url)
+        _ReplicaSessionLocal = sessionmaker(
+            autocommit=False,
+            autoflush=False,
+            bind=_replica_engine,
+        )
+    else:
+        _replica_engine = None
+        _ReplicaSessionLocal = None
+    _replica_state.reset()
 
     logger.info("Database engine initialized")
     return _engine, _SessionLocal
@@ -142,9 +201,80 @@ def _ensure_password_changed_at_column():
 
 # ---------- SESSION ACCESS ----------
 
+_WRITES = "uncommitted_writes"
+
+
+def _track_writes(factory: sessionmaker) -> None:
+    """
+    Flag sessions from `factory` that hold uncommitted writes, including
+    Core statements (session.execute(update(...))) that never show up in
+    session.new / dirty / deleted. Cleared when the transaction ends.
+    """
+    @event.listens_for(factory, "do_orm_execute")
+    def _on_execute(state):
+        if not _is_read(state):
+            state.session.info[_WRITES] = True
+
+    @event.listens_for(factory, "after_flush")
+    def _on_flush(session, flush_context):
+        session.info[_WRITES] = True
+
+    @event.listens_for(factory, "after_commit")
+    @event.listens_for(factory, "after_rollback")
+    def _on_end(session):
+        session.info.pop(_WRITES, None)
+
+
+def _is_read(state) -> bool:
+    if state.is_select:
+        return True
+    statement = state.statement
+    return isinstance(statement, TextClause) and \
+        statement.text.lstrip().upper().startswith(("SELECT", "WITH", "PRAGMA"))
+
+
+class _RequestSession:
+    """
+    The app context's shared session, as handed to one service call.
+
+    Services use it exactly like a fresh session (commit, rollback, close,
+    `with`), but close() only discards what this caller left unfinished; the
+    session and its connection stay open for the next service call and are
+    released at app-context teardown.
+    """
+
+    def __init__(self, session: Session):
+        self._session = session
+
+    def __getattr__(self, name):
+        return getattr(self._session, name)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def close(self):
+        session = self._session
+        transaction = session.get_transaction()
+        if transaction is None:
+            return
+        # Failed statement or uncommitted writes (ORM or Core): roll back,
+        # as close() would, so the next caller's commit can't persist them
+        if not transaction.is_active or session.new or session.dirty or session.deleted \
+                or session.info.get(_WRITES):
+            session.rollback()
+
+
 def get_db_session():
     """
-    Get a new database session.
+    Get a database session.
+
+    Inside an app context of an app set up with setup_request_sessions()
+    this is the context's shared session, so one request reuses a single
+    pooled connection across service calls; elsewhere (scripts, jobs,
+    background threads) it is a new session.
 
     Caller is responsible for:
     - committing or rolling back
@@ -153,4 +283,156 @@ def get_db_session():
     if _SessionLocal is None:
         init_db()
 
+    if has_app_context() and current_app.extensions.get("db_request_sessions"):
+        return _RequestSession(_request_sessions())
     return _SessionLocal()
+
+
+def release_request_connection() -> bool:
+    """
+    Hand the app context's pooled connection back before teardown.
+
+    For callers about to wait on other threads that check out connections
+    of their own (fanout.fan_out): a request holding one while they queue
+    for the rest can exhaust a small pool. Ends the session's read
+    transaction; loaded objects stay readable (expire_on_commit=False) and
+    the next query checks a connection out again.
+
+    True when no connection is held afterwards; False if the session has
+    unsaved changes or uncommitted writes, which keep it.
+    """
+    if _request_sessions is None or not has_app_context() \
+            or not current_app.extensions.get("db_request_sessions"):
+        return True
+    session = _request_sessions()
+    if session.get_transaction() is None:
+        return True
+    if session.new or session.dirty or session.deleted or session.info.get(_WRITES):
+        return False
+    session.commit()
+    return True
+
+
+def remove_request_session(exc=None):
+    """Close the app context's session and return its connection to the pool."""
+    if _request_sessions is not None:
+        _request_sessions.remove()
+
+
+def setup_request_sessions(app):
+    """Share one session per app context in `app` (see get_db_session)."""
+    app.extensions["db_request_sessions"] = True
+    app.teardown_appcontext(remove_request_session)
+
+
+
+# ---------- READ REPLICA ----------
+
+class ReplicaState:
+    """Cached replica health: last measured lag and whether reads may use it."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        self.lag_seconds = None
+        self.usable = False
+        self.checked_at = None
+        self.fallbacks = 0
+
+
+_replica_state = ReplicaState()
+
+
+def _to_utc(value):
+    if value is None:
+        return None
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value)
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value
+
+
+def _latest_event_time(engine):
+    with engine.connect() as conn:
+        return _to_utc(conn.execute(select(func.max(SearchEvent.timestamp))).scalar())
+
+
+def measure_replica_lag() -> float:
+    """
+    Seconds the replica is behind the primary.
+
+    PostgreSQL standbys report their replay delay directly. Elsewhere (and
+    for logical replicas) lag is estimated from the newest search event on
+    each side, which moves constantly on a live site.
+    """
+    if _replica_engine.dialect.name == "postgresql":
+        with _replica_engine.connect() as conn:
+            lag = conn.execute(text(
+                "SELECT EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp())"
+            )).scalar()
+        if lag is not None:
+            return max(float(lag), 0.0)
+
+    primary_latest = _latest_event_time(_engine)
+    replica_latest = _latest_event_time(_replica_engine)
+    if primary_latest is None:
+        return 0.0
+    if replica_latest is None:
+        return float("inf")
+    return max((primary_latest - replica_latest).total_seconds(), 0.0)
+
+
+def _replica_usable() -> bool:
+    state = _replica_state
+    now = time.monotonic()
+    if state.checked_at is not None and now - state.checked_at < REPLICA_LAG_CHECK_SECONDS:
+        return state.usable
+    # One thread re-measures; the rest use the previous verdict meanwhile
+    if not state.lock.acquire(blocking=False):
+        return state.usable
+    try:
+        try:
+            state.lag_seconds = measure_replica_lag()
+            state.usable = state.lag_seconds <= REPLICA_MAX_LAG_SECONDS
+            if not state.usable:
+                logger.warning("Read replica %.1fs behind; reading from primary", state.lag_seconds)
+        except Exception:
+            logger.exception("Read replica unreachable; reading from primary")
+            state.lag_seconds, state.usable = None, False
+        state.checked_at = now
+        return state.usable
+    finally:
+        state.lock.release()
+
+
+def get_read_session():
+    """
+    Session for read-only queries that tolerate replication lag (catalog
+    frames, reviews, analytics, ML batch reads).
+
+    Uses the replica when one is configured and within
+    REPLICA_MAX_LAG_SECONDS, otherwise the primary via get_db_session().
+    Never write through it. Caller closes it, as with get_db_session().
+    """
+    if _SessionLocal is None:
+        init_db()
+
+    if _ReplicaSessionLocal is not None:
+        if _replica_usable():
+            return _ReplicaSessionLocal()
+        _replica_state.fallbacks += 1
+    return get_db_session()
+
+
+def replica_status() -> dict:
+    """Replica configuration and last health check (for /metrics)."""
+    state = _replica_state
+    return {
+        "configured": _replica_engine is not None,
+        "usable": state.usable,
+        "lag_seconds": state.lag_seconds,
+        "fallbacks": state.fallbacks,
+    }
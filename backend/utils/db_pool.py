@@ -0,0 +1,138 @@
+"""
+Connection pool sizing and metrics.
+
+Responsibilities:
+- Read pool sizing from the environment (DB_POOL_SIZE, DB_MAX_OVERFLOW, ...)
+- Time how long checkouts wait for a free connection
+- Count connects, invalidations and checkout timeouts
+- Render pool gauges/counters for /metrics
+
+Like the request histograms, counters are per process.
+"""
+
+import os
+import time
+import threading
+from typing import Dict, Iterable, Optional
+
+from sqlalchemy import event
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.pool import QueuePool
+
+from backend.utils.request_timing import LatencyHistogram, register_histogram
+from backend.utils.sqlite_profile import SQLITE_PERFORMANCE_PROFILE
+
+
+# ---------- CONFIG ----------
+
+def pool_settings(database_url: Optional[str] = None) -> Dict[str, int]:
+    """
+    Pool sizing for create_engine(), overridable from the env.
+
+    A request holds one connection from its first query until teardown
+    (handing it back while a fan-out's pool threads use theirs), so
+    DB_POOL_SIZE + DB_MAX_OVERFLOW should cover the worker's thread count;
+    otherwise requests queue for up to DB_POOL_TIMEOUT seconds.
+
+    SQLite without the WAL profile (SQLITE_PERFORMANCE_PROFILE=0) keeps a
+    single connection by default: with the rollback journal and no writer
+    queue, concurrent writers would only fail with "database is locked"
+    after the busy timeout.
+    """
+    pool_size, max_overflow = "5", "10"
+    if database_url and database_url.startswith("sqlite") and not SQLITE_PERFORMANCE_PROFILE:
+        pool_size, max_overflow = "1", "0"
+    return {
+        "pool_size": int(os.getenv("DB_POOL_SIZE", pool_size)),
+        "max_overflow": int(os.getenv("DB_MAX_OVERFLOW", max_overflow)),
+        "pool_timeout": int(os.getenv("DB_POOL_TIMEOUT", "30")),
+        "pool_recycle": int(os.getenv("DB_POOL_RECYCLE", "3600")),
+    }
+
+
+# ---------- METRICS ----------
+
+CHECKOUT_WAIT = register_histogram(LatencyHistogram(
+    "db_pool_checkout_wait_seconds",
+    "Time spent waiting for a pooled DB connection.",
+    (),
+))
+
+_COUNTER_HELP = {
+    "connects": "New DB connections opened by the pool.",
+    "invalidations": "Pooled DB connections invalidated (errors, pre-ping failures).",
+    "checkout_timeouts": "Checkouts that gave up after DB_POOL_TIMEOUT.",
+}
+_counters: Dict[str, int] = dict.fromkeys(_COUNTER_HELP, 0)
+_counters_lock = threading.Lock()
+
+
+def _increment(name: str) -> None:
+    with _counters_lock:
+        _counters[name] += 1
+
+
+class TimedQueuePool(QueuePool):
+    """QueuePool that records checkout wait time and timeouts."""
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        except PoolTimeoutError:
+            _increment("checkout_timeouts")
+            raise
+        finally:
+            CHECKOUT_WAIT.observe(time.perf_counter() - start)
+
+
+def instrument_pool(engine) -> None:
+    """Count connects and invalidations on `engine`'s pool (idempotent)."""
+    if event.contains(engine, "connect", _on_connect):
+        return
+    event.listen(engine, "connect", _on_connect)
+    event.listen(engine, "invalidate", _on_invalidate)
+    event.listen(engine, "soft_invalidate", _on_invalidate)
+
+
+def _on_connect(dbapi_connection, connection_record):
+    _increment("connects")
+
+
+def _on_invalidate(dbapi_connection, connection_record, exception):
+    _increment("invalidations")
+
+
+def pool_status(engine) -> Dict[str, int]:
+    pool = engine.pool
+    if not isinstance(pool, QueuePool):
+        return {}
+    return {
+        "size": pool.size(),
+        "checked_out": pool.checkedout(),
+        "checked_in": pool.checkedin(),
+        # Negative until the base pool is full (SQLAlchemy convention)
+        "overflow": max(pool.overflow(), 0),
+    }
+
+
+def render_pool_metrics(engine) -> Iterable[str]:
+    """Gauges for `engine` plus the process-wide counters (text format)."""
+    if engine is not None:
+        for name, value in pool_status(engine).items():
+            metric = f"db_pool_{name}"
+            yield f"# TYPE {metric} gauge"
+            yield f"{metric} {value}"
+    with _counters_lock:
+        counters = dict(_counters)
+    for name, value in counters.items():
+        metric = f"db_pool_{name}_total"
+        yield f"# HELP {metric} {_COUNTER_HELP[name]}"
+        yield f"# TYPE {metric} counter"
+        yield f"{metric} {value}"
+
+
+def reset_pool_counters() -> None:
+    with _counters_lock:
+        for name in _counters:
+            _counters[name] = 0
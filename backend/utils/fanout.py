@@ -0,0 +1,93 @@
+"""
+Shared thread pool for running independent blocking lookups concurrently.
+
+Responsibilities:
+- One bounded, process-wide pool (FANOUT_WORKERS threads) reused by every
+  request, so a fan-out never starts threads of its own
+- fan_out(): run named calls concurrently, the last on the calling thread,
+  and return their results by name
+- Attribute SQL issued from pool threads to the caller's query stats
+
+Pool threads run outside the Flask app context: DB work there opens its own
+short-lived sessions instead of sharing the request-scoped one, and
+Server-Timing stages must be recorded by the caller. The request's own
+connection is handed back while it waits on them, so a fan-out needs no more
+than its own calls' connections from the pool (never one extra held idle).
+"""
+
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict
+
+from backend.utils.database import release_request_connection
+from backend.utils.query_stats import bind_query_stats
+
+
+# ---------- CONFIG ----------
+
+FANOUT_WORKERS = int(os.getenv("FANOUT_WORKERS", "16"))
+
+
+# ---------- POOL ----------
+
+_pool: ThreadPoolExecutor | None = None
+_pool_lock = threading.Lock()
+
+
+def _get_pool() -> ThreadPoolExecutor:
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = ThreadPoolExecutor(max_workers=FANOUT_WORKERS, thread_name_prefix="fanout")
+    return _pool
+
+
+def fan_out(calls: Dict[str, Callable[[], Any]]) -> Dict[str, Any]:
+    """
+    Run zero-argument callables concurrently and return {name: result}.
+
+    The last call runs on the calling thread (one fewer hand-off). If any
+    call raises, the first exception is re-raised after all have finished,
+    so no work is left running against a failed request.
+
+    A request session with unsaved changes can't give its connection back;
+    then the calls run one by one on the calling thread instead.
+    """
+    if not calls:
+        return {}
+    if len(calls) > 1 and not release_request_connection():
+        return _run_inline(calls)
+    *background, (last_name, last_call) = calls.items()
+    pool = _get_pool()
+    futures = {name: pool.submit(bind_query_stats(call)) for name, call in background}
+
+    results, error = {}, None
+    try:
+        results[last_name] = last_call()
+    except Exception as exc:
+        error = exc
+    if futures:
+        # The inline call may have checked the request's connection out again
+        release_request_connection()
+    for name, future in futures.items():
+        try:
+            results[name] = future.result()
+        except Exception as exc:
+            error = error or exc
+    if error is not None:
+        raise error
+    return results
+
+
+def _run_inline(calls: Dict[str, Callable[[], Any]]) -> Dict[str, Any]:
+    results, error = {}, None
+    for name, call in calls.items():
+        try:
+            results[name] = call()
+        except Exception as exc:
+            error = error or exc
+    if error is not None:
+        raise error
+    return results
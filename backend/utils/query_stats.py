@@ -0,0 +1,211 @@
+"""
+Per-request SQL instrumentation: query counts, DB time and N+1 detection.
+
+Responsibilities:
+- Hook SQLAlchemy cursor events on the engine (installed by init_db)
+- Attribute every statement to the active collectors: the current request
+  and any enclosing count_queries() / query_budget() block
+- Flag statements repeated within one request (the usual N+1 shape)
+- Report DB time as a Server-Timing stage, export per-endpoint histograms
+  to /metrics and, in debug mode, add X-DB-* response headers
+- query_budget(): test helper asserting an upper bound on queries
+
+Statements are grouped by their SQL text, which SQLAlchemy renders with
+bound parameters, so the same query issued in a loop for different ids
+counts as one repeated statement. Queries run from other threads are not
+attributed to the request that started them unless the work is wrapped with
+bind_query_stats() (as the request fan-out pool does).
+"""
+
+import os
+import time
+import logging
+import threading
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import List, Optional, Tuple
+
+from flask import current_app, g, request
+from sqlalchemy import event
+
+from backend.utils.request_timing import LatencyHistogram, record_timing, register_histogram
+
+
+logger = logging.getLogger("query_stats")
+
+
+# ---------- CONFIG ----------
+
+# X-DB-* headers outside debug mode (they reveal SQL; keep off in production)
+QUERY_STATS_HEADERS = os.getenv("QUERY_STATS_HEADERS", "0").lower() in ("1", "true", "yes")
+# Same statement this many times in one request is reported as a likely N+1
+N_PLUS_ONE_THRESHOLD = int(os.getenv("N_PLUS_ONE_THRESHOLD", "5"))
+SLOWEST_KEPT = 3
+
+QUERY_COUNT_BUCKETS = (1, 2, 3, 5, 8, 13, 21, 34, 55, 89)
+
+
+# ---------- STATE ----------
+
+_collectors: ContextVar[Tuple["QueryStats", ...]] = ContextVar("query_collectors", default=())
+
+DB_QUERIES = register_histogram(LatencyHistogram(
+    "db_queries_per_request",
+    "SQL statements executed per request by route.",
+    ("endpoint",),
+    buckets=QUERY_COUNT_BUCKETS,
+))
+
+DB_TIME = register_histogram(LatencyHistogram(
+    "db_time_per_request_seconds",
+    "Time spent executing SQL per request by route.",
+    ("endpoint",),
+))
+
+
+class QueryStats:
+    """Statements seen by one collector."""
+
+    def __init__(self):
+        self.count = 0
+        self.total_seconds = 0.0
+        self.statements: Counter = Counter()
+        self.slowest: List[Tuple[float, str]] = []
+        # Fan-out threads record into the same request's stats
+        self._lock = threading.Lock()
+
+    def record(self, statement: str, seconds: float) -> None:
+        with self._lock:
+            self.count += 1
+            self.total_seconds += seconds
+            self.statements[statement] += 1
+            if len(self.slowest) < SLOWEST_KEPT or seconds > self.slowest[-1][0]:
+                self.slowest.append((seconds, statement))
+                self.slowest.sort(key=lambda item: item[0], reverse=True)
+                del self.slowest[SLOWEST_KEPT:]
+
+    def repeated(self, threshold: int = N_PLUS_ONE_THRESHOLD) -> List[Tuple[str, int]]:
+        return [(sql, n) for sql, n in self.statements.most_common() if n >= threshold]
+
+
+# ---------- ENGINE HOOKS ----------
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if _collectors.get():
+        conn.info.setdefault("_query_start", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    collectors = _collectors.get()
+    starts = conn.info.get("_query_start")
+    if not collectors or not starts:
+        return
+    elapsed = time.perf_counter() - starts.pop()
+    for stats in collectors:
+        stats.record(statement, elapsed)
+
+
+def instrument_engine(engine) -> None:
+    """Attach the counting listeners to `engine` (idempotent)."""
+    if not event.contains(engine, "before_cursor_execute", _before_cursor_execute):
+        event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+
+
+@contextmanager
+def count_queries():
+    """Collect the statements executed in this context (nests with requests)."""
+    stats = QueryStats()
+    token = _collectors.set(_collectors.get() + (stats,))
+    try:
+        yield stats
+    finally:
+        _collectors.reset(token)
+
+
+def bind_query_stats(fn):
+    """
+    Wrap `fn` so statements it runs on another thread count towards the
+    caller's collectors (its request and any count_queries() block).
+    """
+    collectors = _collectors.get()
+
+    def run(*args, **kwargs):
+        token = _collectors.set(collectors)
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            _collectors.reset(token)
+
+    return run
+
+
+@contextmanager
+def query_budget(max_queries: int):
+    """
+    Fail if the enclosed block runs more than `max_queries` statements.
+
+        with query_budget(3):
+            client.get("/api/cart")
+    """
+    with count_queries() as stats:
+        yield stats
+    if stats.count > max_queries:
+        detail = "\n".join(f"  {n}x {sql}" for sql, n in stats.statements.most_common())
+        raise AssertionError(f"{stats.count} queries, budget {max_queries}:\n{detail}")
+
+
+def _one_line(statement: str, limit: int = 200) -> str:
+    return " ".join(statement.split())[:limit]
+
+
+# ---------- SETUP ----------
+
+def setup_query_stats(app):
+    """
+    Attach per-request query accounting. Register after setup_request_timing
+    so the "db" stage lands in the same request's Server-Timing header.
+    """
+
+    @app.before_request
+    def _start_query_stats():
+        stats = QueryStats()
+        g._query_stats = stats
+        g._query_stats_token = _collectors.set(_collectors.get() + (stats,))
+
+    @app.after_request
+    def _emit_query_stats(response):
+        stats: Optional[QueryStats] = g.get("_query_stats")
+        if stats is None:
+            return response
+
+        endpoint = request.url_rule.rule if request.url_rule is not None else "unmatched"
+        DB_QUERIES.observe(stats.count, endpoint)
+        DB_TIME.observe(stats.total_seconds, endpoint)
+        if stats.count:
+            record_timing("db", stats.total_seconds * 1000)
+
+        repeated = stats.repeated()
+        for statement, n in repeated:
+            logger.warning("Possible N+1 on %s %s: %dx %s",
+                           request.method, endpoint, n, _one_line(statement))
+
+        if QUERY_STATS_HEADERS or current_app.debug:
+            response.headers["X-DB-Query-Count"] = str(stats.count)
+            response.headers["X-DB-Time-Ms"] = f"{stats.total_seconds * 1000:.2f}"
+            response.headers["X-DB-Repeated-Statements"] = str(len(repeated))
+            if stats.slowest:
+                seconds, statement = stats.slowest[0]
+                response.headers["X-DB-Slowest"] = f"{seconds * 1000:.2f}ms {_one_line(statement)}"
+        return response
+
+    @app.teardown_request
+    def _stop_query_stats(exc=None):
+        token = g.pop("_query_stats_token", None)
+        if token is not None:
+            try:
+                _collectors.reset(token)
+            except ValueError:
+                # Token from a different context (e.g. streamed response)
+                _collectors.set(())
@@ -0,0 +1,223 @@
+"""
+Sampling request profiler middleware.
+
+Responsibilities:
+- Profile a configurable fraction of requests, plus any request from an
+  admin carrying the profiling header
+- Sample the request thread's Python stack at a fixed interval while it runs
+  (statistical, low overhead; no tracing of every call)
+- Append each profile (route, duration, collapsed-stack counts) to an hourly
+  JSONL file in a rotating on-disk store
+- Aggregate stored profiles per route into collapsed-stack (flamegraph.pl /
+  speedscope) text for a time window
+"""
+
+import os
+import sys
+import json
+import time
+import random
+import logging
+import threading
+from collections import Counter
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Iterator, Optional
+
+from flask import request, g
+
+from backend.utils.admin_auth import request_admin_user
+
+logger = logging.getLogger("request_profiler")
+
+
+# ---------- CONFIG ----------
+
+PROFILE_SAMPLE_RATE = float(os.getenv("PROFILE_SAMPLE_RATE", "0"))
+PROFILE_INTERVAL_MS = float(os.getenv("PROFILE_INTERVAL_MS", "5"))
+PROFILE_STORE_DIR = os.getenv("PROFILE_STORE_DIR", "request_profiles")
+PROFILE_RETENTION_HOURS = int(os.getenv("PROFILE_RETENTION_HOURS", "24"))
+PROFILE_HEADER = "X-Profile-Request"
+
+FILE_PREFIX = "profiles-"
+FILE_TIME_FORMAT = "%Y%m%d%H"
+
+
+# ---------- SAMPLER ----------
+
+class StackSampler:
+    """Samples one thread's stack every `interval` seconds into collapsed-stack counts."""
+
+    def __init__(self, thread_id: int, interval: float):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks: Counter = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True, name="StackSampler")
+
+    def start(self) -> "StackSampler":
+        self._thread.start()
+        return self
+
+    def stop(self) -> Counter:
+        self._stop.set()
+        self._thread.join()
+        return self.stacks
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is not None:
+                self.stacks[_collapse(frame)] += 1
+
+
+def _frame_label(frame) -> str:
+    code = frame.f_code
+    filename = os.path.relpath(code.co_filename) if code.co_filename.startswith(os.getcwd()) else code.co_filename
+    return f"{code.co_name} ({filename}:{code.co_firstlineno})".replace(";", ":")
+
+
+def _collapse(frame) -> str:
+    labels = []
+    while frame is not None:
+        labels.append(_frame_label(frame))
+        frame = frame.f_back
+    return ";".join(reversed(labels))
+
+
+# ---------- STORE ----------
+
+def _file_for(ts: datetime, store_dir: str) -> str:
+    return os.path.join(store_dir, f"{FILE_PREFIX}{ts:{FILE_TIME_FORMAT}}.jsonl")
+
+
+def _file_hour(name: str) -> Optional[datetime]:
+    if not (name.startswith(FILE_PREFIX) and name.endswith(".jsonl")):
+        return None
+    try:
+        stamp = name[len(FILE_PREFIX):-len(".jsonl")]
+        return datetime.strptime(stamp, FILE_TIME_FORMAT).replace(tzinfo=timezone.utc)
+    except ValueError:
+        return None
+
+
+_write_lock = threading.Lock()
+
+
+def save_profile(record: dict, store_dir: str = None, retention_hours: int = None) -> None:
+    """Append one profile to the current hour's file and drop expired files."""
+    store_dir = store_dir or PROFILE_STORE_DIR
+    retention_hours = PROFILE_RETENTION_HOURS if retention_hours is None else retention_hours
+    now = datetime.fromtimestamp(record["ts"], timezone.utc)
+    line = json.dumps(record, separators=(",", ":")) + "\n"
+
+    with _write_lock:
+        os.makedirs(store_dir, exist_ok=True)
+        with open(_file_for(now, store_dir), "a") as f:
+            f.write(line)
+        _rotate(store_dir, now - timedelta(hours=retention_hours))
+
+
+def _rotate(store_dir: str, cutoff: datetime) -> None:
+    for name in os.listdir(store_dir):
+        hour = _file_hour(name)
+        if hour is not None and hour + timedelta(hours=1) <= cutoff:
+            try:
+                os.remove(os.path.join(store_dir, name))
+            except OSError:
+                pass
+
+
+def iter_profiles(since: datetime, until: datetime, store_dir: str = None) -> Iterator[dict]:
+    """Stored profiles with since <= ts < until."""
+    store_dir = store_dir or PROFILE_STORE_DIR
+    if not os.path.isdir(store_dir):
+        return
+    lo, hi = since.timestamp(), until.timestamp()
+    for name in sorted(os.listdir(store_dir)):
+        hour = _file_hour(name)
+        if hour is None or hour + timedelta(hours=1) <= since or hour >= until:
+            continue
+        with open(os.path.join(store_dir, name)) as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    continue  # partially written line
+                if lo <= record.get("ts", 0) < hi:
+                    yield record
+
+
+def summarize_profiles(since: datetime, until: datetime, route: str = None, store_dir: str = None) -> Dict[str, dict]:
+    """Per-route profile count, sample count and mean/max duration."""
+    summary: Dict[str, dict] = {}
+    for record in iter_profiles(since, until, store_dir):
+        if route and record["route"] != route:
+            continue
+        entry = summary.setdefault(record["route"], {"profiles": 0, "samples": 0, "total_ms": 0.0, "max_ms": 0.0})
+        entry["profiles"] += 1
+        entry["samples"] += sum(record["stacks"].values())
+        entry["total_ms"] += record["duration_ms"]
+        entry["max_ms"] = max(entry["max_ms"], record["duration_ms"])
+    for entry in summary.values():
+        entry["mean_ms"] = round(entry.pop("total_ms") / entry["profiles"], 2)
+        entry["max_ms"] = round(entry["max_ms"], 2)
+    return summary
+
+
+def collapsed_stacks(since: datetime, until: datetime, route: str = None, store_dir: str = None) -> str:
+    """
+    Aggregate stored profiles into collapsed-stack text ("frame;frame count"
+    per line), each stack rooted at its "METHOD route" so one flamegraph can
+    compare endpoints.
+    """
+    totals: Counter = Counter()
+    for record in iter_profiles(since, until, store_dir):
+        if route and record["route"] != route:
+            continue
+        root = f"{record['method']} {record['route']}"
+        for stack, count in record["stacks"].items():
+            totals[f"{root};{stack}"] += count
+    return "".join(f"{stack} {count}\n" for stack, count in sorted(totals.items()))
+
+
+# ---------- SETUP ----------
+
+def _should_profile() -> bool:
+    if request.headers.get(PROFILE_HEADER):
+        return request_admin_user() is not None
+    return PROFILE_SAMPLE_RATE > 0 and random.random() < PROFILE_SAMPLE_RATE
+
+
+def setup_request_profiling(app):
+    """
+    Attach sampling-profiler middleware to Flask app.
+    """
+
+    @app.before_request
+    def _start_profiler():
+        try:
+            if not _should_profile():
+                return
+        except Exception:
+            logger.warning("Profiling decision failed", exc_info=True)
+            return
+        g._profile_start = time.perf_counter()
+        g._profile_sampler = StackSampler(threading.get_ident(), PROFILE_INTERVAL_MS / 1000.0).start()
+
+    @app.teardown_request
+    def _save_profile(exc):
+        sampler = g.pop("_profile_sampler", None)
+        if sampler is None:
+            return
+        stacks = sampler.stop()
+        try:
+            save_profile({
+                "ts": time.time(),
+                "method": request.method,
+                "route": request.url_rule.rule if request.url_rule is not None else request.path,
+                "duration_ms": round((time.perf_counter() - g._profile_start) * 1000, 2),
+                "interval_ms": PROFILE_INTERVAL_MS,
+                "stacks": dict(stacks),
+            })
+        except Exception:
+            logger.warning("Failed to store request profile", exc_info=True)
@@ -0,0 +1,182 @@
+"""
+Per-stage request timing: Server-Timing headers and latency histograms.
+
+Responsibilities:
+- Time named stages of a request (timed() / record_timing())
+- Emit a request's stage timings as a Server-Timing response header
+- Keep per-stage and per-endpoint latency histograms in process
+- Render them in the Prometheus text exposition format (served at /metrics)
+
+Histograms live in process memory: with several workers each one exports
+its own series, so scrape every worker or aggregate with sum() in queries.
+Stages recorded outside a request (batch jobs, cache warming) are ignored.
+"""
+
+import os
+import time
+import threading
+from bisect import bisect_left
+from contextlib import contextmanager
+from typing import Dict, Iterable, Tuple
+
+from flask import g, has_request_context, request
+
+
+# ---------- CONFIG ----------
+
+SERVER_TIMING_ENABLED = os.getenv("SERVER_TIMING_ENABLED", "1").lower() in ("1", "true", "yes")
+
+# Upper bounds in seconds (Prometheus convention); +Inf is implicit.
+LATENCY_BUCKETS = (
+    0.001, 0.0025, 0.005, 0.01, 0.025, 0.05,
+    0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0,
+)
+
+
+# ---------- HISTOGRAMS ----------
+
+class LatencyHistogram:
+    """Thread-safe labelled histogram with fixed buckets."""
+
+    def __init__(self, name: str, help_text: str, label_names: Tuple[str, ...],
+                 buckets: Tuple[float, ...] = LATENCY_BUCKETS):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = label_names
+        self.buckets = buckets
+        self._series: Dict[Tuple[str, ...], list] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, seconds: float, *labels: str) -> None:
+        index = bisect_left(self.buckets, seconds)
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                # [per-bucket counts (last = +Inf), sum, count]
+                series = self._series[labels] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][index] += 1
+            series[1] += seconds
+            series[2] += 1
+
+    def snapshot(self) -> Dict[Tuple[str, ...], dict]:
+        with self._lock:
+            return {
+                labels: {"buckets": list(counts), "sum": total, "count": count}
+                for labels, (counts, total, count) in self._series.items()
+            }
+
+    def reset(self) -> None:
+        with self._lock:
+            self._series.clear()
+
+    def render(self) -> Iterable[str]:
+        yield f"# HELP {self.name} {self.help_text}"
+        yield f"# TYPE {self.name} histogram"
+        for labels, series in sorted(self.snapshot().items()):
+            base = ",".join(f'{k}="{_escape(v)}"' for k, v in zip(self.label_names, labels))
+            sep = "," if base else ""
+            cumulative = 0
+            bounds = [repr(b) for b in self.buckets] + ["+Inf"]
+            for bound, count in zip(bounds, series["buckets"]):
+                cumulative += count
+                yield f'{self.name}_bucket{{{base}{sep}le="{bound}"}} {cumulative}'
+            yield f"{self.name}_sum{{{base}}} {series['sum']:.6f}"
+            yield f"{self.name}_count{{{base}}} {series['count']}"
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+STAGE_LATENCY = LatencyHistogram(
+    "app_stage_duration_seconds",
+    "Latency of named request stages (search pipeline, controllers).",
+    ("stage",),
+)
+
+REQUEST_LATENCY = LatencyHistogram(
+    "http_request_duration_seconds",
+    "End-to-end request latency by route.",
+    ("method", "endpoint", "status"),
+)
+
+HISTOGRAMS = [STAGE_LATENCY, REQUEST_LATENCY]
+
+
+def register_histogram(histogram: LatencyHistogram) -> LatencyHistogram:
+    """Include `histogram` in /metrics output and reset_metrics()."""
+    HISTOGRAMS.append(histogram)
+    return histogram
+
+
+# ---------- STAGE TIMING API ----------
+
+def record_timing(stage: str, ms: float) -> None:
+    """Add `ms` to the current request's `stage` (summed if recorded twice)."""
+    if not has_request_context():
+        return
+    timings = g.setdefault("_stage_timings", {})
+    timings[stage] = timings.get(stage, 0.0) + ms
+
+
+def record_timings(timings: Dict[str, float]) -> None:
+    for stage, ms in timings.items():
+        record_timing(stage, ms)
+
+
+@contextmanager
+def timed(stage: str):
+    """Time the enclosed block as `stage` of the current request."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        record_timing(stage, (time.perf_counter() - start) * 1000)
+
+
+def server_timing_header(timings: Dict[str, float]) -> str:
+    return ", ".join(f"{stage};dur={ms:.2f}" for stage, ms in timings.items())
+
+
+def render_metrics() -> str:
+    lines = []
+    for histogram in HISTOGRAMS:
+        lines.extend(histogram.render())
+    return "\n".join(lines) + "\n"
+
+
+def reset_metrics() -> None:
+    for histogram in HISTOGRAMS:
+        histogram.reset()
+
+
+# ---------- SETUP ----------
+
+def setup_request_timing(app):
+    """
+    Attach stage-timing middleware: observes histograms for every request
+    and adds the Server-Timing header.
+    """
+
+    @app.before_request
+    def _start_request_timer():
+        g._timing_start = time.perf_counter()
+
+    @app.after_request
+    def _emit_timings(response):
+        start = getattr(g, "_timing_start", None)
+        if start is None:
+            return response
+
+        elapsed = time.perf_counter() - start
+        endpoint = request.url_rule.rule if request.url_rule is not None else "unmatched"
+        REQUEST_LATENCY.observe(elapsed, request.method, endpoint, str(response.status_code))
+
+        timings = dict(g.get("_stage_timings") or {})
+        for stage, ms in timings.items():
+            STAGE_LATENCY.observe(ms / 1000.0, stage)
+
+        if SERVER_TIMING_ENABLED:
+            timings["app"] = elapsed * 1000
+            response.headers.add("Server-Timing", server_timing_header(timings))
+        return response
@@ -6,27 +6,55 @@ Responsibilities:
 - A/B ranking logic
 - ML-based scoring
 - Recent interaction boosting
+- Tiered (per-cluster cached + per-user re-rank) personalization
+- Optional semantic (LSA + ANN) retrieval fused with lexical results
+- Two-stage ranking: cheap first-stage top-K before ML scoring
+- Per-stage timings (cache, db, fuzzy, score, sort) for Server-Timing / /metrics
+- Accept independent lookups prefetched by the caller (SearchLookups), or
+  prefetch them itself: one Redis MGET, then the remaining DB / profile
+  lookups concurrently on the shared fan-out pool
 """
 
+import os
 import json
+import random
+import logging
 import difflib
+from dataclasses import dataclass
 from datetime import datetime, timezone
-from typing import List
+from typing import Any, List
 
-from backend.services.db_product_service import get_products_df
+import numpy as np
+
+from backend.services.db_product_service import get_products_df, get_products_by_ids
 from backend.services.db_event_service import get_events_df
 from backend.services.user_profile_service import get_profiles
 from backend.services.db_user_manager import get_user_by_id
-from backend.services.redis_client import redis_get_json, redis_setex_json
+from backend.services.redis_client import (
+    redis_get_json,
+    redis_mget_json,
+    redis_msetex_entries,
+    redis_setex_json,
+)
 from backend.services.cache_keys import query_hash
+from backend.services.semantic_search_service import semantic_product_ids
+from backend.utils.fanout import fan_out
+from backend.utils.request_timing import timed
 
 from ml.features import build_features
-from ml.model import predict_score
+from ml.model import get_model_version, predict_scores
+from ml.profile_store import ProfileStore
+
+
+logger = logging.getLogger("search")
 
 
 # ---------- CONFIG ----------
 
 CACHE_SECONDS = 300
+# Prefetch independent lookups concurrently (one MGET + fan-out pool);
+# 0 = fetch them one after another as ranking needs them
+SEARCH_FANOUT = os.getenv("SEARCH_FANOUT", "1").lower() in ("1", "true", "yes")
 RANKED_CACHE_SECONDS = 120
 RECENT_BOOST_CACHE_SECONDS = 30
 FUZZY_MATCH_THRESHOLD = 0.7
@@ -36,8 +64,39 @@ FUZZY_MATCH_THRESHOLD = 0.7
 # score magnitudes are small; a percentage multiplier is scale-invariant.
 RECENT_BOOST_MAX = 0.20
 RECENT_BOOST_DECAY = 0.02
+RECENT_BOOST_EVENTS = ("click", "add_to_cart")
 CLUSTER_BOOST_WEIGHT = 0.5
 
+# Tiered ranking: rank once per query × group × cluster, then re-rank per user
+# with linear category/price deltas. Weights mirror the model's fallback
+# formula (ml/model.py) for the category_score / price_affinity features.
+# Off by default: it approximates the model for every Group A user, which
+# changes that arm's ranking; opt in per deployment.
+SEARCH_TIERED_RANKING = os.getenv("SEARCH_TIERED_RANKING", "0").lower() in ("1", "true", "yes")
+PERSONAL_CATEGORY_WEIGHT = 0.15
+PERSONAL_PRICE_WEIGHT = 0.05
+
+# Semantic retrieval: add the ANN index's nearest products to the lexical
+# candidates, merged by reciprocal rank fusion. Off unless enabled.
+SEARCH_SEMANTIC = os.getenv("SEARCH_SEMANTIC", "0").lower() in ("1", "true", "yes")
+SEMANTIC_TOP_K = int(os.getenv("SEARCH_SEMANTIC_TOP_K", "50"))
+SEMANTIC_MIN_SCORE = float(os.getenv("SEARCH_SEMANTIC_MIN_SCORE", "0.3"))
+RRF_K = 60
+
+# Two-stage ranking: only the top-K candidates by a cheap first-stage score
+# (text match × popularity prior) reach the ranker. K is per A/B group
+# (SEARCH_FIRST_STAGE_K_A / _B, falling back to SEARCH_FIRST_STAGE_K);
+# 0 disables the cut. A sample of requests also ranks the full set and logs
+# recall@K so K can be tuned against latency.
+FIRST_STAGE_DEFAULT_K = int(os.getenv("SEARCH_FIRST_STAGE_K", "200"))
+FIRST_STAGE_K = {
+    group: int(os.getenv(f"SEARCH_FIRST_STAGE_K_{group}", FIRST_STAGE_DEFAULT_K))
+    for group in ("A", "B")
+}
+FIRST_STAGE_TITLE_WEIGHT = 1.0
+FIRST_STAGE_RECALL_AT = 20
+FIRST_STAGE_RECALL_SAMPLE_RATE = float(os.getenv("SEARCH_FIRST_STAGE_RECALL_SAMPLE_RATE", "0.01"))
+
 
 # ---------- HELPERS ----------
 
@@ -76,37 +135,61 @@ def _fuzzy_match(text: str, query_words: List[str]) -> bool:
     return False
 
 
+def recent_boost_key(user_id: str) -> str:
+    return f"recent_boost:{user_id}"
+
+
+def parse_recent_boost(cached) -> dict[int, float] | None:
+    """Decode a cached recent-boost map; None if absent/invalid."""
+    if isinstance(cached, dict):
+        return {int(k): v for k, v in cached.items()}
+    return None
+
+
+def recent_boost_from_products(product_ids) -> dict[int, float]:
+    """Newest-first interacted product ids -> multiplicative boosts."""
+    boosts = {}
+    for i, product_id in enumerate(product_ids):
+        # Multiplicative percentage boost: 20% for rank-0, decays by 2% per rank
+        boosts[int(product_id)] = max(0.0, RECENT_BOOST_MAX - RECENT_BOOST_DECAY * i)
+    return boosts
+
+
 def _get_recent_boost(user_id: str) -> dict[int, float]:
     if not user_id:
         return {}
 
-    cache_key = f"recent_boost:{user_id}"
-    cached = redis_get_json(cache_key, count_stats=False)
-    if isinstance(cached, dict):
-        return {int(k): v for k, v in cached.items()}
+    cached = parse_recent_boost(redis_get_json(recent_boost_key(user_id), count_stats=False))
+    if cached is not None:
+        return cached
+    return _load_recent_boost(user_id)
+
 
+def _load_recent_boost(user_id: str) -> dict[int, float]:
+    """Recent boost from the events table (cache miss path); caches the result."""
     boosts = {}
     try:
         df = get_events_df(
             user_id=user_id,
-            event_types=["click", "add_to_cart"],
+            event_types=RECENT_BOOST_EVENTS,
             limit=10,
         )
         if not df.empty:
-            for i, row in enumerate(df.itertuples()):
-                # Multiplicative percentage boost: 20% for rank-0, decays by 2% per rank
-                boosts[int(row.product_id)] = max(0.0, RECENT_BOOST_MAX - RECENT_BOOST_DECAY * i)
+            boosts = recent_boost_from_products(df["product_id"])
     except Exception:
         pass
 
     # Cache with short TTL — invalidated by cache_invalidation.py on new events
-    redis_setex_json(cache_key, {str(k): v for k, v in boosts.items()}, RECENT_BOOST_CACHE_SECONDS)
+    redis_setex_json(recent_boost_key(user_id), {str(k): v for k, v in boosts.items()}, RECENT_BOOST_CACHE_SECONDS)
     return boosts
 
 
 def _get_cluster_category_boost(cluster: int, profiles: dict) -> dict:
     if cluster is None:
         return {}
+    if isinstance(profiles, ProfileStore):
+        # Precomputed by the batch job — no scan over every profile
+        return profiles.cluster_boost(cluster)
 
     counts = {}
     for profile in profiles.values():
@@ -123,9 +206,442 @@ def _get_cluster_category_boost(cluster: int, profiles: dict) -> dict:
 
 
 def _ranked_cache_key(query: str, user_id: str, cluster, ab_group: str) -> str:
+    # Model version in the key: a hot-reloaded model never serves rankings
+    # scored by its predecessor.
     user_key = user_id or "anon"
     cluster_key = "none" if cluster is None else str(cluster)
-    return f"search_ranked:{query_hash(query)}:{ab_group}:{cluster_key}:{user_key}"
+    return f"search_ranked:{query_hash(query)}:{get_model_version()}:{ab_group}:{cluster_key}:{user_key}"
+
+
+def _tier_cache_key(query: str, cluster, ab_group: str) -> str:
+    """Shared query × model version × group × cluster ranking — no user component."""
+    cluster_key = "none" if cluster is None else str(cluster)
+    return f"search_tier:{query_hash(query)}:{get_model_version()}:{ab_group}:{cluster_key}"
+
+
+def ranking_cache_key(query: str, user_id: str, cluster, ab_group: str) -> str:
+    """Key of the ranking search_products reads first (tiered or per-user)."""
+    if SEARCH_TIERED_RANKING:
+        return _tier_cache_key(query, cluster, ab_group)
+    return _ranked_cache_key(query, user_id, cluster, ab_group)
+
+
+def base_cache_key(query: str, category: str = None) -> str:
+    # Key includes category so category-expanded results cache separately,
+    # and the retrieval mode so toggling it never serves the other's list.
+    cat_key = category.lower() if category else "none"
+    mode = "semantic" if SEARCH_SEMANTIC else "base"
+    return f"search_products:{query_hash(query)}:{cat_key}:{mode}"
+
+
+# ---------- PREFETCHED LOOKUPS ----------
+
+UNSET: Any = object()
+
+
+@dataclass
+class SearchLookups:
+    """
+    Independent inputs of search_products fetched ahead of ranking (e.g.
+    concurrently by the async path). search_products fetches any field left
+    UNSET itself; a prefetched cache miss is None.
+    """
+    ranking: Any = UNSET           # cached list at ranking_cache_key()
+    base_candidates: Any = UNSET   # cached list at base_cache_key()
+    text_products: Any = UNSET     # get_products_df(search_query=query)
+    category_products: Any = UNSET # get_products_df(category_filter=category)
+    profiles: Any = UNSET          # get_profiles()
+    recent_boost: Any = UNSET      # _get_recent_boost(user_id)
+
+
+def _prefetched(lookups, name: str, fetch):
+    value = getattr(lookups, name) if lookups is not None else UNSET
+    return fetch() if value is UNSET else value
+
+
+def prefetch_lookups(query, user_id, cluster, ab_group, category=None, force_refresh=False) -> SearchLookups:
+    """
+    Fetch search_products' independent inputs up front: one MGET for the
+    ranking, base-candidate and recent-boost caches, then whatever is still
+    needed (text / category queries, profiles, recent-boost events)
+    concurrently, so a cold search waits for its slowest lookup rather than
+    the sum of them. Cluster boost depends on profiles and stays lazy.
+    """
+    personalized = bool(user_id) and ab_group != "B"
+    ranking_key = ranking_cache_key(query, user_id, cluster, ab_group)
+    keys = [ranking_key, base_cache_key(query, category)]
+    if personalized:
+        keys.append(recent_boost_key(user_id))
+
+    with timed("search_cache"):
+        values = redis_mget_json(keys, counted=() if force_refresh else (ranking_key,))
+
+    lookups = SearchLookups(base_candidates=values[1])
+    if not force_refresh:
+        lookups.ranking = values[0]
+    ranked = isinstance(lookups.ranking, list)
+    if personalized:
+        recent_boost = parse_recent_boost(values[2])
+        if recent_boost is not None:
+            lookups.recent_boost = recent_boost
+    else:
+        lookups.recent_boost = {}
+
+    # Tiered rankings are re-ranked per user even on a hit
+    rerank = SEARCH_TIERED_RANKING and personalized
+    calls = {}
+    if not ranked and not lookups.base_candidates:
+        calls["text_products"] = lambda: get_products_df(search_query=query)
+        if category:
+            calls["category_products"] = lambda: get_products_df(category_filter=category)
+    if lookups.recent_boost is UNSET and (not ranked or rerank):
+        calls["recent_boost"] = lambda: _load_recent_boost(user_id)
+    if not ranked or rerank:
+        # Last: runs on this thread, usually an in-memory read
+        calls["profiles"] = get_profiles
+
+    if calls:
+        with timed("search_fanout"):
+            for name, value in fan_out(calls).items():
+                setattr(lookups, name, value)
+    return lookups
+
+
+def _cluster_category_score(category: str, cluster_boost: dict) -> float:
+    return min(1.0, CLUSTER_BOOST_WEIGHT * cluster_boost.get(category, 0))
+
+
+def _personalize(results: list, profile: dict, cluster_boost: dict, recent_boost: dict) -> list:
+    """
+    Cheap per-user re-rank of a cached cluster-level ranking.
+
+    The tier score was computed with the cluster category signal only and no
+    price affinity. The user's own signals are layered on as linear deltas
+    (weighted like the model's fallback formula) and the recent-interaction
+    boost is applied multiplicatively, exactly as in the exact path.
+    """
+    cat_pref = (profile or {}).get("category_pref", {})
+    if not cat_pref and not recent_boost and (profile or {}).get("avg_price") is None:
+        return results
+
+    personalized = []
+    with timed("search_score"):
+        for r in results:
+            cluster_score = _cluster_category_score(r["category"], cluster_boost)
+            user_score = min(1.0, cat_pref.get(r["category"], 0) + cluster_score)
+            score = (
+                r["score"]
+                + PERSONAL_CATEGORY_WEIGHT * (user_score - cluster_score)
+                + PERSONAL_PRICE_WEIGHT * user_price_affinity(profile, r["price"])
+            )
+            score *= (1.0 + recent_boost.get(int(r["product_id"]), 0))
+            personalized.append({**r, "score": round(score, 3)})
+
+    with timed("search_sort"):
+        personalized.sort(key=lambda x: x["score"], reverse=True)
+    return personalized
+
+
+def _candidate_row(r) -> dict:
+    created_at = r["created_at"]
+    return {
+        "product_id": int(r["product_id"]),
+        "title": r["title"],
+        "description": r["description"],
+        "price": r["price"],
+        "category": r["category"],
+        "rating": float(r["rating"]),
+        "popularity": float(r["popularity"]),
+        "created_at": created_at.isoformat() if hasattr(created_at, 'isoformat') else str(created_at),
+    }
+
+
+def _fuse_semantic(query: str, products: list) -> list:
+    """
+    Reciprocal rank fusion of the lexical candidate order with the semantic
+    index's nearest products. Semantic-only hits are hydrated from the DB
+    and flagged so the lexical filter keeps them.
+    """
+    semantic_ids = semantic_product_ids(query, SEMANTIC_TOP_K, SEMANTIC_MIN_SCORE)
+    if not semantic_ids:
+        return products
+
+    by_id = {row["product_id"]: row for row in products}
+    fused = {pid: 1.0 / (RRF_K + rank + 1) for rank, pid in enumerate(by_id)}
+
+    missing = [pid for pid in semantic_ids if pid not in by_id]
+    if missing:
+        with timed("search_db"):
+            hydrated = get_products_by_ids(missing)
+        for p in hydrated:
+            by_id[int(p["product_id"])] = _candidate_row(p)
+
+    for rank, pid in enumerate(semantic_ids):
+        if pid in by_id:
+            fused[pid] = fused.get(pid, 0.0) + 1.0 / (RRF_K + rank + 1)
+            by_id[pid] = {**by_id[pid], "semantic": True}
+
+    return [by_id[pid] for pid in sorted(fused, key=fused.get, reverse=True)]
+
+
+def _load_candidates(query: str, category: str = None, lookups: SearchLookups = None,
+                     writes: dict = None) -> list:
+    """Base (non-personalized) candidates: cached text search + category expansion
+    (+ semantic neighbours when SEARCH_SEMANTIC is on).
+
+    With `writes`, the cache entry is added to it ({key: (value, ttl)}) for
+    the caller to store together with its ranking instead of written here."""
+    cache_key = base_cache_key(query, category)
+
+    with timed("search_cache"):
+        cached_products = _prefetched(
+            lookups, "base_candidates", lambda: redis_get_json(cache_key, count_stats=False)
+        )
+    if cached_products:
+        return cached_products
+
+    # Text search
+    with timed("search_db"):
+        products_df = _prefetched(lookups, "text_products", lambda: get_products_df(search_query=query))
+    seen_ids: set[int] = set()
+    products = []
+
+    def _df_to_rows(df):
+        rows = []
+        for r in df.to_dict("records"):
+            pid = int(r["product_id"])
+            if pid in seen_ids:
+                continue
+            seen_ids.add(pid)
+            rows.append(_candidate_row(r))
+        return rows
+
+    if products_df is not None and not products_df.empty:
+        products.extend(_df_to_rows(products_df))
+
+    # Category expansion: when intent detected a category (e.g. "laptops" →
+    # "Computers"), fetch ALL products in that category so results aren't
+    # limited to those that literally contain the word "laptop".
+    if category:
+        with timed("search_db"):
+            cat_df = _prefetched(
+                lookups, "category_products", lambda: get_products_df(category_filter=category)
+            )
+        if cat_df is not None and not cat_df.empty:
+            products.extend(_df_to_rows(cat_df))
+
+    if SEARCH_SEMANTIC:
+        with timed("search_semantic"):
+            products = _fuse_semantic(query, products)
+
+    if products:
+        if writes is not None:
+            writes[cache_key] = (products, CACHE_SECONDS)
+        else:
+            redis_setex_json(cache_key, products, CACHE_SECONDS)
+    return products
+
+
+
+def _filter_candidates(products: list, query: str, category: str = None) -> list:
+    # --- Fuzzy text filtering ---
+    # Products whose category exactly matches the intent-detected category are
+    # automatically included — they are semantically relevant even if their
+    # title doesn't contain the query word (e.g. "MacBook Pro" for "laptops").
+    # Semantic hits are kept for the same reason.
+    category_lower = category.lower() if category else None
+    query_words = [w for w in query.lower().split() if w]
+    with timed("search_fuzzy"):
+        return [
+            row for row in products
+            if row.get("semantic")
+            or (category_lower and (row.get("category") or "").lower() == category_lower)
+            or _fuzzy_match(f"{row['title']} {row['description']} {row.get('category') or ''}", query_words)
+        ]
+
+
+def _rank_by_popularity(filtered: list) -> list:
+    # --- Group B: simple popularity ---
+    with timed("search_score"):
+        results = [
+            {
+                "product_id": row["product_id"],
+                "title": row["title"],
+                "description": row["description"],
+                "price": row["price"],
+                "category": row["category"],
+                "rating": row["rating"],
+                "popularity": row["popularity"],
+                "score": float(row["popularity"]),
+            }
+            for row in filtered
+        ]
+    with timed("search_sort"):
+        return sorted(results, key=lambda x: x["score"], reverse=True)
+
+
+def _rank_by_model(filtered: list, profile: dict, cluster_boost: dict, recent_boost: dict) -> list:
+    # --- Group A: ML ranking ---
+    results = []
+    if not filtered:
+        return results
+    with timed("search_score"):
+        rows = []
+        for r in filtered:
+            cat_pref = profile.get("category_pref", {}).get(r["category"], 0)
+            cl_boost = cluster_boost.get(r["category"], 0)
+            # Cap combined category signal to [0, 1] — the two components share the same scale
+            category_score = min(1.0, cat_pref + CLUSTER_BOOST_WEIGHT * cl_boost)
+
+            # Convert created_at string to datetime if needed for features
+            created_at = r.get("created_at")
+            if isinstance(created_at, str):
+                created_at = datetime.fromisoformat(created_at)
+
+            rows.append(build_features(
+                popularity=r["popularity"],
+                rating=r["rating"],
+                created_at=created_at,
+                category_score=category_score,
+                price_affinity=user_price_affinity(profile, r["price"]),
+            ))
+
+        # One model call for every candidate (see ml/model.py:predict_scores)
+        scores = predict_scores(np.stack(rows))
+
+        for r, score in zip(filtered, scores):
+            # Multiplicative recent boost: scale-invariant regardless of model score magnitude
+            boost_pct = recent_boost.get(int(r["product_id"]), 0)
+            score = float(score) * (1.0 + boost_pct)
+
+            results.append({
+                "product_id": int(r["product_id"]),
+                "title": r["title"],
+                "description": r["description"],
+                "price": r["price"],
+                "category": r["category"],
+                "rating": float(r["rating"]),
+                "popularity": float(r["popularity"]),
+                "score": round(score, 3),
+            })
+
+    with timed("search_sort"):
+        return sorted(results, key=lambda x: x["score"], reverse=True)
+
+
+def _first_stage_k(ab_group: str) -> int:
+    return FIRST_STAGE_K.get(ab_group, FIRST_STAGE_DEFAULT_K)
+
+
+def _first_stage_scores(filtered: list, query: str) -> np.ndarray:
+    """
+    Cheap relevance proxy: candidate-order discount (lexical / fused rank,
+    category-expansion rows come last) plus title term overlap, times a
+    log-popularity prior.
+    """
+    query_words = [w for w in query.lower().split() if w]
+    n = len(filtered)
+
+    position = 1.0 / np.log2(np.arange(n) + 2.0)
+    title_overlap = np.fromiter(
+        (
+            sum(w in (row.get("title") or "").lower() for w in query_words) / len(query_words)
+            if query_words else 0.0
+            for row in filtered
+        ),
+        dtype=np.float64,
+        count=n,
+    )
+    popularity = np.fromiter(
+        (max(float(row.get("popularity") or 0.0), 0.0) for row in filtered),
+        dtype=np.float64,
+        count=n,
+    )
+    return (position + FIRST_STAGE_TITLE_WEIGHT * title_overlap) * (1.0 + np.log1p(popularity))
+
+
+def _select_first_stage(filtered: list, query: str, k: int) -> list:
+    """Top-k rows by first-stage score (argpartition, original order kept)."""
+    if k <= 0 or len(filtered) <= k:
+        return filtered
+    scores = _first_stage_scores(filtered, query)
+    top = np.sort(np.argpartition(-scores, k - 1)[:k])
+    return [filtered[i] for i in top]
+
+
+def _log_first_stage_recall(filtered: list, results: list, rank_fn, ab_group: str, k: int) -> None:
+    """recall@N of the cut: share of the full ranking's top N that survived it."""
+    full = rank_fn(filtered)[:FIRST_STAGE_RECALL_AT]
+    if not full:
+        return
+    kept = {r["product_id"] for r in results}
+    recall = sum(r["product_id"] in kept for r in full) / len(full)
+    logger.info(
+        "first_stage_recall group=%s k=%d candidates=%d recall@%d=%.3f",
+        ab_group, k, len(filtered), FIRST_STAGE_RECALL_AT, recall,
+    )
+
+
+def _two_stage_rank(filtered: list, query: str, ab_group: str, rank_fn) -> list:
+    """Apply the first-stage cut, then `rank_fn` (popularity or model) to the survivors."""
+    k = _first_stage_k(ab_group)
+    if k <= 0 or len(filtered) <= k:
+        return rank_fn(filtered)
+
+    results = rank_fn(_select_first_stage(filtered, query, k))
+    if random.random() < FIRST_STAGE_RECALL_SAMPLE_RATE:
+        try:
+            _log_first_stage_recall(filtered, results, rank_fn, ab_group, k)
+        except Exception:
+            logger.exception("First-stage recall sampling failed")
+    return results
+
+
+def _search_tiered(query, user_id, cluster, ab_group, category, force_refresh, lookups=None):
+    """
+    Tiered ranking: one cached ranking per query × group × cluster, shared by
+    every user (and anonymous traffic), with a per-user re-rank on top.
+    """
+    tier_cache_key = _tier_cache_key(query, cluster, ab_group)
+
+    with timed("search_cache"):
+        tiered = None if force_refresh else _prefetched(
+            lookups, "ranking", lambda: redis_get_json(tier_cache_key)
+        )
+    profiles = None
+
+    if not isinstance(tiered, list):
+        writes = {}
+        products = _load_candidates(query, category, lookups, writes)
+        if not products:
+            return []
+        filtered = _filter_candidates(products, query, category)
+
+        if ab_group == "B":
+            tiered = _two_stage_rank(filtered, query, ab_group, _rank_by_popularity)
+        else:
+            profiles = _prefetched(lookups, "profiles", get_profiles)
+            cluster_boost = _get_cluster_category_boost(cluster, profiles)
+            tiered = _two_stage_rank(
+                filtered, query, ab_group,
+                lambda rows: _rank_by_model(rows, {}, cluster_boost, {}),
+            )
+
+        writes[tier_cache_key] = (tiered, RANKED_CACHE_SECONDS)
+        redis_msetex_entries(writes)
+
+    # Group B is popularity-only: nothing user-specific to layer on.
+    if ab_group == "B" or not user_id:
+        return tiered
+
+    profiles = profiles if profiles is not None else _prefetched(lookups, "profiles", get_profiles)
+    profile = profiles.get(user_id, {})
+    recent_boost = _prefetched(lookups, "recent_boost", lambda: _get_recent_boost(user_id))
+    if not profile and not recent_boost:
+        return tiered
+
+    cluster_boost = _get_cluster_category_boost(cluster, profiles) if profile else {}
+    return _personalize(tiered, profile, cluster_boost, recent_boost)
 
 
 # ---------- MAIN API ----------
@@ -137,142 +653,59 @@ def search_products(
     ab_group="A",
     limit=None,
     category: str = None,
+    force_refresh: bool = False,
+    lookups: SearchLookups = None,
 ):
-    # Cache base query candidates (non-personalized).
-    # Key includes category so category-expanded results cache separately.
-    cat_key = category.lower() if category else "none"
-    base_cache_key = f"search_products:{query_hash(query)}:{cat_key}:base"
+    """
+    force_refresh=True skips the ranked-cache read (the base candidate cache
+    is still used) so batch jobs such as cache warming overwrite stale
+    rankings, e.g. after a retrain, instead of just re-reading them.
+
+    lookups carries inputs the caller already fetched (SearchLookups);
+    without it they are prefetched concurrently (SEARCH_FANOUT) or fetched
+    one by one as ranking needs them.
+
+    By default each user gets an exactly-scored, individually cached ranking;
+    with SEARCH_TIERED_RANKING enabled the ranked cache is shared per query ×
+    group × cluster and personalized per request with linear deltas.
+    """
+    if lookups is None and SEARCH_FANOUT:
+        lookups = prefetch_lookups(query, user_id, cluster, ab_group, category, force_refresh)
+
+    if SEARCH_TIERED_RANKING:
+        results = _search_tiered(query, user_id, cluster, ab_group, category, force_refresh, lookups)
+        return results[:limit] if limit is not None else results
+
     ranked_cache_key = _ranked_cache_key(query, user_id, cluster, ab_group)
 
-    cached_ranked = redis_get_json(ranked_cache_key)
+    with timed("search_cache"):
+        cached_ranked = None if force_refresh else _prefetched(
+            lookups, "ranking", lambda: redis_get_json(ranked_cache_key)
+        )
     if isinstance(cached_ranked, list):
         return cached_ranked[:limit] if limit is not None else cached_ranked
 
-    cached_products = redis_get_json(base_cache_key, count_stats=False)
-
-    if cached_products:
-        products = cached_products
-    else:
-        # Text search
-        products_df = get_products_df(search_query=query)
-        seen_ids: set[int] = set()
-        products = []
-
-        def _df_to_rows(df):
-            rows = []
-            for _, r in df.iterrows():
-                pid = int(r.product_id)
-                if pid in seen_ids:
-                    continue
-                seen_ids.add(pid)
-                rows.append({
-                    "product_id": pid,
-                    "title": r.title,
-                    "description": r.description,
-                    "price": r.price,
-                    "category": r.category,
-                    "rating": float(r.rating),
-                    "popularity": float(r.popularity),
-                    "created_at": r.created_at.isoformat() if hasattr(r.created_at, 'isoformat') else str(r.created_at),
-                })
-            return rows
-
-        if products_df is not None and not products_df.empty:
-            products.extend(_df_to_rows(products_df))
-
-        # Category expansion: when intent detected a category (e.g. "laptops" →
-        # "Computers"), fetch ALL products in that category so results aren't
-        # limited to those that literally contain the word "laptop".
-        if category:
-            cat_df = get_products_df(category_filter=category)
-            if cat_df is not None and not cat_df.empty:
-                products.extend(_df_to_rows(cat_df))
-
-        if not products:
-            return []
-
-        redis_setex_json(base_cache_key, products, CACHE_SECONDS)
+    writes = {}
+    products = _load_candidates(query, category, lookups, writes)
+    if not products:
+        return []
 
     # Get user context for personalization (happens after cache hit)
-    profiles = get_profiles()
+    profiles = _prefetched(lookups, "profiles", get_profiles)
     profile = profiles.get(user_id, {})
 
-    # --- Fuzzy text filtering ---
-    # Products whose category exactly matches the intent-detected category are
-    # automatically included — they are semantically relevant even if their
-    # title doesn't contain the query word (e.g. "MacBook Pro" for "laptops").
-    category_lower = category.lower() if category else None
-    query_words = [w for w in query.lower().split() if w]
-    filtered = [
-        row for row in products
-        if (category_lower and (row.get("category") or "").lower() == category_lower)
-        or _fuzzy_match(f"{row['title']} {row['description']} {row.get('category') or ''}", query_words)
-    ]
+    filtered = _filter_candidates(products, query, category)
 
-    # --- Group B: simple popularity ---
     if ab_group == "B":
-        results = sorted(
-            (
-                {
-                    "product_id": row["product_id"],
-                    "title": row["title"],
-                    "description": row["description"],
-                    "price": row["price"],
-                    "category": row["category"],
-                    "rating": row["rating"],
-                    "popularity": row["popularity"],
-                    "score": float(row["popularity"]),
-                }
-                for row in filtered
-            ),
-            key=lambda x: x["score"],
-            reverse=True,
-        )
-
-        redis_setex_json(ranked_cache_key, results, RANKED_CACHE_SECONDS)
-
-        return results[:limit] if limit is not None else results
-
-    # --- Group A: ML ranking ---
-    recent_boost = _get_recent_boost(user_id)
-    cluster_boost = _get_cluster_category_boost(cluster, profiles)
-
-    results = []
-    for r in filtered:
-        cat_pref = profile.get("category_pref", {}).get(r["category"], 0)
-        cl_boost = cluster_boost.get(r["category"], 0)
-        # Cap combined category signal to [0, 1] — the two components share the same scale
-        category_score = min(1.0, cat_pref + CLUSTER_BOOST_WEIGHT * cl_boost)
-
-        # Convert created_at string to datetime if needed for features
-        created_at = r.get("created_at")
-        if isinstance(created_at, str):
-            created_at = datetime.fromisoformat(created_at)
-
-        features = build_features(
-            popularity=r["popularity"],
-            rating=r["rating"],
-            created_at=created_at,
-            category_score=category_score,
-            price_affinity=user_price_affinity(profile, r["price"]),
+        results = _two_stage_rank(filtered, query, ab_group, _rank_by_popularity)
+    else:
+        recent_boost = _prefetched(lookups, "recent_boost", lambda: _get_recent_boost(user_id))
+        cluster_boost = _get_cluster_category_boost(cluster, profiles)
+        results = _two_stage_rank(
+            filtered, query, ab_group,
+            lambda rows: _rank_by_model(rows, profile, cluster_boost, recent_boost),
         )
 
-        score = predict_score(features)
-        # Multiplicative recent boost: scale-invariant regardless of model score magnitude
-        boost_pct = recent_boost.get(int(r["product_id"]), 0)
-        score *= (1.0 + boost_pct)
-
-        results.append({
-            "product_id": int(r["product_id"]),
-            "title": r["title"],
-            "description": r["description"],
-            "price": r["price"],
-            "category": r["category"],
-            "rating": float(r["rating"]),
-            "popularity": float(r["popularity"]),
-            "score": round(score, 3),
-        })
-
-    results = sorted(results, key=lambda x: x["score"], reverse=True)
-    redis_setex_json(ranked_cache_key, results, RANKED_CACHE_SECONDS)
+    writes[ranked_cache_key] = (results, RANKED_CACHE_SECONDS)
+    redis_msetex_entries(writes)
     return results[:limit] if limit is not None else results
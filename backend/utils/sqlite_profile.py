@@ -0,0 +1,156 @@
+"""
+SQLite performance profile for local and single-node deployments.
+
+Responsibilities:
+- Switch file databases to WAL so readers no longer wait behind writers
+- Apply connection pragmas (synchronous, mmap_size, cache_size, temp_store)
+- Queue writers in-process: one connection writes at a time, the others
+  wait on a lock instead of spinning on SQLITE_BUSY
+
+WAL lets any number of pooled connections read while one writes; the
+writer queue covers the remaining constraint (a single writer per file).
+A connection joins the queue at its first INSERT/UPDATE/DELETE and leaves
+it when its transaction commits or rolls back, or when it is returned to
+the pool. The queue is per process; other processes writing the same file
+fall back to SQLite's busy timeout.
+
+Disable with SQLITE_PERFORMANCE_PROFILE=0 (rollback journal, no queue).
+"""
+
+import os
+import time
+import logging
+import threading
+
+from sqlalchemy import event
+
+from backend.utils.request_timing import LatencyHistogram, register_histogram
+
+
+logger = logging.getLogger("sqlite_profile")
+
+
+# ---------- CONFIG ----------
+
+SQLITE_PERFORMANCE_PROFILE = os.getenv("SQLITE_PERFORMANCE_PROFILE", "1").lower() in ("1", "true", "yes")
+# NORMAL is durable across app crashes in WAL mode; a power loss can drop
+# the last commits, never corrupt the file.
+SQLITE_SYNCHRONOUS = os.getenv("SQLITE_SYNCHRONOUS", "NORMAL")
+SQLITE_MMAP_SIZE = int(os.getenv("SQLITE_MMAP_SIZE", str(256 * 1024 * 1024)))
+# Negative = KiB (SQLite convention): 64 MiB page cache per connection
+SQLITE_CACHE_SIZE = int(os.getenv("SQLITE_CACHE_SIZE", "-65536"))
+# Give up queueing after this long and let SQLite's busy timeout decide
+SQLITE_WRITER_WAIT_SECONDS = float(os.getenv("SQLITE_WRITER_WAIT_SECONDS", "30"))
+
+_WRITE_PREFIXES = ("INSERT", "UPDATE", "DELETE", "REPLACE")
+_HOLDS_WRITER = "_sqlite_holds_writer"
+
+
+# ---------- WRITER QUEUE ----------
+
+WRITER_WAIT = register_histogram(LatencyHistogram(
+    "db_sqlite_writer_wait_seconds",
+    "Time SQLite writes waited for the single-writer queue.",
+    (),
+))
+
+
+class WriterQueue:
+    """
+    Process-wide single-writer lock, held from first write to transaction end.
+
+    Reentrant per thread: a thread already holding it through one connection
+    takes it again for another (e.g. a background batch run inline while the
+    request session has an open write) instead of waiting on itself. It is
+    released when the last of that thread's connections ends its
+    transaction. Two such connections on the same file are still serialized
+    by SQLite, within its busy timeout.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._state = threading.Lock()  # guards _owner / _holders
+        self._owner = None
+        self._holders = 0
+
+    def acquire(self, info: dict) -> None:
+        if info.get(_HOLDS_WRITER):
+            return
+        me = threading.get_ident()
+        with self._state:
+            if self._owner == me:
+                self._holders += 1
+                info[_HOLDS_WRITER] = True
+                return
+        start = time.perf_counter()
+        acquired = self._lock.acquire(timeout=SQLITE_WRITER_WAIT_SECONDS)
+        WRITER_WAIT.observe(time.perf_counter() - start)
+        if acquired:
+            with self._state:
+                self._owner, self._holders = me, 1
+            info[_HOLDS_WRITER] = True
+        else:
+            logger.warning("SQLite writer queue wait exceeded %.0fs; writing unqueued",
+                           SQLITE_WRITER_WAIT_SECONDS)
+
+    def release(self, info: dict) -> None:
+        if not info.pop(_HOLDS_WRITER, False):
+            return
+        # May run on another thread (e.g. a connection checked in elsewhere)
+        with self._state:
+            self._holders -= 1
+            if self._holders > 0:
+                return
+            self._owner = None
+        self._lock.release()
+
+
+_writer_queue = WriterQueue()
+
+
+def _is_write(statement: str) -> bool:
+    return statement.lstrip()[:7].upper().startswith(_WRITE_PREFIXES)
+
+
+# ---------- SETUP ----------
+
+def _set_pragmas(dbapi_connection, connection_record):
+    cursor = dbapi_connection.cursor()
+    try:
+        # Persistent per file; in-memory databases stay in "memory" mode
+        cursor.execute("PRAGMA journal_mode=WAL")
+        cursor.execute(f"PRAGMA synchronous={SQLITE_SYNCHRONOUS}")
+        cursor.execute(f"PRAGMA mmap_size={SQLITE_MMAP_SIZE}")
+        cursor.execute(f"PRAGMA cache_size={SQLITE_CACHE_SIZE}")
+        cursor.execute("PRAGMA temp_store=MEMORY")
+    finally:
+        cursor.close()
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if _is_write(statement):
+        _writer_queue.acquire(conn.info)
+
+
+def _end_transaction(conn):
+    _writer_queue.release(conn.info)
+
+
+def _on_checkin(dbapi_connection, connection_record):
+    # Returned to the pool mid-transaction (pool reset rolls it back)
+    _writer_queue.release(connection_record.info)
+
+
+def apply_sqlite_profile(engine) -> None:
+    """Install pragmas and the writer queue on a SQLite engine (idempotent)."""
+    if not SQLITE_PERFORMANCE_PROFILE or engine.dialect.name != "sqlite":
+        return
+    if event.contains(engine, "connect", _set_pragmas):
+        return
+    event.listen(engine, "connect", _set_pragmas)
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine, "commit", _end_transaction)
+    event.listen(engine, "rollback", _end_transaction)
+    event.listen(engine, "checkin", _on_checkin)
+    logger.info("SQLite profile: WAL, synchronous=%s, mmap_size=%d, cache_size=%d, single-writer queue",
+                SQLITE_SYNCHRONOUS, SQLITE_MMAP_SIZE, SQLITE_CACHE_SIZE)
@@ -0,0 +1,3 @@
+"""
+Reproducible in-process benchmarks (see benchmarks/run.py).
+"""
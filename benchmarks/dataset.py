@@ -0,0 +1,199 @@
+"""
+Deterministic synthetic catalog + event history in SQLite.
+
+The same (size, seed) always produces the same database, so latency numbers
+from different commits are comparable. Databases are cached under
+benchmarks/data/ and reused unless --rebuild is given.
+
+Products get titles/descriptions drawn from per-category vocabularies that
+match backend/utils/intent.py, so intent detection and category expansion
+behave as they do on real queries. Popularity is Zipf-like and events skew
+towards popular products and each user's two favourite categories, which is
+what the profile/cluster code expects to see.
+"""
+
+import os
+import random
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List
+
+from sqlalchemy import Text, create_engine, insert
+
+from backend.models import Base, Product, SearchEvent, User
+
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data")
+
+SIZES = {
+    "10k": 10_000,
+    "100k": 100_000,
+    "1m": 1_000_000,
+}
+
+USERS_PER_PRODUCT = 0.02
+EVENTS_PER_USER = 50
+CHUNK_SIZE = 20_000
+# Fixed epoch so created_at / timestamps (and freshness features) don't
+# drift with the wall clock.
+EPOCH = datetime(2025, 1, 1, tzinfo=timezone.utc)
+
+VOCABULARY: Dict[str, List[str]] = {
+    "Computers": ["laptop", "notebook", "desktop", "chromebook", "ultrabook", "workstation"],
+    "Electronics": ["smartphone", "tablet", "phone", "e-reader", "smartwatch"],
+    "Audio": ["headphones", "earbuds", "speaker", "soundbar", "earphones"],
+    "Photography": ["camera", "lens", "tripod", "webcam", "camcorder"],
+    "Networking": ["router", "modem", "mesh wifi", "ethernet switch", "range extender"],
+    "Storage": ["ssd", "hard drive", "flash drive", "memory card", "nas"],
+    "Accessories": ["keyboard", "mouse", "charger", "cable", "monitor", "hub"],
+    "Gaming": ["console", "controller", "gaming headset", "gamepad", "gaming chair"],
+    "Smart Home": ["smart bulb", "smart plug", "smart speaker", "thermostat", "doorbell"],
+}
+ADJECTIVES = [
+    "wireless", "portable", "compact", "pro", "ultra", "slim", "premium",
+    "budget", "rugged", "silent", "fast", "4k", "rgb", "ergonomic", "smart",
+]
+BRANDS = ["Acme", "Nimbus", "Vertex", "Orion", "Helix", "Pulse", "Quanta", "Zephyr"]
+PRICE_RANGES = {
+    "Computers": (300, 3000), "Electronics": (100, 1500), "Audio": (20, 600),
+    "Photography": (50, 2500), "Networking": (30, 500), "Storage": (15, 800),
+    "Accessories": (5, 400), "Gaming": (30, 700), "Smart Home": (10, 300),
+}
+EVENT_TYPES = ("click", "click", "click", "add_to_cart")
+
+
+def parse_size(size: str) -> int:
+    key = size.lower()
+    if key in SIZES:
+        return SIZES[key]
+    return int(key)
+
+
+def dataset_path(n_products: int, seed: int) -> str:
+    return os.path.join(DATA_DIR, f"catalog-{n_products}-seed{seed}.sqlite")
+
+
+def _products(rng: random.Random, n_products: int):
+    categories = list(VOCABULARY)
+    for i in range(n_products):
+        category = categories[i % len(categories)]
+        noun = rng.choice(VOCABULARY[category])
+        adjective = rng.choice(ADJECTIVES)
+        brand = rng.choice(BRANDS)
+        low, high = PRICE_RANGES[category]
+        yield {
+            "id": i + 1,
+            "title": f"{brand} {adjective} {noun} {i % 97}",
+            "description": f"{adjective} {noun} by {brand} for everyday {category.lower()} use",
+            "category": category,
+            "price": round(rng.uniform(low, high), 2),
+            "rating": round(rng.uniform(2.5, 5.0), 1),
+            "review_count": rng.randint(0, 500),
+            # Zipf-like: a few best sellers, a long tail
+            "popularity": int(1000 / (1 + rng.paretovariate(1.2))) + rng.randint(0, 5),
+            "created_at": EPOCH - timedelta(days=rng.randint(0, 730)),
+            "updated_at": EPOCH,
+        }
+
+
+def _users(n_users: int):
+    for i in range(n_users):
+        yield {
+            "user_id": f"bench_user_{i}",
+            "username": f"bench_user_{i}",
+            "email": None,
+            "password_hash": "x",
+            "email_verified": False,
+            "group": "A" if i % 2 == 0 else "B",
+            "cluster": None,
+            "created_at": EPOCH,
+            "updated_at": EPOCH,
+        }
+
+
+def _events(rng: random.Random, n_products: int, n_users: int, events_per_user: int):
+    categories = list(VOCABULARY)
+    n_categories = len(categories)
+    for u in range(n_users):
+        favourites = rng.sample(range(n_categories), 2)
+        for _ in range(events_per_user):
+            # Products are laid out round-robin by category, so product ids
+            # with (id - 1) % n_categories == c belong to category c.
+            category = rng.choice(favourites) if rng.random() < 0.8 else rng.randrange(n_categories)
+            slot = min(int(rng.paretovariate(1.1)) - 1, n_products // n_categories - 1)
+            product_id = slot * n_categories + category + 1
+            noun = VOCABULARY[categories[category]][0]
+            yield {
+                "user_id": f"bench_user_{u}",
+                "query": noun,
+                "product_id": product_id,
+                "event_type": rng.choice(EVENT_TYPES),
+                "group": "A" if u % 2 == 0 else "B",
+                "position": rng.randint(0, 20),
+                "timestamp": EPOCH - timedelta(minutes=rng.randint(0, 60 * 24 * 60)),
+            }
+
+
+def _insert_chunked(conn, table, rows) -> int:
+    total = 0
+    chunk = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) >= CHUNK_SIZE:
+            conn.execute(insert(table), chunk)
+            total += len(chunk)
+            chunk = []
+    if chunk:
+        conn.execute(insert(table), chunk)
+        total += len(chunk)
+    return total
+
+
+def build_dataset(n_products: int, seed: int = 42, *, rebuild: bool = False,
+                  events_per_user: int = EVENTS_PER_USER) -> dict:
+    """Create (or reuse) the SQLite database for (n_products, seed)."""
+    path = dataset_path(n_products, seed)
+    n_users = max(100, int(n_products * USERS_PER_PRODUCT))
+    info = {"path": path, "products": n_products, "users": n_users,
+            "events": n_users * events_per_user, "seed": seed}
+
+    if os.path.exists(path) and not rebuild:
+        return info
+
+    os.makedirs(DATA_DIR, exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    if os.path.exists(tmp_path):
+        os.remove(tmp_path)
+
+    engine = create_engine(f"sqlite:///{tmp_path}")
+    # products.search_vector is PostgreSQL-only TSVECTOR; SQLite can't render
+    # it in DDL, so swap in a plain type just for CREATE TABLE.
+    original_type = Product.__table__.c.search_vector.type
+    Product.__table__.c.search_vector.type = Text()
+    try:
+        Base.metadata.create_all(engine)
+    finally:
+        Product.__table__.c.search_vector.type = original_type
+    rng = random.Random(seed)
+    with engine.begin() as conn:
+        _insert_chunked(conn, Product.__table__, _products(rng, n_products))
+        _insert_chunked(conn, User.__table__, _users(n_users))
+        _insert_chunked(conn, SearchEvent.__table__, _events(rng, n_products, n_users, events_per_user))
+    engine.dispose()
+
+    os.replace(tmp_path, path)
+    return info
+
+
+def sample_queries(seed: int, n: int) -> List[str]:
+    """Deterministic mix of plain, modifier, sort and price-constrained queries."""
+    rng = random.Random(seed)
+    templates = ["{noun}", "{adj} {noun}", "best {noun}", "cheap {noun}", "{noun} under {price}"]
+    queries = []
+    for _ in range(n):
+        category = rng.choice(list(VOCABULARY))
+        queries.append(rng.choice(templates).format(
+            noun=rng.choice(VOCABULARY[category]),
+            adj=rng.choice(ADJECTIVES),
+            price=rng.choice([50, 100, 200, 500, 1000]),
+        ))
+    return queries
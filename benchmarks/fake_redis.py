@@ -0,0 +1,204 @@
+"""
+In-memory stand-in for the redis-py client, for benchmarks.
+
+Implements the subset of commands the backend uses (string get/set with
+TTL, counters, hashes, pattern scans, pipelines, locks) with redis-py's return conventions
+and decode_responses=True semantics, so services run unchanged without a
+Redis server. Single-process only; TTLs are checked lazily on access.
+"""
+
+import fnmatch
+import threading
+import time
+from typing import Dict, Iterator, Optional, Tuple, Union
+
+
+class FakeRedis:
+    def __init__(self):
+        self._data: Dict[str, Tuple[Union[str, Dict[str, str]], Optional[float]]] = {}
+        self._lock = threading.RLock()
+        self.commands = 0
+
+    # ---------- internals ----------
+
+    def _live(self, key: str) -> Optional[str]:
+        entry = self._data.get(key)
+        if entry is None:
+            return None
+        value, expires_at = entry
+        if expires_at is not None and expires_at <= time.monotonic():
+            del self._data[key]
+            return None
+        return value
+
+    def _count(self, n: int = 1) -> None:
+        self.commands += n
+
+    # ---------- strings ----------
+
+    def get(self, key):
+        with self._lock:
+            self._count()
+            return self._live(str(key))
+
+    def mget(self, keys, *args):
+        keys = list(keys) if not isinstance(keys, str) else [keys]
+        keys.extend(args)
+        with self._lock:
+            self._count()
+            return [self._live(str(k)) for k in keys]
+
+    def set(self, key, value, ex=None, nx=False):
+        with self._lock:
+            self._count()
+            key = str(key)
+            if nx and self._live(key) is not None:
+                return None
+            expires_at = time.monotonic() + ex if ex else None
+            self._data[key] = (str(value), expires_at)
+            return True
+
+    def mset(self, mapping):
+        with self._lock:
+            self._count()
+            for key, value in mapping.items():
+                self._data[str(key)] = (str(value), None)
+            return True
+
+    def setex(self, key, ttl, value):
+        return self.set(key, value, ex=int(ttl))
+
+    def incrby(self, key, amount=1):
+        with self._lock:
+            self._count()
+            key = str(key)
+            current = self._live(key)
+            expires_at = self._data[key][1] if current is not None else None
+            value = int(current or 0) + int(amount)
+            self._data[key] = (str(value), expires_at)
+            return value
+
+    def incr(self, key, amount=1):
+        return self.incrby(key, amount)
+
+    # ---------- hashes ----------
+    # Stored in _data as a dict value
+
+    def hincrby(self, key, field, amount=1):
+        with self._lock:
+            self._count()
+            key = str(key)
+            current = self._live(key)
+            fields = dict(current) if isinstance(current, dict) else {}
+            expires_at = self._data[key][1] if current is not None else None
+            value = int(fields.get(str(field), 0)) + int(amount)
+            fields[str(field)] = str(value)
+            self._data[key] = (fields, expires_at)
+            return value
+
+    def hgetall(self, key):
+        with self._lock:
+            self._count()
+            current = self._live(str(key))
+            return dict(current) if isinstance(current, dict) else {}
+
+    # ---------- keys ----------
+
+    def delete(self, *keys):
+        with self._lock:
+            self._count()
+            removed = 0
+            for key in keys:
+                if self._live(str(key)) is not None:
+                    del self._data[str(key)]
+                    removed += 1
+            return removed
+
+    def exists(self, *keys):
+        with self._lock:
+            self._count()
+            return sum(self._live(str(k)) is not None for k in keys)
+
+    def expire(self, key, ttl):
+        with self._lock:
+            self._count()
+            value = self._live(str(key))
+            if value is None:
+                return False
+            self._data[str(key)] = (value, time.monotonic() + int(ttl))
+            return True
+
+    def scan_iter(self, match: str = "*", count: int = None) -> Iterator[str]:
+        with self._lock:
+            self._count()
+            keys = [k for k in list(self._data) if fnmatch.fnmatchcase(k, match) and self._live(k) is not None]
+        yield from keys
+
+    def keys(self, pattern: str = "*"):
+        return list(self.scan_iter(match=pattern))
+
+    def flushdb(self):
+        with self._lock:
+            self._data.clear()
+            return True
+
+    def dbsize(self):
+        with self._lock:
+            return sum(self._live(k) is not None for k in list(self._data))
+
+    def ping(self):
+        return True
+
+    # ---------- pipelines ----------
+
+    def pipeline(self, transaction=True):
+        return _FakePipeline(self)
+
+    # ---------- locks ----------
+
+    def lock(self, name, timeout=None, blocking=True, **kwargs):
+        return _FakeLock(self, f"lock:{name}", timeout)
+
+
+class _FakePipeline:
+    """Buffers commands and runs them atomically as one round trip."""
+
+    def __init__(self, client: FakeRedis):
+        self.client = client
+        self._ops = []
+
+    def __getattr__(self, name):
+        method = getattr(self.client, name)
+
+        def queue(*args, **kwargs):
+            self._ops.append((method, args, kwargs))
+            return self
+        return queue
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self._ops = []
+        return False
+
+    def execute(self):
+        with self.client._lock:
+            before = self.client.commands
+            results = [method(*args, **kwargs) for method, args, kwargs in self._ops]
+            self.client.commands = before + 1
+        self._ops = []
+        return results
+
+
+class _FakeLock:
+    def __init__(self, client: FakeRedis, key: str, timeout):
+        self.client = client
+        self.key = key
+        self.timeout = timeout
+
+    def acquire(self, blocking=True):
+        return bool(self.client.set(self.key, "1", ex=self.timeout, nx=True))
+
+    def release(self):
+        self.client.delete(self.key)
@@ -0,0 +1,312 @@
+"""
+Replay a recorded trace (benchmarks/trace.py) against the Flask app.
+
+Operations are issued open-loop by a dispatcher thread and executed by a
+pool of `--concurrency` worker threads, either at the trace's own pacing
+(sped up by `--speed`) or at a fixed `--rate` per second. Latency is
+measured from each operation's scheduled start, so queueing behind a
+saturated pool shows up in the numbers instead of silently slowing the
+arrival rate.
+
+By default the app runs in-process through its WSGI interface with Redis
+replaced by the in-memory stand-in, and DB queries are counted per
+endpoint. With --base-url requests go over HTTP to a running server
+instead; DB counts are then unavailable and cache stats are read from the
+configured REDIS_URL.
+
+Authenticated endpoints (cart, recommendations) get session tokens minted
+with SECRET_KEY, so it must match the target's. Operations by anonymous
+users on those endpoints are skipped.
+
+Usage:
+    python -m benchmarks.replay trace.jsonl.gz [--concurrency 8]
+        [--speed 60 | --rate 200] [--max-ops 10000]
+        [--size 10k | --base-url http://localhost:5000] [--output replay.json]
+"""
+
+import os
+import json
+import time
+import logging
+import argparse
+import threading
+from collections import Counter, defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from benchmarks.dataset import build_dataset, parse_size
+from benchmarks.trace import read_trace
+
+
+# ---------- OPERATIONS ----------
+
+def request_for(op: dict) -> Optional[dict]:
+    """HTTP request for a trace op; None when it can't be replayed."""
+    user_id = op.get("u") or ""
+    kind = op["op"]
+    if kind == "search":
+        return {"endpoint": "/api/search", "method": "GET", "path": "/api/search",
+                "params": {"q": op["q"]}, "user": user_id}
+    if kind == "event":
+        return {"endpoint": "/api/event", "method": "POST", "path": "/api/event",
+                "json": {"event": "click", "product_id": op["p"], "query": op.get("q", "")},
+                "user": user_id}
+    if not user_id:
+        return None
+    if kind == "cart":
+        return {"endpoint": "/api/cart/update", "method": "POST", "path": "/api/cart/update",
+                "json": {"product_id": op["p"], "quantity": 1}, "user": user_id}
+    if kind == "cart_clear":
+        return {"endpoint": "/api/cart/clear", "method": "POST", "path": "/api/cart/clear",
+                "json": {}, "user": user_id}
+    if kind == "recommendations":
+        return {"endpoint": "/api/recommendations", "method": "GET",
+                "path": "/api/recommendations", "user": user_id}
+    return None
+
+
+def schedule(ops: List[dict], speed: float, rate: Optional[float]) -> List[float]:
+    """Start offsets in seconds: fixed rate, or trace pacing divided by speed."""
+    if rate:
+        return [i / rate for i in range(len(ops))]
+    return [op.get("t", 0.0) / speed for op in ops]
+
+
+# ---------- TARGETS ----------
+
+class _TokenCache:
+    def __init__(self):
+        self._tokens: Dict[str, str] = {}
+        self._lock = threading.Lock()
+
+    def headers(self, user_id: str) -> dict:
+        if not user_id:
+            return {}
+        with self._lock:
+            token = self._tokens.get(user_id)
+            if token is None:
+                from backend.utils.auth_token import create_token
+                token = self._tokens[user_id] = create_token(user_id)
+        return {"Authorization": f"Bearer {token}"}
+
+
+class WsgiTarget:
+    """The app in-process; one test client per worker thread."""
+
+    def __init__(self):
+        from backend.app import app
+        from backend.utils.rate_limit import limiter
+        # Replays exceed per-IP limits by design
+        limiter.enabled = False
+        self.app = app
+        self._local = threading.local()
+
+    def send(self, req: dict, headers: dict):
+        client = getattr(self._local, "client", None)
+        if client is None:
+            client = self._local.client = self.app.test_client()
+        if req["method"] == "GET":
+            return client.get(req["path"], query_string=req.get("params"), headers=headers).status_code
+        return client.post(req["path"], json=req.get("json"), headers=headers).status_code
+
+
+class HttpTarget:
+    def __init__(self, base_url: str):
+        import requests
+        self._requests = requests
+        self.base_url = base_url.rstrip("/")
+        self._local = threading.local()
+
+    def send(self, req: dict, headers: dict):
+        session = getattr(self._local, "session", None)
+        if session is None:
+            session = self._local.session = self._requests.Session()
+        url = self.base_url + req["path"]
+        if req["method"] == "GET":
+            return session.get(url, params=req.get("params"), headers=headers, timeout=30).status_code
+        return session.post(url, json=req.get("json"), headers=headers, timeout=30).status_code
+
+
+# ---------- DB QUERY COUNTING ----------
+
+class QueryCounter:
+    """Counts SQL statements per endpoint via the thread running the request."""
+
+    def __init__(self, engine):
+        from sqlalchemy import event
+        self.counts: Counter = Counter()
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        event.listen(engine, "before_cursor_execute", self._on_execute)
+
+    def _on_execute(self, *args, **kwargs):
+        label = getattr(self._local, "endpoint", None) or "background"
+        with self._lock:
+            self.counts[label] += 1
+
+    def set_endpoint(self, endpoint: Optional[str]) -> None:
+        self._local.endpoint = endpoint
+
+
+# ---------- REPLAY ----------
+
+def replay(ops: List[dict], target, *, concurrency: int, speed: float, rate: Optional[float],
+           query_counter: Optional[QueryCounter] = None) -> dict:
+    tokens = _TokenCache()
+    offsets = schedule(ops, speed, rate)
+    results: Dict[str, list] = defaultdict(list)  # endpoint -> [(response_s, service_s, status)]
+    results_lock = threading.Lock()
+    skipped = Counter()
+
+    def _run(req, scheduled_at):
+        started = time.perf_counter()
+        if query_counter is not None:
+            query_counter.set_endpoint(req["endpoint"])
+        try:
+            status = target.send(req, tokens.headers(req["user"]))
+        except Exception:
+            status = 599
+        finally:
+            if query_counter is not None:
+                query_counter.set_endpoint(None)
+        done = time.perf_counter()
+        with results_lock:
+            results[req["endpoint"]].append((done - scheduled_at, done - started, status))
+
+    begin = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="replay") as pool:
+        for op, offset in zip(ops, offsets):
+            req = request_for(op)
+            if req is None:
+                skipped[op["op"]] += 1
+                continue
+            scheduled_at = begin + offset
+            delay = scheduled_at - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            pool.submit(_run, req, scheduled_at)
+    wall = time.perf_counter() - begin
+
+    return {"results": results, "skipped": dict(skipped), "wall_seconds": wall}
+
+
+def summarize(run: dict, query_counts: Optional[Counter] = None) -> dict:
+    from backend.utils.request_timing import LATENCY_BUCKETS, LatencyHistogram
+
+    endpoints = {}
+    total = 0
+    for endpoint, samples in sorted(run["results"].items()):
+        response = np.asarray([s[0] for s in samples]) * 1000
+        service = np.asarray([s[1] for s in samples]) * 1000
+        histogram = LatencyHistogram("replay", "", ())
+        for seconds, _, _ in samples:
+            histogram.observe(seconds)
+        counts = histogram.snapshot()[()]["buckets"]
+        total += len(samples)
+        entry = {
+            "requests": len(samples),
+            "errors": sum(1 for s in samples if s[2] >= 400),
+            "status": dict(Counter(str(s[2]) for s in samples)),
+            "p50_ms": round(float(np.percentile(response, 50)), 3),
+            "p95_ms": round(float(np.percentile(response, 95)), 3),
+            "p99_ms": round(float(np.percentile(response, 99)), 3),
+            "service_p50_ms": round(float(np.percentile(service, 50)), 3),
+            "service_p99_ms": round(float(np.percentile(service, 99)), 3),
+            "histogram": {
+                "le_seconds": list(LATENCY_BUCKETS) + ["+Inf"],
+                "cumulative": [int(c) for c in np.cumsum(counts)],
+            },
+        }
+        if query_counts is not None:
+            entry["db_queries_per_request"] = round(query_counts.get(endpoint, 0) / len(samples), 2)
+        endpoints[endpoint] = entry
+
+    summary = {
+        "requests": total,
+        "wall_seconds": round(run["wall_seconds"], 3),
+        "achieved_rps": round(total / run["wall_seconds"], 2) if run["wall_seconds"] else None,
+        "skipped": run["skipped"],
+        "endpoints": endpoints,
+    }
+    if query_counts is not None:
+        summary["db_queries_background"] = query_counts.get("background", 0)
+    return summary
+
+
+def _cache_delta(before: dict, after: dict) -> dict:
+    hits = after["hits"] - before["hits"]
+    misses = after["misses"] - before["misses"]
+    return {
+        "hits": hits,
+        "misses": misses,
+        "invalidations": after["invalidations"] - before["invalidations"],
+        "hit_rate": round(hits / (hits + misses), 4) if hits + misses else 0.0,
+    }
+
+
+# ---------- CLI ----------
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("trace")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--speed", type=float, default=60.0, help="trace time compression factor")
+    parser.add_argument("--rate", type=float, help="fixed arrival rate (ops/s); overrides --speed")
+    parser.add_argument("--max-ops", type=int)
+    parser.add_argument("--base-url", help="replay over HTTP against a running server")
+    parser.add_argument("--size", help="replay in-process against the benchmark dataset of this size "
+                                       "instead of DATABASE_URL")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", help="write JSON here instead of stdout")
+    args = parser.parse_args(argv)
+
+    header, ops = read_trace(args.trace)
+    if args.max_ops:
+        ops = ops[:args.max_ops]
+
+    if args.size and not args.base_url:
+        from benchmarks.run import _configure_environment
+        _configure_environment(build_dataset(parse_size(args.size), args.seed)["path"])
+    else:
+        os.environ.setdefault("SECRET_KEY", "benchmark")
+        logging.disable(logging.INFO)
+
+    query_counter = None
+    if args.base_url:
+        target = HttpTarget(args.base_url)
+    else:
+        from benchmarks.run import install_fake_redis
+        target = WsgiTarget()
+        install_fake_redis()
+        from backend.utils import database
+        query_counter = QueryCounter(database.init_db()[0])
+
+    from backend.services.cache_invalidation import get_cache_stats
+    cache_before = get_cache_stats()
+    run = replay(ops, target, concurrency=args.concurrency, speed=args.speed,
+                 rate=args.rate, query_counter=query_counter)
+    cache_after = get_cache_stats()
+
+    report = summarize(run, query_counter.counts if query_counter else None)
+    report["meta"] = {
+        "trace": os.path.basename(args.trace),
+        "trace_exported_at": header.get("exported_at"),
+        "target": args.base_url or "wsgi",
+        "concurrency": args.concurrency,
+        "rate": args.rate,
+        "speed": None if args.rate else args.speed,
+    }
+    report["cache"] = _cache_delta(cache_before, cache_after)
+
+    payload = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(payload + "\n")
+    else:
+        print(payload)
+
+
+if __name__ == "__main__":
+    main()
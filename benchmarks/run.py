@@ -0,0 +1,268 @@
+"""
+In-process latency benchmarks for search, recommendations, event logging
+and cart updates.
+
+Builds (or reuses) a deterministic SQLite catalog (benchmarks/dataset.py),
+swaps Redis for the in-memory stand-in (benchmarks/fake_redis.py) and calls
+the controllers directly, so results reflect application code and the DB
+rather than network or WSGI overhead. Output is JSON with p50/p95/p99
+latency and throughput per scenario; --compare prints the change against a
+previous run's JSON.
+
+By default ML artifacts are isolated per dataset: a profile store is built
+from the synthetic events and everything else (model, neighbour indexes,
+candidates) is absent, so the request paths use their fallbacks. Pass
+--use-artifacts to benchmark with whatever ml/ artifacts the checkout has.
+
+Usage:
+    python -m benchmarks.run [--size 10k|100k|1m] [--requests 500]
+        [--scenarios search,recommendations,events,cart] [--cold]
+        [--output results.json] [--compare baseline.json]
+"""
+
+import os
+import sys
+import json
+import time
+import random
+import logging
+import argparse
+import platform
+import subprocess
+from datetime import datetime, timezone
+from typing import Callable, Dict, List
+
+import numpy as np
+
+from benchmarks.dataset import DATA_DIR, build_dataset, parse_size, sample_queries
+from benchmarks.fake_redis import FakeRedis
+
+
+SCENARIOS = ("search", "recommendations", "events", "cart")
+ANONYMOUS_SEARCH_SHARE = 0.25
+
+
+# ---------- ENVIRONMENT ----------
+
+def _configure_environment(db_path: str) -> None:
+    """Must run before backend modules are imported (they read env at import)."""
+    os.environ["DATABASE_URL"] = f"sqlite:///{db_path}"
+    os.environ.setdefault("REDIS_URL", "redis://localhost:6379/15")
+    os.environ.setdefault("SECRET_KEY", "benchmark")
+    logging.disable(logging.INFO)
+
+
+def install_fake_redis() -> FakeRedis:
+    """Point every module-level Redis handle at one in-memory client."""
+    from backend.services import redis_client, cache_invalidation
+    from backend.services.retrain.state import _state
+
+    fake = FakeRedis()
+    redis_client._redis = fake
+    cache_invalidation._redis = fake
+    _state._r = fake
+    return fake
+
+
+def isolate_artifacts(artifact_dir: str) -> None:
+    """
+    Serve ML artifacts from `artifact_dir` only: a profile store built from
+    the benchmark's own events; everything else missing (fallback paths).
+    """
+    from ml import model_registry
+    from ml.profile_store import build_profile_store
+    from backend.services import (
+        rec_candidates_service,
+        semantic_search_service,
+        similarity_service,
+        user_profile_service,
+    )
+
+    def _path(name):
+        return os.path.join(artifact_dir, name)
+
+    model_registry.MODELS_DIR = _path("models")
+    model_registry.POINTER_FILE = _path("models/CURRENT")
+    model_registry.LEGACY_MODEL_PATH = _path("ranking_model.pkl")
+    model_registry.TREES_PATH = _path("ranking_trees")
+    similarity_service.NEIGHBORS_PATH = _path("item_neighbors")
+    similarity_service.CONTENT_NEIGHBORS_PATH = _path("content_neighbors")
+    rec_candidates_service.CANDIDATES_PATH = _path("rec_candidates")
+    semantic_search_service.SEMANTIC_INDEX_PATH = _path("semantic_index")
+    user_profile_service.PROFILE_STORE_PATH = _path("profile_store")
+
+    if not os.path.isdir(user_profile_service.PROFILE_STORE_PATH):
+        build_profile_store(user_profile_service.PROFILE_STORE_PATH)
+
+
+# ---------- SCENARIOS ----------
+
+def build_scenarios(info: dict, seed: int) -> Dict[str, Callable[[int], tuple]]:
+    from backend.controllers.search_controller import search_controller
+    from backend.controllers.recommendations_controller import recommendations_controller
+    from backend.controllers.events_controller import log_event_controller
+    from backend.controllers.cart_controller import update_cart_controller
+
+    rng = random.Random(seed)
+    n_users, n_products = info["users"], info["products"]
+    queries = sample_queries(seed, 200)
+
+    def _user():
+        return f"bench_user_{rng.randrange(n_users)}"
+
+    def _product():
+        # Mostly popular-ish ids, like real click traffic
+        return min(int(rng.paretovariate(1.1)), n_products)
+
+    def search(i):
+        user_id = None if rng.random() < ANONYMOUS_SEARCH_SHARE else _user()
+        return search_controller(queries[i % len(queries)], user_id)
+
+    def recommendations(i):
+        return recommendations_controller(_user())
+
+    def events(i):
+        return log_event_controller({
+            "user_id": _user(),
+            "event": "click",
+            "product_id": _product(),
+            "query": queries[i % len(queries)],
+        })
+
+    def cart(i):
+        return update_cart_controller({
+            "user_id": _user(),
+            "product_id": _product(),
+            "quantity": 1,
+        })
+
+    return {"search": search, "recommendations": recommendations, "events": events, "cart": cart}
+
+
+# ---------- MEASUREMENT ----------
+
+def run_scenario(fn: Callable[[int], tuple], requests: int, warmup: int, fake: FakeRedis, cold: bool) -> dict:
+    for i in range(warmup):
+        fn(i)
+
+    latencies: List[float] = []
+    errors = 0
+    commands_before = fake.commands
+    started = time.perf_counter()
+    for i in range(requests):
+        if cold:
+            fake.flushdb()
+        t0 = time.perf_counter()
+        result = fn(warmup + i)
+        latencies.append((time.perf_counter() - t0) * 1000)
+        status = result[1] if isinstance(result, tuple) and len(result) > 1 else 200
+        if status >= 400:
+            errors += 1
+    wall = time.perf_counter() - started
+
+    ms = np.asarray(latencies)
+    return {
+        "requests": requests,
+        "errors": errors,
+        "p50_ms": round(float(np.percentile(ms, 50)), 3),
+        "p95_ms": round(float(np.percentile(ms, 95)), 3),
+        "p99_ms": round(float(np.percentile(ms, 99)), 3),
+        "mean_ms": round(float(ms.mean()), 3),
+        "max_ms": round(float(ms.max()), 3),
+        "throughput_rps": round(requests / wall, 2) if wall > 0 else None,
+        "redis_commands_per_request": round((fake.commands - commands_before) / requests, 2),
+    }
+
+
+def _git_commit() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except Exception:
+        return "unknown"
+
+
+def compare(current: dict, baseline: dict) -> List[str]:
+    """Human-readable p50/p95/p99 deltas per scenario (positive = slower)."""
+    lines = []
+    for name, stats in current["scenarios"].items():
+        base = baseline.get("scenarios", {}).get(name)
+        if not base:
+            continue
+        deltas = []
+        for key in ("p50_ms", "p95_ms", "p99_ms"):
+            if base.get(key):
+                deltas.append(f"{key[:-3]} {100.0 * (stats[key] - base[key]) / base[key]:+.1f}%")
+        lines.append(f"{name:>16}: " + ", ".join(deltas))
+    return lines
+
+
+# ---------- CLI ----------
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--size", default="10k", help="10k, 100k, 1m or a product count")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--warmup", type=int, default=50)
+    parser.add_argument("--scenarios", default=",".join(SCENARIOS))
+    parser.add_argument("--cold", action="store_true", help="flush the cache before every request")
+    parser.add_argument("--use-artifacts", action="store_true", help="use the checkout's ml/ artifacts")
+    parser.add_argument("--rebuild", action="store_true", help="regenerate the SQLite dataset")
+    parser.add_argument("--output", help="write JSON here instead of stdout")
+    parser.add_argument("--compare", help="baseline JSON from an earlier run")
+    args = parser.parse_args(argv)
+
+    names = [s.strip() for s in args.scenarios.split(",") if s.strip()]
+    unknown = set(names) - set(SCENARIOS)
+    if unknown:
+        parser.error(f"unknown scenarios: {', '.join(sorted(unknown))}")
+
+    n_products = parse_size(args.size)
+    t_build = time.perf_counter()
+    info = build_dataset(n_products, args.seed, rebuild=args.rebuild)
+    build_seconds = time.perf_counter() - t_build
+
+    _configure_environment(info["path"])
+    fake = install_fake_redis()
+    if not args.use_artifacts:
+        isolate_artifacts(os.path.join(DATA_DIR, f"artifacts-{n_products}-seed{args.seed}"))
+
+    from ml.model import get_model_version
+    scenarios = build_scenarios(info, args.seed)
+
+    results = {
+        "meta": {
+            "commit": _git_commit(),
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "dataset": {k: v for k, v in info.items() if k != "path"},
+            "dataset_build_seconds": round(build_seconds, 2),
+            "model_version": get_model_version(),
+            "cold_cache": args.cold,
+            "warmup": args.warmup,
+        },
+        "scenarios": {},
+    }
+    for name in names:
+        results["scenarios"][name] = run_scenario(scenarios[name], args.requests, args.warmup, fake, args.cold)
+        print(f"{name}: {results['scenarios'][name]}", file=sys.stderr)
+
+    payload = json.dumps(results, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(payload + "\n")
+    else:
+        print(payload)
+
+    if args.compare:
+        with open(args.compare) as f:
+            for line in compare(results, json.load(f)):
+                print(line, file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,166 @@
+"""
+Concurrent read throughput on SQLite while events are being written.
+
+Copies the benchmark dataset (benchmarks/dataset.py) once per mode and runs
+`--readers` threads issuing the queries a search cache miss makes
+(get_products_df text search + category expansion) while `--writers`
+threads log click events through the events controller (event insert +
+popularity update) as fast as they can. Modes:
+
+    default  rollback journal, no writer queue (SQLITE_PERFORMANCE_PROFILE=0)
+    wal      WAL + pragmas + single-writer queue (backend/utils/sqlite_profile.py)
+
+Output is JSON with reads/s, read p50/p95/p99, writes/s and errors per mode.
+
+Usage:
+    python -m benchmarks.sqlite_concurrency [--size 10k] [--seconds 10]
+        [--readers 8] [--writers 2] [--modes default,wal] [--output out.json]
+"""
+
+import os
+import json
+import time
+import random
+import shutil
+import sqlite3
+import argparse
+import tempfile
+import threading
+from typing import Dict, List
+
+import numpy as np
+
+from benchmarks.dataset import VOCABULARY, build_dataset, parse_size, sample_queries
+
+
+MODES = ("default", "wal")
+
+
+def _prepare_copy(source: str, directory: str, mode: str) -> str:
+    path = os.path.join(directory, f"{mode}.sqlite")
+    shutil.copyfile(source, path)
+    with sqlite3.connect(path) as conn:
+        # journal_mode persists in the file; start every mode from rollback
+        conn.execute("PRAGMA journal_mode=DELETE")
+    return path
+
+
+def _use_database(path: str, profile: bool) -> None:
+    from backend.utils import database, sqlite_profile
+
+    if database._engine is not None:
+        database._engine.dispose()
+    os.environ["DATABASE_URL"] = f"sqlite:///{path}"
+    sqlite_profile.SQLITE_PERFORMANCE_PROFILE = profile
+    database._engine = None
+    database._SessionLocal = None
+    database.init_db()
+
+
+def run_mode(seconds: float, readers: int, writers: int, info: dict, seed: int) -> dict:
+    from backend.controllers.events_controller import log_event_controller
+    from backend.services.product.dataframe import get_products_df
+
+    queries = sample_queries(seed, 200)
+    categories = list(VOCABULARY)
+    read_latencies: List[List[float]] = [[] for _ in range(readers)]
+    counts: Dict[str, int] = {"writes": 0, "read_errors": 0, "write_errors": 0}
+    counts_lock = threading.Lock()
+    stop = threading.Event()
+
+    def reader(i):
+        rng = random.Random(seed + i)
+        while not stop.is_set():
+            t0 = time.perf_counter()
+            try:
+                get_products_df(search_query=rng.choice(queries).split()[-1])
+                get_products_df(category_filter=rng.choice(categories))
+            except Exception:
+                with counts_lock:
+                    counts["read_errors"] += 1
+                continue
+            read_latencies[i].append((time.perf_counter() - t0) * 1000)
+
+    def writer(i):
+        rng = random.Random(seed + 1000 + i)
+        while not stop.is_set():
+            _, status = log_event_controller({
+                "user_id": f"bench_user_{rng.randrange(info['users'])}",
+                "event": "click",
+                "product_id": rng.randrange(1, info["products"] + 1),
+                "query": rng.choice(queries),
+            })
+            with counts_lock:
+                counts["writes" if status < 400 else "write_errors"] += 1
+
+    threads = [threading.Thread(target=reader, args=(i,)) for i in range(readers)]
+    threads += [threading.Thread(target=writer, args=(i,)) for i in range(writers)]
+    for t in threads:
+        t.start()
+    time.sleep(seconds)
+    stop.set()
+    for t in threads:
+        t.join()
+
+    ms = np.asarray([x for per_thread in read_latencies for x in per_thread])
+    result = {
+        "reads": int(ms.size),
+        "reads_per_second": round(ms.size / seconds, 2),
+        "writes_per_second": round(counts["writes"] / seconds, 2),
+        "read_errors": counts["read_errors"],
+        "write_errors": counts["write_errors"],
+    }
+    if ms.size:
+        for p in (50, 95, 99):
+            result[f"read_p{p}_ms"] = round(float(np.percentile(ms, p)), 3)
+    return result
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--size", default="10k", help="10k, 100k, 1m or a product count")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--seconds", type=float, default=10.0)
+    parser.add_argument("--readers", type=int, default=8)
+    parser.add_argument("--writers", type=int, default=2)
+    parser.add_argument("--modes", default=",".join(MODES))
+    parser.add_argument("--output", help="write JSON here instead of stdout")
+    args = parser.parse_args(argv)
+
+    modes = [m.strip() for m in args.modes.split(",") if m.strip()]
+    unknown = set(modes) - set(MODES)
+    if unknown:
+        parser.error(f"unknown modes: {', '.join(sorted(unknown))}")
+
+    info = build_dataset(parse_size(args.size), args.seed)
+
+    from benchmarks.run import _configure_environment, install_fake_redis
+    _configure_environment(info["path"])
+    install_fake_redis()
+
+    results = {
+        "meta": {
+            "dataset": {k: v for k, v in info.items() if k != "path"},
+            "seconds": args.seconds,
+            "readers": args.readers,
+            "writers": args.writers,
+        },
+        "modes": {},
+    }
+    with tempfile.TemporaryDirectory(prefix="sqlite-bench-") as directory:
+        for mode in modes:
+            _use_database(_prepare_copy(info["path"], directory, mode), profile=(mode == "wal"))
+            results["modes"][mode] = run_mode(args.seconds, args.readers, args.writers, info, args.seed)
+        from backend.utils import database
+        database._engine.dispose()
+
+    payload = json.dumps(results, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(payload + "\n")
+    else:
+        print(payload)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+"""
+Export recorded traffic from search_events as a replayable trace.
+
+Each event becomes one or two operations in timestamp order:
+
+    click / add_to_cart with a query  ->  search(query) first, unless the
+                                          same user searched it just before
+    click                             ->  event(click, product, query)
+    add_to_cart                       ->  cart(product, +1)
+    cart_cleared                      ->  cart_clear
+
+The trace is gzip-compressed JSON lines: a header, then one compact
+{"t", "op", "u", "q", "p"} object per operation, with t in seconds from the
+first event. benchmarks/replay.py plays it back.
+
+Usage:
+    python -m benchmarks.trace --output trace.jsonl.gz [--since 2025-01-01] [--limit 100000]
+"""
+
+import gzip
+import json
+import argparse
+from datetime import datetime, timezone
+from typing import Iterable, Iterator, List, Optional, Tuple
+
+from sqlalchemy import select
+
+from backend.models import SearchEvent
+from backend.utils.database import get_db_session
+
+
+TRACE_VERSION = 1
+FETCH_BATCH = 5000
+
+
+def events_to_ops(events: Iterable[tuple]) -> Iterator[dict]:
+    """(timestamp, user_id, query, product_id, event_type) rows -> trace ops."""
+    start = None
+    last_search = {}
+    for timestamp, user_id, query, product_id, event_type in events:
+        if start is None:
+            start = timestamp
+        t = round((timestamp - start).total_seconds(), 3)
+        user_id = user_id or ""
+        query = (query or "").strip()
+
+        if event_type in ("click", "add_to_cart") and query and last_search.get(user_id) != query:
+            last_search[user_id] = query
+            yield {"t": t, "op": "search", "u": user_id, "q": query}
+
+        if event_type == "click" and product_id:
+            yield {"t": t, "op": "event", "u": user_id, "q": query, "p": int(product_id)}
+        elif event_type == "add_to_cart" and product_id:
+            yield {"t": t, "op": "cart", "u": user_id, "p": int(product_id)}
+        elif event_type == "cart_cleared":
+            yield {"t": t, "op": "cart_clear", "u": user_id}
+
+
+def _iter_events(since: Optional[datetime], limit: Optional[int]) -> Iterator[tuple]:
+    stmt = (
+        select(
+            SearchEvent.timestamp,
+            SearchEvent.user_id,
+            SearchEvent.query,
+            SearchEvent.product_id,
+            SearchEvent.event_type,
+        )
+        .order_by(SearchEvent.timestamp, SearchEvent.id)
+    )
+    if since is not None:
+        stmt = stmt.where(SearchEvent.timestamp >= since)
+    if limit:
+        stmt = stmt.limit(limit)
+
+    with get_db_session() as session:
+        yield from session.execute(stmt.execution_options(yield_per=FETCH_BATCH))
+
+
+def write_trace(path: str, ops: Iterable[dict], source: str = "search_events") -> int:
+    count = 0
+    with gzip.open(path, "wt", encoding="utf-8") as f:
+        f.write(json.dumps({
+            "version": TRACE_VERSION,
+            "source": source,
+            "exported_at": datetime.now(timezone.utc).isoformat(),
+        }) + "\n")
+        for op in ops:
+            f.write(json.dumps({k: v for k, v in op.items() if v not in ("", None)},
+                               separators=(",", ":")) + "\n")
+            count += 1
+    return count
+
+
+def read_trace(path: str) -> Tuple[dict, List[dict]]:
+    with gzip.open(path, "rt", encoding="utf-8") as f:
+        header = json.loads(f.readline())
+        if header.get("version") != TRACE_VERSION:
+            raise ValueError(f"unsupported trace version {header.get('version')}")
+        return header, [json.loads(line) for line in f if line.strip()]
+
+
+def export_trace(path: str, since: Optional[datetime] = None, limit: Optional[int] = None) -> int:
+    return write_trace(path, events_to_ops(_iter_events(since, limit)))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--output", required=True)
+    parser.add_argument("--since", type=datetime.fromisoformat, help="ISO date/time of the first event")
+    parser.add_argument("--limit", type=int, help="max events to export")
+    args = parser.parse_args(argv)
+
+    count = export_trace(args.output, args.since, args.limit)
+    print(f"Wrote {count} operations to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
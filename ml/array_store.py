@@ -0,0 +1,130 @@
+"""
+Directory-of-.npy artifact storage.
+
+Each array is saved as its own .npy file so readers can np.load(...,
+mmap_mode="r") it: pages are shared through the OS cache across web
+workers instead of every process holding a private copy. Optional Python
+objects (e.g. a fitted vectorizer) are stored alongside with joblib.
+
+Like the model registry (ml/model_registry.py), every save is a new
+immutable build directory and a pointer file names the current one:
+
+    <path>/<build>/<name>.npy     one directory per save
+    <path>/CURRENT                name of the build readers should load
+
+A build is assembled under a temp name and renamed into place, then the
+pointer is replaced atomically, so a reader that resolved the pointer loads
+every array from that one build. The previous builds are kept for readers
+still loading them (KEEP_BUILDS); a reader whose build was pruned mid-load
+re-reads the pointer and starts over. Directories written before builds
+existed (.npy files directly under <path>) are still read until the next
+save replaces them.
+"""
+
+import os
+import shutil
+import secrets
+from datetime import datetime, timezone
+from typing import Dict, Iterable, Optional
+
+import joblib
+import numpy as np
+
+
+POINTER_NAME = "CURRENT"
+# Builds kept after a save: the new one plus the one readers may still be loading
+KEEP_BUILDS = 2
+# Pointer re-reads when a build disappears while being loaded
+_LOAD_ATTEMPTS = 3
+
+
+def _new_build() -> str:
+    return f"{datetime.now(timezone.utc):%Y%m%dT%H%M%S%f}-{secrets.token_hex(3)}"
+
+
+def current_build(path: str) -> Optional[str]:
+    """Name of the build `path`'s pointer names; None for legacy / missing dirs."""
+    try:
+        with open(os.path.join(path, POINTER_NAME)) as f:
+            return f.read().strip() or None
+    except OSError:
+        return None
+
+
+def _builds(path: str):
+    """Build directories under `path`, oldest first (names sort chronologically)."""
+    return sorted(
+        name for name in os.listdir(path)
+        if not name.startswith(".") and os.path.isdir(os.path.join(path, name))
+    )
+
+
+def save_array_dir(path: str, arrays: Dict[str, np.ndarray], objects: Optional[Dict[str, object]] = None) -> None:
+    os.makedirs(path, exist_ok=True)
+    build = _new_build()
+    tmp_dir = os.path.join(path, f".tmp-{build}")
+    os.makedirs(tmp_dir)
+    try:
+        for name, array in arrays.items():
+            np.save(os.path.join(tmp_dir, f"{name}.npy"), np.ascontiguousarray(array))
+        for name, obj in (objects or {}).items():
+            joblib.dump(obj, os.path.join(tmp_dir, f"{name}.joblib"))
+        os.replace(tmp_dir, os.path.join(path, build))
+    except Exception:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        raise
+
+    pointer = os.path.join(path, POINTER_NAME)
+    with open(f"{pointer}.tmp", "w") as f:
+        f.write(build)
+    os.replace(f"{pointer}.tmp", pointer)
+    _prune(path, build)
+
+
+def _prune(path: str, current: str) -> None:
+    # Workers that mapped a pruned build keep their (unlinked) pages.
+    for name in _builds(path)[:-KEEP_BUILDS]:
+        if name != current:
+            shutil.rmtree(os.path.join(path, name), ignore_errors=True)
+    # Legacy single-build layout: files directly under path
+    for name in os.listdir(path):
+        if name.endswith((".npy", ".joblib")):
+            os.remove(os.path.join(path, name))
+
+
+def load_array_dir(
+    path: str,
+    array_names: Iterable[str],
+    object_names: Iterable[str] = (),
+    *,
+    mmap: bool = True,
+) -> Optional[Dict[str, object]]:
+    """Arrays (memory-mapped read-only by default) and objects; None if absent."""
+    array_names, object_names = list(array_names), list(object_names)
+    for attempt in range(_LOAD_ATTEMPTS):
+        if not os.path.isdir(path):
+            return None
+        build = current_build(path)
+        build_dir = os.path.join(path, build) if build else path
+        try:
+            return _load_build(build_dir, array_names, object_names, mmap)
+        except FileNotFoundError:
+            # Build pruned (or legacy files replaced) while loading: a newer
+            # build is current, start over from the pointer
+            if attempt == _LOAD_ATTEMPTS - 1:
+                raise
+    return None
+
+
+def _load_build(build_dir: str, array_names, object_names, mmap: bool) -> Dict[str, object]:
+    loaded: Dict[str, object] = {
+        name: np.load(
+            os.path.join(build_dir, f"{name}.npy"),
+            mmap_mode="r" if mmap else None,
+            allow_pickle=False,
+        )
+        for name in array_names
+    }
+    for name in object_names:
+        loaded[name] = joblib.load(os.path.join(build_dir, f"{name}.joblib"))
+    return loaded
@@ -0,0 +1,147 @@
+"""
+Item-to-item content similarity index.
+
+Vectorizes every product's title + description + category with the shared
+TF-IDF builder (ml/vectorizer.py), L2-normalizes the rows and keeps each
+product's top-K cosine neighbours, computed as blocked sparse products
+(M[block] @ M.T) so memory stays bounded as the catalog grows.
+
+Unlike the co-interaction index (ml/item_similarity.py) this needs no event
+history, so new or rarely-seen products still get neighbours. The arrays use
+the same layout (item_ids / neighbors / scores) and are saved as separate
+.npy files in one directory, so web workers can np.load(mmap_mode="r") them
+and share the pages through the OS cache instead of each holding a copy.
+"""
+
+import os
+import logging
+from typing import Dict, Optional
+
+from dotenv import load_dotenv
+load_dotenv()
+
+import numpy as np
+import pandas as pd
+from sklearn.preprocessing import normalize
+
+from ml.array_store import load_array_dir, save_array_dir
+from ml.vectorizer import build_vectorizer
+from ml.item_similarity import top_k_per_row
+from backend.services.db_product_service import get_products_df
+
+logger = logging.getLogger(__name__)
+
+
+CONTENT_NEIGHBORS_PATH = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)),
+    "content_neighbors",
+)
+
+ARRAY_NAMES = ("item_ids", "neighbors", "scores")
+
+TOP_K = int(os.getenv("CONTENT_NEIGHBORS_TOP_K", "20"))
+# Pairs that only share a stray term or two are not worth recommending.
+MIN_SIMILARITY = float(os.getenv("CONTENT_NEIGHBORS_MIN_SIMILARITY", "0.1"))
+BLOCK_SIZE = 1024
+
+
+# ---------------------------------------------------------------------
+# Vectorization
+# ---------------------------------------------------------------------
+
+def product_texts(products: pd.DataFrame) -> pd.Series:
+    """title + description + category, one document per product row."""
+    return (
+        products["title"].fillna("").astype(str) + " "
+        + products["description"].fillna("").astype(str) + " "
+        + products["category"].fillna("").astype(str)
+    )
+
+
+# ---------------------------------------------------------------------
+# Similarity
+# ---------------------------------------------------------------------
+
+def build_content_index(
+    products: pd.DataFrame,
+    *,
+    top_k: int = TOP_K,
+    min_similarity: float = MIN_SIMILARITY,
+    block_size: int = BLOCK_SIZE,
+) -> Dict[str, np.ndarray]:
+    """Cosine TF-IDF top-K neighbours for every product row."""
+    if products is None or products.empty:
+        return {
+            "item_ids": np.zeros(0, dtype=np.int32),
+            "neighbors": np.zeros((0, top_k), dtype=np.int32),
+            "scores": np.zeros((0, top_k), dtype=np.float32),
+        }
+
+    products = products.sort_values("product_id")
+    item_ids = products["product_id"].to_numpy(dtype=np.int64)
+
+    _, M = build_vectorizer(product_texts(products).tolist())
+    M = normalize(M.astype(np.float32), norm="l2", copy=False).tocsr()
+    MT = M.T.tocsc()
+
+    n_items = len(item_ids)
+    neighbors = np.full((n_items, top_k), -1, dtype=np.int32)
+    scores = np.zeros((n_items, top_k), dtype=np.float32)
+
+    for start in range(0, n_items, block_size):
+        end = min(start + block_size, n_items)
+        sim = (M[start:end] @ MT).tocsr()
+        sim.setdiag(0, k=start)  # an item is not its own neighbour
+        sim.data[sim.data < min_similarity] = 0
+        sim.eliminate_zeros()
+
+        block_neighbors, block_scores = top_k_per_row(sim, top_k)
+        valid = block_neighbors >= 0
+        neighbors[start:end][valid] = item_ids[block_neighbors[valid]]
+        scores[start:end] = block_scores
+
+    return {"item_ids": item_ids.astype(np.int32), "neighbors": neighbors, "scores": scores}
+
+
+# ---------------------------------------------------------------------
+# Persist / load
+# ---------------------------------------------------------------------
+
+def save_content_index(index: Dict[str, np.ndarray], path: str = CONTENT_NEIGHBORS_PATH) -> None:
+    """One .npy per array under `path/`, swapped in atomically (see array_store.py)."""
+    save_array_dir(path, {name: index[name] for name in ARRAY_NAMES})
+    logger.info("Content neighbour index saved to %s (%d items)", path, len(index["item_ids"]))
+
+
+def load_content_index(path: str = CONTENT_NEIGHBORS_PATH) -> Optional[Dict[str, np.ndarray]]:
+    """Memory-mapped, read-only arrays; None if the index hasn't been built."""
+    return load_array_dir(path, ARRAY_NAMES)
+
+
+# ---------------------------------------------------------------------
+# Orchestration
+# ---------------------------------------------------------------------
+
+def build_content_neighbors(path: str = CONTENT_NEIGHBORS_PATH) -> int:
+    """Build the index over the whole catalog and persist it.
+    Returns the number of indexed items."""
+    products = get_products_df(limit=None)
+    if products is None or products.empty:
+        logger.warning("No products; skipping content neighbour index")
+        return 0
+
+    index = build_content_index(products)
+    save_content_index(index, path)
+    return len(index["item_ids"])
+
+
+def main():
+    logging.basicConfig(
+        level=logging.INFO,
+        format="%(asctime)s | %(levelname)s | %(name)s | %(message)s",
+    )
+    build_content_neighbors()
+
+
+if __name__ == "__main__":
+    main()
@@ -19,7 +19,7 @@ sys.path.insert(
 
 load_dotenv()
 
-from backend.utils.database import init_db, get_db_session
+from backend.utils.database import init_db, get_read_session
 from backend.models import Product
 
 
@@ -76,7 +76,7 @@ def export_products_to_csv(output_file: str) -> int:
     logger.info("Initializing database connection")
     init_db()
 
-    session = get_db_session()
+    session = get_read_session()
     try:
         products = fetch_products(session)
 
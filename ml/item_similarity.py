@@ -0,0 +1,255 @@
+"""
+Item-to-item co-interaction similarity index.
+
+Builds a sparse user × item interaction matrix from click / add_to_cart
+events, derives item × item co-interaction cosine similarity with SciPy
+sparse products (in row blocks, so memory stays bounded as the catalog
+grows), and keeps the top-K neighbours per product in fixed-width arrays:
+
+    item_ids   (n_items,)      int32, ascending — row lookup via searchsorted
+    neighbors  (n_items, K)    int32 product ids, -1 padded
+    scores     (n_items, K)    float32 similarity, best first, 0 padded
+
+At request time a user's recent ids expand into neighbours with a handful
+of array lookups (backend/services/similarity_service.py) instead of a
+catalog scan. The arrays are stored as memory-mapped .npy files
+(ml/array_store.py), shared by every web worker.
+"""
+
+import os
+import logging
+from typing import Dict, Optional
+
+from dotenv import load_dotenv
+load_dotenv()
+
+import numpy as np
+import pandas as pd
+from scipy.sparse import csr_matrix
+
+from ml.array_store import load_array_dir, save_array_dir
+from backend.services.db_event_service import get_events_df
+
+logger = logging.getLogger(__name__)
+
+
+NEIGHBORS_PATH = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)),
+    "item_neighbors",
+)
+ARRAY_NAMES = ("item_ids", "neighbors", "scores")
+
+EVENT_WEIGHTS = {
+    "click": 1.0,
+    "add_to_cart": 2.0,
+}
+
+TOP_K = int(os.getenv("ITEM_NEIGHBORS_TOP_K", "20"))
+# Pairs seen together by fewer users than this are treated as noise.
+MIN_CO_USERS = int(os.getenv("ITEM_NEIGHBORS_MIN_CO_USERS", "2"))
+BLOCK_SIZE = 2048
+
+
+# ---------------------------------------------------------------------
+# Interaction matrix
+# ---------------------------------------------------------------------
+
+def build_interaction_matrix(events: pd.DataFrame):
+    """
+    Return (X, item_ids): X is a CSR (n_users, n_items) matrix of
+    log1p(weighted interaction counts); item_ids maps columns to product ids.
+    """
+    events = events[events["event"].isin(EVENT_WEIGHTS)]
+    events = events.dropna(subset=["product_id"])
+    events = events[events["user_id"].astype(str) != ""]
+    if events.empty:
+        return csr_matrix((0, 0), dtype=np.float32), np.zeros(0, dtype=np.int32)
+
+    user_idx, _ = pd.factorize(events["user_id"].astype(str))
+    product_ids = events["product_id"].astype(np.int64).to_numpy()
+    item_ids, item_idx = np.unique(product_ids, return_inverse=True)
+    weights = events["event"].map(EVENT_WEIGHTS).to_numpy(dtype=np.float32)
+
+    X = csr_matrix(
+        (weights, (user_idx, item_idx)),
+        shape=(int(user_idx.max()) + 1, len(item_ids)),
+        dtype=np.float32,
+    )
+    X.sum_duplicates()
+    # Dampen heavy repeat-clickers so one user can't dominate a pair
+    X.data = np.log1p(X.data)
+    return X, item_ids.astype(np.int32)
+
+
+# ---------------------------------------------------------------------
+# Similarity
+# ---------------------------------------------------------------------
+
+def top_k_per_row(sim: csr_matrix, k: int):
+    """Column indices (-1 padded) and values of each CSR row's k largest entries."""
+    n = sim.shape[0]
+    neighbors = np.full((n, k), -1, dtype=np.int64)
+    scores = np.zeros((n, k), dtype=np.float32)
+
+    for row in range(n):
+        start, end = sim.indptr[row], sim.indptr[row + 1]
+        if start == end:
+            continue
+        data = sim.data[start:end]
+        cols = sim.indices[start:end]
+        if len(data) > k:
+            part = np.argpartition(-data, k - 1)[:k]
+            data, cols = data[part], cols[part]
+        order = np.argsort(-data, kind="stable")
+        neighbors[row, :len(order)] = cols[order]
+        scores[row, :len(order)] = data[order]
+
+    return neighbors, scores
+
+
+def build_neighbor_index(
+    X: csr_matrix,
+    item_ids: np.ndarray,
+    *,
+    top_k: int = TOP_K,
+    min_co_users: int = MIN_CO_USERS,
+    block_size: int = BLOCK_SIZE,
+) -> Dict[str, np.ndarray]:
+    """Cosine co-interaction top-K neighbours for every item column of X."""
+    n_items = X.shape[1]
+    if n_items == 0:
+        return {
+            "item_ids": np.zeros(0, dtype=np.int32),
+            "neighbors": np.zeros((0, top_k), dtype=np.int32),
+            "scores": np.zeros((0, top_k), dtype=np.float32),
+        }
+
+    XT = X.T.tocsr()
+    norms = np.sqrt(np.asarray(X.multiply(X).sum(axis=0)).ravel())
+    norms[norms == 0] = 1.0
+    binary = X.copy()
+    binary.data[:] = 1.0
+    binary_T = binary.T.tocsr()
+
+    neighbors = np.full((n_items, top_k), -1, dtype=np.int32)
+    scores = np.zeros((n_items, top_k), dtype=np.float32)
+
+    for start in range(0, n_items, block_size):
+        end = min(start + block_size, n_items)
+        co = (XT[start:end] @ X).tocsr()
+        co.setdiag(0, k=start)  # an item is not its own neighbour
+
+        if min_co_users > 1:
+            support = (binary_T[start:end] @ binary).tocsr()
+            # Element-wise mask: keep only pairs shared by >= min_co_users
+            support.data = (support.data >= min_co_users).astype(np.float32)
+            co = co.multiply(support).tocsr()
+
+        # Cosine normalization: divide row i by norm_i and column j by norm_j
+        co = co.multiply(1.0 / norms[start:end, None]).multiply(1.0 / norms[None, :]).tocsr()
+        co.eliminate_zeros()
+
+        block_neighbors, block_scores = top_k_per_row(co, top_k)
+        valid = block_neighbors >= 0
+        neighbors[start:end][valid] = item_ids[block_neighbors[valid]]
+        scores[start:end] = block_scores
+
+    return {"item_ids": item_ids.astype(np.int32), "neighbors": neighbors, "scores": scores}
+
+
+# ---------------------------------------------------------------------
+# Persist / load
+# ---------------------------------------------------------------------
+
+def save_neighbor_index(index: Dict[str, np.ndarray], path: str = NEIGHBORS_PATH) -> None:
+    """Atomic directory swap so readers never see a partial index."""
+    save_array_dir(path, index)
+    logger.info("Item neighbour index saved to %s (%d items)", path, len(index["item_ids"]))
+
+
+def load_neighbor_index(path: str = NEIGHBORS_PATH) -> Optional[Dict[str, np.ndarray]]:
+    return load_array_dir(path, ARRAY_NAMES)
+
+
+def expand_neighbors(
+    index: Optional[Dict[str, np.ndarray]],
+    product_ids,
+    *,
+    limit: int = TOP_K,
+    weights=None,
+) -> Dict[int, float]:
+    """
+    Merge the neighbour lists of `product_ids` into {product_id: score}.
+
+    Scores from several seeds are summed (optionally weighted per seed, e.g.
+    by recency); the seeds themselves are excluded. Returns at most `limit`
+    entries, best first.
+    """
+    if not index or not len(product_ids) or not len(index["item_ids"]):
+        return {}
+
+    item_ids = index["item_ids"]
+    seeds = np.asarray([int(p) for p in product_ids], dtype=np.int64)
+    seed_weights = np.ones(len(seeds), dtype=np.float32) if weights is None else np.asarray(weights, dtype=np.float32)
+
+    rows = np.searchsorted(item_ids, seeds)
+    rows_clipped = np.minimum(rows, len(item_ids) - 1)
+    found = item_ids[rows_clipped] == seeds
+    if not found.any():
+        return {}
+
+    neighbors = index["neighbors"][rows_clipped[found]]
+    scores = index["scores"][rows_clipped[found]] * seed_weights[found, None]
+
+    merged: Dict[int, float] = {}
+    seed_set = set(seeds.tolist())
+    for pid, score in zip(neighbors.ravel().tolist(), scores.ravel().tolist()):
+        if pid < 0 or pid in seed_set:
+            continue
+        merged[pid] = merged.get(pid, 0.0) + score
+
+    best = sorted(merged.items(), key=lambda kv: kv[1], reverse=True)[:limit]
+    return dict(best)
+
+
+def seeds_with_neighbors(index: Optional[Dict[str, np.ndarray]], product_ids) -> set:
+    """Subset of `product_ids` that have at least one neighbour in `index`."""
+    if not index or not len(product_ids) or not len(index["item_ids"]):
+        return set()
+    item_ids = index["item_ids"]
+    seeds = np.asarray([int(p) for p in product_ids], dtype=np.int64)
+    rows = np.minimum(np.searchsorted(item_ids, seeds), len(item_ids) - 1)
+    found = (item_ids[rows] == seeds) & (index["neighbors"][rows, 0] >= 0)
+    return set(seeds[found].tolist())
+
+
+# ---------------------------------------------------------------------
+# Orchestration
+# ---------------------------------------------------------------------
+
+def build_item_neighbors(path: str = NEIGHBORS_PATH) -> int:
+    """Build the index from all recorded interactions and persist it.
+    Returns the number of indexed items."""
+    events = get_events_df(limit=None, event_types=list(EVENT_WEIGHTS))
+    if events.empty:
+        logger.warning("No interaction events; skipping item neighbour index")
+        return 0
+
+    X, item_ids = build_interaction_matrix(events)
+    logger.info("Interaction matrix: %d users × %d items, %d nnz", X.shape[0], X.shape[1], X.nnz)
+
+    index = build_neighbor_index(X, item_ids)
+    save_neighbor_index(index, path)
+    return len(index["item_ids"])
+
+
+def main():
+    logging.basicConfig(
+        level=logging.INFO,
+        format="%(asctime)s | %(levelname)s | %(name)s | %(message)s",
+    )
+    build_item_neighbors()
+
+
+if __name__ == "__main__":
+    main()
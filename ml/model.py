@@ -1,20 +1,50 @@
 import os
+import time
 import joblib
 import logging
+import threading
 import numpy as np
-from typing import Optional
+from dataclasses import dataclass, replace
+from typing import Dict, Optional
+
+from ml.model_registry import LEGACY_VERSION, current_version, model_paths
+from ml.tree_model import load_trees, predict_trees
 
 logger = logging.getLogger(__name__)
 
-_MODEL: Optional[object] = None
+# Seconds between checks of the published model version (ml/model_registry.py)
+MODEL_RELOAD_INTERVAL = int(os.getenv("MODEL_RELOAD_INTERVAL", "30"))
+
+
+@dataclass(frozen=True)
+class ModelState:
+    """
+    One published model version: the LightGBM ranker and its flat-array
+    export (ml/tree_model.py, preferred when present). Replaced as a whole
+    on reload, so readers never mix a model with another version's trees.
+
+    When the trees exist they are memory-mapped and the pickle is only
+    loaded (from model_path) if the evaluator ever fails, which keeps
+    startup to milliseconds. Immutable: that lazy load publishes a new
+    instance rather than editing one a reader may hold.
+    """
+    version: str
+    model: Optional[object]
+    trees: Optional[Dict[str, np.ndarray]]
+    model_path: Optional[str] = None
+
 
+# Swapped by reference assignment (atomic in CPython); readers take one
+# snapshot per call and never lock.
+_STATE: Optional[ModelState] = None
+_LOAD_LOCK = threading.Lock()
+_WATCHER: Optional[threading.Thread] = None
 
-def load_model() -> Optional[object]:
+
+def load_model(model_path: Optional[str] = None) -> Optional[object]:
     """Load ranking model from disk if present."""
-    model_path = os.path.join(
-        os.path.dirname(os.path.abspath(__file__)),
-        "ranking_model.pkl",
-    )
+    if model_path is None:
+        model_path = model_paths(current_version())[0]
 
     if not os.path.exists(model_path):
         logger.warning("Ranking model not found at %s", model_path)
@@ -28,24 +58,143 @@ def load_model() -> Optional[object]:
         return None
 
 
+def load_model_state(version: Optional[str]) -> ModelState:
+    model_path, trees_path = model_paths(version)
+    trees = load_trees(trees_path)
+    if trees is not None:
+        return ModelState(
+            version=version or LEGACY_VERSION,
+            model=None,
+            trees=trees,
+            model_path=model_path if os.path.exists(model_path) else None,
+        )
+    return ModelState(
+        version=version or LEGACY_VERSION,
+        model=load_model(model_path),
+        trees=None,
+    )
+
+
+def _model_of(state: ModelState) -> Optional[object]:
+    """The state's LightGBM model, loading a deferred pickle on first use."""
+    if state.model is not None or state.model_path is None:
+        return state.model
+    with _LOAD_LOCK:
+        current = _STATE
+        if current is not None and current.version == state.version and current.model is not None:
+            return current.model
+        model = load_model(state.model_path)
+        # Publish the loaded copy only if this snapshot is still the one served
+        if current is state:
+            _set_state(replace(state, model=model, model_path=None))
+    return model
+
+
+def get_state() -> ModelState:
+    """Current model snapshot; loads the published version on first use."""
+    state = _STATE
+    if state is None:
+        with _LOAD_LOCK:
+            state = _STATE
+            if state is None:
+                state = _set_state(load_model_state(current_version()))
+    return state
+
+
+def _set_state(state: ModelState) -> ModelState:
+    global _STATE
+    _STATE = state
+    return state
+
+
 def get_model() -> Optional[object]:
     """Lazy-load model to avoid import-time side effects."""
-    global _MODEL
-    if _MODEL is None:
-        _MODEL = load_model()
-    return _MODEL
+    return _model_of(get_state())
+
+
+def get_trees() -> Optional[Dict[str, np.ndarray]]:
+    """Exported tree arrays of the current model; None when it wasn't exported."""
+    return get_state().trees
+
+
+def get_model_version() -> str:
+    """Version tag of the model serving scores (used in ranked cache keys)."""
+    return get_state().version
+
+
+def reload_if_changed() -> bool:
+    """
+    Load the published version if it differs from the one being served.
+    The new model is fully loaded before the swap; on failure the current
+    one keeps serving.
+    """
+    version = current_version() or LEGACY_VERSION
+    state = _STATE
+    if state is not None and state.version == version:
+        return False
+
+    with _LOAD_LOCK:
+        if _STATE is not None and _STATE.version == version:
+            return False
+        new_state = load_model_state(version)
+        if new_state.model is None and new_state.trees is None and _STATE is not None:
+            logger.error("Model version %s failed to load; keeping %s", version, _STATE.version)
+            return False
+        _set_state(new_state)
+
+    logger.info("Ranking model hot-reloaded: %s -> %s",
+                state.version if state else None, version)
+    return True
+
+
+def start_model_watcher(interval: int = MODEL_RELOAD_INTERVAL) -> Optional[threading.Thread]:
+    """Background thread that polls the version pointer and hot-swaps models."""
+    global _WATCHER
+    if interval <= 0:
+        return None
+    with _LOAD_LOCK:
+        if _WATCHER is not None and _WATCHER.is_alive():
+            return _WATCHER
+
+        def _run():
+            while True:
+                time.sleep(interval)
+                try:
+                    reload_if_changed()
+                except Exception:
+                    logger.exception("Model reload check failed")
+
+        _WATCHER = threading.Thread(target=_run, daemon=True, name="ModelWatcher")
+        _WATCHER.start()
+    return _WATCHER
+
+
+def _predict_with_trees(trees: Optional[Dict[str, np.ndarray]], X: np.ndarray) -> Optional[np.ndarray]:
+    if trees is None:
+        return None
+    try:
+        return predict_trees(trees, X)
+    except Exception:
+        logger.exception("Tree evaluator failed (input shape: %s); using LightGBM", np.shape(X))
+        return None
 
 
 def predict_score(features: np.ndarray) -> float:
     """
     Predict ranking score for a single feature vector.
 
-    Falls back to a heuristic score (first feature) if:
+    Uses the exported tree arrays when available, then LightGBM, and falls
+    back to a heuristic score (first feature) if:
     - model is missing
     - prediction fails
     - output shape is unexpected
     """
-    model = get_model()
+    state = get_state()
+    scores = _predict_with_trees(state.trees, np.asarray([features]))
+    if scores is not None:
+        return float(scores[0])
+
+    model = _model_of(state)
 
     if model is not None:
         try:
@@ -72,3 +221,39 @@ def predict_score(features: np.ndarray) -> float:
     )
     logger.debug("Using fallback score: %f", fallback_score)
     return fallback_score
+
+
+# Fallback weights, in feature order: popularity, rating, freshness,
+# category_score, price_affinity (see predict_score).
+_FALLBACK_WEIGHTS = np.array([0.40, 0.30, 0.10, 0.15, 0.05], dtype=np.float32)
+
+
+def predict_scores(features: np.ndarray) -> np.ndarray:
+    """
+    Predict ranking scores for a batch of feature vectors (n_samples, 5).
+
+    One model call for the whole batch instead of one per row — use this from
+    batch jobs and anywhere many candidates are scored at once. Same order of
+    preference as predict_score: exported trees, LightGBM, weighted heuristic.
+    """
+    X = np.asarray(features, dtype=np.float32)
+    if X.ndim != 2 or len(X) == 0:
+        return np.zeros(len(X) if X.ndim else 0, dtype=np.float64)
+
+    state = get_state()
+    scores = _predict_with_trees(state.trees, X)
+    if scores is not None:
+        return scores
+
+    model = _model_of(state)
+
+    if model is not None:
+        try:
+            scores = np.asarray(model.predict(X), dtype=np.float64)
+            if scores.shape == (len(X),):
+                return scores
+            logger.error("Unexpected model output shape %s for %d rows", scores.shape, len(X))
+        except Exception:
+            logger.exception("Batch model prediction failed (input shape: %s)", X.shape)
+
+    return (X @ _FALLBACK_WEIGHTS).astype(np.float64)
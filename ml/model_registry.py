@@ -0,0 +1,153 @@
+"""
+Versioned ranking-model artifacts.
+
+Each training run publishes a new immutable version directory:
+
+    ml/models/<version>/model.pkl     joblib-pickled LGBMRanker
+    ml/models/<version>/trees/        flat-array export (ml/tree_model.py)
+
+The directory is assembled under a temp name and renamed into place, so a
+version is either complete or absent. The current version is recorded in
+Redis (shared by every web worker) and in ml/models/CURRENT (fallback when
+Redis is unavailable); workers poll it and hot-swap models (ml/model.py).
+
+Deployments that predate versioning keep working: with no published
+version the legacy ml/ranking_model.pkl + ml/ranking_trees are used.
+"""
+
+import os
+import shutil
+import secrets
+import logging
+from datetime import datetime, timezone
+from typing import List, Optional, Tuple
+
+import joblib
+
+from ml.tree_model import TREES_PATH, export_model_trees
+
+logger = logging.getLogger(__name__)
+
+
+ML_DIR = os.path.dirname(os.path.abspath(__file__))
+MODELS_DIR = os.path.join(ML_DIR, "models")
+POINTER_FILE = os.path.join(MODELS_DIR, "CURRENT")
+LEGACY_MODEL_PATH = os.path.join(ML_DIR, "ranking_model.pkl")
+LEGACY_VERSION = "legacy"
+
+REDIS_VERSION_KEY = "model:current_version"
+# Older versions are pruned after a publish; workers may still be serving
+# the previous one until their next poll, so keep a few.
+KEEP_VERSIONS = int(os.getenv("MODEL_KEEP_VERSIONS", "3"))
+
+
+def _redis():
+    try:
+        from backend.services.redis_client import _redis as client
+        return client
+    except Exception:
+        return None
+
+
+# ---------------------------------------------------------------------
+# Paths
+# ---------------------------------------------------------------------
+
+def version_dir(version: str) -> str:
+    return os.path.join(MODELS_DIR, version)
+
+
+def model_paths(version: Optional[str]) -> Tuple[str, str]:
+    """(model pickle, trees dir) for a version; legacy paths for None / 'legacy'."""
+    if not version or version == LEGACY_VERSION:
+        return LEGACY_MODEL_PATH, TREES_PATH
+    base = version_dir(version)
+    return os.path.join(base, "model.pkl"), os.path.join(base, "trees")
+
+
+def list_versions() -> List[str]:
+    """Published versions, oldest first (names sort chronologically)."""
+    if not os.path.isdir(MODELS_DIR):
+        return []
+    return sorted(
+        name for name in os.listdir(MODELS_DIR)
+        if not name.startswith(".") and os.path.isdir(version_dir(name))
+    )
+
+
+# ---------------------------------------------------------------------
+# Current-version pointer
+# ---------------------------------------------------------------------
+
+def current_version() -> Optional[str]:
+    """
+    The version workers should serve: Redis pointer, then the local pointer
+    file; None when nothing has been published (legacy artifacts apply).
+    A pointer to a version missing on this host is ignored.
+    """
+    client = _redis()
+    if client is not None:
+        try:
+            version = client.get(REDIS_VERSION_KEY)
+            if version and os.path.isdir(version_dir(version)):
+                return version
+        except Exception:
+            pass
+
+    try:
+        with open(POINTER_FILE) as f:
+            version = f.read().strip()
+    except OSError:
+        return None
+    return version if version and os.path.isdir(version_dir(version)) else None
+
+
+def set_current_version(version: str) -> None:
+    os.makedirs(MODELS_DIR, exist_ok=True)
+    tmp_path = f"{POINTER_FILE}.tmp"
+    with open(tmp_path, "w") as f:
+        f.write(version)
+    os.replace(tmp_path, POINTER_FILE)
+
+    client = _redis()
+    if client is not None:
+        try:
+            client.set(REDIS_VERSION_KEY, version)
+        except Exception:
+            logger.warning("Could not publish model version %s to Redis; workers fall back to %s",
+                           version, POINTER_FILE)
+
+
+# ---------------------------------------------------------------------
+# Publish
+# ---------------------------------------------------------------------
+
+def new_version() -> str:
+    return f"{datetime.now(timezone.utc):%Y%m%dT%H%M%S%f}-{secrets.token_hex(3)}"
+
+
+def publish_model(model, keep: int = KEEP_VERSIONS) -> str:
+    """Write `model` as a new version, make it current and prune old ones."""
+    version = new_version()
+    tmp_dir = os.path.join(MODELS_DIR, f".tmp-{version}")
+    os.makedirs(tmp_dir)
+    try:
+        joblib.dump(model, os.path.join(tmp_dir, "model.pkl"))
+        export_model_trees(model, os.path.join(tmp_dir, "trees"))
+        os.replace(tmp_dir, version_dir(version))
+    except Exception:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        raise
+
+    set_current_version(version)
+    logger.info("Published ranking model version %s", version)
+    prune_versions(keep)
+    return version
+
+
+def prune_versions(keep: int = KEEP_VERSIONS) -> None:
+    current = current_version()
+    versions = list_versions()
+    for version in versions[:max(0, len(versions) - keep)]:
+        if version != current:
+            shutil.rmtree(version_dir(version), ignore_errors=True)
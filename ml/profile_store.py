@@ -0,0 +1,187 @@
+"""
+Columnar, memory-mapped user-profile artifact.
+
+build_user_profiles() (ml/user_profile.py) returns a dict of dicts that
+every web worker used to rebuild from the full event history on startup and
+every few minutes — seconds of work and one private copy per worker. The
+batch jobs instead write the profiles once as .npy columns
+(ml/array_store.py):
+
+    user_ids        str      sorted; row lookup via searchsorted
+    pref_offsets    int64    user i's prefs: [offsets[i], offsets[i + 1])
+    pref_categories int32    index into `categories`
+    pref_weights    float32
+    avg_price       float64  NaN when unknown
+    cluster         int32    -1 when unassigned
+    categories      str      category vocabulary
+    cluster_ids     int32    sorted
+    cluster_boost   float32  (n_clusters, n_categories), rows sum to 1
+
+Workers map the files read-only, so opening them takes milliseconds and the
+pages are shared through the OS cache. ProfileStore exposes the same
+read-only mapping interface callers already use (profiles.get(user_id)),
+plus precomputed cluster category boosts so they no longer scan every
+profile per request.
+"""
+
+import os
+import logging
+from collections.abc import Mapping
+from typing import Dict, Iterator, Optional
+
+import numpy as np
+
+from ml.array_store import load_array_dir, save_array_dir
+from ml.user_profile import build_user_profiles
+
+logger = logging.getLogger(__name__)
+
+
+PROFILE_STORE_PATH = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)),
+    "profile_store",
+)
+
+ARRAY_NAMES = (
+    "user_ids", "pref_offsets", "pref_categories", "pref_weights",
+    "avg_price", "cluster", "categories", "cluster_ids", "cluster_boost",
+)
+
+
+# ---------------------------------------------------------------------
+# Encode
+# ---------------------------------------------------------------------
+
+def encode_profiles(profiles: Dict[str, dict]) -> Dict[str, np.ndarray]:
+    """Columnar arrays for a build_user_profiles() result."""
+    user_ids = sorted(str(uid) for uid in profiles)
+    by_id = {str(uid): profile for uid, profile in profiles.items()}
+
+    categories = sorted({
+        cat for profile in by_id.values() for cat in profile.get("category_pref", {})
+    })
+    category_index = {cat: i for i, cat in enumerate(categories)}
+
+    offsets = np.zeros(len(user_ids) + 1, dtype=np.int64)
+    pref_categories, pref_weights = [], []
+    avg_price = np.full(len(user_ids), np.nan, dtype=np.float64)
+    cluster = np.full(len(user_ids), -1, dtype=np.int32)
+
+    for i, uid in enumerate(user_ids):
+        profile = by_id[uid]
+        prefs = profile.get("category_pref", {})
+        pref_categories.extend(category_index[cat] for cat in prefs)
+        pref_weights.extend(float(w) for w in prefs.values())
+        offsets[i + 1] = offsets[i] + len(prefs)
+        if profile.get("avg_price") is not None:
+            avg_price[i] = float(profile["avg_price"])
+        if profile.get("cluster") is not None:
+            cluster[i] = int(profile["cluster"])
+
+    pref_categories = np.asarray(pref_categories, dtype=np.int32)
+    pref_weights = np.asarray(pref_weights, dtype=np.float32)
+
+    # Cluster boost: members' category weights summed, normalized to 1
+    # (same as recommendations_controller.get_cluster_category_boost).
+    cluster_ids = np.unique(cluster[cluster >= 0]).astype(np.int32)
+    boost = np.zeros((len(cluster_ids), len(categories)), dtype=np.float64)
+    if len(cluster_ids) and len(pref_weights):
+        owner = np.repeat(np.arange(len(user_ids)), np.diff(offsets))
+        member = cluster[owner] >= 0
+        rows = np.searchsorted(cluster_ids, cluster[owner][member])
+        np.add.at(boost, (rows, pref_categories[member]), pref_weights[member])
+        totals = boost.sum(axis=1, keepdims=True)
+        np.divide(boost, totals, out=boost, where=totals > 0)
+
+    return {
+        "user_ids": np.asarray(user_ids, dtype=str),
+        "pref_offsets": offsets,
+        "pref_categories": pref_categories,
+        "pref_weights": pref_weights,
+        "avg_price": avg_price,
+        "cluster": cluster,
+        "categories": np.asarray(categories, dtype=str),
+        "cluster_ids": cluster_ids,
+        "cluster_boost": boost.astype(np.float32),
+    }
+
+
+# ---------------------------------------------------------------------
+# Read-only view
+# ---------------------------------------------------------------------
+
+class ProfileStore(Mapping):
+    """Mapping user_id -> profile dict, decoded on access from the columns."""
+
+    def __init__(self, arrays: Dict[str, np.ndarray]):
+        self._a = arrays
+        self._user_ids = arrays["user_ids"]
+        self._categories = [str(c) for c in arrays["categories"]]
+
+    def _row(self, user_id) -> Optional[int]:
+        if not len(self._user_ids):
+            return None
+        key = str(user_id)
+        row = int(np.searchsorted(self._user_ids, key))
+        if row < len(self._user_ids) and self._user_ids[row] == key:
+            return row
+        return None
+
+    def __getitem__(self, user_id) -> dict:
+        row = self._row(user_id)
+        if row is None:
+            raise KeyError(user_id)
+        a = self._a
+        start, end = a["pref_offsets"][row], a["pref_offsets"][row + 1]
+        avg_price = float(a["avg_price"][row])
+        cluster = int(a["cluster"][row])
+        return {
+            "category_pref": {
+                self._categories[c]: float(w)
+                for c, w in zip(a["pref_categories"][start:end], a["pref_weights"][start:end])
+            },
+            "avg_price": None if np.isnan(avg_price) else avg_price,
+            "cluster": None if cluster < 0 else cluster,
+        }
+
+    def __contains__(self, user_id) -> bool:
+        return self._row(user_id) is not None
+
+    def __iter__(self) -> Iterator[str]:
+        return (str(uid) for uid in self._user_ids)
+
+    def __len__(self) -> int:
+        return len(self._user_ids)
+
+    def cluster_boost(self, cluster) -> dict:
+        """{category: share} for a cluster; {} if unknown."""
+        if cluster is None:
+            return {}
+        cluster_ids = self._a["cluster_ids"]
+        row = int(np.searchsorted(cluster_ids, int(cluster)))
+        if row >= len(cluster_ids) or cluster_ids[row] != int(cluster):
+            return {}
+        weights = self._a["cluster_boost"][row]
+        return {self._categories[i]: float(weights[i]) for i in np.flatnonzero(weights)}
+
+
+# ---------------------------------------------------------------------
+# Persist / load
+# ---------------------------------------------------------------------
+
+def save_profile_store(profiles: Dict[str, dict], path: str = PROFILE_STORE_PATH) -> int:
+    arrays = encode_profiles(profiles)
+    save_array_dir(path, arrays)
+    logger.info("Profile store saved to %s (%d users, %d clusters)",
+                path, len(arrays["user_ids"]), len(arrays["cluster_ids"]))
+    return len(arrays["user_ids"])
+
+
+def load_profile_store(path: str = PROFILE_STORE_PATH) -> Optional[ProfileStore]:
+    arrays = load_array_dir(path, ARRAY_NAMES)
+    return ProfileStore(arrays) if arrays is not None else None
+
+
+def build_profile_store(path: str = PROFILE_STORE_PATH) -> int:
+    """Build profiles from the full event history and persist them."""
+    return save_profile_store(build_user_profiles(), path)
@@ -0,0 +1,263 @@
+"""
+Batch materialization of recommendation candidates.
+
+For every user cluster (plus a cold-start segment for users without one) the
+product catalog is scored once with the ranking model, using the cluster's
+aggregate category and price preferences, and the top candidates are kept
+under per-category quotas. The result is written as a directory of
+memory-mapped .npy arrays (ml/array_store.py) that every web worker maps (see
+backend/services/rec_candidates_service.py), so a recommendations cache miss
+only has to demote recent items and diversify instead of re-scoring the
+catalog for one user.
+"""
+
+import os
+import logging
+from typing import Dict, List, Optional, Tuple
+
+from dotenv import load_dotenv
+load_dotenv()
+
+import numpy as np
+import pandas as pd
+
+from ml.array_store import load_array_dir, save_array_dir
+from ml.features import build_features
+from ml.model import predict_scores
+from ml.user_profile import build_user_profiles
+from backend.services.db_product_service import get_products_df
+
+logger = logging.getLogger(__name__)
+
+
+CANDIDATES_PATH = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)),
+    "rec_candidates",
+)
+ARRAY_NAMES = ("segments", "offsets", "product_ids", "scores")
+
+COLD_START_SEGMENT = "cold"
+
+# Products scored per segment (top-N by popularity). Offline, so this can be
+# much larger than the 500 the request path used to score per user.
+CANDIDATE_POOL_SIZE = int(os.getenv("REC_CANDIDATE_POOL_SIZE", "5000"))
+CANDIDATES_PER_SEGMENT = int(os.getenv("REC_CANDIDATES_PER_SEGMENT", "200"))
+# No single category may take more than this share of a segment's list, so
+# request-time diversification always has other categories to draw from.
+MAX_CATEGORY_SHARE = 0.25
+CLUSTER_BOOST_WEIGHT = 0.5
+
+
+def segment_for_cluster(cluster) -> str:
+    return COLD_START_SEGMENT if cluster is None else str(int(cluster))
+
+
+# ---------------------------------------------------------------------
+# Segment preferences
+# ---------------------------------------------------------------------
+
+def cluster_preferences(profiles: Dict[str, dict]) -> Dict[int, dict]:
+    """
+    Aggregate member profiles into {cluster: {"category_boost", "avg_price"}}.
+
+    category_boost matches recommendations_controller.get_cluster_category_boost
+    (category weights summed over members, normalized to 1).
+    """
+    cat_counts: Dict[int, Dict[str, float]] = {}
+    prices: Dict[int, List[float]] = {}
+
+    for profile in profiles.values():
+        cluster = profile.get("cluster")
+        if cluster is None:
+            continue
+        counts = cat_counts.setdefault(int(cluster), {})
+        for cat, weight in profile.get("category_pref", {}).items():
+            counts[cat] = counts.get(cat, 0) + weight
+        if profile.get("avg_price"):
+            prices.setdefault(int(cluster), []).append(float(profile["avg_price"]))
+
+    prefs = {}
+    for cluster, counts in cat_counts.items():
+        total = sum(counts.values())
+        cluster_prices = prices.get(cluster)
+        prefs[cluster] = {
+            "category_boost": {k: v / total for k, v in counts.items()} if total else {},
+            "avg_price": float(np.mean(cluster_prices)) if cluster_prices else None,
+        }
+    return prefs
+
+
+# ---------------------------------------------------------------------
+# Scoring
+# ---------------------------------------------------------------------
+
+def _price_affinity(prices: np.ndarray, avg_price: Optional[float]) -> np.ndarray:
+    if not avg_price:
+        return np.zeros(len(prices), dtype=np.float32)
+    denom = max(abs(avg_price), 1.0)
+    return np.clip(1.0 - np.abs(prices - avg_price) / denom, 0.0, 1.0)
+
+
+def score_segment(products: pd.DataFrame, prefs: Optional[dict]) -> np.ndarray:
+    """Model scores for every product row given a segment's preferences."""
+    prefs = prefs or {}
+    boost = prefs.get("category_boost", {})
+    category_scores = products["category"].map(
+        lambda c: min(1.0, CLUSTER_BOOST_WEIGHT * boost.get(c, 0))
+    ).to_numpy(dtype=np.float32)
+    price_affinity = _price_affinity(
+        products["price"].to_numpy(dtype=np.float64), prefs.get("avg_price")
+    )
+
+    X = np.stack([
+        build_features(
+            popularity=pop,
+            rating=rating,
+            created_at=created_at,
+            category_score=cat_score,
+            price_affinity=price_aff,
+        )
+        for pop, rating, created_at, cat_score, price_aff in zip(
+            products["popularity"],
+            products["rating"],
+            products["created_at"],
+            category_scores,
+            price_affinity,
+        )
+    ])
+    return predict_scores(X)
+
+
+def select_with_quota(
+    product_ids: np.ndarray,
+    categories: np.ndarray,
+    scores: np.ndarray,
+    limit: int = CANDIDATES_PER_SEGMENT,
+    max_share: float = MAX_CATEGORY_SHARE,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Top `limit` products by score with at most max_share per category."""
+    quota = max(1, int(limit * max_share))
+    order = np.argsort(-scores, kind="stable")
+
+    chosen: List[int] = []
+    per_category: Dict[str, int] = {}
+    for idx in order:
+        cat = categories[idx]
+        if per_category.get(cat, 0) >= quota:
+            continue
+        chosen.append(idx)
+        per_category[cat] = per_category.get(cat, 0) + 1
+        if len(chosen) >= limit:
+            break
+
+    chosen_idx = np.asarray(chosen, dtype=np.int64)
+    return (
+        product_ids[chosen_idx].astype(np.int32),
+        scores[chosen_idx].astype(np.float32),
+    )
+
+
+# ---------------------------------------------------------------------
+# Build + persist
+# ---------------------------------------------------------------------
+
+def build_candidate_lists(
+    products: Optional[pd.DataFrame] = None,
+    profiles: Optional[Dict[str, dict]] = None,
+) -> Dict[str, Tuple[np.ndarray, np.ndarray]]:
+    """Return {segment: (product_ids int32, scores float32)}, best first."""
+    if products is None:
+        products = get_products_df(limit=CANDIDATE_POOL_SIZE)
+    if profiles is None:
+        profiles = build_user_profiles()
+
+    if products is None or products.empty:
+        logger.warning("No products available; skipping candidate materialization")
+        return {}
+
+    products = products.copy()
+    products["created_at"] = pd.to_datetime(products["created_at"])
+    products["category"] = products["category"].fillna("")
+
+    product_ids = products["product_id"].to_numpy()
+    categories = products["category"].to_numpy()
+
+    segments: Dict[str, Optional[dict]] = {COLD_START_SEGMENT: None}
+    for cluster, prefs in cluster_preferences(profiles).items():
+        segments[segment_for_cluster(cluster)] = prefs
+
+    lists = {}
+    for segment, prefs in segments.items():
+        scores = score_segment(products, prefs)
+        lists[segment] = select_with_quota(product_ids, categories, scores)
+
+    logger.info(
+        "Materialized recommendation candidates for %d segments from %d products",
+        len(lists), len(products),
+    )
+    return lists
+
+
+def save_candidate_lists(lists: Dict[str, Tuple[np.ndarray, np.ndarray]], path: str = CANDIDATES_PATH) -> None:
+    """
+    Write all segments as CSR-style arrays:
+    segments[i]'s rows are product_ids/scores[offsets[i]:offsets[i + 1]].
+    Written to a temp directory and swapped in so readers never see a partial build.
+    """
+    segments = sorted(lists)
+    lengths = [len(lists[s][0]) for s in segments]
+    offsets = np.zeros(len(segments) + 1, dtype=np.int64)
+    offsets[1:] = np.cumsum(lengths)
+
+    product_ids = np.concatenate([lists[s][0] for s in segments]) if segments else np.zeros(0, np.int32)
+    scores = np.concatenate([lists[s][1] for s in segments]) if segments else np.zeros(0, np.float32)
+
+    save_array_dir(path, {
+        "segments": np.asarray(segments, dtype=str),
+        "offsets": offsets,
+        "product_ids": product_ids.astype(np.int32),
+        "scores": scores.astype(np.float32),
+    })
+    logger.info("Recommendation candidates saved to %s (%d rows)", path, int(offsets[-1]))
+
+
+def load_candidate_lists(path: str = CANDIDATES_PATH) -> Dict[str, Tuple[np.ndarray, np.ndarray]]:
+    """Inverse of save_candidate_lists; {} if the artifact doesn't exist."""
+    data = load_array_dir(path, ARRAY_NAMES)
+    if data is None:
+        return {}
+
+    segments = [str(s) for s in data["segments"]]
+    offsets = data["offsets"]
+    product_ids = data["product_ids"]
+    scores = data["scores"]
+
+    return {
+        segment: (product_ids[offsets[i]:offsets[i + 1]], scores[offsets[i]:offsets[i + 1]])
+        for i, segment in enumerate(segments)
+    }
+
+
+def materialize_candidates(path: str = CANDIDATES_PATH) -> int:
+    """Build and persist candidate lists. Returns the number of segments."""
+    lists = build_candidate_lists()
+    if not lists:
+        return 0
+    save_candidate_lists(lists, path)
+    return len(lists)
+
+
+# ---------------------------------------------------------------------
+# CLI entry point
+# ---------------------------------------------------------------------
+
+def main():
+    logging.basicConfig(
+        level=logging.INFO,
+        format="%(asctime)s | %(levelname)s | %(name)s | %(message)s",
+    )
+    materialize_candidates()
+
+
+if __name__ == "__main__":
+    main()
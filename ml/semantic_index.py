@@ -0,0 +1,202 @@
+"""
+Semantic (LSA) product vectors with an IVF approximate-nearest-neighbour index.
+
+Offline:
+- TF-IDF over title + description + category (ml/vectorizer.py), reduced
+  with TruncatedSVD to dense, L2-normalized float32 vectors
+- k-means coarse quantizer; every vector is stored in its centroid's
+  inverted list, lists laid out contiguously (CSR-style offsets)
+
+Online (search_index):
+- the query is encoded with the same vectorizer + SVD projection
+- only the `nprobe` lists whose centroids are closest are scanned, so the
+  work per query is ~nprobe × n_items / n_lists dot products instead of a
+  full catalog scan
+
+Arrays are stored as .npy files (ml/array_store.py) and memory-mapped by
+web workers; the fitted vectorizer and projection are stored with joblib.
+"""
+
+import os
+import logging
+from typing import Dict, List, Optional, Tuple
+
+from dotenv import load_dotenv
+load_dotenv()
+
+import numpy as np
+import pandas as pd
+from sklearn.cluster import MiniBatchKMeans
+from sklearn.decomposition import TruncatedSVD
+from sklearn.preprocessing import normalize
+
+from ml.array_store import load_array_dir, save_array_dir
+from ml.content_similarity import product_texts
+from ml.vectorizer import build_vectorizer
+from backend.services.db_product_service import get_products_df
+
+logger = logging.getLogger(__name__)
+
+
+SEMANTIC_INDEX_PATH = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)),
+    "semantic_index",
+)
+
+ARRAY_NAMES = ("item_ids", "vectors", "centroids", "list_offsets", "components")
+OBJECT_NAMES = ("vectorizer",)
+
+DIMENSIONS = int(os.getenv("SEMANTIC_DIMENSIONS", "128"))
+# Inverted lists scanned per query: recall vs latency knob.
+NPROBE = int(os.getenv("SEMANTIC_NPROBE", "8"))
+MAX_LISTS = 4096
+RANDOM_STATE = 42
+
+
+def default_n_lists(n_items: int) -> int:
+    """~sqrt(n) lists keeps both centroid and list scans around sqrt(n)."""
+    return int(max(1, min(MAX_LISTS, round(np.sqrt(n_items)))))
+
+
+# ---------------------------------------------------------------------
+# Build
+# ---------------------------------------------------------------------
+
+def build_semantic_index(
+    products: pd.DataFrame,
+    *,
+    dimensions: int = DIMENSIONS,
+    n_lists: Optional[int] = None,
+) -> Optional[Dict[str, object]]:
+    """Vectorize, project and IVF-partition the catalog; None if empty."""
+    if products is None or products.empty:
+        return None
+
+    item_ids = products["product_id"].to_numpy(dtype=np.int64)
+    vectorizer, tfidf = build_vectorizer(product_texts(products).tolist())
+
+    n_components = max(1, min(dimensions, tfidf.shape[1] - 1, len(item_ids) - 1))
+    svd = TruncatedSVD(n_components=n_components, random_state=RANDOM_STATE)
+    vectors = normalize(svd.fit_transform(tfidf)).astype(np.float32)
+
+    n_lists = min(n_lists or default_n_lists(len(item_ids)), len(item_ids))
+    if n_lists > 1:
+        kmeans = MiniBatchKMeans(n_clusters=n_lists, random_state=RANDOM_STATE, n_init=3)
+        assignment = kmeans.fit_predict(vectors)
+        centroids = normalize(kmeans.cluster_centers_).astype(np.float32)
+    else:
+        assignment = np.zeros(len(item_ids), dtype=np.int64)
+        centroids = normalize(vectors.mean(axis=0, keepdims=True)).astype(np.float32)
+
+    order = np.argsort(assignment, kind="stable")
+    list_offsets = np.zeros(len(centroids) + 1, dtype=np.int64)
+    list_offsets[1:] = np.cumsum(np.bincount(assignment, minlength=len(centroids)))
+
+    return {
+        "item_ids": item_ids[order].astype(np.int32),
+        "vectors": vectors[order],
+        "centroids": centroids,
+        "list_offsets": list_offsets,
+        "components": svd.components_.astype(np.float32),
+        "vectorizer": vectorizer,
+    }
+
+
+# ---------------------------------------------------------------------
+# Query
+# ---------------------------------------------------------------------
+
+def encode_query(index: Dict[str, object], text: str) -> Optional[np.ndarray]:
+    """Unit-length query vector, or None when no query term is in the vocabulary."""
+    tfidf = index["vectorizer"].transform([text or ""])
+    if tfidf.nnz == 0:
+        return None
+    vector = np.asarray(tfidf @ index["components"].T, dtype=np.float32).ravel()
+    norm = np.linalg.norm(vector)
+    return vector / norm if norm > 0 else None
+
+
+def search_index(
+    index: Optional[Dict[str, object]],
+    text: str,
+    *,
+    top_k: int = 50,
+    nprobe: int = NPROBE,
+    min_score: float = 0.0,
+) -> List[Tuple[int, float]]:
+    """[(product_id, cosine)] for the approximate top_k nearest products."""
+    if not index or not len(index["item_ids"]):
+        return []
+    query = encode_query(index, text)
+    if query is None:
+        return []
+
+    centroids = index["centroids"]
+    offsets = index["list_offsets"]
+    nprobe = min(nprobe, len(centroids))
+    centroid_scores = centroids @ query
+    probe = np.argpartition(-centroid_scores, nprobe - 1)[:nprobe]
+
+    rows = np.concatenate([np.arange(offsets[c], offsets[c + 1]) for c in probe])
+    if not len(rows):
+        return []
+    scores = index["vectors"][rows] @ query
+
+    k = min(top_k, len(rows))
+    best = np.argpartition(-scores, k - 1)[:k]
+    best = best[np.argsort(-scores[best], kind="stable")]
+
+    item_ids = index["item_ids"]
+    return [
+        (int(item_ids[rows[i]]), float(scores[i]))
+        for i in best
+        if scores[i] >= min_score
+    ]
+
+
+# ---------------------------------------------------------------------
+# Persist / load
+# ---------------------------------------------------------------------
+
+def save_semantic_index(index: Dict[str, object], path: str = SEMANTIC_INDEX_PATH) -> None:
+    save_array_dir(
+        path,
+        {name: index[name] for name in ARRAY_NAMES},
+        {name: index[name] for name in OBJECT_NAMES},
+    )
+    logger.info(
+        "Semantic index saved to %s (%d items, %d lists, %d dims)",
+        path, len(index["item_ids"]), len(index["centroids"]), index["vectors"].shape[1],
+    )
+
+
+def load_semantic_index(path: str = SEMANTIC_INDEX_PATH) -> Optional[Dict[str, object]]:
+    """Memory-mapped arrays + fitted vectorizer; None if not built."""
+    return load_array_dir(path, ARRAY_NAMES, OBJECT_NAMES)
+
+
+# ---------------------------------------------------------------------
+# Orchestration
+# ---------------------------------------------------------------------
+
+def build_semantic_search_index(path: str = SEMANTIC_INDEX_PATH) -> int:
+    """Build the index over the whole catalog and persist it.
+    Returns the number of indexed items."""
+    index = build_semantic_index(get_products_df(limit=None))
+    if index is None:
+        logger.warning("No products; skipping semantic index")
+        return 0
+    save_semantic_index(index, path)
+    return len(index["item_ids"])
+
+
+def main():
+    logging.basicConfig(
+        level=logging.INFO,
+        format="%(asctime)s | %(levelname)s | %(name)s | %(message)s",
+    )
+    build_semantic_search_index()
+
+
+if __name__ == "__main__":
+    main()
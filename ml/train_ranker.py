@@ -1,6 +1,5 @@
 # -*- coding: utf-8 -*-
 
-import os
 import logging
 from typing import List, Tuple
 
@@ -11,11 +10,11 @@ import pandas as pd
 import numpy as np
 from scipy.stats import spearmanr
 
-import joblib
 from lightgbm import LGBMRanker
 
 from ml.user_profile import build_user_profiles
 from ml.features import build_features
+from ml.model_registry import publish_model
 from backend.utils.search import user_category_score, user_price_affinity
 from backend.services.db_product_service import get_products_df
 from backend.services.db_event_service import get_events_df
@@ -23,12 +22,6 @@ from backend.services.db_event_service import get_events_df
 logger = logging.getLogger(__name__)
 
 
-MODEL_PATH = os.path.join(
-    os.path.dirname(os.path.abspath(__file__)),
-    "ranking_model.pkl",
-)
-
-
 REQUIRED_PRODUCT_COLUMNS = [
     "product_id",
     "created_at",
@@ -206,8 +199,10 @@ def train_and_save_model(X, y, group) -> None:
     else:
         logger.info("Too few test samples for evaluation; skipping")
 
-    joblib.dump(model, MODEL_PATH)
-    logger.info("Model saved to %s", MODEL_PATH)
+    # New immutable version (pickle + flat-array trees); web workers pick it
+    # up on their next version poll.
+    version = publish_model(model)
+    logger.info("Model saved as version %s", version)
 
 
 # ---------------------------------------------------------------------
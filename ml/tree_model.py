@@ -0,0 +1,310 @@
+"""
+Flat-array export and NumPy evaluator for the LightGBM ranking model.
+
+LGBMRanker.predict goes through the sklearn wrapper and LightGBM's C API,
+which costs far more than the arithmetic for the 1-500 rows a request
+scores. At train time the booster's trees are flattened into parallel node
+arrays (all trees share one node space):
+
+    feature        int32    split feature, -1 for leaves
+    threshold      float64  go left when x <= threshold
+    left / right   int32    child node indices
+    value          float64  leaf output (0 for split nodes)
+    default_left   bool     direction for missing values
+    missing_type   int8     0 = none, 1 = zero, 2 = NaN (LightGBM semantics)
+    roots          int32    root node of each tree
+    params         int64    [max_depth, average_output, n_features, bitvectors]
+
+From those, QuickScorer-style bitvector tables are derived (Lucchese et al.,
+SIGIR 2015): each tree's leaves are numbered left to right, and every split
+node gets a 64-bit mask clearing the leaves of its left subtree. A split is
+"false" (go right) exactly when threshold < x, so per feature the AND of all
+false nodes' masks is a prefix of the threshold-sorted node list, which is
+precomputed:
+
+    bv_thresholds  float64  split thresholds sorted per feature
+    bv_offsets     int64    feature f's thresholds: [offsets[f], offsets[f + 1])
+    bv_masks       uint64   (n_splits + n_features, n_trees) prefix-AND tables;
+                            feature f's block starts at offsets[f] + f
+    leaf_values    float64  (n_trees, 64) leaf outputs in left-to-right order
+
+Scoring is then one searchsorted + gather per feature, an AND across
+features, and the lowest set bit of each tree's mask is its exit leaf.
+Models those tables can't express exactly (more than 64 leaves, zero/NaN
+missing-value handling, NaN inputs) use predict_trees' level-by-level
+traversal of the node arrays instead.
+"""
+
+import os
+import logging
+import shutil
+from typing import Dict, Optional
+
+import numpy as np
+
+from ml.array_store import load_array_dir, save_array_dir
+
+logger = logging.getLogger(__name__)
+
+
+TREES_PATH = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)),
+    "ranking_trees",
+)
+
+ARRAY_NAMES = (
+    "feature", "threshold", "left", "right", "value",
+    "default_left", "missing_type", "roots", "params",
+    "bv_thresholds", "bv_offsets", "bv_masks", "leaf_values",
+)
+
+MAX_BITVECTOR_LEAVES = 64
+_ALL_LEAVES = np.uint64(0xFFFFFFFFFFFFFFFF)
+
+MISSING_NONE, MISSING_ZERO, MISSING_NAN = 0, 1, 2
+_MISSING_TYPES = {"None": MISSING_NONE, "Zero": MISSING_ZERO, "NaN": MISSING_NAN}
+# LightGBM treats |x| <= kZeroThreshold as zero for missing_type == Zero
+_ZERO_THRESHOLD = 1e-35
+
+
+# ---------------------------------------------------------------------
+# Export
+# ---------------------------------------------------------------------
+
+def export_trees(booster) -> Dict[str, np.ndarray]:
+    """
+    Flatten a fitted lightgbm.Booster into node arrays.
+    Raises ValueError for models the evaluator can't reproduce (categorical
+    splits, multi-class), so callers keep using LightGBM for those.
+    """
+    dump = booster.dump_model()
+    if dump.get("num_tree_per_iteration", 1) != 1:
+        raise ValueError("multi-output models are not supported")
+
+    feature, threshold, left, right, value = [], [], [], [], []
+    default_left, missing_type, roots = [], [], []
+    max_depth = 0
+
+    def new_node():
+        for column, blank in (
+            (feature, -1), (threshold, 0.0), (left, -1), (right, -1),
+            (value, 0.0), (default_left, False), (missing_type, MISSING_NONE),
+        ):
+            column.append(blank)
+        return len(feature) - 1
+
+    for tree in dump["tree_info"]:
+        root = new_node()
+        roots.append(root)
+        stack = [(tree["tree_structure"], root, 0)]
+        while stack:
+            node, idx, depth = stack.pop()
+            max_depth = max(max_depth, depth)
+            if "leaf_value" in node:
+                value[idx] = float(node["leaf_value"])
+                continue
+            if node.get("decision_type", "<=") != "<=":
+                raise ValueError(f"unsupported split type {node.get('decision_type')!r}")
+
+            feature[idx] = int(node["split_feature"])
+            threshold[idx] = float(node["threshold"])
+            default_left[idx] = bool(node.get("default_left", True))
+            missing_type[idx] = _MISSING_TYPES.get(node.get("missing_type", "None"), MISSING_NONE)
+
+            left_idx, right_idx = new_node(), new_node()
+            left[idx], right[idx] = left_idx, right_idx
+            stack.append((node["left_child"], left_idx, depth + 1))
+            stack.append((node["right_child"], right_idx, depth + 1))
+
+    trees = {
+        "feature": np.asarray(feature, dtype=np.int32),
+        "threshold": np.asarray(threshold, dtype=np.float64),
+        "left": np.asarray(left, dtype=np.int32),
+        "right": np.asarray(right, dtype=np.int32),
+        "value": np.asarray(value, dtype=np.float64),
+        "default_left": np.asarray(default_left, dtype=bool),
+        "missing_type": np.asarray(missing_type, dtype=np.int8),
+        "roots": np.asarray(roots, dtype=np.int32),
+    }
+    n_features = int(dump.get("max_feature_idx", -1)) + 1
+    bitvectors = build_bitvectors(trees, n_features)
+    trees.update(bitvectors or {
+        "bv_thresholds": np.zeros(0, dtype=np.float64),
+        "bv_offsets": np.zeros(n_features + 1, dtype=np.int64),
+        "bv_masks": np.zeros((0, len(roots)), dtype=np.uint64),
+        "leaf_values": np.zeros((len(roots), MAX_BITVECTOR_LEAVES), dtype=np.float64),
+    })
+    trees["params"] = np.asarray(
+        [max_depth, int(bool(dump.get("average_output"))), n_features, int(bitvectors is not None)],
+        dtype=np.int64,
+    )
+    return trees
+
+
+def build_bitvectors(trees: Dict[str, np.ndarray], n_features: int) -> Optional[Dict[str, np.ndarray]]:
+    """QuickScorer tables for the node arrays; None if the model can't use them."""
+    feature, left, right = trees["feature"], trees["left"], trees["right"]
+    roots = trees["roots"]
+    n_trees = len(roots)
+
+    if (trees["missing_type"][feature >= 0] != MISSING_NONE).any():
+        return None
+
+    node_mask = np.full(len(feature), _ALL_LEAVES, dtype=np.uint64)
+    node_tree = np.zeros(len(feature), dtype=np.int64)
+    leaf_values = np.zeros((n_trees, MAX_BITVECTOR_LEAVES), dtype=np.float64)
+
+    for tree_idx, root in enumerate(roots):
+        # Iterative in-order walk: number leaves left to right and record each
+        # node's [first_leaf, end_leaf) range.
+        next_leaf = 0
+        ranges = {}
+        stack = [(int(root), False)]
+        while stack:
+            node, children_done = stack.pop()
+            node_tree[node] = tree_idx
+            if feature[node] < 0:
+                if next_leaf >= MAX_BITVECTOR_LEAVES:
+                    return None
+                leaf_values[tree_idx, next_leaf] = trees["value"][node]
+                ranges[node] = (next_leaf, next_leaf + 1)
+                next_leaf += 1
+            elif not children_done:
+                stack.append((node, True))
+                stack.append((int(right[node]), False))
+                stack.append((int(left[node]), False))
+            else:
+                first, mid = ranges[int(left[node])]
+                end = ranges[int(right[node])][1]
+                ranges[node] = (first, end)
+                left_bits = ((1 << (mid - first)) - 1) << first
+                node_mask[node] = np.uint64(~left_bits & 0xFFFFFFFFFFFFFFFF)
+
+    splits = np.flatnonzero(feature >= 0)
+    splits = splits[np.lexsort((trees["threshold"][splits], feature[splits]))]
+    counts = np.bincount(feature[splits], minlength=n_features)
+    offsets = np.zeros(n_features + 1, dtype=np.int64)
+    offsets[1:] = np.cumsum(counts)
+
+    masks = np.full((len(splits) + n_features, n_trees), _ALL_LEAVES, dtype=np.uint64)
+    for f in range(n_features):
+        block = offsets[f] + f
+        for i, node in enumerate(splits[offsets[f]:offsets[f + 1]]):
+            masks[block + i + 1] = masks[block + i]
+            masks[block + i + 1, node_tree[node]] &= node_mask[node]
+
+    return {
+        "bv_thresholds": trees["threshold"][splits],
+        "bv_offsets": offsets,
+        "bv_masks": masks,
+        "leaf_values": leaf_values,
+    }
+
+
+# ---------------------------------------------------------------------
+# Evaluation
+# ---------------------------------------------------------------------
+
+def predict_trees(trees: Dict[str, np.ndarray], X: np.ndarray) -> np.ndarray:
+    """Raw scores for X (n_samples, n_features); matches Booster.predict."""
+    X = np.asarray(X, dtype=np.float64)
+    if X.ndim == 1:
+        X = X[None, :]
+
+    roots = trees["roots"]
+    if not len(roots):
+        return np.zeros(len(X), dtype=np.float64)
+
+    average_output, bitvectors = int(trees["params"][1]), bool(trees["params"][3])
+    if bitvectors and not np.isnan(X).any():
+        scores = _predict_bitvectors(trees, X)
+    else:
+        scores = _predict_traversal(trees, X)
+    if average_output:
+        scores /= len(roots)
+    return scores
+
+
+def _predict_bitvectors(trees: Dict[str, np.ndarray], X: np.ndarray) -> np.ndarray:
+    thresholds = trees["bv_thresholds"]
+    offsets = trees["bv_offsets"]
+    masks = trees["bv_masks"]
+    n_trees = masks.shape[1]
+
+    alive = np.full((len(X), n_trees), _ALL_LEAVES, dtype=np.uint64)
+    for f in range(len(offsets) - 1):
+        start, end = offsets[f], offsets[f + 1]
+        if start == end:
+            continue
+        # Number of this feature's splits with threshold < x, i.e. "go right"
+        false_count = np.searchsorted(thresholds[start:end], X[:, f], side="left")
+        alive &= masks[start + f + false_count]
+
+    lowest = alive & (~alive + np.uint64(1))
+    exit_leaf = np.frexp(lowest.astype(np.float64))[1] - 1
+    return trees["leaf_values"][np.arange(n_trees), exit_leaf].sum(axis=1)
+
+
+def _predict_traversal(trees: Dict[str, np.ndarray], X: np.ndarray) -> np.ndarray:
+    roots = trees["roots"]
+    feature = trees["feature"]
+    threshold = trees["threshold"]
+    left, right = trees["left"], trees["right"]
+    default_left = trees["default_left"]
+    missing_type = trees["missing_type"]
+    max_depth = int(trees["params"][0])
+
+    rows = np.arange(len(X))[:, None]
+    node = np.broadcast_to(roots, (len(X), len(roots))).copy()
+
+    for _ in range(max_depth):
+        feat = feature[node]
+        is_split = feat >= 0
+        if not is_split.any():
+            break
+
+        x = X[rows, np.maximum(feat, 0)]
+        mtype = missing_type[node]
+        is_nan = np.isnan(x)
+        x = np.where(is_nan & (mtype != MISSING_NAN), 0.0, x)
+        use_default = (
+            ((mtype == MISSING_ZERO) & (np.abs(x) <= _ZERO_THRESHOLD))
+            | ((mtype == MISSING_NAN) & is_nan)
+        )
+        go_left = np.where(use_default, default_left[node], x <= threshold[node])
+        node = np.where(is_split, np.where(go_left, left[node], right[node]), node)
+
+    return trees["value"][node].sum(axis=1)
+
+
+# ---------------------------------------------------------------------
+# Persist / load
+# ---------------------------------------------------------------------
+
+def save_trees(trees: Dict[str, np.ndarray], path: str = TREES_PATH) -> None:
+    save_array_dir(path, {name: trees[name] for name in ARRAY_NAMES})
+    logger.info("Exported %d trees (%d nodes) to %s", len(trees["roots"]), len(trees["feature"]), path)
+
+
+def load_trees(path: str = TREES_PATH) -> Optional[Dict[str, np.ndarray]]:
+    """Memory-mapped node arrays; None if no export exists."""
+    try:
+        return load_array_dir(path, ARRAY_NAMES)
+    except Exception:
+        logger.exception("Failed to load exported trees from %s", path)
+        return None
+
+
+def export_model_trees(model, path: str = TREES_PATH) -> bool:
+    """
+    Export a fitted LGBMRanker next to its pickle. On failure any previous
+    export is removed so the evaluator never serves a different model than
+    the pickle; predict_score then falls back to LightGBM.
+    """
+    try:
+        save_trees(export_trees(model.booster_), path)
+        return True
+    except Exception:
+        logger.exception("Tree export failed; predictions will use LightGBM")
+        shutil.rmtree(path, ignore_errors=True)
+        return False
@@ -5,7 +5,7 @@ import pandas as pd
 
 from backend.services.db_event_service import get_events_df
 from backend.services.db_product_service import get_products_df
-from backend.utils.database import get_db_session
+from backend.utils.database import get_read_session
 from backend.models import User
 
 
@@ -119,7 +119,7 @@ def build_user_profiles() -> Dict[str, dict]:
 def _load_user_clusters() -> Dict[str, int]:
     """Return {str(user_id): cluster} for users that have been assigned a cluster."""
     try:
-        with get_db_session() as session:
+        with get_read_session() as session:
             rows = (
                 session.query(User.user_id, User.cluster)
                 .filter(User.cluster.isnot(None))
@@ -0,0 +1,56 @@
+"""
+Microbenchmark: LightGBM predict vs the exported NumPy tree evaluator.
+
+Trains a throwaway LGBMRanker on synthetic 5-feature data (same shape and
+size as ml/train_ranker.py's model), then times single-row and batch
+prediction both ways.
+
+Usage:
+    python -m scripts.benchmark_tree_eval [--trees 100] [--repeat 2000]
+"""
+
+import argparse
+import time
+
+import numpy as np
+from lightgbm import LGBMRanker
+
+from ml.tree_model import export_trees, predict_trees
+
+
+def _time(fn, repeat: int) -> float:
+    """Median seconds per call over `repeat` calls."""
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    return float(np.median(samples))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--trees", type=int, default=100)
+    parser.add_argument("--repeat", type=int, default=2000)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    X = rng.random((5000, 5)).astype(np.float32)
+    y = np.clip(np.round(2 * X[:, 0] + X[:, 3] + 0.5 * rng.random(5000)), 0, 3).astype(int)
+    model = LGBMRanker(n_estimators=args.trees, random_state=42, verbose=-1)
+    model.fit(X, y, group=[50] * 100)
+    trees = export_trees(model.booster_)
+
+    print(f"{args.trees} trees, {len(trees['feature'])} nodes, max depth {int(trees['params'][0])}")
+    print(f"{'batch':>6} {'lightgbm µs':>12} {'numpy µs':>10} {'speedup':>8}")
+    for batch in (1, 10, 100, 500):
+        rows = rng.random((batch, 5)).astype(np.float32)
+        assert np.allclose(predict_trees(trees, rows), model.predict(rows))
+        repeat = max(10, args.repeat // batch)
+        lgbm = _time(lambda: model.predict(rows), repeat)
+        numpy_eval = _time(lambda: predict_trees(trees, rows), repeat)
+        print(f"{batch:>6} {lgbm * 1e6:>12.1f} {numpy_eval * 1e6:>10.1f} {lgbm / numpy_eval:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -16,6 +16,7 @@ from backend.utils.database import get_db_session, init_db, create_tables
 from backend.models import User, Product, SearchEvent, CartItem
 from backend.services.cart.core import add_to_cart
 from backend.services.security import hash_password
+from backend.services.db_event_service import create_search_events_bulk
 
 
 # Environment-aware API URL
@@ -227,21 +228,14 @@ def signup_and_login(username, password):
 # Optimized batch operations for large-scale data
 # ----------------------------
 def log_events_batch(events_list):
-    """Log multiple events in a single transaction for better performance."""
+    """Log multiple events with multi-row inserts (COPY on PostgreSQL) in a single transaction."""
     if not events_list:
         return
     
-    session = get_db_session()
     try:
-        for event_data in events_list:
-            event = SearchEvent(**event_data)
-            session.add(event)
-        session.commit()
+        create_search_events_bulk(events_list)
     except Exception as e:
         print(f"Error logging batch of {len(events_list)} events: {e}")
-        session.rollback()
-    finally:
-        session.close()
 
 def log_event_to_db(user_id, query, product_id, event_type):
     """Log an event directly to the database."""
@@ -0,0 +1,89 @@
+"""
+Tests for versioned .npy artifact directories (ml/array_store.py): builds
+published through the pointer file, pruning, reader retry and the legacy
+single-directory layout.
+"""
+
+import os
+from unittest.mock import patch
+
+import numpy as np
+import pytest
+
+import ml.array_store as store
+
+
+def _save(path, value):
+    store.save_array_dir(path, {"a": np.full(3, value), "b": np.full(2, value)})
+
+
+def _values(loaded):
+    return {name: int(array[0]) for name, array in loaded.items()}
+
+
+class TestBuilds:
+    def test_save_publishes_a_new_build(self, tmp_path):
+        path = str(tmp_path / "artifact")
+        _save(path, 1)
+        first = store.current_build(path)
+        _save(path, 2)
+        second = store.current_build(path)
+
+        assert first != second
+        assert _values(store.load_array_dir(path, ["a", "b"])) == {"a": 2, "b": 2}
+        assert isinstance(store.load_array_dir(path, ["a"])["a"], np.memmap)
+        assert not [n for n in os.listdir(path) if n.startswith(".tmp")]
+
+    def test_reader_of_previous_build_is_unaffected(self, tmp_path):
+        path = str(tmp_path / "artifact")
+        _save(path, 1)
+        mapped = store.load_array_dir(path, ["a", "b"])
+        _save(path, 2)
+        # Arrays mapped before the swap still come from one (the old) build
+        assert _values(mapped) == {"a": 1, "b": 1}
+
+    def test_old_builds_pruned(self, tmp_path):
+        path = str(tmp_path / "artifact")
+        for value in range(4):
+            _save(path, value)
+        builds = store._builds(path)
+        assert len(builds) == store.KEEP_BUILDS
+        assert builds[-1] == store.current_build(path)
+
+    def test_pruned_build_mid_load_retries_from_pointer(self, tmp_path):
+        path = str(tmp_path / "artifact")
+        _save(path, 1)
+        stale = store.current_build(path)
+        for value in (2, 3):
+            _save(path, value)
+        assert stale not in store._builds(path)
+
+        # First resolution names the pruned build, as for a reader that read
+        # the pointer just before the saves
+        with patch.object(store, "current_build", side_effect=[stale, store.current_build(path)]):
+            assert _values(store.load_array_dir(path, ["a", "b"])) == {"a": 3, "b": 3}
+
+    def test_missing_dir(self, tmp_path):
+        assert store.load_array_dir(str(tmp_path / "missing"), ["a"]) is None
+
+    def test_failed_save_keeps_current_build(self, tmp_path):
+        path = str(tmp_path / "artifact")
+        _save(path, 1)
+        with patch.object(store.joblib, "dump", side_effect=OSError("disk full")):
+            with pytest.raises(OSError):
+                store.save_array_dir(path, {"a": np.zeros(3)}, {"obj": object()})
+        assert _values(store.load_array_dir(path, ["a", "b"])) == {"a": 1, "b": 1}
+        assert not [n for n in os.listdir(path) if n.startswith(".tmp")]
+
+
+class TestLegacyLayout:
+    def test_flat_directory_read_then_replaced(self, tmp_path):
+        path = str(tmp_path / "artifact")
+        os.makedirs(path)
+        for name in ("a", "b"):
+            np.save(os.path.join(path, f"{name}.npy"), np.full(3, 7))
+        assert _values(store.load_array_dir(path, ["a", "b"])) == {"a": 7, "b": 7}
+
+        _save(path, 8)
+        assert _values(store.load_array_dir(path, ["a", "b"])) == {"a": 8, "b": 8}
+        assert not [n for n in os.listdir(path) if n.endswith(".npy")]
@@ -0,0 +1,257 @@
+"""
+Tests for the ASGI serving mode (backend/asgi.py, backend/controllers/
+async_controller.py, backend/utils/async_database.py): async auth, the
+concurrent lookup fan-out feeding search_products, recommendations and the
+Flask fallback for other routes. Uses a SQLite file (aiosqlite) and an
+in-memory async Redis stand-in; product frames (the products table needs
+PostgreSQL's TSVECTOR) are stubbed.
+"""
+
+import os
+import json
+import tempfile
+from collections import Counter
+from datetime import datetime, timezone
+from unittest.mock import patch
+
+import flask
+import pytest
+from sqlalchemy import create_engine, insert
+from starlette.testclient import TestClient
+
+import backend.asgi as asgi
+import backend.controllers.async_controller as ac
+import backend.services.async_redis as async_redis
+import backend.services.redis_client as redis_client
+import backend.utils.async_database as adb
+from backend.models import SearchEvent, User
+from backend.utils.auth_token import create_token
+from backend.utils.search import SearchLookups, ranking_cache_key, recent_boost_key
+
+
+SECRET = "test-secret"
+PRODUCT = {"product_id": 1, "title": "Laptop", "category": "Computers", "price": 500.0, "rating": 4.5}
+
+
+class FakeAsyncRedis:
+    def __init__(self):
+        self.store = {}
+        self.mget_calls = []
+
+    async def mget(self, keys):
+        self.mget_calls.append(list(keys))
+        return [self.store.get(k) for k in keys]
+
+    async def setex(self, key, ttl, value):
+        self.store[key] = value
+
+    def pipeline(self, transaction=True):
+        return FakePipeline(self)
+
+
+class FakePipeline:
+    def __init__(self, redis):
+        self.redis, self.ops = redis, []
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    def incr(self, key):
+        return self.incrby(key, 1)
+
+    def incrby(self, key, amount):
+        self.ops.append(("incr", key, amount))
+
+    def expire(self, key, ttl):
+        self.ops.append(("expire", key, ttl))
+
+    async def execute(self):
+        results = []
+        for op, key, arg in self.ops:
+            if op == "incr":
+                self.redis.store[key] = int(self.redis.store.get(key, 0)) + arg
+                results.append(self.redis.store[key])
+            else:
+                results.append(True)
+        return results
+
+
+@pytest.fixture
+def env(monkeypatch):
+    fd, path = tempfile.mkstemp(suffix=".db")
+    os.close(fd)
+    engine = create_engine(f"sqlite:///{path}")
+    User.__table__.create(bind=engine)
+    SearchEvent.__table__.create(bind=engine)
+    with engine.begin() as conn:
+        conn.execute(insert(User.__table__), [{
+            "user_id": "u1", "username": "alice", "password_hash": "x", "cluster": 2, "group": "B",
+        }])
+        conn.execute(insert(SearchEvent.__table__), [
+            {"user_id": "u1", "query": "laptop", "product_id": pid, "event_type": "click",
+             "group": "B", "timestamp": datetime(2025, 6, 1, 12, minute, tzinfo=timezone.utc)}
+            for minute, pid in enumerate([7, 8, 7])
+        ])
+    engine.dispose()
+
+    monkeypatch.setenv("DATABASE_URL", f"sqlite:///{path}")
+    monkeypatch.delenv("DATABASE_REPLICA_URL", raising=False)
+    monkeypatch.setenv("SECRET_KEY", SECRET)
+    fake = FakeAsyncRedis()
+
+    wsgi = flask.Flask(__name__)
+
+    @wsgi.route("/api/ping")
+    def ping():
+        return {"pong": True}
+
+    with patch.object(async_redis, "get_async_redis", return_value=fake), \
+            patch.object(asgi, "get_async_redis", return_value=fake), \
+            patch.object(redis_client, "_pending", Counter()), \
+            patch.object(ac, "get_profiles", return_value={}), \
+            patch.object(ac, "fetch_products_df", return_value=None):
+        with TestClient(asgi.create_asgi_app(wsgi)) as client:
+            yield client, fake
+    os.remove(path)
+
+
+def _auth():
+    return {"Authorization": f"Bearer {create_token('u1')}"}
+
+
+class TestAsyncDatabaseUrl:
+    def test_drivers(self):
+        assert adb.async_database_url("sqlite:///data/x.db") == "sqlite+aiosqlite:///data/x.db"
+        assert adb.async_database_url("postgresql://u:p@h/db") == "postgresql+asyncpg://u:p@h/db"
+
+    def test_sslmode_translated_for_asyncpg(self):
+        url = adb.async_database_url("postgresql://u:p@h/db?sslmode=require")
+        assert url == "postgresql+asyncpg://u:p@h/db?ssl=require"
+
+
+class TestAsyncSearch:
+    def test_cache_miss_fans_out_and_feeds_search(self, env):
+        client, fake = env
+        with patch.object(ac, "search_products", return_value=[PRODUCT]) as search:
+            resp = client.get("/api/search", params={"q": "laptop"}, headers=_auth())
+
+        assert resp.status_code == 200
+        assert resp.json()["products"] == [PRODUCT]
+        assert "lookups;dur=" in resp.headers["Server-Timing"]
+
+        # One MGET for ranking, base candidates and recent boost
+        keys = fake.mget_calls[0]
+        assert keys[0] == ranking_cache_key("laptop", "u1", 2, "B")
+        assert keys[2] == recent_boost_key("u1")
+
+        kwargs = search.call_args.kwargs
+        assert kwargs["cluster"] == 2 and kwargs["ab_group"] == "B"
+        lookups = kwargs["lookups"]
+        assert lookups.ranking is None and lookups.profiles == {}
+        # Recent boost built from the async events read (newest first, same
+        # rank decay as _get_recent_boost) and cached for the sync path
+        assert lookups.recent_boost == pytest.approx({7: 0.16, 8: 0.18})
+        assert json.loads(fake.store[recent_boost_key("u1")]) == pytest.approx({"7": 0.16, "8": 0.18})
+
+    def test_ranking_hit_skips_db(self, env):
+        client, fake = env
+        fake.store[ranking_cache_key("laptop", None, None, "A")] = json.dumps([PRODUCT])
+        with patch.object(ac, "fetch_products_df") as fetch, \
+                patch.object(ac, "search_products", return_value=[PRODUCT]) as search:
+            resp = client.get("/api/search", params={"q": "laptop"})
+
+        assert resp.status_code == 200
+        fetch.assert_not_called()
+        assert search.call_args.kwargs["lookups"].ranking == [PRODUCT]
+        # Counted in the in-process buffer, flushed to Redis periodically
+        assert redis_client._pending["cache:hits"] == 1
+
+    def test_cache_miss_queries_products(self, env):
+        client, _ = env
+        frames = []
+
+        async def fake_fetch(search_query=None, category_filter=None, limit=None):
+            frames.append((search_query, category_filter))
+            return f"df:{search_query}"
+
+        with patch.object(ac, "fetch_products_df", side_effect=fake_fetch), \
+                patch.object(ac, "search_products", return_value=[]) as search:
+            client.get("/api/search", params={"q": "laptop"})
+
+        # Text search and category expansion ("laptop" → Computers)
+        assert set(frames) == {("laptop", None), (None, "Computers")}
+        lookups = search.call_args.kwargs["lookups"]
+        assert lookups.text_products == "df:laptop"
+        assert lookups.category_products == "df:None"
+
+    def test_invalid_token_searches_anonymously(self, env):
+        client, _ = env
+        with patch.object(ac, "search_products", return_value=[]) as search:
+            resp = client.get("/api/search", params={"q": "laptop"},
+                              headers={"Authorization": "Bearer junk"})
+        assert resp.status_code == 200
+        assert search.call_args.args[1] is None
+
+    def test_query_required(self, env):
+        client, _ = env
+        resp = client.get("/api/search")
+        assert resp.status_code == 400
+
+    def test_rate_limit(self, env):
+        client, _ = env
+        with patch.object(asgi, "SEARCH_RATE_LIMIT_PER_MINUTE", 1), \
+                patch.object(ac, "search_products", return_value=[]):
+            assert client.get("/api/search", params={"q": "a"}).status_code == 200
+            assert client.get("/api/search", params={"q": "a"}).status_code == 429
+
+    def test_rate_limit_fails_open(self, env):
+        client, _ = env
+        with patch.object(asgi, "get_async_redis", side_effect=ConnectionError("down")), \
+                patch.object(ac, "search_products", return_value=[]):
+            assert client.get("/api/search", params={"q": "a"}).status_code == 200
+
+
+class TestAsyncRecommendations:
+    def test_requires_auth(self, env):
+        client, _ = env
+        assert client.get("/api/recommendations").status_code == 401
+
+    def test_recent_ids_and_rank(self, env):
+        client, fake = env
+        with patch.object(ac, "fetch_products_by_ids", return_value=[]) as hydrate, \
+                patch.object(ac, "rank_similar", return_value=[PRODUCT]) as rank:
+            resp = client.get("/api/recommendations", headers=_auth())
+
+        assert resp.status_code == 200
+        assert resp.json() == {"recent": [], "similar": [PRODUCT]}
+        hydrate.assert_called_once_with([7, 8])
+        assert rank.call_args.args == ("u1", 2, {}, [7, 8], 10)
+        assert json.loads(fake.store["recommendations:u1"])["similar"] == [PRODUCT]
+
+    def test_cached(self, env):
+        client, fake = env
+        fake.store["recommendations:u1"] = json.dumps({"recent": [], "similar": [PRODUCT]})
+        with patch.object(ac, "rank_similar") as rank:
+            resp = client.get("/api/recommendations", headers=_auth())
+        assert resp.json()["similar"] == [PRODUCT]
+        rank.assert_not_called()
+
+
+class TestFlaskFallback:
+    def test_other_routes_served_by_flask(self, env):
+        client, _ = env
+        assert client.get("/api/ping").json() == {"pong": True}
+
+
+class TestSearchLookups:
+    def test_prefetched_values_skip_fetches(self):
+        from backend.utils import search as search_module
+
+        lookups = SearchLookups(ranking=[PRODUCT])
+        with patch.object(search_module, "SEARCH_TIERED_RANKING", False), \
+                patch.object(search_module, "redis_get_json") as get:
+            assert search_module.search_products("laptop", None, lookups=lookups) == [PRODUCT]
+        get.assert_not_called()
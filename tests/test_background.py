@@ -0,0 +1,215 @@
+"""
+Tests for the bounded background executor (backend/utils/background.py):
+batching of event inserts and popularity deltas, backpressure, drain on
+shutdown and metrics — plus the batched write services it calls.
+"""
+import os
+import tempfile
+import threading
+from unittest.mock import patch
+
+import pytest
+from sqlalchemy import text
+
+import backend.utils.background as bg
+from backend.services.event.creation import search_event_row
+
+
+@pytest.fixture
+def writes():
+    calls = {"events": [], "popularity": []}
+    with patch.object(bg, "_insert_events", side_effect=lambda rows: calls["events"].append(list(rows))), \
+         patch.object(bg, "_apply_popularity", side_effect=lambda d: calls["popularity"].append(dict(d))):
+        yield calls
+
+
+def _blocked(executor):
+    """Occupy the (single) worker until the returned event is set."""
+    gate, started = threading.Event(), threading.Event()
+    executor.submit(lambda: (started.set(), gate.wait(5)))
+    assert started.wait(5)
+    return gate
+
+
+class TestBatching:
+    def test_events_and_popularity_written_per_batch(self, writes):
+        executor = bg.BackgroundExecutor(workers=1, queue_size=100)
+        gate = _blocked(executor)
+        for pid in (1, 1, 2):
+            executor.log_event(search_event_row("u1", "q", pid, "add_to_cart"))
+        executor.add_popularity(1, 3)
+        executor.add_popularity(1, 3)
+        executor.add_popularity(2, 1)
+        gate.set()
+        assert executor.drain(5)
+
+        assert [[row["product_id"] for row in rows] for rows in writes["events"]] == [[1, 1, 2]]
+        assert writes["popularity"] == [{1: 6, 2: 1}]
+        assert executor.stats()["completed"] == 7
+        executor.shutdown(1)
+
+    def test_batch_size_caps_a_batch(self, writes):
+        executor = bg.BackgroundExecutor(workers=1, queue_size=100, batch_size=2)
+        gate = _blocked(executor)
+        for pid in range(1, 5):
+            executor.log_event(search_event_row("u1", "q", pid, "click"))
+        gate.set()
+        assert executor.drain(5)
+        assert [len(rows) for rows in writes["events"]] == [2, 2]
+        executor.shutdown(1)
+
+
+class TestBackpressureAndFailures:
+    def test_full_queue_runs_on_caller(self, writes):
+        executor = bg.BackgroundExecutor(workers=1, queue_size=1, submit_timeout=0.01)
+        gate = _blocked(executor)
+        caller = threading.current_thread()
+        ran_on = []
+        assert executor.submit(lambda: ran_on.append(threading.current_thread()))
+        assert not executor.submit(lambda: ran_on.append(threading.current_thread()))
+        assert ran_on == [caller]
+        assert executor.stats()["inline"] == 1
+        gate.set()
+        assert executor.drain(5)
+        assert len(ran_on) == 2 and ran_on[1] is not caller
+        executor.shutdown(1)
+
+    def test_failures_are_logged_not_raised(self, writes):
+        executor = bg.BackgroundExecutor(workers=1)
+        done = threading.Event()
+        executor.submit(lambda: 1 / 0)
+        with patch.object(bg, "_insert_events", side_effect=RuntimeError("db down")):
+            executor.log_event(search_event_row("u1", "q", 1, "click"))
+            assert executor.drain(5)
+        executor.submit(done.set)
+        assert done.wait(5)
+        assert executor.stats()["failed"] == 2
+        executor.shutdown(1)
+
+
+    def test_bad_rows_dropped_alone(self, writes):
+        written, popularity = [], []
+
+        def insert(rows):
+            if any(row["product_id"] == 99 for row in rows):
+                raise ValueError("bad row")
+            written.extend(row["product_id"] for row in rows)
+
+        def apply(deltas):
+            if 99 in deltas:
+                raise ValueError("bad product")
+            popularity.append(deltas)
+
+        executor = bg.BackgroundExecutor(workers=1, queue_size=100)
+        with patch.object(bg, "_insert_events", side_effect=insert), \
+             patch.object(bg, "_apply_popularity", side_effect=apply):
+            gate = _blocked(executor)
+            for pid in (1, 2, 99, 3, 4):
+                executor.log_event(search_event_row("u1", "q", pid, "click"))
+            for pid in (1, 99, 99, 2):
+                executor.add_popularity(pid, 1)
+            gate.set()
+            assert executor.drain(5)
+
+            assert sorted(written) == [1, 2, 3, 4]
+            assert {k: v for d in popularity for k, v in d.items()} == {1: 1, 2: 1}
+            stats = executor.stats()
+            assert stats["failed"] == 3 and stats["completed"] == 1 + 4 + 2
+
+            # Inline (queue full / closed) writes retry the same way
+            executor.shutdown(1)
+            assert executor.log_event(search_event_row("u1", "q", 99, "click")) is False
+            assert executor.stats()["failed"] == 4
+
+    def test_connection_errors_not_retried(self, writes):
+        from sqlalchemy.exc import OperationalError
+
+        executor = bg.BackgroundExecutor(workers=1)
+        with patch.object(bg, "_insert_events", side_effect=OperationalError("x", {}, None)) as insert:
+            executor._run_batch([(bg._EVENT, (search_event_row("u1", "q", pid, "click"), None))
+                                 for pid in range(4)])
+        assert insert.call_count == 1
+        assert executor.stats()["failed"] == 4
+
+
+class TestShutdown:
+    def test_drains_queue_then_runs_inline(self, writes):
+        executor = bg.BackgroundExecutor(workers=2)
+        ran = []
+        for i in range(20):
+            executor.submit(ran.append, i)
+        assert executor.shutdown(5)
+        assert sorted(ran) == list(range(20))
+        assert executor.stats()["workers"] == 2
+
+        caller_ran = []
+        assert executor.submit(caller_ran.append, "late") is False
+        assert caller_ran == ["late"]
+
+    def test_metrics(self, writes):
+        executor = bg.BackgroundExecutor(workers=1)
+        executor.submit(lambda: None)
+        executor.drain(5)
+        lines = list(executor.render_metrics())
+        assert "background_queue_depth 0" in lines
+        assert "background_completed_total 1" in lines
+        executor.shutdown(1)
+
+
+@pytest.fixture
+def db(monkeypatch):
+    fd, path = tempfile.mkstemp(suffix=".db")
+    os.close(fd)
+    monkeypatch.setenv("DATABASE_URL", f"sqlite:///{path}")
+
+    import backend.utils.database as database
+    database._engine = None
+    database._SessionLocal = None
+    engine, _ = database.init_db()
+
+    from backend.models import SearchEvent
+    SearchEvent.__table__.create(bind=engine)
+    with engine.begin() as conn:
+        conn.execute(text("CREATE TABLE products (id INTEGER PRIMARY KEY, popularity FLOAT, updated_at DATETIME)"))
+        conn.execute(text("INSERT INTO products (id, popularity) VALUES (1, 0), (2, 5)"))
+    yield engine
+
+    database._engine = None
+    database._SessionLocal = None
+    os.remove(path)
+
+
+class TestBatchedWrites:
+    def test_events_bulk_insert_one_statement(self, db):
+        from backend.services.db_event_service import create_search_events_bulk
+        from backend.utils import query_stats as qs
+
+        rows = [search_event_row(" u1 ", "q", pid, "click") for pid in (1, 2, 3)]
+        with qs.count_queries() as stats:
+            assert create_search_events_bulk(rows) == 3
+        assert stats.count <= 3  # insert + transaction bookkeeping, not one per row
+        with db.connect() as conn:
+            assert conn.execute(text("SELECT user_id, product_id FROM search_events ORDER BY id")).all() == [
+                ("u1", 1), ("u1", 2), ("u1", 3),
+            ]
+
+    def test_mixed_batch_keeps_good_rows(self, db):
+        executor = bg.BackgroundExecutor(workers=1, queue_size=100)
+        gate = _blocked(executor)
+        executor.log_event(search_event_row("u1", "q", 1, "click"))
+        executor.log_event({"user_id": None, "event_type": None})
+        executor.log_event(search_event_row("u2", "q", 2, "click"))
+        gate.set()
+        assert executor.drain(5)
+        executor.shutdown(1)
+
+        with db.connect() as conn:
+            assert conn.execute(text("SELECT user_id FROM search_events ORDER BY id")).scalars().all() == ["u1", "u2"]
+        assert executor.stats()["failed"] == 1
+
+    def test_popularity_deltas_committed(self, db):
+        from backend.services.db_product_service import update_products_popularity
+
+        assert update_products_popularity({1: 3, 2: -1, 3: 2}) == 3
+        with db.connect() as conn:
+            assert dict(conn.execute(text("SELECT id, popularity FROM products")).all()) == {1: 3, 2: 4}
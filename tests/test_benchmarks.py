@@ -0,0 +1,79 @@
+"""
+Tests for the benchmark harness helpers: the in-memory Redis stand-in, the
+deterministic dataset builder and the run comparison.
+"""
+
+import sqlite3
+import time
+from unittest.mock import patch
+
+import benchmarks.dataset as dataset
+from benchmarks.fake_redis import FakeRedis
+from benchmarks.run import compare
+
+
+class TestFakeRedis:
+    def test_string_and_counter_semantics(self):
+        r = FakeRedis()
+        assert r.get("k") is None
+        r.setex("k", 60, '{"a": 1}')
+        assert r.get("k") == '{"a": 1}'
+        assert r.incr("hits") == 1 and r.incr("hits") == 2
+        assert r.get("hits") == "2"
+        assert r.mget(["k", "missing"]) == ['{"a": 1}', None]
+
+    def test_expiry_and_pattern_delete(self):
+        r = FakeRedis()
+        r.set("search_tier:a", "1", ex=1)
+        r.set("search_tier:b", "1")
+        r.set("other", "1")
+        with patch("benchmarks.fake_redis.time.monotonic", return_value=time.monotonic() + 5):
+            assert r.get("search_tier:a") is None
+        assert sorted(r.scan_iter(match="search_tier:*")) == ["search_tier:b"]
+        assert r.delete("search_tier:b", "nope") == 1
+
+    def test_pipeline_is_one_command(self):
+        r = FakeRedis()
+        pipe = r.pipeline(transaction=False)
+        pipe.setex("a", 60, "1")
+        pipe.incrby("hits", 3)
+        assert pipe.execute() == [True, 3]
+        assert r.commands == 1
+        assert r.get("a") == "1" and r.get("hits") == "3"
+
+    def test_lock_is_exclusive(self):
+        r = FakeRedis()
+        first, second = r.lock("job", timeout=10), r.lock("job", timeout=10)
+        assert first.acquire(blocking=False)
+        assert not second.acquire(blocking=False)
+        first.release()
+        assert second.acquire(blocking=False)
+
+
+class TestDataset:
+    def _rows(self, path):
+        with sqlite3.connect(path) as conn:
+            return (
+                conn.execute("SELECT id, title, price, popularity FROM products ORDER BY id").fetchall(),
+                conn.execute("SELECT user_id, product_id, event_type FROM search_events ORDER BY id").fetchall(),
+            )
+
+    def test_same_seed_same_data(self, tmp_path):
+        with patch.object(dataset, "DATA_DIR", str(tmp_path / "a")):
+            a = dataset.build_dataset(90, seed=7, events_per_user=3)
+        with patch.object(dataset, "DATA_DIR", str(tmp_path / "b")):
+            b = dataset.build_dataset(90, seed=7, events_per_user=3)
+        assert self._rows(a["path"]) == self._rows(b["path"])
+        products, events = self._rows(a["path"])
+        assert len(products) == 90 and len(events) == a["events"]
+        assert all(1 <= pid <= 90 for _, pid, _ in events)
+
+    def test_sizes_and_queries(self):
+        assert dataset.parse_size("100k") == 100_000 and dataset.parse_size("2500") == 2500
+        assert dataset.sample_queries(1, 5) == dataset.sample_queries(1, 5)
+
+
+def test_compare_reports_relative_change():
+    current = {"scenarios": {"search": {"p50_ms": 11.0, "p95_ms": 20.0, "p99_ms": 30.0}}}
+    baseline = {"scenarios": {"search": {"p50_ms": 10.0, "p95_ms": 20.0, "p99_ms": 40.0}}}
+    assert compare(current, baseline) == ["          search: p50 +10.0%, p95 +0.0%, p99 -25.0%"]
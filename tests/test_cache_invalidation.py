@@ -7,51 +7,88 @@ from unittest.mock import MagicMock, patch, call
 import pytest
 
 import backend.services.cache_invalidation as ci
+from benchmarks.fake_redis import FakeRedis
 
 
 def _mock_redis():
     m = MagicMock()
     m.scan_iter.return_value = []
     m.delete.return_value = 0
-    m.get.return_value = None
+    m.mget.side_effect = lambda keys: [None] * len(keys)
     return m
 
 
+def _deleted_keys(mock_r):
+    return {key for c in mock_r.delete.call_args_list for key in c[0]}
+
+
+@pytest.fixture(autouse=True)
+def _no_counter_flush():
+    # Buffered counters go to the real client; keep tests off the network
+    with patch.object(ci, "flush_counters"), patch.object(ci, "incr_counter"):
+        yield
+
+
 # ---- get_cache_stats ----
 
+def _stats_redis(counters=None, namespaces=None):
+    """FakeRedis seeded with counter strings and {hash key: {ns: count}}."""
+    r = FakeRedis()
+    for key, value in (counters or {}).items():
+        r.set(key, value)
+    for hash_key, fields in (namespaces or {}).items():
+        for field, amount in fields.items():
+            r.hincrby(hash_key, field, amount)
+    r.commands = 0
+    return r
+
+
 class TestGetCacheStats:
     def test_returns_zeros_when_redis_has_none(self):
-        mock_r = _mock_redis()
-        with patch.object(ci, "_redis", mock_r):
+        with patch.object(ci, "_redis", _stats_redis()):
             stats = ci.get_cache_stats()
-        assert stats == {"hits": 0, "misses": 0, "invalidations": 0, "hit_rate": 0.0}
+        assert stats == {"hits": 0, "misses": 0, "invalidations": 0, "hit_rate": 0.0, "namespaces": {}}
 
     def test_computes_hit_rate_correctly(self):
-        mock_r = _mock_redis()
-        mock_r.get.side_effect = lambda key: {
+        r = _stats_redis({
             "cache:hits": "80",
             "cache:misses": "20",
             "cache:invalidations": "3",
-        }.get(key)
-        with patch.object(ci, "_redis", mock_r):
+        })
+        with patch.object(ci, "_redis", r):
             stats = ci.get_cache_stats()
         assert stats["hit_rate"] == pytest.approx(0.8)
         assert stats["hits"] == 80
         assert stats["misses"] == 20
         assert stats["invalidations"] == 3
 
+    def test_per_namespace_hit_rate_and_latency(self):
+        r = _stats_redis(namespaces={
+            "cache:ns:hits": {"search_ranked": 3, "analytics": 1},
+            "cache:ns:misses": {"search_ranked": 1},
+            "cache:ns:lookup_us": {"search_ranked": 2000, "analytics": 500},
+        })
+        with patch.object(ci, "_redis", r):
+            stats = ci.get_cache_stats()
+        assert stats["namespaces"]["search_ranked"] == {
+            "hits": 3, "misses": 1, "hit_rate": 0.75, "avg_latency_ms": 0.5,
+        }
+        assert stats["namespaces"]["analytics"]["hit_rate"] == 1.0
+        # One round trip for the counters and all three hashes
+        assert r.commands == 1
+
     def test_returns_zeros_on_redis_failure(self):
         mock_r = _mock_redis()
-        mock_r.get.side_effect = ConnectionError("Redis down")
+        mock_r.pipeline.side_effect = ConnectionError("Redis down")
         with patch.object(ci, "_redis", mock_r):
             stats = ci.get_cache_stats()
         assert stats["hits"] == 0
         assert stats["misses"] == 0
+        assert stats["namespaces"] == {}
 
     def test_hit_rate_zero_when_no_requests(self):
-        mock_r = _mock_redis()
-        mock_r.get.return_value = "0"
-        with patch.object(ci, "_redis", mock_r):
+        r = _stats_redis({"cache:hits": "0", "cache:misses": "0"})
+        with patch.object(ci, "_redis", r):
             stats = ci.get_cache_stats()
         assert stats["hit_rate"] == 0.0
 
@@ -63,17 +100,14 @@ class TestResetCacheStats:
         mock_r = _mock_redis()
         with patch.object(ci, "_redis", mock_r):
             ci.reset_cache_stats()
-        calls = mock_r.set.call_args_list
-        keys_set = {c[0][0] for c in calls}
-        assert "cache:hits" in keys_set
-        assert "cache:misses" in keys_set
-        assert "cache:invalidations" in keys_set
-        values_set = {c[0][1] for c in calls}
-        assert values_set == {0}
+        # One MSET for all three counters
+        (mapping,), _ = mock_r.mset.call_args
+        assert mapping == {"cache:hits": 0, "cache:misses": 0, "cache:invalidations": 0}
+        mock_r.delete.assert_called_once_with("cache:ns:hits", "cache:ns:misses", "cache:ns:lookup_us")
 
     def test_redis_failure_does_not_raise(self):
         mock_r = _mock_redis()
-        mock_r.set.side_effect = ConnectionError
+        mock_r.mset.side_effect = ConnectionError
         with patch.object(ci, "_redis", mock_r):
             ci.reset_cache_stats()  # must not raise
 
@@ -113,9 +147,12 @@ class TestInvalidateOnUserEvent:
         with patch.object(ci, "_redis", mock_r):
             result = ci.invalidate_on_user_event("u123", "click")
         # Must delete recommendations:u123 and recent_boost:u123
-        deleted_keys = {c[0][0] for c in mock_r.delete.call_args_list}
+        deleted_keys = _deleted_keys(mock_r)
         assert "recommendations:u123" in deleted_keys
         assert "recent_boost:u123" in deleted_keys
+        # Single round trip
+        assert mock_r.delete.call_count == 1
+        assert result is True
 
     def test_add_to_cart_triggers_invalidation(self):
         mock_r = _mock_redis()
@@ -135,7 +172,7 @@ class TestInvalidateOnUserEvent:
         mock_r.delete.return_value = 1
         with patch.object(ci, "_redis", mock_r):
             ci.invalidate_on_user_event("u123", "purchase", cluster_id=2)
-        deleted_keys = {c[0][0] for c in mock_r.delete.call_args_list}
+        deleted_keys = _deleted_keys(mock_r)
         assert "cluster_boost:2" in deleted_keys
 
     def test_cluster_boost_not_invalidated_without_cluster(self):
@@ -143,7 +180,7 @@ class TestInvalidateOnUserEvent:
         mock_r.delete.return_value = 1
         with patch.object(ci, "_redis", mock_r):
             ci.invalidate_on_user_event("u123", "click")
-        deleted_keys = {c[0][0] for c in mock_r.delete.call_args_list}
+        deleted_keys = _deleted_keys(mock_r)
         assert not any("cluster_boost" in k for k in deleted_keys)
 
     def test_redis_failure_does_not_raise(self):
@@ -170,9 +207,43 @@ class TestInvalidateUserRecommendations:
 
 class TestGetCacheHitRate:
     def test_returns_float_between_zero_and_one(self):
-        mock_r = _mock_redis()
-        mock_r.get.side_effect = lambda key: {"cache:hits": "3", "cache:misses": "1"}.get(key, "0")
-        with patch.object(ci, "_redis", mock_r):
+        r = _stats_redis({"cache:hits": "3", "cache:misses": "1"})
+        with patch.object(ci, "_redis", r):
             rate = ci.get_cache_hit_rate()
         assert 0.0 <= rate <= 1.0
         assert rate == pytest.approx(0.75)
+
+
+# ---- batching ----
+
+class TestBatching:
+    def test_pattern_delete_batches_scan_pages(self):
+        mock_r = _mock_redis()
+        mock_r.scan_iter.return_value = [f"search_tier:k{i}" for i in range(3)]
+        mock_r.delete.side_effect = lambda *keys: len(keys)
+        with patch.object(ci, "_DELETE_BATCH", 2), patch.object(ci, "_redis", mock_r):
+            assert ci._delete_by_pattern("search_tier:*") == 3
+        assert [c[0] for c in mock_r.delete.call_args_list] == [
+            ("search_tier:k0", "search_tier:k1"), ("search_tier:k2",),
+        ]
+
+    def test_stats_flush_buffered_counters_first(self):
+        with patch.object(ci, "_redis", _stats_redis()):
+            ci.get_cache_stats()
+        ci.flush_counters.assert_called_once()
+
+    def test_invalidation_counted_through_buffer(self):
+        mock_r = _mock_redis()
+        mock_r.delete.return_value = 1
+        with patch.object(ci, "_redis", mock_r):
+            ci.invalidate_cluster_boost(1)
+        ci.incr_counter.assert_called_once_with("cache:invalidations")
+        mock_r.incr.assert_not_called()
+
+    def test_product_update_drops_cart_views(self):
+        mock_r = _mock_redis()
+        mock_r.scan_iter.side_effect = lambda match, count: ["cart:u1"] if match == "cart:*" else []
+        mock_r.delete.side_effect = lambda *keys: len(keys)
+        with patch.object(ci, "_redis", mock_r):
+            assert ci.invalidate_on_product_update(7) is True
+        assert _deleted_keys(mock_r) == {"cart:u1"}
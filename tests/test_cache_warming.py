@@ -0,0 +1,93 @@
+"""
+Tests for backend/services/cache_warming.py — plan construction, pacing,
+progress reporting and failure isolation. DB/Redis lookups are patched.
+"""
+
+from unittest.mock import patch
+
+import backend.services.cache_warming as cw
+
+
+def _plan(**kwargs):
+    with patch.object(cw, "get_top_queries", return_value=[("laptop", 40), ("headphones", 12)]), \
+         patch.object(cw, "get_cluster_ids", return_value=[0, 1]), \
+         patch.object(cw, "get_most_active_users", return_value=[("u1", 90), ("u2", 30)]):
+        return cw.build_warm_plan(**kwargs)
+
+
+class TestBuildWarmPlan:
+    def test_search_tasks_cover_every_group_and_cluster(self):
+        plan = _plan()
+        search = [t for t in plan if t[0] == cw.TASK_SEARCH]
+        # 2 queries × 2 groups × (anon/None + 2 clusters)
+        assert len(search) == 2 * 2 * 3
+        assert ("search", "laptop", "A", None) in search
+        assert ("search", "headphones", "B", 1) in search
+
+    def test_recommendation_tasks_for_active_users(self):
+        plan = _plan()
+        recs = [t for t in plan if t[0] == cw.TASK_RECOMMENDATIONS]
+        assert recs == [("recommendations", "u1"), ("recommendations", "u2")]
+
+    def test_queries_ordered_before_users_and_by_popularity(self):
+        plan = _plan()
+        assert plan[0][:2] == ("search", "laptop")
+        assert plan[-1][0] == "recommendations"
+
+    def test_zero_lookback_means_all_history(self):
+        with patch.object(cw, "get_top_queries", return_value=[]) as mock_top, \
+             patch.object(cw, "get_cluster_ids", return_value=[]), \
+             patch.object(cw, "get_most_active_users", return_value=[]):
+            cw.build_warm_plan(lookback_hours=0)
+        assert mock_top.call_args.kwargs["since_hours"] is None
+
+
+class TestRunWarmPlan:
+    def test_dispatches_tasks_and_counts(self):
+        plan = [("search", "laptop", "A", None), ("recommendations", "u1")]
+        with patch.object(cw, "_warm_search", return_value=3) as ws, \
+             patch.object(cw, "_warm_recommendations", return_value=5) as wr:
+            summary = cw.run_warm_plan(plan, max_ops_per_second=0)
+        ws.assert_called_once_with("laptop", "A", None)
+        wr.assert_called_once_with("u1")
+        assert summary["done"] == 2
+        assert summary["search"] == 1
+        assert summary["recommendations"] == 1
+        assert summary["failed"] == 0
+
+    def test_failure_is_counted_not_raised(self):
+        plan = [("search", "laptop", "A", None), ("search", "tv", "B", None)]
+        with patch.object(cw, "_warm_search", side_effect=[RuntimeError("db down"), 1]):
+            summary = cw.run_warm_plan(plan, max_ops_per_second=0)
+        assert summary["failed"] == 1
+        assert summary["search"] == 1
+        assert summary["done"] == 2
+
+    def test_paces_to_max_ops_per_second(self):
+        plan = [("search", "q", "A", None)] * 3
+        sleeps = []
+        with patch.object(cw, "_warm_search", return_value=0):
+            cw.run_warm_plan(plan, max_ops_per_second=2, sleep=sleeps.append)
+        assert len(sleeps) == 3
+        assert all(0 < s <= 0.5 for s in sleeps)
+
+    def test_progress_callback_called_per_task(self):
+        plan = [("search", "q", "A", None)] * 4
+        seen = []
+        with patch.object(cw, "_warm_search", return_value=0):
+            cw.run_warm_plan(plan, max_ops_per_second=0, progress=seen.append)
+        assert [s["done"] for s in seen] == [1, 2, 3, 4]
+        assert all(s["total"] == 4 for s in seen)
+
+
+class TestWarmSearch:
+    def test_uses_intent_clean_query_and_category_and_forces_refresh(self):
+        with patch.object(cw, "search_products", return_value=[{}, {}]) as sp:
+            n = cw._warm_search("cheap laptops", "A", 2)
+        assert n == 2
+        args, kwargs = sp.call_args
+        assert args[1] is None  # anonymous / cluster-level entry
+        assert kwargs["cluster"] == 2
+        assert kwargs["ab_group"] == "A"
+        assert kwargs["category"] == "Computers"
+        assert kwargs["force_refresh"] is True
@@ -0,0 +1,158 @@
+"""
+Tests for the cart read path: the joined cart query (backend/services/cart/
+get.py), the per-user cart cache (cart/cache.py) and its invalidation by
+cart writes. Uses a temp SQLite DB — the products table is created with
+plain DDL because the model's TSVECTOR column is PostgreSQL-only — and the
+in-memory FakeRedis.
+"""
+import os
+import tempfile
+from datetime import datetime
+from unittest.mock import patch
+
+import flask
+import pytest
+from sqlalchemy import text
+
+import backend.services.cart.cache as cart_cache
+import backend.services.redis_client as redis_client
+from backend.utils import query_stats as qs
+from benchmarks.fake_redis import FakeRedis
+
+
+@pytest.fixture
+def cart_db(monkeypatch):
+    fd, path = tempfile.mkstemp(suffix=".db")
+    os.close(fd)
+    monkeypatch.setenv("DATABASE_URL", f"sqlite:///{path}")
+
+    import backend.utils.database as database
+    database._engine = None
+    database._SessionLocal = None
+    engine, _ = database.init_db()
+
+    from backend.models import CartItem, User
+    User.__table__.create(bind=engine)
+    CartItem.__table__.create(bind=engine)
+    with engine.begin() as conn:
+        conn.execute(text(
+            "CREATE TABLE products (id INTEGER PRIMARY KEY, title TEXT, description TEXT, "
+            "category TEXT, price FLOAT, rating FLOAT, review_count INTEGER, "
+            "popularity FLOAT, created_at DATETIME)"
+        ))
+        conn.execute(text(
+            "INSERT INTO products VALUES "
+            "(1, 'Laptop', '', 'Computers', 500.0, 4.5, 3, 10, :ts), "
+            "(2, 'Mouse', '', 'Computers', 20.0, 4.0, 1, 5, :ts)"
+        ), {"ts": datetime(2024, 1, 1)})
+        conn.execute(User.__table__.insert(), [{"user_id": "u1", "username": "u1", "password_hash": "x"}])
+
+    fake = FakeRedis()
+    with patch.object(redis_client, "_redis", fake), patch.object(cart_cache, "_redis", fake):
+        yield fake
+
+    database._engine = None
+    database._SessionLocal = None
+    os.remove(path)
+
+
+class TestGetCartItems:
+    def test_one_joined_query(self, cart_db):
+        from backend.services.cart.add import add_to_cart
+        from backend.services.cart.get import get_cart_items
+
+        add_to_cart("u1", 2, 3)
+        add_to_cart("u1", 1, 1)
+        add_to_cart("u1", 99, 1)  # product since deleted
+
+        with qs.query_budget(1):
+            items = get_cart_items("u1")
+        assert [(i["product_id"], i["quantity"]) for i in items] == [(2, 3), (1, 1)]
+        assert items[1]["title"] == "Laptop" and items[1]["price"] == 500.0
+
+    def test_empty(self, cart_db):
+        from backend.services.cart.get import get_cart_items
+        assert get_cart_items("u1") == []
+
+
+class TestCartController:
+    def test_totals_and_cache(self, cart_db):
+        from backend.controllers import cart_controller as cc
+        from backend.services.cart.add import add_to_cart
+
+        add_to_cart("u1", 1, 2)
+        add_to_cart("u1", 2, 1)
+        body, status = cc.get_cart_controller("u1")
+        assert status == 200
+        assert body["total"] == 1020.0 and body["total_items"] == 3 and body["count"] == 3
+        # Flask's JSON encoding of the product datetimes, as before caching
+        assert body["items"][0]["created_at"] == "Mon, 01 Jan 2024 00:00:00 GMT"
+        with flask.Flask(__name__).app_context():
+            assert flask.json.loads(flask.json.dumps(datetime(2024, 1, 1))) == body["items"][0]["created_at"]
+
+        with patch.object(cc, "get_cart_items") as db:
+            assert cc.get_cart_controller("u1") == (body, 200)
+        db.assert_not_called()
+
+    def test_writes_invalidate_cache(self, cart_db):
+        from backend.controllers import cart_controller as cc
+        from backend.services.cart.add import add_to_cart
+        from backend.services.cart.clear import clear_cart
+        from backend.services.cart.remove import remove_from_cart
+
+        add_to_cart("u1", 1, 2)
+        assert cc.get_cart_controller("u1")[0]["total_items"] == 2
+
+        remove_from_cart("u1", 1, 1)
+        assert cart_db.get("cart:u1") is None
+        assert cc.get_cart_controller("u1")[0]["total_items"] == 1
+
+        add_to_cart("u1", 2, 1)
+        assert cc.get_cart_controller("u1")[0]["total_items"] == 2
+
+        clear_cart("u1")
+        assert cc.get_cart_controller("u1")[0] == {"items": [], "total": 0, "total_items": 0, "count": 0}
+
+    def test_read_racing_a_write_does_not_serve_stale_cart(self, cart_db):
+        from backend.controllers import cart_controller as cc
+        from backend.services.cart.add import add_to_cart
+        from backend.services.cart.get import get_cart_items
+
+        add_to_cart("u1", 1, 1)
+
+        def load_then_write(user_id):
+            # The read loads the cart, then a write commits and invalidates
+            # before the read caches what it loaded
+            items = get_cart_items(user_id)
+            add_to_cart("u1", 2, 1)
+            return items
+
+        with patch.object(cc, "get_cart_items", side_effect=load_then_write):
+            assert cc.get_cart_controller("u1")[0]["total_items"] == 1
+        assert cart_db.get("cart:u1") is not None  # the racing read's entry
+
+        body, _ = cc.get_cart_controller("u1")
+        assert body["total_items"] == 2
+        with patch.object(cc, "get_cart_items") as db:
+            assert cc.get_cart_controller("u1")[0] == body
+        db.assert_not_called()
+
+    def test_invalidate_all_keeps_generations(self, cart_db):
+        from backend.controllers import cart_controller as cc
+        from backend.services.cache_invalidation import invalidate_all_cart_caches
+        from backend.services.cart.add import add_to_cart
+
+        add_to_cart("u1", 1, 1)
+        cc.get_cart_controller("u1")
+        with patch("backend.services.cache_invalidation._redis", cart_db):
+            assert invalidate_all_cart_caches() == 1
+        assert cart_db.get("cart:u1") is None
+        assert cart_db.get("cartgen:u1") == "1"
+
+    def test_db_failure_not_cached(self, cart_db):
+        from backend.controllers import cart_controller as cc
+
+        with patch.object(cc, "get_cart_items", side_effect=RuntimeError("db down")):
+            body, status = cc.get_cart_controller("u1")
+        assert status == 200 and body["items"] == []
+        assert cart_db.get("cart:u1") is None
@@ -0,0 +1,124 @@
+"""
+Tests for the TF-IDF content neighbour index (ml/content_similarity.py) and
+its use as the cold-item fallback in backend/services/similarity_service.py.
+"""
+
+from unittest.mock import patch
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import ml.content_similarity as content
+import ml.item_similarity as sim
+
+
+def _products():
+    return pd.DataFrame({
+        "product_id": [4, 1, 2, 3],
+        "title": ["Gaming mouse", "Wireless headphones", "Bluetooth headphones", "Espresso machine"],
+        "description": ["RGB gaming mouse", "Noise cancelling wireless headphones",
+                        "Bluetooth over-ear headphones", "Stainless espresso coffee maker"],
+        "category": ["Gaming", "Audio", "Audio", "Kitchen"],
+    })
+
+
+class TestContentIndex:
+    def test_item_ids_sorted_for_searchsorted(self):
+        index = content.build_content_index(_products(), top_k=2, min_similarity=0.0)
+        assert list(index["item_ids"]) == [1, 2, 3, 4]
+        assert index["neighbors"].shape == (4, 2)
+
+    def test_textually_similar_items_are_neighbours(self):
+        index = content.build_content_index(_products(), top_k=2, min_similarity=0.05)
+        row = list(index["item_ids"]).index(1)
+        assert index["neighbors"][row][0] == 2
+        assert 0 < index["scores"][row][0] <= 1.0 + 1e-6
+
+    def test_unrelated_items_filtered_by_min_similarity(self):
+        index = content.build_content_index(_products(), top_k=2, min_similarity=0.05)
+        row = list(index["item_ids"]).index(3)
+        assert list(index["neighbors"][row]) == [-1, -1]
+
+    def test_item_never_its_own_neighbour(self):
+        index = content.build_content_index(_products(), top_k=3, min_similarity=0.0)
+        for row, pid in enumerate(index["item_ids"]):
+            assert pid not in index["neighbors"][row]
+
+    def test_blocking_does_not_change_result(self):
+        whole = content.build_content_index(_products(), top_k=3, min_similarity=0.0, block_size=1024)
+        blocked = content.build_content_index(_products(), top_k=3, min_similarity=0.0, block_size=1)
+        np.testing.assert_array_equal(whole["neighbors"], blocked["neighbors"])
+        np.testing.assert_allclose(whole["scores"], blocked["scores"], rtol=1e-6)
+
+    def test_empty_catalog(self):
+        index = content.build_content_index(pd.DataFrame(), top_k=2)
+        assert index["neighbors"].shape == (0, 2)
+
+    def test_roundtrip_is_memory_mapped(self, tmp_path):
+        path = str(tmp_path / "content")
+        index = content.build_content_index(_products(), top_k=2, min_similarity=0.0)
+        content.save_content_index(index, path)
+        # Second save replaces the directory in place
+        content.save_content_index(index, path)
+        loaded = content.load_content_index(path)
+        for key in content.ARRAY_NAMES:
+            assert isinstance(loaded[key], np.memmap)
+            np.testing.assert_array_equal(loaded[key], index[key])
+        assert sim.expand_neighbors(loaded, [1])
+
+    def test_load_missing_returns_none(self, tmp_path):
+        assert content.load_content_index(str(tmp_path / "none")) is None
+
+
+class TestContentFallback:
+    def _co_index(self):
+        # Only product 1 has interaction neighbours.
+        return {
+            "item_ids": np.array([1, 2], np.int32),
+            "neighbors": np.array([[5, -1], [-1, -1]], np.int32),
+            "scores": np.array([[0.8, 0], [0, 0]], np.float32),
+        }
+
+    def _content_index(self):
+        return {
+            "item_ids": np.array([1, 2], np.int32),
+            "neighbors": np.array([[9, -1], [7, 1]], np.int32),
+            "scores": np.array([[0.9, 0], [0.6, 0.4]], np.float32),
+        }
+
+    def _similar(self, tmp_path, recent_ids):
+        import backend.services.similarity_service as svc
+        co_path = str(tmp_path / "nb")
+        content_path = str(tmp_path / "content")
+        sim.save_neighbor_index(self._co_index(), co_path)
+        content.save_content_index(self._content_index(), content_path)
+        svc.reset_similarity_cache()
+        try:
+            with patch.object(svc, "NEIGHBORS_PATH", co_path), \
+                 patch.object(svc, "CONTENT_NEIGHBORS_PATH", content_path):
+                return svc, svc.get_similar_product_ids(recent_ids)
+        finally:
+            svc.reset_similarity_cache()
+
+    def test_seed_without_interactions_uses_content(self, tmp_path):
+        svc, out = self._similar(tmp_path, [2, 1])
+        # 1 has co-interaction neighbours, so its content neighbour 9 is unused
+        assert 9 not in out
+        assert out[5] == pytest.approx(0.8 * svc.RECENCY_DECAY)
+        assert out[7] == pytest.approx(0.6 * svc.CONTENT_WEIGHT)
+        # recent items are never recommended back
+        assert 1 not in out
+
+    def test_content_only_when_no_interaction_index(self, tmp_path):
+        import backend.services.similarity_service as svc
+        content_path = str(tmp_path / "content")
+        content.save_content_index(self._content_index(), content_path)
+        svc.reset_similarity_cache()
+        try:
+            with patch.object(svc, "NEIGHBORS_PATH", str(tmp_path / "none")), \
+                 patch.object(svc, "CONTENT_NEIGHBORS_PATH", content_path):
+                out = svc.get_similar_product_ids([1])
+        finally:
+            svc.reset_similarity_cache()
+        assert out == {9: pytest.approx(0.9 * svc.CONTENT_WEIGHT)}
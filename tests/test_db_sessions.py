@@ -0,0 +1,220 @@
+"""
+Tests for request-scoped DB sessions (backend/utils/database.py) and pool
+sizing/metrics (backend/utils/db_pool.py).
+"""
+
+import os
+import tempfile
+
+import flask
+import pytest
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+import backend.utils.db_pool as db_pool
+import backend.utils.request_timing as rt
+
+
+@pytest.fixture
+def db(monkeypatch):
+    fd, path = tempfile.mkstemp(suffix=".db")
+    os.close(fd)
+    monkeypatch.setenv("DATABASE_URL", f"sqlite:///{path}")
+
+    import backend.utils.database as database
+    database._engine = None
+    database._SessionLocal = None
+    engine, _ = database.init_db()
+
+    from backend.models import User
+    User.__table__.create(bind=engine)
+    rt.reset_metrics()
+    db_pool.reset_pool_counters()
+
+    yield database
+
+    database._engine.dispose()
+    database._engine = None
+    database._SessionLocal = None
+    os.remove(path)
+
+
+def _app(database):
+    app = flask.Flask(__name__)
+    database.setup_request_sessions(app)
+    return app
+
+
+class TestRequestSessions:
+    def test_shared_within_app_context(self, db):
+        from backend.services.user.create import create_user
+        from backend.services.user.get_by_id import get_user_by_id
+
+        with _app(db).app_context():
+            create_user("u1", "alice", "hash")
+            first = db.get_db_session()
+            second = db.get_db_session()
+            assert first._session is second._session
+            assert get_user_by_id("u1").username == "alice"
+            assert db_pool.pool_status(db._engine)["checked_out"] == 1
+
+        assert db_pool.pool_status(db._engine)["checked_out"] == 0
+
+    def test_plain_session_outside_app_context(self, db):
+        session = db.get_db_session()
+        assert isinstance(session, Session)
+        session.close()
+
+        # An app that didn't opt in keeps per-call sessions too
+        with flask.Flask(__name__).app_context():
+            session = db.get_db_session()
+            assert isinstance(session, Session)
+            session.close()
+
+    def test_close_discards_unfinished_work(self, db):
+        from backend.models import User
+
+        with _app(db).app_context():
+            with db.get_db_session() as session:
+                session.add(User(user_id="u2", username="bob", password_hash="x"))
+            # Failed statement leaves the transaction unusable until rolled back
+            session = db.get_db_session()
+            with pytest.raises(Exception):
+                session.execute(text("SELECT * FROM missing_table"))
+            session.close()
+
+            with db.get_db_session() as session:
+                assert session.query(User).filter_by(user_id="u2").first() is None
+
+
+    def test_close_discards_uncommitted_core_write(self, db):
+        from sqlalchemy import update
+        from backend.models import User
+        from backend.services.user.create import create_user
+
+        with _app(db).app_context():
+            create_user("u1", "alice", "hash")
+            with db.get_db_session() as session:
+                # Core write, then the caller bails out before commit()
+                session.execute(update(User).where(User.user_id == "u1").values(username="mallory"))
+            with db.get_db_session() as session:
+                session.commit()
+
+        with db.get_db_session() as session:
+            assert session.query(User.username).filter_by(user_id="u1").scalar() == "alice"
+
+    def test_committed_core_write_kept_and_reads_untouched(self, db):
+        from sqlalchemy import update
+        from backend.models import User
+        from backend.services.user.create import create_user
+
+        with _app(db).app_context():
+            create_user("u1", "alice", "hash")
+            with db.get_db_session() as session:
+                session.execute(update(User).where(User.user_id == "u1").values(username="bob"))
+                session.commit()
+            with db.get_db_session() as session:
+                user = session.query(User).filter_by(user_id="u1").one()
+                session.execute(text("SELECT 1"))
+            # A read-only caller's close keeps the transaction (and objects) as is
+            assert db.get_db_session().get_transaction() is not None
+            assert user.username == "bob"
+
+
+class TestFanOutWithRequestSession:
+    @pytest.fixture
+    def one_connection(self, db, monkeypatch):
+        monkeypatch.setenv("DB_POOL_SIZE", "1")
+        monkeypatch.setenv("DB_MAX_OVERFLOW", "0")
+        monkeypatch.setenv("DB_POOL_TIMEOUT", "2")
+        db._engine.dispose()
+        db._engine = None
+        db._SessionLocal = None
+        db.init_db()
+        return db
+
+    def test_fan_out_does_not_wait_on_request_connection(self, one_connection):
+        from backend.services.user.create import create_user
+        from backend.services.user.get_by_id import get_user_by_id
+        from backend.utils.fanout import fan_out
+
+        create_user("u1", "alice", "hash")
+        lookup = lambda: get_user_by_id("u1").username
+        with _app(one_connection).app_context():
+            user = get_user_by_id("u1")
+            assert db_pool.pool_status(one_connection._engine)["checked_out"] == 1
+            results = fan_out({"a": lookup, "b": lookup, "inline": lookup})
+            # Objects loaded before the fan-out stay readable
+            assert user.username == "alice"
+
+        assert results == {"a": "alice", "b": "alice", "inline": "alice"}
+        assert "db_pool_checkout_timeouts_total 0" in list(db_pool.render_pool_metrics(None))
+
+    def test_uncommitted_core_write_runs_calls_inline(self, one_connection):
+        import threading
+        from sqlalchemy import update
+        from backend.models import User
+        from backend.utils.fanout import fan_out
+
+        caller = threading.current_thread()
+        with _app(one_connection).app_context():
+            session = one_connection.get_db_session()
+            session.execute(update(User).values(username="x"))
+            results = fan_out({"a": threading.current_thread, "b": threading.current_thread})
+            session.rollback()
+        assert results == {"a": caller, "b": caller}
+
+    def test_unsaved_changes_run_calls_inline(self, one_connection):
+        import threading
+        from backend.models import User
+        from backend.utils.fanout import fan_out
+
+        caller = threading.current_thread()
+        with _app(one_connection).app_context():
+            session = one_connection.get_db_session()
+            session.add(User(user_id="u3", username="carol", password_hash="x"))
+            results = fan_out({"a": threading.current_thread, "b": threading.current_thread})
+            assert session.new
+            session.rollback()
+        assert results == {"a": caller, "b": caller}
+
+
+class TestPoolMetrics:
+    def test_pool_settings_from_env(self, monkeypatch):
+        monkeypatch.setenv("DB_POOL_SIZE", "20")
+        monkeypatch.setenv("DB_MAX_OVERFLOW", "0")
+        settings = db_pool.pool_settings()
+        assert settings["pool_size"] == 20 and settings["max_overflow"] == 0
+        assert settings["pool_timeout"] == 30
+
+    def test_sqlite_without_wal_profile_keeps_one_connection(self, monkeypatch):
+        for name in ("DB_POOL_SIZE", "DB_MAX_OVERFLOW"):
+            monkeypatch.delenv(name, raising=False)
+        url = "sqlite:///app.db"
+        with monkeypatch.context() as m:
+            m.setattr(db_pool, "SQLITE_PERFORMANCE_PROFILE", False)
+            settings = db_pool.pool_settings(url)
+            assert (settings["pool_size"], settings["max_overflow"]) == (1, 0)
+            # Postgres is unaffected; an explicit env setting still wins
+            assert db_pool.pool_settings("postgresql://db/app")["pool_size"] == 5
+            m.setenv("DB_POOL_SIZE", "3")
+            assert db_pool.pool_settings(url)["pool_size"] == 3
+        monkeypatch.setattr(db_pool, "SQLITE_PERFORMANCE_PROFILE", True)
+        assert db_pool.pool_settings(url)["pool_size"] == 5
+
+    def test_checkout_wait_and_counters_rendered(self, db):
+        db._engine.dispose()
+        with db._engine.connect() as conn:
+            conn.execute(text("SELECT 1"))
+
+        assert db_pool.CHECKOUT_WAIT.snapshot()[()]["count"] >= 1
+        lines = list(db_pool.render_pool_metrics(db._engine))
+        assert "db_pool_size 5" in lines
+        assert "db_pool_connects_total 1" in lines
+        assert "db_pool_invalidations_total 0" in lines
+        assert "db_pool_checkout_wait_seconds_count" in rt.render_metrics()
+
+    def test_invalidation_counted(self, db):
+        with db._engine.connect() as conn:
+            conn.invalidate()
+        assert "db_pool_invalidations_total 1" in list(db_pool.render_pool_metrics(None))
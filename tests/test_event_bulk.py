@@ -0,0 +1,172 @@
+"""
+Tests for bulk SearchEvent writes (backend/services/event/creation.py:
+create_search_events_bulk, COPY payload) and the event route's move to the
+background executor (events_controller.log_event_controller).
+"""
+import os
+import tempfile
+import threading
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from unittest.mock import MagicMock, patch
+
+import pytest
+from sqlalchemy import text
+
+import backend.services.event.creation as creation
+from backend.utils import query_stats as qs
+
+
+@pytest.fixture
+def db(monkeypatch):
+    fd, path = tempfile.mkstemp(suffix=".db")
+    os.close(fd)
+    monkeypatch.setenv("DATABASE_URL", f"sqlite:///{path}")
+
+    import backend.utils.database as database
+    database._engine = None
+    database._SessionLocal = None
+    engine, _ = database.init_db()
+
+    from backend.models import SearchEvent
+    SearchEvent.__table__.create(bind=engine)
+    yield engine
+
+    database._engine = None
+    database._SessionLocal = None
+    os.remove(path)
+
+
+def _rows(n):
+    return [creation.search_event_row("u1", f"q{i}", i + 1, "click") for i in range(n)]
+
+
+class TestCreateSearchEventsBulk:
+    def test_multi_row_statements_in_chunks(self, db):
+        with qs.count_queries() as stats:
+            assert creation.create_search_events_bulk(_rows(5), chunk_size=2) == 5
+        inserts = sum(n for sql, n in stats.statements.items() if sql.lstrip().upper().startswith("INSERT"))
+        assert inserts == 3  # one per chunk, never one per row
+        with db.connect() as conn:
+            assert conn.execute(text("SELECT count(*) FROM search_events")).scalar() == 5
+
+    def test_partial_rows_get_defaults(self, db):
+        creation.create_search_events_bulk([
+            {"user_id": "u1", "query": "q", "product_id": 3, "event_type": "click", "group": "B"},
+        ])
+        with db.connect() as conn:
+            row = conn.execute(text('SELECT "group", position, timestamp FROM search_events')).one()
+        assert row[0] == "B" and row[1] is None and row[2] is not None
+
+    def test_empty_is_noop(self, db):
+        with qs.count_queries() as stats:
+            assert creation.create_search_events_bulk([]) == 0
+        assert stats.count == 0
+
+    def test_failure_rolls_back_whole_call(self, db):
+        # Atomic per call; the background executor retries failed batches in
+        # smaller pieces (tests/test_background.py)
+        rows = _rows(2) + [{"user_id": None, "event_type": None}]
+        with pytest.raises(Exception):
+            creation.create_search_events_bulk(rows)
+        with db.connect() as conn:
+            assert conn.execute(text("SELECT count(*) FROM search_events")).scalar() == 0
+
+
+class TestCopy:
+    def test_payload_quotes_values_and_leaves_null_unquoted(self):
+        row = creation._complete_row({
+            "user_id": "u1", "query": 'say "hi", ok', "product_id": None, "event_type": "cart_cleared",
+            "group": "", "timestamp": datetime(2025, 6, 1, 12, tzinfo=timezone.utc),
+        })
+        line = creation.events_copy_payload([row]).read()
+        assert line == '"u1","say ""hi"", ok",,"cart_cleared","",,"2025-06-01T12:00:00+00:00"\n'
+
+    def test_postgres_large_batches_use_copy(self):
+        session = MagicMock()
+        session.bind.dialect.name = "postgresql"
+
+        @contextmanager
+        def scope():
+            yield session
+
+        with patch.object(creation, "session_scope", scope), \
+             patch.object(creation, "EVENT_COPY_THRESHOLD", 3), \
+             patch.object(creation, "_copy_events") as copy:
+            creation.create_search_events_bulk(_rows(2))
+            copy.assert_not_called()
+            creation.create_search_events_bulk(_rows(3))
+        copy.assert_called_once()
+        assert len(copy.call_args.args[1]) == 3
+
+
+class TestEventRoute:
+    def test_event_queued_and_caches_invalidated_after_write(self):
+        from backend.controllers import events_controller as ec
+
+        with patch.object(ec, "get_product_by_id", return_value=object()), \
+             patch.object(ec, "resolve_user_context", return_value=("u1", "B")), \
+             patch.object(ec, "get_user_by_id", return_value=MagicMock(cluster=2)), \
+             patch.object(ec, "invalidate_on_user_event") as invalidate, \
+             patch.object(ec, "record_event"), \
+             patch.object(ec.background, "log_event") as log_event, \
+             patch.object(ec.background, "add_popularity") as add_popularity:
+            body, status = ec.log_event_controller({"user_id": "u1", "event": "click", "product_id": 5, "query": "q"})
+            assert status == 200
+            invalidate.assert_not_called()
+
+            row, = log_event.call_args.args
+            assert (row["user_id"], row["product_id"], row["group"]) == ("u1", 5, "B")
+            log_event.call_args.kwargs["after"]()
+        invalidate.assert_called_once_with("u1", "click", 2)
+        add_popularity.assert_called_once_with(5, 1)
+
+    def _log_batch(self, users, insert=None):
+        """Log a click per user id into one background batch; returns the executor."""
+        from backend.controllers import events_controller as ec
+        from backend.utils import background as bg
+
+        executor = bg.BackgroundExecutor(workers=1, queue_size=100)
+        gate, started = threading.Event(), threading.Event()
+        executor.submit(lambda: (started.set(), gate.wait(5)))
+        assert started.wait(5)
+        with patch.object(bg, "_executor", executor), \
+             patch.object(bg, "_insert_events", side_effect=insert or bg._insert_events), \
+             patch.object(bg, "_apply_popularity"), \
+             patch.object(ec, "get_product_by_id", return_value=object()), \
+             patch.object(ec, "invalidate_on_user_event"), \
+             patch.object(ec, "record_event"):
+            for user_id in users:
+                body, status = ec.log_event_controller({"user_id": user_id, "event": "click", "product_id": 5})
+                assert status == 200
+            gate.set()
+            assert executor.drain(5)
+        executor.shutdown(1)
+        return executor
+
+    def _stored_users(self, db):
+        with db.connect() as conn:
+            return conn.execute(text("SELECT user_id FROM search_events ORDER BY id")).scalars().all()
+
+    def test_anonymous_and_unknown_users_share_batches(self, db):
+        from backend.models import User
+
+        User.__table__.create(bind=db)
+        with db.begin() as conn:
+            conn.execute(User.__table__.insert().values(user_id="u1", username="alice", password_hash="x"))
+
+        # SQLite without the FK pragma keeps every row, as before batching
+        executor = self._log_batch(["u1", "", "ghost", "u1"])
+        assert self._stored_users(db) == ["u1", "", "ghost", "u1"]
+        assert executor.stats()["failed"] == 0
+
+    def test_rows_rejected_by_the_database_dropped_alone(self, db):
+        def insert(rows):
+            # A database enforcing search_events.user_id -> users
+            if any(row["user_id"] != "u1" for row in rows):
+                raise ValueError("foreign key violation")
+            creation.create_search_events_bulk(rows)
+
+        executor = self._log_batch(["u1", "", "ghost", "u1"], insert)
+        assert self._stored_users(db) == ["u1", "u1"]
+        assert executor.stats()["failed"] == 2
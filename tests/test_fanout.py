@@ -0,0 +1,145 @@
+"""
+Tests for the shared fan-out pool (backend/utils/fanout.py) and the
+concurrent lookup prefetch in search_products (prefetch_lookups).
+"""
+
+import time
+import threading
+from unittest.mock import patch
+
+import pytest
+from sqlalchemy import create_engine, text
+
+import backend.utils.search as search
+from backend.utils.fanout import fan_out
+from backend.utils.query_stats import count_queries, instrument_engine
+
+
+def _sleepy(value, seconds=0.2):
+    def call(*args):
+        time.sleep(seconds)
+        return value
+    return call
+
+
+def _mget(*values):
+    return lambda keys, **kw: (list(values) + [None] * len(keys))[:len(keys)]
+
+
+class TestFanOut:
+    def test_runs_calls_concurrently(self):
+        start = time.perf_counter()
+        results = fan_out({"a": _sleepy(1), "b": _sleepy(2), "c": _sleepy(3)})
+        assert results == {"a": 1, "b": 2, "c": 3}
+        assert time.perf_counter() - start < 0.45
+
+    def test_last_call_runs_on_caller_thread(self):
+        caller = threading.current_thread()
+        results = fan_out({
+            "pool": threading.current_thread,
+            "inline": threading.current_thread,
+        })
+        assert results["inline"] is caller
+        assert results["pool"] is not caller
+
+    def test_error_raised_after_all_calls_finish(self):
+        finished = []
+
+        def slow():
+            time.sleep(0.1)
+            finished.append(True)
+
+        def boom():
+            raise ValueError("boom")
+
+        with pytest.raises(ValueError):
+            fan_out({"slow": slow, "boom": boom})
+        assert finished == [True]
+
+    def test_empty(self):
+        assert fan_out({}) == {}
+
+    def test_pool_queries_count_towards_caller(self):
+        engine = create_engine("sqlite://")
+        instrument_engine(engine)
+
+        def query():
+            with engine.connect() as conn:
+                return conn.execute(text("SELECT 1")).scalar()
+
+        with count_queries() as stats:
+            fan_out({"a": query, "b": query})
+        assert stats.count == 2
+        engine.dispose()
+
+
+class TestPrefetchLookups:
+    def test_cold_search_fetches_everything_concurrently(self):
+        mget_calls = []
+
+        def mget(keys, **kw):
+            mget_calls.append((keys, kw))
+            return [None] * len(keys)
+
+        with patch.object(search, "SEARCH_TIERED_RANKING", True), \
+             patch.object(search, "redis_mget_json", side_effect=mget), \
+             patch.object(search, "get_products_df", side_effect=lambda **kw: time.sleep(0.2) or kw), \
+             patch.object(search, "_load_recent_boost", side_effect=_sleepy({5: 0.2})), \
+             patch.object(search, "get_profiles", side_effect=_sleepy({"u1": {}})):
+            start = time.perf_counter()
+            lookups = search.prefetch_lookups("laptop", "u1", 0, "A", category="Computers")
+            elapsed = time.perf_counter() - start
+            ranking_key = search.ranking_cache_key("laptop", "u1", 0, "A")
+
+        assert elapsed < 0.45
+        # One round trip for all three cache keys; only the ranking counts stats
+        (keys, kw), = mget_calls
+        assert keys == [
+            ranking_key,
+            search.base_cache_key("laptop", "Computers"),
+            search.recent_boost_key("u1"),
+        ]
+        assert kw["counted"] == (keys[0],)
+        assert lookups.text_products == {"search_query": "laptop"}
+        assert lookups.category_products == {"category_filter": "Computers"}
+        assert lookups.recent_boost == {5: 0.2}
+        assert lookups.profiles == {"u1": {}}
+
+    def test_exact_ranking_hit_fetches_nothing_else(self):
+        ranked = [{"product_id": 1}]
+        with patch.object(search, "SEARCH_TIERED_RANKING", False), \
+             patch.object(search, "redis_mget_json", side_effect=_mget(ranked)), \
+             patch.object(search, "get_products_df") as db, \
+             patch.object(search, "get_profiles") as profiles:
+            assert search.search_products("laptop", "u1", cluster=0, ab_group="A") == ranked
+        db.assert_not_called()
+        profiles.assert_not_called()
+
+    def test_tier_hit_fetches_only_rerank_inputs(self):
+        tier = [{"product_id": 1, "score": 1.0}]
+        with patch.object(search, "SEARCH_TIERED_RANKING", True), \
+             patch.object(search, "redis_mget_json", side_effect=_mget(tier, None, {"1": 0.2})), \
+             patch.object(search, "get_products_df") as db, \
+             patch.object(search, "_load_recent_boost") as load_recent, \
+             patch.object(search, "get_profiles", return_value={}):
+            lookups = search.prefetch_lookups("laptop", "u1", 0, "A")
+        db.assert_not_called()
+        load_recent.assert_not_called()
+        assert lookups.recent_boost == {1: 0.2}
+        assert lookups.profiles == {}
+
+    def test_cached_base_candidates_skip_db(self):
+        with patch.object(search, "redis_mget_json", side_effect=_mget(None, [{"product_id": 1}])), \
+             patch.object(search, "get_products_df") as db, \
+             patch.object(search, "get_profiles", return_value={}):
+            lookups = search.prefetch_lookups("laptop", None, None, "A", category="Computers")
+        db.assert_not_called()
+        assert lookups.text_products is search.UNSET
+
+    def test_force_refresh_ignores_cached_ranking(self):
+        with patch.object(search, "redis_mget_json", side_effect=_mget([{"product_id": 1}])) as mget, \
+             patch.object(search, "get_products_df", return_value=None), \
+             patch.object(search, "get_profiles", return_value={}):
+            lookups = search.prefetch_lookups("laptop", None, None, "B", force_refresh=True)
+        assert lookups.ranking is search.UNSET
+        assert mget.call_args.kwargs["counted"] == ()
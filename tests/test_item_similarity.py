@@ -0,0 +1,149 @@
+"""
+Tests for the item-to-item co-interaction index (ml/item_similarity.py) and
+its request-time wrapper (backend/services/similarity_service.py).
+"""
+
+from unittest.mock import patch
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import ml.item_similarity as sim
+
+
+def _events():
+    # Products 1 & 2 are co-interacted by three users; 3 only with user a;
+    # 9 is seen alone.
+    return pd.DataFrame({
+        "user_id": ["a", "a", "a", "b", "b", "c", "c", "d", ""],
+        "product_id": [1, 2, 3, 1, 2, 1, 2, 9, 1],
+        "event": ["click", "click", "add_to_cart", "click", "add_to_cart",
+                  "click", "click", "click", "click"],
+    })
+
+
+class TestInteractionMatrix:
+    def test_shape_and_item_ids(self):
+        X, item_ids = sim.build_interaction_matrix(_events())
+        assert X.shape == (4, 4)  # anonymous events dropped
+        assert list(item_ids) == [1, 2, 3, 9]
+
+    def test_ignores_other_event_types(self):
+        events = pd.DataFrame({"user_id": ["a"], "product_id": [1], "event": ["cart_cleared"]})
+        X, item_ids = sim.build_interaction_matrix(events)
+        assert X.shape == (0, 0)
+        assert len(item_ids) == 0
+
+
+class TestNeighborIndex:
+    def _index(self, **kwargs):
+        X, item_ids = sim.build_interaction_matrix(_events())
+        return sim.build_neighbor_index(X, item_ids, top_k=3, **kwargs)
+
+    def test_min_support_filters_single_user_pairs(self):
+        index = self._index(min_co_users=2)
+        row = list(index["item_ids"]).index(3)
+        assert list(index["neighbors"][row]) == [-1, -1, -1]
+
+    def test_strongly_coupled_items_are_top_neighbours(self):
+        index = self._index(min_co_users=2)
+        row = list(index["item_ids"]).index(1)
+        assert index["neighbors"][row][0] == 2
+        assert 0 < index["scores"][row][0] <= 1.0
+
+    def test_item_never_its_own_neighbour(self):
+        index = self._index(min_co_users=1)
+        for row, pid in enumerate(index["item_ids"]):
+            assert pid not in index["neighbors"][row]
+
+    def test_blocking_does_not_change_result(self):
+        X, item_ids = sim.build_interaction_matrix(_events())
+        whole = sim.build_neighbor_index(X, item_ids, top_k=3, min_co_users=1, block_size=1024)
+        blocked = sim.build_neighbor_index(X, item_ids, top_k=3, min_co_users=1, block_size=1)
+        np.testing.assert_array_equal(whole["neighbors"], blocked["neighbors"])
+        np.testing.assert_allclose(whole["scores"], blocked["scores"], rtol=1e-6)
+
+    def test_roundtrip(self, tmp_path):
+        path = str(tmp_path / "nb")
+        index = self._index(min_co_users=1)
+        sim.save_neighbor_index(index, path)
+        loaded = sim.load_neighbor_index(path)
+        for key in ("item_ids", "neighbors", "scores"):
+            np.testing.assert_array_equal(loaded[key], index[key])
+
+
+class TestExpandNeighbors:
+    def _index(self):
+        return {
+            "item_ids": np.array([1, 2, 5], np.int32),
+            "neighbors": np.array([[2, 7, -1], [1, 7, -1], [8, -1, -1]], np.int32),
+            "scores": np.array([[0.9, 0.3, 0], [0.9, 0.5, 0], [0.4, 0, 0]], np.float32),
+        }
+
+    def test_seeds_excluded_and_scores_summed(self):
+        out = sim.expand_neighbors(self._index(), [1, 2])
+        assert out == {7: pytest.approx(0.8)}
+
+    def test_seed_weights_applied(self):
+        out = sim.expand_neighbors(self._index(), [1, 5], weights=[1.0, 0.5])
+        assert out[2] == pytest.approx(0.9)
+        assert out[8] == pytest.approx(0.2)
+
+    def test_unknown_seed_and_missing_index(self):
+        assert sim.expand_neighbors(self._index(), [42]) == {}
+        assert sim.expand_neighbors(None, [1]) == {}
+
+    def test_limit(self):
+        out = sim.expand_neighbors(self._index(), [1], limit=1)
+        assert list(out) == [2]
+
+
+class TestSimilarityService:
+    def test_recent_items_expand_with_recency_weighting(self, tmp_path):
+        import backend.services.similarity_service as svc
+        path = str(tmp_path / "nb")
+        sim.save_neighbor_index(TestExpandNeighbors()._index(), path)
+        svc.reset_similarity_cache()
+        try:
+            with patch.object(svc, "NEIGHBORS_PATH", path):
+                out = svc.get_similar_product_ids([5, 1])
+        finally:
+            svc.reset_similarity_cache()
+        # seed 5 weight 1.0, seed 1 weight RECENCY_DECAY
+        assert out[8] == pytest.approx(0.4)
+        assert out[2] == pytest.approx(0.9 * svc.RECENCY_DECAY)
+
+    def test_no_index_returns_empty(self, tmp_path):
+        import backend.services.similarity_service as svc
+        svc.reset_similarity_cache()
+        try:
+            with patch.object(svc, "NEIGHBORS_PATH", str(tmp_path / "none")):
+                assert svc.get_similar_product_ids([1]) == {}
+        finally:
+            svc.reset_similarity_cache()
+
+
+class TestRecommendationsUseNeighbours:
+    def _product(self, pid, category):
+        return {
+            "product_id": pid, "title": f"P{pid}", "description": "", "category": category,
+            "price": 10.0, "rating": 4.0, "review_count": 1, "popularity": 5,
+            "created_at": "2024-01-01T00:00:00",
+        }
+
+    def test_neighbours_lead_similar_list(self):
+        from backend.controllers import recommendations_controller as ctrl
+        catalog = {1: self._product(1, "Audio"), 2: self._product(2, "Gaming"), 3: self._product(3, "Audio")}
+        with patch.object(ctrl, "redis_get_json", return_value=None), \
+             patch.object(ctrl, "redis_msetex_entries"), \
+             patch.object(ctrl, "get_user_by_id", return_value=None), \
+             patch.object(ctrl, "get_profiles", return_value={}), \
+             patch.object(ctrl, "get_recent_product_ids", return_value=[3]), \
+             patch.object(ctrl, "get_segment_candidates",
+                          return_value=(np.array([1, 2]), np.array([0.9, 0.8], np.float32))), \
+             patch.object(ctrl, "get_similar_product_ids", return_value={2: 0.7}), \
+             patch.object(ctrl, "get_products_by_ids",
+                          side_effect=lambda ids: [catalog[int(i)] for i in ids if int(i) in catalog]):
+            result, _ = ctrl.recommendations_controller("u1")
+        assert [p["product_id"] for p in result["similar"]] == [2, 1]
@@ -7,7 +7,7 @@ import numpy as np
 import pytest
 
 from ml.features import build_features
-from ml.model import predict_score
+from ml.model import ModelState, predict_score, predict_scores
 
 
 def _make_features(popularity=500, rating=4.0, days_old=30,
@@ -21,7 +21,7 @@ class TestPredictScoreFallback:
 
     def setup_method(self):
         # Force no model so tests don't depend on a .pkl file being present
-        self._patch = patch("ml.model._MODEL", None)
+        self._patch = patch("ml.model._STATE", ModelState("test", None, None))
         self._patch.start()
         # Also patch load_model to return None so it doesn't try to load from disk
         self._patch2 = patch("ml.model.load_model", return_value=None)
@@ -69,7 +69,7 @@ class TestPredictScoreWithModel:
     def test_uses_model_when_available(self):
         mock_model = MagicMock()
         mock_model.predict.return_value = np.array([0.75])
-        with patch("ml.model._MODEL", mock_model):
+        with patch("ml.model._STATE", ModelState("test", mock_model, None)):
             f = _make_features()
             score = predict_score(f)
         assert score == pytest.approx(0.75)
@@ -78,10 +78,37 @@ class TestPredictScoreWithModel:
     def test_falls_back_when_model_raises(self):
         mock_model = MagicMock()
         mock_model.predict.side_effect = RuntimeError("model exploded")
-        with patch("ml.model._MODEL", mock_model), \
+        with patch("ml.model._STATE", ModelState("test", mock_model, None)), \
              patch("ml.model.load_model", return_value=None):
             f = _make_features()
             score = predict_score(f)
         # Should return a valid float from the fallback heuristic
         assert isinstance(score, float)
         assert 0.0 <= score <= 1.0
+
+
+class TestPredictScoresBatch:
+    def test_fallback_matches_single_row(self):
+        rows = np.array([[0.8, 0.6, 0.4, 0.3, 0.2], [1, 1, 1, 1, 1]], dtype=np.float32)
+        with patch("ml.model._STATE", ModelState("test", None, None)), patch("ml.model.load_model", return_value=None):
+            batch = predict_scores(rows)
+            singles = [predict_score(r) for r in rows]
+        np.testing.assert_allclose(batch, singles, atol=1e-6)
+
+    def test_single_model_call_for_batch(self):
+        mock_model = MagicMock()
+        mock_model.predict.return_value = np.array([0.1, 0.2, 0.3])
+        with patch("ml.model._STATE", ModelState("test", mock_model, None)):
+            out = predict_scores(np.zeros((3, 5), dtype=np.float32))
+        mock_model.predict.assert_called_once()
+        np.testing.assert_allclose(out, [0.1, 0.2, 0.3])
+
+    def test_bad_output_shape_falls_back(self):
+        mock_model = MagicMock()
+        mock_model.predict.return_value = np.array([0.1])
+        with patch("ml.model._STATE", ModelState("test", mock_model, None)):
+            out = predict_scores(np.ones((2, 5), dtype=np.float32))
+        np.testing.assert_allclose(out, [1.0, 1.0], atol=1e-6)
+
+    def test_empty_batch(self):
+        assert len(predict_scores(np.zeros((0, 5), dtype=np.float32))) == 0
@@ -0,0 +1,121 @@
+"""
+Tests for versioned model artifacts (ml/model_registry.py) and the hot
+reload in ml/model.py. Artifacts go to a temp dir; Redis is a dict stub.
+"""
+
+import os
+from unittest.mock import patch
+
+import numpy as np
+import pytest
+from lightgbm import LGBMRanker
+
+import ml.model as model_module
+import ml.model_registry as registry
+
+
+class _FakeRedis:
+    def __init__(self):
+        self.store = {}
+
+    def get(self, key):
+        return self.store.get(key)
+
+    def set(self, key, value):
+        self.store[key] = value
+
+
+def _ranker(seed):
+    rng = np.random.default_rng(seed)
+    X = rng.random((300, 5)).astype(np.float32)
+    y = np.clip(np.round(3 * X[:, seed % 5] + rng.random(300)), 0, 3).astype(int)
+    return LGBMRanker(n_estimators=10, random_state=42, verbose=-1).fit(X, y, group=[30] * 10)
+
+
+@pytest.fixture
+def models_dir(tmp_path):
+    fake = _FakeRedis()
+    base = str(tmp_path / "models")
+    with patch.object(registry, "MODELS_DIR", base), \
+         patch.object(registry, "POINTER_FILE", os.path.join(base, "CURRENT")), \
+         patch.object(registry, "_redis", return_value=fake), \
+         patch.object(model_module, "_STATE", None):
+        yield base, fake
+
+
+class TestPublish:
+    def test_version_dir_is_complete_and_current(self, models_dir):
+        base, fake = models_dir
+        version = registry.publish_model(_ranker(0))
+        model_path, trees_path = registry.model_paths(version)
+        assert os.path.exists(model_path) and os.path.isdir(trees_path)
+        assert fake.store[registry.REDIS_VERSION_KEY] == version
+        assert registry.current_version() == version
+        assert not [n for n in os.listdir(base) if n.startswith(".tmp")]
+
+    def test_pointer_file_used_when_redis_points_elsewhere(self, models_dir):
+        _, fake = models_dir
+        version = registry.publish_model(_ranker(0))
+        fake.store[registry.REDIS_VERSION_KEY] = "missing-on-this-host"
+        assert registry.current_version() == version
+
+    def test_prune_keeps_recent_and_current(self, models_dir):
+        versions = [registry.publish_model(_ranker(i), keep=2) for i in range(3)]
+        assert registry.list_versions() == versions[1:]
+
+    def test_nothing_published_means_legacy(self, models_dir):
+        assert registry.current_version() is None
+        assert registry.model_paths(None)[0] == registry.LEGACY_MODEL_PATH
+
+
+class TestHotReload:
+    def test_swaps_to_new_version(self, models_dir):
+        first, second = _ranker(0), _ranker(1)
+        x = np.random.default_rng(9).random(5).astype(np.float32)
+
+        v1 = registry.publish_model(first)
+        assert model_module.get_model_version() == v1
+        assert model_module.predict_score(x) == pytest.approx(first.predict(x[None, :])[0])
+        assert model_module.reload_if_changed() is False
+
+        v2 = registry.publish_model(second)
+        assert model_module.reload_if_changed() is True
+        assert model_module.get_model_version() == v2
+        assert model_module.predict_score(x) == pytest.approx(second.predict(x[None, :])[0])
+
+    def test_pickle_deferred_while_trees_serve(self, models_dir):
+        registry.publish_model(_ranker(0))
+        with patch.object(model_module, "load_model", wraps=model_module.load_model) as load:
+            state = model_module.get_state()
+            model_module.predict_scores(np.ones((3, 5), np.float32))
+            load.assert_not_called()
+            assert state.model is None and state.model_path is not None
+            assert model_module.get_model() is not None
+            load.assert_called_once()
+            # The loaded model arrives in a new snapshot; the old one is untouched
+            assert state.model is None and state.model_path is not None
+            assert model_module.get_state() is not state
+            assert model_module.get_state().trees is state.trees
+            assert model_module.get_model() is not None
+            load.assert_called_once()
+
+    def test_broken_version_keeps_serving_previous(self, models_dir):
+        v1 = registry.publish_model(_ranker(0))
+        model_module.get_state()
+        broken = os.path.join(registry.MODELS_DIR, "29990101T000000-broken")
+        os.makedirs(broken)
+        registry.set_current_version("29990101T000000-broken")
+        assert model_module.reload_if_changed() is False
+        assert model_module.get_model_version() == v1
+
+
+class TestRankedCacheKeysTaggedWithVersion:
+    def test_keys_change_with_model_version(self):
+        import backend.utils.search as search
+        with patch.object(search, "get_model_version", return_value="v1"):
+            tier_v1 = search._tier_cache_key("laptop", 0, "A")
+            ranked_v1 = search._ranked_cache_key("laptop", "u1", 0, "A")
+        with patch.object(search, "get_model_version", return_value="v2"):
+            assert search._tier_cache_key("laptop", 0, "A") != tier_v1
+            assert search._ranked_cache_key("laptop", "u1", 0, "A") != ranked_v1
+        assert ":v1:A:0" in tier_v1
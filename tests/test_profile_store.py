@@ -0,0 +1,119 @@
+"""
+Tests for the columnar, memory-mapped user-profile store (ml/profile_store.py)
+and how user_profile_service / the cluster boost helpers consume it.
+"""
+
+import os
+import time
+import threading
+from unittest.mock import patch
+
+import numpy as np
+import pytest
+
+import ml.profile_store as ps
+
+
+_PROFILES = {
+    "u1": {"category_pref": {"Audio": 0.75, "Kitchen": 0.25}, "avg_price": 120.0, "cluster": 0},
+    "u2": {"category_pref": {"Audio": 1.0}, "avg_price": None, "cluster": 0},
+    "u3": {"category_pref": {"Gaming": 0.5, "Kitchen": 0.5}, "avg_price": 40.0, "cluster": 2},
+    "u4": {"category_pref": {}, "avg_price": None, "cluster": None},
+}
+
+
+def _store():
+    return ps.ProfileStore(ps.encode_profiles(_PROFILES))
+
+
+class TestProfileStore:
+    def test_decodes_every_profile(self):
+        store = _store()
+        assert len(store) == 4 and set(store) == set(_PROFILES)
+        for uid, profile in _PROFILES.items():
+            decoded = store[uid]
+            assert decoded["category_pref"] == pytest.approx(profile["category_pref"])
+            assert decoded["avg_price"] == profile["avg_price"]
+            assert decoded["cluster"] == profile["cluster"]
+
+    def test_unknown_user(self):
+        store = _store()
+        assert "nobody" not in store
+        assert store.get("nobody") is None
+        with pytest.raises(KeyError):
+            store["nobody"]
+
+    def test_cluster_boost_matches_controller_scan(self):
+        from backend.controllers import recommendations_controller as rc
+        store = _store()
+        for cluster in (0, 2):
+            with patch.object(rc, "redis_get_json", return_value=None), \
+                 patch.object(rc, "redis_setex_json"):
+                expected = rc.get_cluster_category_boost(cluster, dict(_PROFILES))
+            assert store.cluster_boost(cluster) == pytest.approx(expected)
+            assert rc.get_cluster_category_boost(cluster, store) == pytest.approx(expected)
+        assert store.cluster_boost(7) == {}
+        assert store.cluster_boost(None) == {}
+
+    def test_empty_profiles(self):
+        store = ps.ProfileStore(ps.encode_profiles({}))
+        assert len(store) == 0 and store.get("u1") is None and store.cluster_boost(0) == {}
+
+    def test_roundtrip_is_memory_mapped(self, tmp_path):
+        path = str(tmp_path / "profiles")
+        assert ps.save_profile_store(_PROFILES, path) == 4
+        loaded = ps.load_profile_store(path)
+        assert isinstance(loaded._a["pref_weights"], np.memmap)
+        assert loaded["u1"]["category_pref"] == pytest.approx(_PROFILES["u1"]["category_pref"])
+        assert ps.load_profile_store(str(tmp_path / "missing")) is None
+
+
+class TestProfileServiceUsesStore:
+    def test_store_preferred_over_rebuild(self, tmp_path):
+        import backend.services.user_profile_service as svc
+        path = str(tmp_path / "profiles")
+        ps.save_profile_store(_PROFILES, path)
+        svc._store_cache.reset()
+        try:
+            with patch.object(svc, "PROFILE_STORE_PATH", path), \
+                 patch.object(svc, "build_user_profiles") as build:
+                profiles = svc.get_profiles()
+            build.assert_not_called()
+            assert isinstance(profiles, ps.ProfileStore)
+            assert profiles["u3"]["cluster"] == 2
+        finally:
+            svc._store_cache.reset()
+
+    def test_stale_store_falls_back_to_in_process_refresh(self, tmp_path):
+        import backend.services.user_profile_service as svc
+        path = str(tmp_path / "profiles")
+        ps.save_profile_store(_PROFILES, path)
+        old = time.time() - svc.PROFILE_STORE_MAX_AGE_SECONDS - 60
+        os.utime(path, (old, old))
+        svc._store_cache.reset()
+        rebuilt = {"u9": {"category_pref": {}, "avg_price": None, "cluster": None}}
+        refreshes = []
+
+        def refresh():
+            # Called under the service lock, like the real background thread
+            refreshes.append(threading.Thread(target=svc._background_refresh))
+            refreshes[-1].start()
+
+        try:
+            with patch.object(svc, "PROFILE_STORE_PATH", path), \
+                 patch.object(svc, "_state", svc.ProfileCache()), \
+                 patch.object(svc, "build_user_profiles", return_value=rebuilt) as build, \
+                 patch.object(svc, "_trigger_async_refresh", side_effect=refresh):
+                # The outdated store still answers while the rebuild runs...
+                assert isinstance(svc.get_profiles(), ps.ProfileStore)
+                refreshes[0].join(5)
+                build.assert_called_once()
+                # ...then the in-process profiles take over
+                assert svc.get_profiles() is rebuilt
+
+                # A rewritten store is preferred again
+                ps.save_profile_store(_PROFILES, path)
+                svc._store_cache.reset()
+                assert isinstance(svc.get_profiles(), ps.ProfileStore)
+        finally:
+            svc._store_cache.reset()
@@ -0,0 +1,135 @@
+"""
+Tests for per-request SQL instrumentation (backend/utils/query_stats.py):
+statement counting, N+1 detection, debug headers, metrics and the
+query_budget() test helper.
+"""
+
+import os
+import logging
+import tempfile
+
+import flask
+import pytest
+from sqlalchemy import create_engine, text
+
+import backend.utils.query_stats as qs
+import backend.utils.request_timing as rt
+
+
+@pytest.fixture(autouse=True)
+def clean_metrics():
+    rt.reset_metrics()
+    yield
+    rt.reset_metrics()
+
+
+@pytest.fixture
+def engine():
+    engine = create_engine("sqlite://")
+    qs.instrument_engine(engine)
+    qs.instrument_engine(engine)  # idempotent
+    return engine
+
+
+def _app(engine, debug=False):
+    app = flask.Flask(__name__)
+    app.debug = debug
+    rt.setup_request_timing(app)
+    qs.setup_query_stats(app)
+
+    @app.route("/items/<int:n>")
+    def items(n):
+        with engine.connect() as conn:
+            for i in range(n):
+                conn.execute(text("SELECT :i"), {"i": i})
+        return "ok"
+
+    return app
+
+
+class TestCollectors:
+    def test_counts_only_inside_collector(self, engine):
+        with engine.connect() as conn:
+            conn.execute(text("SELECT 1"))
+            with qs.count_queries() as outer:
+                conn.execute(text("SELECT 1"))
+                with qs.count_queries() as inner:
+                    conn.execute(text("SELECT 2"))
+        assert outer.count == 2 and inner.count == 1
+        assert outer.statements["SELECT 1"] == 1
+        assert outer.total_seconds >= 0 and len(outer.slowest) == 2
+
+    def test_repeated_statements(self):
+        stats = qs.QueryStats()
+        for _ in range(5):
+            stats.record("SELECT * FROM users WHERE id = ?", 0.001)
+        stats.record("SELECT 1", 0.5)
+        assert stats.repeated(threshold=5) == [("SELECT * FROM users WHERE id = ?", 5)]
+        assert stats.slowest[0] == (0.5, "SELECT 1")
+
+    def test_query_budget(self, engine):
+        with engine.connect() as conn:
+            with qs.query_budget(2):
+                conn.execute(text("SELECT 1"))
+            with pytest.raises(AssertionError, match="3 queries, budget 2"):
+                with qs.query_budget(2):
+                    for _ in range(3):
+                        conn.execute(text("SELECT 1"))
+
+
+class TestRequestStats:
+    def test_headers_only_in_debug(self, engine):
+        resp = _app(engine).test_client().get("/items/2")
+        assert "X-DB-Query-Count" not in resp.headers
+        assert "db;dur=" in resp.headers["Server-Timing"]
+
+        resp = _app(engine, debug=True).test_client().get("/items/2")
+        assert resp.headers["X-DB-Query-Count"] == "2"
+        assert resp.headers["X-DB-Slowest"].endswith("SELECT ?")
+        assert resp.headers["X-DB-Repeated-Statements"] == "0"
+
+    def test_n_plus_one_logged_and_metrics_exported(self, engine, caplog):
+        with caplog.at_level(logging.WARNING, logger="query_stats"):
+            _app(engine).test_client().get("/items/6")
+        assert "Possible N+1 on GET /items/<int:n>: 6x SELECT ?" in caplog.text
+
+        series = qs.DB_QUERIES.snapshot()[("/items/<int:n>",)]
+        assert series["count"] == 1 and series["sum"] == 6
+        assert "db_time_per_request_seconds_count" in rt.render_metrics()
+
+    def test_request_collector_is_released(self, engine):
+        _app(engine).test_client().get("/items/1")
+        assert qs._collectors.get() == ()
+
+
+@pytest.fixture
+def cart_db(monkeypatch):
+    fd, path = tempfile.mkstemp(suffix=".db")
+    os.close(fd)
+    monkeypatch.setenv("DATABASE_URL", f"sqlite:///{path}")
+
+    import backend.utils.database as database
+    database._engine = None
+    database._SessionLocal = None
+    engine, _ = database.init_db()
+
+    from backend.models import CartItem, User
+    User.__table__.create(bind=engine)
+    CartItem.__table__.create(bind=engine)
+
+    yield
+
+    database._engine = None
+    database._SessionLocal = None
+    os.remove(path)
+
+
+class TestServiceBudgets:
+    def test_cart_services_stay_within_budget(self, cart_db):
+        from backend.services.cart.add import add_to_cart
+        from backend.services.cart.get import get_cart
+
+        with qs.query_budget(3):
+            add_to_cart("u1", 5, 1)
+        with qs.query_budget(1):
+            assert get_cart("u1") == {"5": 1}
@@ -0,0 +1,140 @@
+"""
+Tests for read-replica routing (backend/utils/database.py): replica reads,
+lag-aware fallback to the primary and writes staying on the primary.
+Primary and replica are two SQLite files.
+"""
+
+import os
+import tempfile
+from datetime import datetime, timedelta, timezone
+from unittest.mock import patch
+
+import pytest
+from sqlalchemy import create_engine, insert
+
+from backend.models import SearchEvent, User
+
+
+NOW = datetime(2025, 6, 1, 12, 0, tzinfo=timezone.utc)
+
+
+def _create_schema(path):
+    engine = create_engine(f"sqlite:///{path}")
+    User.__table__.create(bind=engine)
+    SearchEvent.__table__.create(bind=engine)
+    return engine
+
+
+def _add_event(engine, timestamp):
+    with engine.begin() as conn:
+        conn.execute(insert(SearchEvent.__table__), [{
+            "user_id": "u1", "query": "laptop", "product_id": 1,
+            "event_type": "click", "group": "A", "timestamp": timestamp,
+        }])
+
+
+def _add_user(engine, username):
+    with engine.begin() as conn:
+        conn.execute(insert(User.__table__), [{
+            "user_id": "u1", "username": username, "password_hash": "x",
+        }])
+
+
+@pytest.fixture
+def dbs(monkeypatch):
+    paths = []
+    for _ in range(2):
+        fd, path = tempfile.mkstemp(suffix=".db")
+        os.close(fd)
+        os.remove(path)
+        paths.append(path)
+    primary_path, replica_path = paths
+    primary, replica = _create_schema(primary_path), _create_schema(replica_path)
+    _add_user(primary, "on_primary")
+    _add_user(replica, "on_replica")
+
+    monkeypatch.setenv("DATABASE_URL", f"sqlite:///{primary_path}")
+    monkeypatch.setenv("DATABASE_REPLICA_URL", f"sqlite:///{replica_path}")
+
+    import backend.utils.database as database
+    database._engine = None
+    database._SessionLocal = None
+    database.init_db()
+
+    yield database, primary, replica
+
+    for engine in (database._engine, database._replica_engine, primary, replica):
+        if engine is not None:
+            engine.dispose()
+    database._engine = None
+    database._SessionLocal = None
+    database._replica_engine = None
+    database._ReplicaSessionLocal = None
+    for path in paths:
+        os.remove(path)
+
+
+def _read_username(database):
+    with database.get_read_session() as session:
+        return session.query(User.username).scalar()
+
+
+class TestReplicaRouting:
+    def test_reads_go_to_caught_up_replica(self, dbs):
+        database, primary, replica = dbs
+        _add_event(primary, NOW)
+        _add_event(replica, NOW)
+
+        assert _read_username(database) == "on_replica"
+        assert database.replica_status()["lag_seconds"] == 0.0
+        with database.get_db_session() as session:
+            assert session.query(User.username).scalar() == "on_primary"
+
+    def test_lagging_replica_falls_back_to_primary(self, dbs):
+        database, primary, replica = dbs
+        _add_event(primary, NOW)
+        _add_event(replica, NOW - timedelta(minutes=5))
+
+        assert _read_username(database) == "on_primary"
+        status = database.replica_status()
+        assert status["usable"] is False and status["lag_seconds"] == 300.0
+        assert status["fallbacks"] == 1
+
+    def test_lag_check_is_cached(self, dbs):
+        database, primary, replica = dbs
+        with patch.object(database, "measure_replica_lag", return_value=0.0) as measure:
+            _read_username(database)
+            _read_username(database)
+        assert measure.call_count == 1
+
+    def test_unreachable_replica_falls_back(self, dbs):
+        database, _, _ = dbs
+        with patch.object(database, "measure_replica_lag", side_effect=OSError("down")):
+            assert _read_username(database) == "on_primary"
+        assert database.replica_status()["lag_seconds"] is None
+
+    def test_without_replica_reads_use_primary(self, dbs, monkeypatch):
+        database, _, _ = dbs
+        monkeypatch.delenv("DATABASE_REPLICA_URL")
+        database._engine.dispose()
+        database._replica_engine.dispose()
+        database._engine = None
+        database._SessionLocal = None
+        database.init_db()
+
+        assert _read_username(database) == "on_primary"
+        assert database.replica_status()["configured"] is False
+
+    def test_per_user_events_read_from_primary(self, dbs):
+        from backend.services.db_event_service import get_events_df
+
+        database, primary, replica = dbs
+        _add_event(primary, NOW)
+        _add_event(replica, NOW)
+        # Logged on the primary, not replicated yet (still within lag budget)
+        _add_event(primary, NOW + timedelta(seconds=1))
+
+        assert len(get_events_df(user_id="u1")) == 2
+        assert len(get_events_df(user_id="u1", use_replica=True)) == 1
+        # Bulk scans stay on the replica
+        assert len(get_events_df(limit=None)) == 1
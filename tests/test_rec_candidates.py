@@ -0,0 +1,176 @@
+"""
+Tests for precomputed recommendation candidates: the batch builder in
+ml/recommendation_candidates.py, the artifact loader service and the
+request-time helpers in recommendations_controller. No DB or Redis.
+"""
+
+from datetime import datetime, timezone, timedelta
+from unittest.mock import patch
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import ml.recommendation_candidates as rc
+from ml.model import ModelState
+
+
+def _products(n=12):
+    cats = ["Audio", "Computers", "Gaming"]
+    now = datetime.now(timezone.utc)
+    return pd.DataFrame({
+        "product_id": np.arange(1, n + 1),
+        "category": [cats[i % 3] for i in range(n)],
+        "price": [50.0 + 10 * i for i in range(n)],
+        "popularity": [1000 * (n - i) for i in range(n)],
+        "rating": [4.0] * n,
+        "created_at": [now - timedelta(days=i) for i in range(n)],
+    })
+
+
+_PROFILES = {
+    "u1": {"cluster": 0, "category_pref": {"Audio": 1.0}, "avg_price": 60.0},
+    "u2": {"cluster": 0, "category_pref": {"Audio": 0.5, "Gaming": 0.5}, "avg_price": 80.0},
+    "u3": {"cluster": 1, "category_pref": {"Computers": 1.0}, "avg_price": 150.0},
+    "u4": {"cluster": None, "category_pref": {"Gaming": 1.0}, "avg_price": 10.0},
+}
+
+
+@pytest.fixture(autouse=True)
+def no_model():
+    with patch("ml.model._STATE", ModelState("test", None, None)), patch("ml.model.load_model", return_value=None):
+        yield
+
+
+class TestClusterPreferences:
+    def test_boost_normalized_per_cluster(self):
+        prefs = rc.cluster_preferences(_PROFILES)
+        assert set(prefs) == {0, 1}
+        assert sum(prefs[0]["category_boost"].values()) == pytest.approx(1.0)
+        assert prefs[0]["category_boost"]["Audio"] == pytest.approx(0.75)
+
+    def test_avg_price_is_member_mean(self):
+        prefs = rc.cluster_preferences(_PROFILES)
+        assert prefs[0]["avg_price"] == pytest.approx(70.0)
+
+    def test_unclustered_users_ignored(self):
+        prefs = rc.cluster_preferences({"u4": _PROFILES["u4"]})
+        assert prefs == {}
+
+
+class TestSelectWithQuota:
+    def test_respects_category_share(self):
+        ids = np.arange(10)
+        cats = np.array(["A"] * 8 + ["B"] * 2)
+        scores = np.linspace(1.0, 0.1, 10)
+        chosen, _ = rc.select_with_quota(ids, cats, scores, limit=4, max_share=0.5)
+        assert list(chosen) == [0, 1, 8, 9]
+
+    def test_scores_sorted_descending(self):
+        ids = np.arange(5)
+        cats = np.array(["A", "B", "C", "D", "E"])
+        scores = np.array([0.1, 0.9, 0.5, 0.7, 0.3])
+        chosen, chosen_scores = rc.select_with_quota(ids, cats, scores, limit=5, max_share=1.0)
+        assert list(chosen) == [1, 3, 2, 4, 0]
+        assert np.all(np.diff(chosen_scores) <= 0)
+
+
+class TestBuildAndPersist:
+    def test_builds_cold_and_cluster_segments(self):
+        lists = rc.build_candidate_lists(products=_products(), profiles=_PROFILES)
+        assert set(lists) == {"cold", "0", "1"}
+        ids, scores = lists["0"]
+        assert ids.dtype == np.int32 and scores.dtype == np.float32
+
+    def test_cluster_preference_shifts_ranking(self):
+        lists = rc.build_candidate_lists(products=_products(), profiles=_PROFILES)
+        products = _products().set_index("product_id")
+        top_cluster1 = products.loc[int(lists["1"][0][0]), "category"]
+        assert top_cluster1 == "Computers"
+
+    def test_save_load_roundtrip(self, tmp_path):
+        path = str(tmp_path / "cands")
+        lists = rc.build_candidate_lists(products=_products(), profiles=_PROFILES)
+        rc.save_candidate_lists(lists, path)
+        loaded = rc.load_candidate_lists(path)
+        assert set(loaded) == set(lists)
+        for seg in lists:
+            np.testing.assert_array_equal(loaded[seg][0], lists[seg][0])
+            np.testing.assert_allclose(loaded[seg][1], lists[seg][1])
+
+    def test_load_missing_artifact_returns_empty(self, tmp_path):
+        assert rc.load_candidate_lists(str(tmp_path / "missing")) == {}
+
+
+class TestCandidateService:
+    def _write(self, tmp_path):
+        path = str(tmp_path / "cands")
+        rc.save_candidate_lists({
+            "cold": (np.array([7, 8], np.int32), np.array([0.9, 0.8], np.float32)),
+            "0": (np.array([3], np.int32), np.array([0.5], np.float32)),
+        }, path)
+        return path
+
+    def test_cluster_segment_and_cold_fallback(self, tmp_path):
+        import backend.services.rec_candidates_service as svc
+        path = self._write(tmp_path)
+        svc.reset_candidates_cache()
+        try:
+            with patch.object(svc, "CANDIDATES_PATH", path):
+                assert list(svc.get_segment_candidates(0)[0]) == [3]
+                assert list(svc.get_segment_candidates(5)[0]) == [7, 8]
+                assert list(svc.get_segment_candidates(None)[0]) == [7, 8]
+        finally:
+            svc.reset_candidates_cache()
+
+    def test_missing_artifact_returns_none(self, tmp_path):
+        import backend.services.rec_candidates_service as svc
+        svc.reset_candidates_cache()
+        try:
+            with patch.object(svc, "CANDIDATES_PATH", str(tmp_path / "missing")):
+                assert svc.get_segment_candidates(0) is None
+        finally:
+            svc.reset_candidates_cache()
+
+
+class TestControllerHelpers:
+    def _product(self, pid, category="Audio"):
+        return {
+            "product_id": pid, "title": f"P{pid}", "description": "", "category": category,
+            "price": 10.0, "rating": 4.0, "review_count": 1, "popularity": 5,
+            "created_at": datetime(2024, 1, 1, tzinfo=timezone.utc),
+        }
+
+    def test_precomputed_demotes_recent_and_skips_deleted(self):
+        from backend.controllers import recommendations_controller as ctrl
+        with patch.object(ctrl, "get_products_by_ids", return_value=[self._product(1), self._product(2)]):
+            scored = ctrl.score_precomputed_candidates(
+                np.array([1, 2, 99]), np.array([0.8, 0.6, 0.5], np.float32), {1},
+            )
+        assert [(p["product_id"], round(s, 3)) for p, s in scored] == [
+            (1, round(0.8 * ctrl.RECENT_DEMOTION, 3)), (2, 0.6),
+        ]
+
+    def test_diversify_applies_cold_start_quota(self):
+        from backend.controllers import recommendations_controller as ctrl
+        scored = [(self._product(i, "Audio"), 1.0 - i * 0.01) for i in range(5)]
+        scored.append((self._product(10, "Gaming"), 0.1))
+        picked = ctrl.diversify(scored, {}, limit=10)
+        assert [p["product_id"] for p in picked] == [0, 1, 10]
+
+    def test_controller_uses_precomputed_list_without_catalog_scan(self):
+        from backend.controllers import recommendations_controller as ctrl
+        with patch.object(ctrl, "redis_get_json", return_value=None), \
+             patch.object(ctrl, "redis_msetex_entries"), \
+             patch.object(ctrl, "get_user_by_id", return_value=None), \
+             patch.object(ctrl, "get_profiles", return_value={}), \
+             patch.object(ctrl, "get_recent_product_ids", return_value=[]), \
+             patch.object(ctrl, "get_segment_candidates",
+                          return_value=(np.array([1, 2]), np.array([0.9, 0.4], np.float32))), \
+             patch.object(ctrl, "get_products_by_ids", return_value=[self._product(1), self._product(2, "Gaming")]), \
+             patch.object(ctrl, "score_candidates_on_the_fly") as on_the_fly:
+            result, status = ctrl.recommendations_controller("u1")
+        on_the_fly.assert_not_called()
+        assert status == 200
+        assert [p["product_id"] for p in result["similar"]] == [1, 2]
+        assert isinstance(result["similar"][0]["created_at"], str)
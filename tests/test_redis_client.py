@@ -0,0 +1,116 @@
+"""
+Tests for backend/services/redis_client.py: MGET / pipelined SETEX helpers
+and the buffered cache counters. Uses the in-memory FakeRedis.
+"""
+
+import json
+from collections import Counter
+from unittest.mock import patch
+
+import pytest
+
+import backend.services.redis_client as rc
+from benchmarks.fake_redis import FakeRedis
+
+
+@pytest.fixture
+def fake():
+    r = FakeRedis()
+    with patch.object(rc, "_redis", r), \
+         patch.object(rc, "_pending", Counter()), \
+         patch.object(rc, "CACHE_STATS_FLUSH_SECONDS", 3600):
+        yield r
+
+
+class TestJsonHelpers:
+    def test_mget_decodes_in_one_round_trip(self, fake):
+        fake.set("a", json.dumps({"x": 1}))
+        fake.set("bad", "{not json")
+        fake.commands = 0
+        assert rc.redis_mget_json(["a", "missing", "bad"]) == [{"x": 1}, None, None]
+        assert fake.commands == 1
+
+    def test_mget_counts_only_listed_keys(self, fake):
+        fake.set("search_ranked:q1", "1")
+        rc.redis_mget_json(
+            ["search_ranked:q1", "search_ranked:q2", "search_products:q1"],
+            counted=("search_ranked:q1", "search_ranked:q2"),
+        )
+        assert rc._pending[rc.HITS_KEY] == 1 and rc._pending[rc.MISSES_KEY] == 1
+        assert rc._pending[(rc.NAMESPACE_HITS_KEY, "search_ranked")] == 1
+        assert rc._pending[(rc.NAMESPACE_MISSES_KEY, "search_ranked")] == 1
+        assert (rc.NAMESPACE_MISSES_KEY, "search_products") not in rc._pending
+
+    def test_lookup_latency_charged_per_counted_key(self, fake):
+        with patch.object(rc.time, "perf_counter", side_effect=[1.0, 1.002]):
+            rc.redis_mget_json(["analytics:summary", "x"], counted=("analytics:summary",))
+        assert rc._pending[(rc.NAMESPACE_LATENCY_KEY, "analytics")] == 2000
+
+    def test_get_json_uncounted(self, fake):
+        assert rc.redis_get_json("a", count_stats=False) is None
+        assert not rc._pending
+
+    def test_mget_redis_error_reads_as_miss(self, fake):
+        with patch.object(fake, "mget", side_effect=ConnectionError):
+            assert rc.redis_get_json("a") is None
+        assert rc._pending[rc.MISSES_KEY] == 1
+
+    def test_msetex_pipelines_with_per_key_ttl(self, fake):
+        assert rc.redis_msetex_json({"a": [1], "b": {"y": 2}}, {"a": 60, "b": 600})
+        assert fake.commands == 1
+        assert json.loads(fake.get("a")) == [1]
+        _, expires_a = fake._data["a"]
+        _, expires_b = fake._data["b"]
+        assert expires_b - expires_a > 400
+
+    def test_msetex_entries(self, fake):
+        assert rc.redis_msetex_entries({"a": ([1], 60), "b": ("x", 600)})
+        assert fake.commands == 1
+        assert json.loads(fake.get("b")) == "x"
+
+    def test_msetex_empty_and_failure(self, fake):
+        assert rc.redis_msetex_json({}, 60)
+        with patch.object(fake, "pipeline", side_effect=ConnectionError):
+            assert rc.redis_msetex_json({"a": 1}, 60) is False
+
+
+class TestBufferedCounters:
+    def test_counts_stay_local_until_flush(self, fake):
+        rc.incr_counter(rc.INVALIDATIONS_KEY)
+        rc.redis_get_json("a")
+        assert fake.get(rc.MISSES_KEY) is None
+
+        fake.commands = 0
+        rc.flush_counters()
+        assert fake.commands == 1
+        assert fake.get(rc.MISSES_KEY) == "1"
+        assert fake.get(rc.INVALIDATIONS_KEY) == "1"
+        assert not rc._pending
+
+    def test_flush_when_interval_elapsed(self, fake):
+        with patch.object(rc, "CACHE_STATS_FLUSH_SECONDS", 0):
+            rc.redis_get_json("a")
+        assert fake.get(rc.MISSES_KEY) == "1"
+
+    def test_failed_flush_keeps_counts(self, fake):
+        rc.incr_counter(rc.HITS_KEY, 2)
+        with patch.object(fake, "pipeline", side_effect=ConnectionError):
+            rc.flush_counters()
+        assert rc._pending[rc.HITS_KEY] == 2
+
+    def test_namespace_counts_flushed_to_hashes(self, fake):
+        rc.redis_get_json("recommendations:u1")
+        rc.redis_get_json("recommendations:u2")
+        rc.flush_counters()
+        assert fake.hgetall(rc.NAMESPACE_MISSES_KEY) == {"recommendations": "2"}
+        assert fake.get(rc.MISSES_KEY) == "2"
+
+    def test_discard(self, fake):
+        rc.incr_counter(rc.HITS_KEY)
+        rc.incr_counter(rc.MISSES_KEY)
+        rc.redis_get_json("analytics:summary")
+        rc.discard_counters(rc.HITS_KEY, rc.NAMESPACE_MISSES_KEY)
+        assert rc._pending[rc.HITS_KEY] == 0
+        assert rc._pending[rc.MISSES_KEY] == 2
+        assert (rc.NAMESPACE_MISSES_KEY, "analytics") not in rc._pending
+        assert (rc.NAMESPACE_LATENCY_KEY, "analytics") in rc._pending
@@ -0,0 +1,139 @@
+"""
+Tests for the sampling request profiler (backend/utils/request_profiler.py)
+and its admin flamegraph endpoints. Profiles go to a temp store dir.
+"""
+
+import os
+import time
+import threading
+from datetime import datetime, timedelta, timezone
+from unittest.mock import MagicMock, patch
+
+import flask
+import pytest
+
+import backend.utils.request_profiler as rp
+from backend.utils import admin_auth
+from backend.utils.auth_token import create_token
+from backend.utils.rate_limit import limiter
+
+
+SECRET = "test-secret-key"
+
+
+@pytest.fixture
+def store(tmp_path):
+    path = str(tmp_path / "profiles")
+    with patch.object(rp, "PROFILE_STORE_DIR", path), \
+         patch.dict(os.environ, {"SECRET_KEY": SECRET}):
+        yield path
+
+
+def _busy_wait(seconds):
+    end = time.perf_counter() + seconds
+    while time.perf_counter() < end:
+        pass
+
+
+def _app():
+    from backend.routes.profiling_routes import bp
+    app = flask.Flask(__name__)
+    limiter.init_app(app)
+    rp.setup_request_profiling(app)
+    app.register_blueprint(bp)
+
+    @app.route("/api/slow")
+    def slow():
+        _busy_wait(0.05)
+        return "ok"
+
+    return app
+
+
+def _admin_headers():
+    token = create_token("u_admin")
+    return {"Authorization": f"Bearer {token}"}
+
+
+def _admin_patches():
+    user = MagicMock(user_id="u_admin", username="admin", email=None, password_changed_at=None)
+    return (
+        patch.object(admin_auth, "ADMIN_USER_IDS", ["u_admin"]),
+        patch.object(admin_auth, "get_user_by_id", return_value=user),
+    )
+
+
+class TestStackSampler:
+    def test_samples_the_target_thread(self):
+        sampler = rp.StackSampler(threading.get_ident(), 0.001).start()
+        _busy_wait(0.05)
+        stacks = sampler.stop()
+        assert sum(stacks.values()) > 0
+        assert any("_busy_wait" in stack.split(";")[-1] for stack in stacks)
+
+
+class TestProfileStore:
+    def _record(self, ts, route="/api/search", stacks=None):
+        return {"ts": ts, "method": "GET", "route": route, "duration_ms": 10.0,
+                "interval_ms": 5, "stacks": stacks or {"a;b": 2, "a;c": 1}}
+
+    def test_collapsed_stacks_aggregate_window_and_route(self, store):
+        now = time.time()
+        rp.save_profile(self._record(now))
+        rp.save_profile(self._record(now, stacks={"a;b": 3}))
+        rp.save_profile(self._record(now, route="/api/recommendations"))
+        rp.save_profile(self._record(now - 7200))
+
+        until = datetime.now(timezone.utc) + timedelta(seconds=1)
+        text = rp.collapsed_stacks(until - timedelta(minutes=5), until, route="/api/search")
+        assert text.splitlines() == ["GET /api/search;a;b 5", "GET /api/search;a;c 1"]
+
+        summary = rp.summarize_profiles(until - timedelta(minutes=5), until)
+        assert summary["/api/search"]["profiles"] == 2
+        assert summary["/api/recommendations"]["samples"] == 3
+
+    def test_expired_hour_files_rotated(self, store):
+        now = time.time()
+        rp.save_profile(self._record(now - 5 * 3600))
+        rp.save_profile(self._record(now), retention_hours=2)
+        assert len(os.listdir(store)) == 1
+
+
+class TestMiddleware:
+    def test_sampled_request_is_stored(self, store):
+        with patch.object(rp, "PROFILE_SAMPLE_RATE", 1.0), \
+             patch.object(rp, "PROFILE_INTERVAL_MS", 1.0):
+            assert _app().test_client().get("/api/slow").status_code == 200
+        now = datetime.now(timezone.utc)
+        records = list(rp.iter_profiles(now - timedelta(minutes=1), now + timedelta(seconds=1)))
+        assert len(records) == 1 and records[0]["route"] == "/api/slow"
+        assert records[0]["stacks"]
+
+    def test_header_ignored_for_non_admin(self, store):
+        resp = _app().test_client().get("/api/slow", headers={rp.PROFILE_HEADER: "1"})
+        assert resp.status_code == 200
+        assert not os.path.exists(store)
+
+    def test_header_profiles_admin_request(self, store):
+        admins, user = _admin_patches()
+        with admins, user:
+            _app().test_client().get("/api/slow", headers={rp.PROFILE_HEADER: "1", **_admin_headers()})
+        assert os.listdir(store)
+
+
+class TestFlamegraphEndpoint:
+    def test_requires_admin(self, store):
+        assert _app().test_client().get("/api/admin/profiles/flamegraph").status_code == 401
+
+    def test_download_and_window_validation(self, store):
+        rp.save_profile({"ts": time.time(), "method": "GET", "route": "/api/search",
+                         "duration_ms": 4.0, "interval_ms": 5, "stacks": {"x;y": 4}})
+        admins, user = _admin_patches()
+        with admins, user:
+            client = _app().test_client()
+            resp = client.get("/api/admin/profiles/flamegraph?minutes=10", headers=_admin_headers())
+            bad = client.get("/api/admin/profiles?minutes=0", headers=_admin_headers())
+        assert resp.status_code == 200
+        assert "attachment" in resp.headers["Content-Disposition"]
+        assert resp.get_data(as_text=True) == "GET /api/search;x;y 4\n"
+        assert bad.status_code == 400
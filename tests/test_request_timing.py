@@ -0,0 +1,119 @@
+"""
+Tests for per-stage request timing (backend/utils/request_timing.py):
+histograms, the Server-Timing header and the /metrics endpoint.
+"""
+
+import os
+from unittest.mock import patch
+
+import flask
+import pytest
+
+import backend.utils.request_timing as rt
+from backend.utils.rate_limit import limiter
+
+
+@pytest.fixture(autouse=True)
+def clean_metrics():
+    rt.reset_metrics()
+    yield
+    rt.reset_metrics()
+
+
+def _app():
+    from backend.routes.metrics_routes import bp
+    app = flask.Flask(__name__)
+    limiter.init_app(app)
+    rt.setup_request_timing(app)
+    app.register_blueprint(bp)
+
+    @app.route("/work")
+    def work():
+        with rt.timed("search_db"):
+            pass
+        rt.record_timing("search_db", 2.0)
+        rt.record_timings({"intent": 1.5})
+        return "ok"
+
+    return app
+
+
+class TestLatencyHistogram:
+    def test_buckets_are_cumulative_in_render(self):
+        h = rt.LatencyHistogram("t_seconds", "help", ("stage",), buckets=(0.01, 0.1))
+        for seconds in (0.005, 0.05, 0.05, 3.0):
+            h.observe(seconds, "db")
+        lines = list(h.render())
+        assert 't_seconds_bucket{stage="db",le="0.01"} 1' in lines
+        assert 't_seconds_bucket{stage="db",le="0.1"} 3' in lines
+        assert 't_seconds_bucket{stage="db",le="+Inf"} 4' in lines
+        assert 't_seconds_count{stage="db"} 4' in lines
+
+    def test_boundary_value_lands_in_its_bucket(self):
+        h = rt.LatencyHistogram("t_seconds", "help", (), buckets=(0.01,))
+        h.observe(0.01)
+        assert h.snapshot()[()]["buckets"] == [1, 0]
+
+    def test_label_values_escaped(self):
+        h = rt.LatencyHistogram("t_seconds", "help", ("endpoint",), buckets=(1.0,))
+        h.observe(0.1, 'a"b')
+        assert any('endpoint="a\\"b"' in line for line in h.render())
+
+
+class TestRequestTiming:
+    def test_recording_outside_request_is_noop(self):
+        rt.record_timing("search_db", 1.0)
+        assert rt.STAGE_LATENCY.snapshot() == {}
+
+    def test_server_timing_header_and_histograms(self):
+        resp = _app().test_client().get("/work")
+        header = resp.headers["Server-Timing"]
+        stages = dict(part.split(";dur=") for part in header.split(", "))
+        assert set(stages) == {"search_db", "intent", "app"}
+        assert float(stages["search_db"]) >= 2.0
+
+        observed = rt.STAGE_LATENCY.snapshot()
+        assert observed[("search_db",)]["count"] == 1
+        assert ("GET", "/work", "200") in rt.REQUEST_LATENCY.snapshot()
+
+    def test_header_can_be_disabled(self):
+        with patch.object(rt, "SERVER_TIMING_ENABLED", False):
+            resp = _app().test_client().get("/work")
+        assert "Server-Timing" not in resp.headers
+        assert ("intent",) in rt.STAGE_LATENCY.snapshot()
+
+
+class TestMetricsEndpoint:
+    def test_exposition_format(self):
+        client = _app().test_client()
+        client.get("/work")
+        body = client.get("/metrics").get_data(as_text=True)
+        assert "# TYPE app_stage_duration_seconds histogram" in body
+        assert 'app_stage_duration_seconds_count{stage="intent"} 1' in body
+        assert 'http_request_duration_seconds_count{method="GET",endpoint="/work",status="200"} 1' in body
+
+    def test_token_required_when_configured(self):
+        client = _app().test_client()
+        with patch.dict(os.environ, {"METRICS_TOKEN": "s3cret"}):
+            assert client.get("/metrics").status_code == 401
+            ok = client.get("/metrics", headers={"Authorization": "Bearer s3cret"})
+        assert ok.status_code == 200
+
+
+class TestSearchStages:
+    def test_search_pipeline_records_stages(self):
+        import backend.utils.search as search
+        rows = [{
+            "product_id": 1, "title": "Laptop", "description": "", "price": 10.0,
+            "category": "Computers", "rating": 4.0, "popularity": 3.0,
+            "created_at": "2024-01-01T00:00:00",
+        }]
+        app = flask.Flask(__name__)
+        with app.test_request_context("/api/search"), \
+             patch.object(search, "SEARCH_TIERED_RANKING", False), \
+             patch.object(search, "redis_mget_json", return_value=[None, rows]), \
+             patch.object(search, "redis_msetex_entries"), \
+             patch.object(search, "get_profiles", return_value={}):
+            search.search_products("laptop", None, ab_group="B")
+            stages = set(flask.g._stage_timings)
+        assert {"search_cache", "search_fuzzy", "search_score", "search_sort"} <= stages
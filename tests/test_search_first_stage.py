@@ -0,0 +1,73 @@
+"""
+Tests for the two-stage ranking cut in backend/utils/search.py: cheap
+first-stage scoring, argpartition top-K selection, per-group K and the
+sampled recall@K log.
+"""
+
+import logging
+from unittest.mock import patch
+
+import backend.utils.search as search
+
+
+def _row(pid, title="Item", popularity=1.0):
+    return {
+        "product_id": pid, "title": title, "description": "", "price": 10.0,
+        "category": "Audio", "rating": 4.0, "popularity": popularity,
+        "created_at": "2024-01-01T00:00:00",
+    }
+
+
+class TestFirstStageScores:
+    def test_title_match_beats_equal_popularity(self):
+        rows = [_row(1, "Cable"), _row(2, "Wireless headphones")]
+        scores = search._first_stage_scores(rows, "headphones")
+        assert scores[1] > scores[0]
+
+    def test_popularity_prior_breaks_ties(self):
+        rows = [_row(1, "Headphones", 1), _row(2, "Headphones", 1000)]
+        scores = search._first_stage_scores(rows, "headphones")
+        assert scores[1] > scores[0]
+
+
+class TestSelectFirstStage:
+    def test_keeps_top_k_in_original_order(self):
+        rows = [_row(i, "Cable") for i in range(7)] + [_row(i, "Headphones") for i in range(7, 10)]
+        selected = search._select_first_stage(rows, "headphones", 3)
+        assert [r["product_id"] for r in selected] == [7, 8, 9]
+
+    def test_small_or_disabled_returns_input(self):
+        rows = [_row(1), _row(2)]
+        assert search._select_first_stage(rows, "q", 5) is rows
+        assert search._select_first_stage(rows, "q", 0) is rows
+
+
+class TestTwoStageRank:
+    def test_ranker_only_sees_k_rows(self):
+        rows = [_row(i, popularity=i) for i in range(50)]
+        seen = []
+
+        def rank_fn(candidates):
+            seen.append(len(candidates))
+            return search._rank_by_popularity(candidates)
+
+        with patch.dict(search.FIRST_STAGE_K, {"A": 10}), \
+             patch.object(search, "FIRST_STAGE_RECALL_SAMPLE_RATE", 0.0):
+            out = search._two_stage_rank(rows, "item", "A", rank_fn)
+        assert seen == [10]
+        assert out[0]["product_id"] == 49
+
+    def test_k_is_per_group(self):
+        rows = [_row(i) for i in range(50)]
+        with patch.dict(search.FIRST_STAGE_K, {"A": 10, "B": 0}), \
+             patch.object(search, "FIRST_STAGE_RECALL_SAMPLE_RATE", 0.0):
+            assert len(search._two_stage_rank(rows, "item", "A", search._rank_by_popularity)) == 10
+            assert len(search._two_stage_rank(rows, "item", "B", search._rank_by_popularity)) == 50
+
+    def test_sampled_recall_is_logged(self, caplog):
+        rows = [_row(i, popularity=i) for i in range(50)]
+        with patch.dict(search.FIRST_STAGE_K, {"A": 30}), \
+             patch.object(search, "FIRST_STAGE_RECALL_SAMPLE_RATE", 1.0), \
+             caplog.at_level(logging.INFO, logger="search"):
+            search._two_stage_rank(rows, "item", "A", search._rank_by_popularity)
+        assert "recall@20=1.000" in caplog.text
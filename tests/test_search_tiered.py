@@ -0,0 +1,148 @@
+"""
+Tests for the tiered ranking path in backend/utils/search.py: the shared
+query × group × cluster cache and the cheap per-user re-rank on top of it.
+Redis, DB and model calls are patched — nothing live is touched.
+"""
+
+from unittest.mock import patch
+import numpy as np
+
+import pytest
+
+import backend.utils.search as search
+
+
+def _row(pid, category="Audio", price=100.0, score=1.0):
+    return {
+        "product_id": pid,
+        "title": f"Item {pid}",
+        "description": "",
+        "price": price,
+        "category": category,
+        "rating": 4.0,
+        "popularity": 100.0,
+        "score": score,
+    }
+
+
+class TestTierCacheKey:
+    def test_has_no_user_component(self):
+        key = search._tier_cache_key("laptop", 0, "A")
+        assert key.startswith("search_tier:")
+        assert key.endswith(":A:0")
+
+    def test_none_cluster_uses_none_literal(self):
+        assert search._tier_cache_key("laptop", None, "B").endswith(":B:none")
+
+    def test_distinct_from_ranked_namespace(self):
+        tier = search._tier_cache_key("laptop", 0, "A")
+        ranked = search._ranked_cache_key("laptop", None, 0, "A")
+        assert tier != ranked
+
+
+class TestPersonalize:
+    def test_no_signals_returns_tier_unchanged(self):
+        tier = [_row(1, score=0.9), _row(2, score=0.5)]
+        assert search._personalize(tier, {}, {}, {}) is tier
+
+    def test_category_preference_adds_weighted_delta(self):
+        tier = [_row(1, category="Audio", score=0.5)]
+        profile = {"category_pref": {"Audio": 1.0}}
+        out = search._personalize(tier, profile, {}, {})
+        assert out[0]["score"] == pytest.approx(0.5 + search.PERSONAL_CATEGORY_WEIGHT, abs=1e-3)
+
+    def test_cluster_component_not_double_counted(self):
+        # Cluster already contributes 0.5 * 1.0 = 0.5; user pref 0.8 caps at 1.0,
+        # so the user delta is only the remaining 0.5.
+        tier = [_row(1, category="Audio", score=0.5)]
+        profile = {"category_pref": {"Audio": 0.8}}
+        out = search._personalize(tier, profile, {"Audio": 1.0}, {})
+        assert out[0]["score"] == pytest.approx(0.5 + search.PERSONAL_CATEGORY_WEIGHT * 0.5, abs=1e-3)
+
+    def test_recent_boost_is_multiplicative(self):
+        tier = [_row(1, score=0.5)]
+        out = search._personalize(tier, {}, {}, {1: 0.2})
+        assert out[0]["score"] == pytest.approx(0.6, abs=1e-3)
+
+    def test_rerank_changes_order(self):
+        tier = [_row(1, category="Gaming", score=0.60), _row(2, category="Audio", score=0.55)]
+        profile = {"category_pref": {"Audio": 1.0}}
+        out = search._personalize(tier, profile, {}, {})
+        assert [r["product_id"] for r in out] == [2, 1]
+
+    def test_does_not_mutate_cached_rows(self):
+        tier = [_row(1, score=0.5)]
+        search._personalize(tier, {}, {}, {1: 0.2})
+        assert tier[0]["score"] == 0.5
+
+
+class TestRankByModel:
+    def test_one_batched_model_call_matches_per_row_scores(self):
+        from ml.model import ModelState, predict_score, predict_scores
+
+        rows = [dict(_row(i, category=c, price=p), created_at="2024-01-01T00:00:00+00:00")
+                for i, (c, p) in enumerate([("Audio", 50.0), ("Gaming", 90.0), ("Audio", 10.0)], 1)]
+        profile = {"category_pref": {"Audio": 1.0}, "avg_price": 40.0}
+        with patch("ml.model._STATE", ModelState("test", None, None)), \
+             patch("ml.model.load_model", return_value=None), \
+             patch.object(search, "predict_scores", side_effect=predict_scores) as batch:
+            out = search._rank_by_model(rows, profile, {"Gaming": 1.0}, {3: 0.5})
+            expected = {}
+            for r in rows:
+                features = search.build_features(
+                    popularity=r["popularity"], rating=r["rating"],
+                    created_at=search.datetime.fromisoformat(r["created_at"]),
+                    category_score=min(1.0, profile["category_pref"].get(r["category"], 0)
+                                       + search.CLUSTER_BOOST_WEIGHT * (r["category"] == "Gaming")),
+                    price_affinity=search.user_price_affinity(profile, r["price"]),
+                )
+                expected[r["product_id"]] = predict_score(features) * (1.5 if r["product_id"] == 3 else 1.0)
+        batch.assert_called_once()
+        assert {r["product_id"]: r["score"] for r in out} == pytest.approx(
+            {pid: round(score, 3) for pid, score in expected.items()}, abs=1e-3)
+        assert search._rank_by_model([], profile, {}, {}) == []
+
+
+def _mget(*values):
+    """redis_mget_json stand-in: `values` for the leading keys, misses after."""
+    return lambda keys, **kw: (list(values) + [None] * len(keys))[:len(keys)]
+
+
+class TestSearchTiered:
+    def test_tier_hit_skips_scoring_for_every_user(self):
+        tier = [_row(1, score=0.9), _row(2, score=0.3)]
+        with patch.object(search, "SEARCH_TIERED_RANKING", True), \
+             patch.object(search, "redis_mget_json", side_effect=_mget(tier)), \
+             patch.object(search, "get_profiles", return_value={}), \
+             patch.object(search, "_load_recent_boost", return_value={}), \
+             patch.object(search, "predict_scores") as mock_predict, \
+             patch.object(search, "get_products_df") as mock_db:
+            r1 = search.search_products("headphones", "u1", cluster=0, ab_group="A")
+            r2 = search.search_products("headphones", "u2", cluster=0, ab_group="A")
+        mock_predict.assert_not_called()
+        mock_db.assert_not_called()
+        assert r1 == tier and r2 == tier
+
+    def test_tier_miss_scores_without_user_and_caches_shared_key(self):
+        candidates = [dict(_row(1), created_at="2024-01-01T00:00:00+00:00")]
+        setex_calls = []
+        with patch.object(search, "SEARCH_TIERED_RANKING", True), \
+             patch.object(search, "redis_mget_json", side_effect=_mget(None, candidates)), \
+             patch.object(search, "redis_msetex_entries", side_effect=setex_calls.extend), \
+             patch.object(search, "get_profiles", return_value={}), \
+             patch.object(search, "_load_recent_boost", return_value={}), \
+             patch.object(search, "predict_scores", side_effect=lambda X: np.full(len(X), 0.4)):
+            out = search.search_products("item", "u1", cluster=3, ab_group="A")
+        assert out[0]["score"] == pytest.approx(0.4)
+        assert search._tier_cache_key("item", 3, "A") in setex_calls
+
+    def test_group_b_ignores_user_signals(self):
+        tier = [_row(1, score=10.0), _row(2, score=5.0)]
+        with patch.object(search, "SEARCH_TIERED_RANKING", True), \
+             patch.object(search, "redis_mget_json", side_effect=_mget(tier)), \
+             patch.object(search, "_get_recent_boost") as mock_recent, \
+             patch.object(search, "_load_recent_boost") as mock_load:
+            out = search.search_products("x", "u1", cluster=None, ab_group="B", limit=1)
+        mock_recent.assert_not_called()
+        mock_load.assert_not_called()
+        assert out == tier[:1]
@@ -0,0 +1,109 @@
+"""
+Tests for the LSA + IVF semantic index (ml/semantic_index.py) and its
+reciprocal-rank-fusion merge with lexical candidates in backend/utils/search.py.
+"""
+
+from unittest.mock import patch
+
+import numpy as np
+import pandas as pd
+
+import ml.semantic_index as semantic
+import backend.utils.search as search
+
+
+def _products():
+    return pd.DataFrame({
+        "product_id": [10, 11, 12, 13, 14, 15],
+        "title": ["Wireless headphones", "Bluetooth earbuds", "Noise cancelling headphones",
+                  "Espresso machine", "Coffee grinder", "Gaming mouse"],
+        "description": ["over-ear wireless audio headphones", "wireless audio earbuds bluetooth",
+                        "audio headphones with noise cancelling", "coffee espresso maker",
+                        "burr grinder for coffee beans", "rgb gaming mouse"],
+        "category": ["Audio", "Audio", "Audio", "Kitchen", "Kitchen", "Gaming"],
+    })
+
+
+class TestSemanticIndex:
+    def test_lists_partition_every_item_once(self):
+        index = semantic.build_semantic_index(_products(), dimensions=4, n_lists=3)
+        offsets = index["list_offsets"]
+        assert offsets[0] == 0 and offsets[-1] == 6
+        assert sorted(index["item_ids"]) == [10, 11, 12, 13, 14, 15]
+        np.testing.assert_allclose(np.linalg.norm(index["vectors"], axis=1), 1.0, rtol=1e-5)
+
+    def test_full_probe_finds_topical_neighbours(self):
+        index = semantic.build_semantic_index(_products(), dimensions=4, n_lists=3)
+        hits = semantic.search_index(index, "coffee", top_k=2, nprobe=3)
+        assert {pid for pid, _ in hits} == {13, 14}
+        assert hits[0][1] >= hits[1][1]
+
+    def test_single_list_is_exact(self):
+        index = semantic.build_semantic_index(_products(), dimensions=4, n_lists=1)
+        hits = semantic.search_index(index, "headphones audio", top_k=3, nprobe=1)
+        assert {pid for pid, _ in hits} <= {10, 11, 12}
+
+    def test_unknown_terms_and_missing_index(self):
+        index = semantic.build_semantic_index(_products(), dimensions=4, n_lists=2)
+        assert semantic.search_index(index, "zzzz") == []
+        assert semantic.search_index(None, "coffee") == []
+
+    def test_min_score_filters(self):
+        index = semantic.build_semantic_index(_products(), dimensions=4, n_lists=1)
+        hits = semantic.search_index(index, "coffee", top_k=6, min_score=0.99)
+        assert all(score >= 0.99 for _, score in hits)
+
+    def test_roundtrip(self, tmp_path):
+        path = str(tmp_path / "sem")
+        index = semantic.build_semantic_index(_products(), dimensions=4, n_lists=2)
+        semantic.save_semantic_index(index, path)
+        loaded = semantic.load_semantic_index(path)
+        assert isinstance(loaded["vectors"], np.memmap)
+        assert semantic.search_index(loaded, "coffee", nprobe=2) == semantic.search_index(index, "coffee", nprobe=2)
+
+    def test_empty_catalog(self):
+        assert semantic.build_semantic_index(pd.DataFrame()) is None
+
+
+def _row(pid, title="x", category="Audio"):
+    return {
+        "product_id": pid, "title": title, "description": "", "price": 10.0,
+        "category": category, "rating": 4.0, "popularity": 1.0,
+        "created_at": "2024-01-01T00:00:00",
+    }
+
+
+class TestFuseSemantic:
+    def test_rrf_promotes_items_found_by_both(self):
+        lexical = [_row(1), _row(2), _row(3)]
+        with patch.object(search, "semantic_product_ids", return_value=[3, 1]), \
+             patch.object(search, "get_products_by_ids") as hydrate:
+            fused = search._fuse_semantic("q", lexical)
+        hydrate.assert_not_called()
+        assert [r["product_id"] for r in fused] == [1, 3, 2]
+        assert fused[0]["semantic"] and not fused[2].get("semantic")
+
+    def test_semantic_only_hits_are_hydrated_and_kept_by_filter(self):
+        import datetime
+        hydrated = {**_row(9, title="Earbuds"), "created_at": datetime.datetime(2024, 1, 1)}
+        with patch.object(search, "semantic_product_ids", return_value=[9]), \
+             patch.object(search, "get_products_by_ids", return_value=[hydrated]):
+            fused = search._fuse_semantic("headphones", [_row(1, title="Headphones")])
+        assert [r["product_id"] for r in fused] == [1, 9]
+        assert fused[1]["created_at"] == "2024-01-01T00:00:00"
+        kept = search._filter_candidates(fused, "headphones")
+        assert [r["product_id"] for r in kept] == [1, 9]
+
+    def test_no_semantic_hits_returns_lexical_unchanged(self):
+        lexical = [_row(1)]
+        with patch.object(search, "semantic_product_ids", return_value=[]):
+            assert search._fuse_semantic("q", lexical) is lexical
+
+    def test_mode_is_part_of_base_cache_key(self):
+        keys = []
+        with patch.object(search, "SEARCH_SEMANTIC", True), \
+             patch.object(search, "redis_get_json", side_effect=lambda k, **kw: keys.append(k)), \
+             patch.object(search, "get_products_df", return_value=pd.DataFrame()), \
+             patch.object(search, "semantic_product_ids", return_value=[]):
+            search._load_candidates("headphones")
+        assert keys[0].endswith(":none:semantic")
@@ -0,0 +1,147 @@
+"""
+Tests for the SQLite performance profile (backend/utils/sqlite_profile.py):
+pragmas, WAL and the single-writer queue.
+"""
+
+import threading
+import time
+from unittest.mock import patch
+
+import pytest
+from sqlalchemy import create_engine, text
+
+import backend.utils.request_timing as rt
+import backend.utils.sqlite_profile as sp
+
+
+@pytest.fixture
+def engine(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'db.sqlite'}", connect_args={"check_same_thread": False})
+    with patch.object(sp, "SQLITE_PERFORMANCE_PROFILE", True):
+        sp.apply_sqlite_profile(engine)
+    with engine.begin() as conn:
+        conn.execute(text("CREATE TABLE t (x INTEGER)"))
+    rt.reset_metrics()
+    yield engine
+    engine.dispose()
+
+
+class TestPragmas:
+    def test_wal_and_pragmas_applied(self, engine):
+        with engine.connect() as conn:
+            assert conn.execute(text("PRAGMA journal_mode")).scalar() == "wal"
+            assert conn.execute(text("PRAGMA synchronous")).scalar() == 1  # NORMAL
+            assert conn.execute(text("PRAGMA cache_size")).scalar() == sp.SQLITE_CACHE_SIZE
+            assert conn.execute(text("PRAGMA temp_store")).scalar() == 2  # MEMORY
+
+    def test_disabled_profile_leaves_engine_alone(self, tmp_path):
+        engine = create_engine(f"sqlite:///{tmp_path / 'plain.sqlite'}")
+        with patch.object(sp, "SQLITE_PERFORMANCE_PROFILE", False):
+            sp.apply_sqlite_profile(engine)
+        with engine.connect() as conn:
+            assert conn.execute(text("PRAGMA journal_mode")).scalar() == "delete"
+        engine.dispose()
+
+    def test_write_detection(self):
+        assert sp._is_write("  insert into t values (1)")
+        assert sp._is_write("UPDATE products SET popularity = 1")
+        assert not sp._is_write("SELECT * FROM t")
+        assert not sp._is_write("PRAGMA journal_mode")
+
+
+class TestWriterQueue:
+    def test_second_writer_waits_for_commit(self, engine):
+        first = engine.connect()
+        first.begin()
+        first.execute(text("INSERT INTO t VALUES (1)"))
+
+        done = threading.Event()
+
+        def second_writer():
+            with engine.begin() as conn:
+                conn.execute(text("INSERT INTO t VALUES (2)"))
+            done.set()
+
+        thread = threading.Thread(target=second_writer)
+        thread.start()
+        assert not done.wait(0.2)  # queued behind the open write transaction
+
+        # Readers are not blocked meanwhile
+        with engine.connect() as reader:
+            assert reader.execute(text("SELECT count(*) FROM t")).scalar() == 0
+
+        first.commit()
+        assert done.wait(5)
+        thread.join()
+        first.close()
+
+        with engine.connect() as conn:
+            assert conn.execute(text("SELECT count(*) FROM t")).scalar() == 2
+        series = sp.WRITER_WAIT.snapshot()[()]
+        assert series["count"] == 2 and series["sum"] >= 0.2
+
+    def test_released_on_rollback_and_checkin(self, engine):
+        conn = engine.connect()
+        conn.begin()
+        conn.execute(text("INSERT INTO t VALUES (1)"))
+        conn.rollback()
+        conn.execute(text("INSERT INTO t VALUES (2)"))
+        conn.close()  # returned to the pool mid-transaction
+
+        start = time.perf_counter()
+        with engine.begin() as other:
+            other.execute(text("INSERT INTO t VALUES (3)"))
+        assert time.perf_counter() - start < 1
+
+    def test_wait_is_bounded(self, engine):
+        holder = engine.connect()
+        holder.begin()
+        holder.execute(text("INSERT INTO t VALUES (1)"))
+        queue = sp._writer_queue
+        info = {}
+        with patch.object(sp, "SQLITE_WRITER_WAIT_SECONDS", 0.05):
+            # Another thread: the holder's own thread would re-enter
+            thread = threading.Thread(target=queue.acquire, args=(info,))
+            thread.start()
+            thread.join(5)
+        assert sp._HOLDS_WRITER not in info
+        holder.rollback()
+        holder.close()
+
+    def test_same_thread_second_connection_does_not_wait(self, engine, tmp_path):
+        # A second database file shares the process-wide queue
+        other = create_engine(f"sqlite:///{tmp_path / 'other.sqlite'}", connect_args={"check_same_thread": False})
+        with patch.object(sp, "SQLITE_PERFORMANCE_PROFILE", True):
+            sp.apply_sqlite_profile(other)
+        with other.begin() as conn:
+            conn.execute(text("CREATE TABLE t (x INTEGER)"))
+
+        first = engine.connect()
+        first.begin()
+        first.execute(text("INSERT INTO t VALUES (1)"))
+
+        start = time.perf_counter()
+        with patch.object(sp, "SQLITE_WRITER_WAIT_SECONDS", 2):
+            with other.begin() as second:
+                second.execute(text("INSERT INTO t VALUES (2)"))
+        assert time.perf_counter() - start < 1
+
+        # Still held for `first`: another thread's writer waits for its commit
+        done = threading.Event()
+
+        def writer():
+            with engine.begin() as conn:
+                conn.execute(text("INSERT INTO t VALUES (3)"))
+            done.set()
+
+        thread = threading.Thread(target=writer)
+        thread.start()
+        assert not done.wait(0.2)
+        first.commit()
+        assert done.wait(5)
+        thread.join()
+        first.close()
+        other.dispose()
+
+        # Fully released: a fresh writer goes straight through
+        assert sp._writer_queue._owner is None and sp._writer_queue._holders == 0
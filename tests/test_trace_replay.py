@@ -0,0 +1,107 @@
+"""
+Tests for trace export and replay: event -> op mapping, the trace file
+format, scheduling and the per-endpoint report.
+"""
+
+import threading
+from datetime import datetime, timedelta
+
+from unittest.mock import patch
+
+from sqlalchemy import create_engine, text
+
+from benchmarks.replay import QueryCounter, replay, request_for, schedule, summarize
+from benchmarks.trace import events_to_ops, read_trace, write_trace
+
+
+T0 = datetime(2025, 1, 1)
+
+
+def _at(seconds):
+    return T0 + timedelta(seconds=seconds)
+
+
+class TestEventsToOps:
+    def test_search_emitted_once_per_query_change(self):
+        ops = list(events_to_ops([
+            (_at(0), "u1", "laptop", 3, "click"),
+            (_at(1), "u1", "laptop", 4, "add_to_cart"),
+            (_at(2), "u1", "mouse", 9, "click"),
+            (_at(3), "u2", "laptop", 3, "click"),
+        ]))
+        assert [(o["op"], o["u"]) for o in ops] == [
+            ("search", "u1"), ("event", "u1"), ("cart", "u1"),
+            ("search", "u1"), ("event", "u1"),
+            ("search", "u2"), ("event", "u2"),
+        ]
+        assert [o["t"] for o in ops if o["op"] == "search"] == [0.0, 2.0, 3.0]
+
+    def test_cart_clear_and_unknown_events(self):
+        ops = list(events_to_ops([
+            (_at(0), "u1", None, None, "cart_cleared"),
+            (_at(5), "u1", "", None, "review"),
+        ]))
+        assert ops == [{"t": 0.0, "op": "cart_clear", "u": "u1"}]
+
+    def test_roundtrip_drops_empty_fields(self, tmp_path):
+        path = str(tmp_path / "trace.jsonl.gz")
+        ops = [{"t": 0.0, "op": "search", "u": "", "q": "laptop"}, {"t": 1.5, "op": "cart_clear", "u": "u1"}]
+        assert write_trace(path, ops) == 2
+        header, loaded = read_trace(path)
+        assert header["version"] == 1
+        assert loaded == [{"t": 0.0, "op": "search", "q": "laptop"}, ops[1]]
+
+
+class TestRequestMapping:
+    def test_anonymous_ops(self):
+        assert request_for({"op": "search", "q": "tv"})["params"] == {"q": "tv"}
+        assert request_for({"op": "event", "p": 3})["json"]["product_id"] == 3
+        assert request_for({"op": "cart", "p": 3}) is None
+        assert request_for({"op": "cart", "u": "u1", "p": 3})["path"] == "/api/cart/update"
+
+    def test_schedule(self):
+        ops = [{"t": 0.0}, {"t": 30.0}, {"t": 60.0}]
+        assert schedule(ops, speed=60, rate=None) == [0.0, 0.5, 1.0]
+        assert schedule(ops, speed=60, rate=10) == [0.0, 0.1, 0.2]
+
+
+class _FakeTarget:
+    def __init__(self, engine):
+        self.seen = []
+        self.engine = engine
+        self._lock = threading.Lock()
+
+    def send(self, req, headers):
+        with self.engine.connect() as conn:
+            conn.execute(text("SELECT 1"))
+        with self._lock:
+            self.seen.append((req["path"], headers))
+        return 500 if req["path"] == "/api/event" else 200
+
+
+class TestReplay:
+    def test_replay_reports_per_endpoint(self):
+        engine = create_engine("sqlite://")
+        counter = QueryCounter(engine)
+        target = _FakeTarget(engine)
+        ops = [
+            {"t": 0.0, "op": "search", "q": "tv"},
+            {"t": 0.0, "op": "search", "u": "u1", "q": "tv"},
+            {"t": 0.0, "op": "event", "u": "u1", "q": "tv", "p": 1},
+            {"t": 0.0, "op": "cart", "p": 1},
+        ]
+        with patch("benchmarks.replay._TokenCache.headers",
+                   lambda self, user: {"Authorization": f"Bearer {user}"} if user else {}):
+            run = replay(ops, target, concurrency=2, speed=1, rate=1000, query_counter=counter)
+        with engine.connect() as conn:
+            conn.execute(text("SELECT 1"))
+
+        report = summarize(run, counter.counts)
+        assert report["requests"] == 3
+        assert report["skipped"] == {"cart": 1}
+        assert report["endpoints"]["/api/search"]["requests"] == 2
+        assert report["endpoints"]["/api/search"]["db_queries_per_request"] == 1.0
+        assert report["endpoints"]["/api/event"]["errors"] == 1
+        assert report["endpoints"]["/api/search"]["histogram"]["cumulative"][-1] == 2
+        assert report["db_queries_background"] == 1
+        assert ("/api/search", {"Authorization": "Bearer u1"}) in target.seen
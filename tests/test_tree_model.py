@@ -0,0 +1,99 @@
+"""
+Tests for the flat-array tree export and NumPy evaluator (ml/tree_model.py):
+parity with LightGBM and its use from ml/model.py.
+"""
+
+from unittest.mock import patch
+
+import numpy as np
+import pytest
+from lightgbm import LGBMRanker
+
+import ml.model as model_module
+import ml.tree_model as tree_model
+
+
+@pytest.fixture(scope="module")
+def ranker():
+    rng = np.random.default_rng(0)
+    X = rng.random((600, 5)).astype(np.float32)
+    y = np.clip(np.round(2 * X[:, 0] + X[:, 3] + 0.3 * rng.random(600)), 0, 3).astype(int)
+    return LGBMRanker(n_estimators=30, random_state=42, verbose=-1).fit(X, y, group=[20] * 30)
+
+
+def _rows(n=200, seed=1):
+    X = np.random.default_rng(seed).random((n, 5)).astype(np.float32)
+    X[::5, 2] = 0.0  # exact zeros exercise the missing_type == Zero branch
+    return X
+
+
+class TestParity:
+    def test_batch_matches_lightgbm(self, ranker):
+        trees = tree_model.export_trees(ranker.booster_)
+        X = _rows()
+        np.testing.assert_allclose(tree_model.predict_trees(trees, X), ranker.predict(X), atol=1e-9)
+
+    def test_single_row(self, ranker):
+        trees = tree_model.export_trees(ranker.booster_)
+        x = _rows(1)[0]
+        assert tree_model.predict_trees(trees, x)[0] == pytest.approx(ranker.predict(x[None, :])[0], abs=1e-9)
+
+    def test_nan_follows_lightgbm_default_direction(self, ranker):
+        trees = tree_model.export_trees(ranker.booster_)
+        X = _rows(20).astype(np.float64)
+        X[:, 0] = np.nan
+        np.testing.assert_allclose(tree_model.predict_trees(trees, X), ranker.predict(X), atol=1e-9)
+
+    def test_bitvector_and_traversal_agree(self, ranker):
+        trees = tree_model.export_trees(ranker.booster_)
+        assert trees["params"][3] == 1
+        X = _rows()
+        np.testing.assert_allclose(
+            tree_model._predict_bitvectors(trees, X),
+            tree_model._predict_traversal(trees, X),
+            atol=1e-9,
+        )
+
+    def test_wide_trees_use_traversal(self):
+        rng = np.random.default_rng(2)
+        X = rng.random((2000, 5)).astype(np.float32)
+        y = np.clip(np.round(3 * X[:, 0] + rng.random(2000)), 0, 3).astype(int)
+        wide = LGBMRanker(n_estimators=5, num_leaves=100, min_child_samples=2, random_state=42, verbose=-1)
+        wide.fit(X, y, group=[100] * 20)
+        trees = tree_model.export_trees(wide.booster_)
+        assert trees["params"][3] == 0
+        np.testing.assert_allclose(tree_model.predict_trees(trees, _rows()), wide.predict(_rows()), atol=1e-9)
+
+    def test_roundtrip_through_disk(self, ranker, tmp_path):
+        path = str(tmp_path / "trees")
+        assert tree_model.export_model_trees(ranker, path)
+        loaded = tree_model.load_trees(path)
+        X = _rows(50)
+        np.testing.assert_allclose(tree_model.predict_trees(loaded, X), ranker.predict(X), atol=1e-9)
+
+
+class TestExportFailure:
+    def test_failed_export_removes_stale_arrays(self, ranker, tmp_path):
+        path = str(tmp_path / "trees")
+        tree_model.export_model_trees(ranker, path)
+        with patch.object(tree_model, "export_trees", side_effect=ValueError("categorical")):
+            assert not tree_model.export_model_trees(ranker, path)
+        assert tree_model.load_trees(path) is None
+
+
+class TestModelUsesTrees:
+    def test_predict_score_prefers_trees(self, ranker):
+        trees = tree_model.export_trees(ranker.booster_)
+        x = _rows(1)[0]
+        with patch.object(model_module, "_STATE", model_module.ModelState("v1", None, trees)), \
+             patch.object(model_module, "load_model") as load_model:
+            score = model_module.predict_score(x)
+            batch = model_module.predict_scores(_rows(10))
+        load_model.assert_not_called()
+        assert score == pytest.approx(ranker.predict(x[None, :])[0], abs=1e-9)
+        np.testing.assert_allclose(batch, ranker.predict(_rows(10)), atol=1e-9)
+
+    def test_falls_back_to_lightgbm_without_export(self, ranker):
+        x = _rows(1)[0]
+        with patch.object(model_module, "_STATE", model_module.ModelState("v1", ranker, None)):
+            assert model_module.predict_score(x) == pytest.approx(ranker.predict(x[None, :])[0])